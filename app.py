@@ -4,6 +4,12 @@ import json
 import subprocess
 from glob import glob
 from tqdm import tqdm
+from log_utils import configure_logging, get_logger
+from rule_engine import RuleSet, compute_intensity_bonus, get_rule_set, load_lexicon
+
+# DEBUG ปิดโดยค่าเริ่มต้น เปิดด้วย THAI_SENTIMENT_LOG=scoring=DEBUG หรือ --log
+scoring_log = get_logger("scoring")
+comments_log = get_logger("comments")
 # เปลี่ยนจาก ml_sentiment_analysis เป็น sentiment_integration สำหรับระบบใหม่
 try:
     from sentiment_integration import analyze_detailed_sentiment
@@ -18,7 +24,7 @@ except ImportError:
 def calculate_emotion_scores(text):
     """Wrapper function that only takes text and extracts tokens and emojis automatically"""
     if not text:
-        print('[DEBUG] calculate_emotion_scores: input is empty')
+        scoring_log.debug('calculate_emotion_scores: input is empty')
         return {}
     
     # Extract tokens and emojis
@@ -52,29 +58,20 @@ def calculate_emotion_scores(text):
         scores['เกลียด'] = 0.0
         scores['โกรธ'] = 0.0
 
+    # สแกนคำสำคัญของทุกอารมณ์และคำบอกความเข้มข้นในรอบเดียว
+    rules = get_app_rule_set()
+    hits = rules.scan(text)
+    regex_counts = rules.regex["emotion"].count(text)
+
     matched_any = False
     for emotion, config in EMOTION_PATTERNS.items():
-        score = 0.0
-        # Determine keywords, regex patterns, and emojis list
-        if isinstance(config, list):
-            keywords = config
-            patterns_list = []
-            emojis_list = []
-        else:
-            keywords = config.get("keywords", [])
-            patterns_list = config.get("patterns", [])
-            emojis_list = config.get("emojis", [])
-        # คะแนนจากคำสำคัญ (keywords)
-        for keyword in keywords:
-            if keyword in text:
-                score += 1.0
-                matched_any = True
-        # คะแนนจาก patterns (regex)
-        for pattern in patterns_list:
-            matches = re.findall(pattern, text)
-            if matches:
-                matched_any = True
-            score += len(matches) * 1.5
+        _, _, emojis_list = _emotion_config(config)
+        keyword_count = hits["emotion"].get(emotion, 0)
+        pattern_count = regex_counts.get(emotion, 0)
+        # คะแนนจากคำสำคัญ (keywords) และ patterns (regex)
+        score = float(keyword_count) + pattern_count * 1.5
+        if keyword_count or pattern_count:
+            matched_any = True
         # คะแนนจาก emojis
         for e in found_emojis:
             if e in emojis_list:
@@ -98,7 +95,7 @@ def calculate_emotion_scores(text):
         scores["รำคาญ"] = scores.get("รำคาญ", 0) + 8.0
 
     # ปรับคะแนนตามความเข้มข้น
-    intensity_bonus = calculate_intensity_bonus(text)
+    intensity_bonus = compute_intensity_bonus(hits["intensity"], INTENSITY_PATTERNS)
     for emotion in scores:
         scores[emotion] *= (1 + intensity_bonus)
         # จำกัดคะแนนสูงสุดเพื่อความเสถียร
@@ -109,18 +106,17 @@ def calculate_emotion_scores(text):
         scores["อื่นๆ"] = 1.0
     
     # Debug: log the final scores
-    print(f"[DEBUG] calculate_emotion_scores: final scores for '{text}': {scores}")
+    scoring_log.debug("calculate_emotion_scores: final scores for '%s': %s", text, scores)
     
     if not isinstance(scores, dict):
-        print(f"[WARN] calculate_emotion_scores returning {type(scores)}: {scores}")
+        scoring_log.warning("calculate_emotion_scores returning %s: %s", type(scores), scores)
     return scores
 
+# คำศัพท์ของ scorer นี้อยู่ใน lexicons/app_emotions.json
+APP_LEXICON = load_lexicon("app_emotions")
+
 # Define intensity patterns for calculate_intensity_bonus
-INTENSITY_PATTERNS = {
-    "high": ["มากๆ", "สุดๆ", "โคตร", "จริงๆ", "หนัก"],
-    "medium": ["ค่อนข้าง", "พอสมควร", "เยอะ"],
-    "low": ["นิดหน่อย", "เล็กน้อย", "นิดๆ"]
-}
+INTENSITY_PATTERNS = APP_LEXICON["intensity_patterns"]
 
 
 # Try to import legacy sentiment function (if needed)
@@ -139,6 +135,9 @@ import hashlib
 import re
 import emoji
 import tempfile
+from regex_bank import RegexBank
+from result_cache import get_result_cache
+from sarcasm_engine import detect_sarcasm
 
 def extract_emojis(text):
     """Extracts emojis from a text string."""
@@ -179,159 +178,38 @@ for group, labels in EMOTION_GROUPS.items():
 
 # === EMOTION PATTERNS ===
 # เพิ่ม emoji และสัญลักษณ์ยอดนิยมสำหรับ "รัก" และ "ขำขัน" และรองรับ <3, 🩵, ❤️, ❤, 😂, 🤣, 😅, 😁, 😆, 😄, 😃, 😸, 😹, 555, ฮ่า, ฮ่าๆ, ฮ่าๆๆ, ฮ่าๆๆๆ, ฮ่าๆๆๆๆ, ฮ่าๆๆๆๆๆ, ฮ่าๆๆๆๆๆๆ
-EMOTION_PATTERNS = {
-    # POSITIVE EMOTIONS
-    'ดีใจ': [
-        'ดีใจ', 'ดีใจจัง', 'ดีใจมาก', 'ดีใจสุดๆ', 'ดีใจเวอร์', 'ปลาบปลื้ม', 'ปลื้มใจ', 'ปิติ', 'ยินดี', 'ปรีดา', 'เปรมปรีดิ์', 'ชื่นใจ', 'ชื่นชม', 'สมหวัง', 'สมปรารถนา', 'สมใจ', 'ถูกใจ', 'พอใจ', 'สุดยอด', 'ยอดเยี่ยม', 'เลิศ', 'เริ่ด', 'ประเสริฐ', 'วิเศษ', 'แจ๋ว', 'เจ๋ง', 'เด็ด', 'เด็ดดวง', 'เป็นต่อ', 'ดีงาม', 'ดีเลิศ', 'ดีต่อใจ', 'ฟิน', 'ฟินเวอร์', 'ฟินนาเล่', 'แฮปปี้', 'มีความสุข', 'สุขใจ', 'สุขสันต์', 'หรรษา', 'บันเทิง', 'รื่นเริง', 'สำราญ', 'เบิกบาน', 'เกษมสันต์', 'อิ่มเอมใจ', 'อิ่มอกอิ่มใจ', 'ปลื้มปริ่ม', 'ยิ้มแก้มปริ', 'ยิ้มไม่หุบ', 'หัวเราะร่า', 'perfect', 'excellent', 'great', 'amazing', 'wonderful', 'fantastic', 'happy', 'joyful', 'delighted', 'pleased'
-    ],
-    'รัก': [
-        'รัก', 'เลิฟ', 'เลิฟๆ', 'รักเลย', 'รักที่สุด', 'รักมาก', 'หลงรัก', 'คลั่งรัก', 'ชอบ', 'ชอบมาก', 'ชอบที่สุด', 'โปรดปราน', 'ถูกใจ', 'โดนใจ', 'หลงใหล', 'คลั่งไคล้', 'ปลื้ม', 'ชื่นชอบ', 'เอ็นดู', 'เมตตา', 'กรุณา', 'ปรานี', 'เสน่หา', 'พิศวาส', 'คิดถึง', 'ห่วงใย', 'อาทร', 'อบอุ่น', 'ซาบซึ้ง', 'ประทับใจ', 'ตรึงใจ', 'ติดใจ', 'love', 'adore', 'like', 'fond of', 'crush',
-        # Emoji & symbols for love
-        '❤', '❤️', '🩵', '💙', '💚', '💛', '💜', '💗', '💖', '💓', '💞', '💕', '💘', '💝', '💟', '❣️', '♥️', '<3', '🤍', '💌', '🌹', '🌻', '🌷', '😘', '😍', '🥰', '😻', '😚', '😙', '😽'
-    ],
-    'ขำขัน': [
-        'ขำ', 'ขำๆ', 'ขำขัน', 'ขำกลิ้ง', 'ขำหนักมาก', 'ขำไม่ไหว', 'ขำท้องแข็ง', 'ขำจนปวดท้อง', 'ขำน้ำตาไหล', 'ฮา', 'ฮาๆ', 'ฮากระจาย', 'ฮาแตก', 'ตลก', 'ตลกมาก', 'โบ๊ะบ๊ะ', 'จี้', 'โคตรฮา', 'อย่างฮา', 'อย่างปั่น', 'ปั่นจัด', '555', 'lol', 'lmao', 'rofl', 'funny', 'hilarious', 'laugh',
-        # Emoji & symbols for humor/laughter
-        '😂', '🤣', '😅', '😁', '😆', '😄', '😃', '😸', '😹',
-        # Thai laughter variants
-        'ฮ่า', 'ฮ่าๆ', 'ฮ่าๆๆ', 'ฮ่าๆๆๆ', 'ฮ่าๆๆๆๆ', 'ฮ่าๆๆๆๆๆ', 'ฮ่าๆๆๆๆๆๆ'
-    ],
-    'ซึ้งใจ': [
-        'ซึ้ง', 'ซึ้งใจ', 'ซึ้งมาก', 'น้ำตาซึม', 'น้ำตาจะไหล', 'ตื้นตัน', 'ตื้นตันใจ', 'ประทับใจ', 'กินใจ', 'สุดซึ้ง', 'ขอบคุณ', 'ขอบใจ', 'ขอบคุณมาก', 'ขอบคุณจริงๆ', 'ขอบคุณจากใจ', 'ซาบซึ้ง', 'ทราบซึ้ง', 'เป็นพระคุณ', 'touched', 'grateful', 'thankful', 'appreciate'
-    ],
-    'ให้กำลังใจ': [
-        'สู้ๆ', 'สู้ต่อไป', 'อย่ายอมแพ้', 'เอาใจช่วย', 'เชียร์', 'เป็นกำลังใจให้', 'เข้มแข็งนะ', 'เดี๋ยวมันก็ผ่านไป', 'cheer up', 'keep fighting', "don't give up", 'you can do it'
-    ],
-    'อยากรู้อยากเห็น': [
-        'อยากรู้', 'อยากเห็น', 'สงสัย', 'ใคร่รู้', 'อยากลอง', 'น่าสนใจ', 'น่าติดตาม', 'curious', 'interested'
-    ],
-    'คาดหวัง': [
-        'คาดหวัง', 'หวังว่า', 'หวัง', 'ตั้งตารอ', 'รอคอย', 'เฝ้ารอ', 'ลุ้น', 'อยากให้', 'hope', 'expect', 'look forward to', 'wish'
-    ],
-    'พอใจ': [
-        'พอใจ', 'โอเค', 'รับทราบ', 'ได้', 'ตามนั้น', 'ไม่ติด', 'ok', 'alright', 'satisfied'
-    ],
-    'สบายใจ': [
-        'สบายใจ', 'โล่งใจ', 'หายห่วง', 'หมดกังวล', 'ผ่อนคลาย', 'โล่งอก', 'relieved', 'at ease', 'relaxed'
-    ],
-
-    # NEGATIVE EMOTIONS
-    'โกรธ': [
-        'โกรธ', 'โมโห', 'ฉุน', 'เคือง', 'ขุ่นเคือง', 'เดือด', 'ปรี๊ด', 'ขึ้น', 'หัวร้อน', 'หัวเสีย', 'หงุดหงิด', 'ฉุนเฉียว', 'เกรี้ยวกราด', 'กราดเกรี้ยว', 'พิโรธ', 'ขัดใจ', 'ไม่พอใจ', 'ไม่สบอารมณ์', 'มีน้ำโห', 'เลือดขึ้นหน้า', 'ฟิวส์ขาด', 'เดือดดาล', 'พลุ่งพล่าน', 'โกรธจัด', 'โกรธเป็นฟืนเป็นไฟ', 'angry', 'mad', 'furious', 'irate', 'enraged', 'pissed off'
-    ],
-    'ไม่พอใจ': [
-        'ไม่พอใจ', 'ไม่ชอบ', 'ไม่ปลื้ม', 'ไม่โอเค', 'ขัดใจ', 'ไม่ได้ดั่งใจ', 'ผิดหวัง', 'เซ็ง', 'เซ็งเป็ด', 'น่าเบื่อ', 'น่ารำคาญ', 'หงุดหงิด', 'ขัดหูขัดตา', 'เกะกะ', 'แย่', 'ห่วย', 'ห่วยแตก', 'ไม่ได้เรื่อง', 'ไม่เอาไหน', 'ตกต่ำ', 'ล้มเหลว', 'หมดศรัทธา', 'เสื่อม', 'ล่มสลาย', 'พัง', 'เจ๊ง', 'ฉิบหาย', 'บรรลัย', 'วายป่วง', 'bad', 'terrible', 'awful', 'horrible', 'sucks', 'disappointed', 'annoyed', 'irritated', 'not happy', 'dissatisfied'
-    ],
-    'เกลียด': [
-        'เกลียด', 'ชัง', 'เกลียดชัง', 'ขยะแขยง', 'น่ารังเกียจ', 'อี๋', 'แหวะ', 'พะอืดพะอม', 'เกลียดเข้าไส้', 'เกลียดตัวกินไข่', 'hate', 'despise', 'detest', 'loathe', 'disgust'
-    ],
-    'เศร้า': [
-        'เศร้า', 'เสียใจ', 'เศร้าใจ', 'เศร้าสร้อย', 'หดหู่', 'ซึม', 'ซึมเศร้า', 'เหงา', 'ว้าเหว่', 'เปล่าเปลี่ยว', 'เดียวดาย', 'อ้างว้าง', 'หม่นหมอง', 'หมองเศร้า', 'ระทม', 'ทุกข์ใจ', 'ตรอมใจ', 'ช้ำใจ', 'สลด', 'สลดใจ', 'ห่อเหี่ยว', 'ใจสลาย', 'อกหัก', 'ดิ่ง', 'นอยด์', 'น้ำตาตกใน', 'sad', 'unhappy', 'sorrowful', 'heartbroken', 'depressed', 'lonely'
-    ],
-    'กลัว': [
-        'กลัว', 'หวาดกลัว', 'หวาดผวา', 'ผวา', 'ขวัญเสีย', 'ขวัญหนีดีฝ่อ', 'ใจหาย', 'ใจคว่ำ', 'อกสั่นขวัญแขวน', 'ขนลุก', 'ขนพองสยองเกล้า', 'เสียวไส้', 'สยอง', 'สยดสยอง', 'น่ากลัว', 'fear', 'scared', 'afraid', 'terrified', 'horrified'
-    ],
-    'ประหลาดใจ': [
-        'ประหลาดใจ', 'แปลกใจ', 'งง', 'งงงวย', 'สับสน', 'มึน', 'อึ้ง', 'ทึ่ง', 'ตะลึง', 'เหวอ', 'เอ๋อ', 'เซอร์ไพรส์', 'คาดไม่ถึง', 'ไม่น่าเชื่อ', 'ตกใจ', 'สะดุ้ง', 'ว้าว', 'เฮ้ย', 'หา', 'ห้ะ', 'อะไรนะ', 'จริงดิ', 'surprised', 'amazed', 'astonished', 'shocked', 'confused', 'wow'
-    ],
-    'รำคาญ': [
-        'รำคาญ', 'น่ารำคาญ', 'น่าเบื่อ', 'เอือม', 'เอือมระอา', 'เซ็ง', 'annoying', 'bothersome', 'tiresome'
-    ],
-    'ประชด': [
-        'ประชด', 'ประชดประชัน', 'แดกดัน', 'กระทบกระเทียบ', 'เหน็บแนม', 'แขวะ', 'แซะ', 'จิกกัด', 'พูดกระทบ', 'พูดแดก', 'ดีออก', 'จ้าาา', 'พ่อคุณ', 'เยี่ยมจริงๆ', 'sarcastic', 'ironic'
-    ],
-    'เสียดสี': [
-        'เสียดสี', 'เย้ยหยัน', 'ถากถาง', 'ดูถูก', 'ดูแคลน', 'เหยียดหยาม', 'สบประมาท', 'เยาะเย้ย', 'mock', 'scorn', 'disdain'
-    ],
-}
+EMOTION_PATTERNS = APP_LEXICON["emotion_patterns"]
 
-def analyze_sarcasm(text):
-    text_lower = text.lower()
-    # Patterns for sarcasm/irony detection (Thai & English)
-    sarcasm_patterns = [
-        # Thai Sarcasm
-        r'ดีออก', r'จ้าาา', r'พ่อคุณ', r'แม่คุณ', r'ตัวดีเลย',
-        r'(เยี่ยม|ดี|เลิศ|ประเสริฐ|สุดยอด)จริงๆ(\\s*เนอะ)?',
-        r'(ดี|เก่ง)ตายห่า',
-        r'ภูมิใจในตัว.*จริงๆ',
-        r'ขอบคุณสำหรับความ(พยายาม|หวังดี)',
-        r'(สวย|หล่อ)เลือกได้',
-        r'(ดี|เก่ง)จนไม่รู้จะพูดยังไง',
-        r'.*ซะไม่มี',
-        r'ทำดีแล้วครับ.* สำหรับ',
-        r'บริการระดับห้าดาว.* ในโลกคู่ขนาน',
-        r'อนาคตสดใสแน่นอน.* ถ้า',
-        r'เสียงเพราะมาก.* จนอยากปิดหู',
-        r'เขียนดีนะ.* ถ้าไม่นับว่า',
-        r'ฉลาดเป็นกรด.* แต่',
-        
-        # Specific patterns for failing cases
-        r'ขอบคุณ.*ที่.*แย่',  # ขอบคุณนะคะที่ทำให้วันนี้เป็นวันที่แย่ที่สุดในชีวิต
-        r'(งาน|สิ่ง)นี้สุดยอด.*ถ้า.*ล้มเหลว',  # งานนี้สุดยอดครับ... ถ้าชอบความล้มเหลว
-        r'ขอบคุณ.*ที่ทำให้.*แย่',  # Thank you for making it worse
-        
-        # Rhetorical Questions (as sarcasm)
-        r'ทำกันได้ลงคอ(เนอะ)?',
-        r'ใครจะไปทน',
-
-        # English Sarcasm
-        r"'(amazing|great|fantastic|wonderful|perfect)'", # Positive words in quotes
-        r'just what i needed',
-        r'so fun',
-        r'(i love|i enjoy) it when',
-        r'oh, great',
-        r'another meeting',
-        r'(clear|smooth) as mud',
-        r"that's just perfect"
-    ]
-    
-    is_sarcastic = False
-    reason = ""
 
-    for pattern in sarcasm_patterns:
-        if re.search(pattern, text_lower):
-            is_sarcastic = True
-            reason = f"Matched sarcasm pattern: '{pattern}'"
-            break
+def _emotion_config(config):
+    """คืน (keywords, patterns, emojis) ของอารมณ์ รองรับทั้งแบบ list และ dict"""
+    if isinstance(config, list):
+        return config, [], []
+    return config.get("keywords", []), config.get("patterns", []), config.get("emojis", [])
 
-    # Check for positive sentiment followed by a negative context (more robust)
-    # Structure: [Positive Keywords] ... [Conjunctions/Prepositions] ... [Negative Keywords/Context]
-    positive_negative_structure = [
-        # Thai Structures
-        r'(ดี|สวย|อร่อย|ชอบ|สุดยอด|เยี่ยม|ดีใจ|เก่ง|พัฒนาการที่ดี|เป็นความคิดที่ดี|ชุดนี้สวย|เสียงเพราะ|เขียนดีนะ|ฉลาดเป็นกรด|ประทับใจ)\s*.*(แต่|ถ้า|สำหรับ|จน|ในความ|ที่เป็นต้นเหตุ|ไม่นับว่า|กว่าจะ|กว่าที่)\s*.*(แย่|ห่วย|ล้มเหลว|ต่ำ|ปัญหา|ไม่พัฒนา|ไม่อยากเจอ|ปิดหู|ไม่รู้เรื่อง|กัดกร่อน|ไร้ความสามารถ)',
-        # More specific patterns for failing cases
-        r'(ขอบคุณ|ขอบใจ).*(ที่|นะ).*(แย่|เลว|ล้มเหลว)',  # Thank you for making it worse
-        r'(สุดยอด|เยี่ยม|ดี).*(ถ้า|สำหรับ).*(ชอบ|คน).*(ล้มเหลว|แย่)',  # Great if you like failure
-        # English Structures
-        r'(amazing|great|fantastic|wonderful|perfect|love|fun|nice)\s*.*(waited|breaks|lost|for no reason|another meeting)'
-    ]
 
-    if not is_sarcastic:
-        for pattern in positive_negative_structure:
-            if re.search(pattern, text_lower):
-                is_sarcastic = True
-                reason = f"Matched positive-negative structure: '{pattern}'"
-                break
+def _build_app_rule_set():
+    """คอมไพล์ EMOTION_PATTERNS และ INTENSITY_PATTERNS เป็น RuleSet"""
+    keywords, patterns = {}, {}
+    for emotion, config in EMOTION_PATTERNS.items():
+        keywords[emotion], patterns[emotion], _ = _emotion_config(config)
+    return RuleSet(
+        "app_emotions",
+        keyword_families={"emotion": keywords, "intensity": INTENSITY_PATTERNS},
+        regex_families={"emotion": patterns}
+    )
+
+
+def get_app_rule_set():
+    """RuleSet ของ app (คอมไพล์ครั้งแรกที่เรียก แล้วใช้ร่วมกันทั้ง process)"""
+    return get_rule_set("app_emotions", _build_app_rule_set)
+
+def analyze_sarcasm(text):
+    """ตรวจจับ sarcasm/irony ด้วย SarcasmEngine (เวลาเชิงเส้น + time budget ต่อข้อความ)
 
-    # Additional check for ellipsis/dots with contrasting sentiment
-    if not is_sarcastic and '...' in text:
-        # Look for positive words before ... and negative words after
-        parts = text.split('...')
-        if len(parts) >= 2:
-            first_part = parts[0].lower()
-            second_part = parts[1].lower()
-            
-            positive_words = ['ขอบคุณ', 'สุดยอด', 'เยี่ยม', 'ดี', 'เก่ง', 'สวย', 'เพราะ']
-            negative_words = ['แย่', 'ล้มเหลว', 'ถ้าชอบ', 'สำหรับคน', 'ที่ไม่', 'ไม่รู้เรื่อง']
-            
-            has_positive_start = any(word in first_part for word in positive_words)
-            has_negative_end = any(word in second_part for word in negative_words)
-            
-            if has_positive_start and has_negative_end:
-                is_sarcastic = True
-                reason = "Positive-negative contrast with ellipsis"
-
-    return {'is_sarcastic': is_sarcastic, 'reason': reason}
+    รายการ pattern อยู่ใน sarcasm_engine.SARCASM_PATTERNS และ POSITIVE_NEGATIVE_STRUCTURES
+    """
+    return detect_sarcasm(text)
 
 def get_context(text):
     """กำหนดบริบทการใช้ภาษาแบบครอบคลุม"""
@@ -491,19 +369,7 @@ def get_context(text):
 
 def calculate_intensity_bonus(text):
     """คำนวณ bonus จากความเข้มข้นของการแสดงออก"""
-    bonus = 0.0
-    
-    for intensity, words in INTENSITY_PATTERNS.items():
-        for word in words:
-            if word in text:
-                if intensity == "high":
-                    bonus += 0.5
-                elif intensity == "medium":
-                    bonus += 0.2
-                elif intensity == "low":
-                    bonus += 0.1
-    
-    return min(bonus, 1.0)  # จำกัด bonus สูงสุด
+    return compute_intensity_bonus(get_app_rule_set().scan(text)["intensity"], INTENSITY_PATTERNS)
 
 def normalize_scores(scores):
     """normalize คะแนนให้อยู่ในช่วง 0-1"""
@@ -597,27 +463,38 @@ def determine_context(text):
 def analyze_sentiment_builtin(text, mode='single', threshold=0.3):
     """วิเคราะห์ sentiment แบบ built-in (ไม่ต้องพึ่งพาไฟล์อื่น) - always returns a dict"""
     try:
-        print(f"[DEBUG] analyze_sentiment_builtin called with text: {text}")
+        scoring_log.debug("analyze_sentiment_builtin called with text: %s", text)
         if not text or not text.strip():
-            print("[DEBUG] Empty input, returning neutral")
+            scoring_log.debug("Empty input, returning neutral")
             return {"sentiment": "neutral", "confidence": 0.0, "sentiment_score": 0.0,
                     "detailed_emotion": "เฉย ๆ", "emotion_group": "Neutral",
                     "context": {"primary_context": "neutral"}, "model_type": "builtin_pattern_matching"}
 
+        # ผลของข้อความเดียวกันในโหมด/threshold เดียวกันเหมือนเดิมเสมอ (threshold ใช้เฉพาะ multi)
+        cache = get_result_cache()
+        cache_key = cache.make_key(
+            "app.analyze_sentiment_builtin", text, mode=mode,
+            threshold=None if mode == 'single' else threshold,
+            version=get_app_rule_set().version
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # Calculate raw scores
         try:
             raw_scores = calculate_emotion_scores(text)
         except Exception as e:
-            print(f"[ERROR] calculate_emotion_scores error: {e}")
+            scoring_log.error("calculate_emotion_scores error: %s", e)
             raw_scores = {}
 
         if not isinstance(raw_scores, dict):
-            print(f"[WARN] calculate_emotion_scores returned non-dict: {type(raw_scores)} {raw_scores}")
+            scoring_log.warning("calculate_emotion_scores returned non-dict: %s %s", type(raw_scores), raw_scores)
             raw_scores = {}
 
         # Normalize
         normalized_scores = normalize_scores(raw_scores)
-        print(f"[DEBUG] normalized_scores: {normalized_scores}")
+        scoring_log.debug("normalized_scores: %s", normalized_scores)
 
         # Context analysis
         context_data = determine_context(text)
@@ -708,11 +585,12 @@ def analyze_sentiment_builtin(text, mode='single', threshold=0.3):
                 "scores": {k: round(v, 3) for k, v in normalized_scores.items()},
                 "model_type": "builtin_pattern_matching"
             }
-        print(f"[DEBUG] analyze_sentiment_builtin result: {result}")
+        scoring_log.debug("analyze_sentiment_builtin result: %s", result)
+        cache.put(cache_key, result)
         return result
 
     except Exception as e:
-        print(f"[EXCEPTION] in analyze_sentiment_builtin: {e}")
+        scoring_log.error("in analyze_sentiment_builtin: %s", e)
         return {"sentiment": "neutral", "confidence": 0.0, "sentiment_score": 0.0,
                 "detailed_emotion": "เฉย ๆ", "emotion_group": "Neutral",
                 "context": {}, "model_type": "builtin_pattern_matching"}
@@ -746,34 +624,34 @@ def fetch_youtube_comments(video_id, limit=20):
         last_error = None
         for cmd in commands:
             try:
-                print(f"[INFO] Running: {' '.join(cmd)}")
+                comments_log.info("Running: %s", ' '.join(cmd))
                 result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-                print(f"[INFO] yt-dlp output: {result.stdout.strip()}")
+                comments_log.info("yt-dlp output: %s", result.stdout.strip())
                 break
             except subprocess.CalledProcessError as e:
-                print(f"[ERROR] yt-dlp failed with command: {' '.join(cmd)}")
-                print(f"[ERROR] yt-dlp stderr: {e.stderr.strip()}")
+                comments_log.error("yt-dlp failed with command: %s", ' '.join(cmd))
+                comments_log.error("yt-dlp stderr: %s", e.stderr.strip())
                 last_error = e
             except FileNotFoundError as e:
-                print(f"[ERROR] yt-dlp not found for command: {' '.join(cmd)}")
+                comments_log.error("yt-dlp not found for command: %s", ' '.join(cmd))
                 last_error = e
         # Find .info.json file (yt-dlp now puts comments inside .info.json)
         info_files = [f for f in os.listdir(tmpdir) if f.endswith(".info.json") and video_id in f]
         if not info_files:
-            print(f"[ERROR] No .info.json file found for video_id={video_id} after yt-dlp. Last error: {last_error}")
+            comments_log.error("No .info.json file found for video_id=%s after yt-dlp. Last error: %s", video_id, last_error)
             return []
         info_path = os.path.join(tmpdir, info_files[0])
         with open(info_path, "r", encoding="utf-8") as fin:
             info_data = json.load(fin)
-        print(f"[DEBUG] .info.json keys: {list(info_data.keys())}")
+        comments_log.debug(".info.json keys: %s", list(info_data))
         comments_data = info_data.get('comments', [])
         # Print debug info about the comments_data
         if isinstance(comments_data, list):
-            print(f"[DEBUG] info_data['comments'] is a list with length: {len(comments_data)}")
+            comments_log.debug("info_data['comments'] is a list with length: %d", len(comments_data))
             if len(comments_data) > 0:
-                print(f"[DEBUG] First comment: {comments_data[0]}")
+                comments_log.debug("First comment: %s", comments_data[0])
         else:
-            print(f"[DEBUG] info_data['comments'] is type: {type(comments_data)}")
+            comments_log.debug("info_data['comments'] is type: %s", type(comments_data))
         # Fallback: if no comments in .info.json, try to find .comments.json file
         if not comments_data:
             comments_files = [f for f in os.listdir(tmpdir) if f.endswith(".comments.json") and video_id in f]
@@ -782,14 +660,14 @@ def fetch_youtube_comments(video_id, limit=20):
                 with open(comments_path, "r", encoding="utf-8") as cfin:
                     try:
                         comments_data = json.load(cfin)
-                        print(f"[DEBUG] Loaded comments from .comments.json, count: {len(comments_data)}")
+                        comments_log.debug("Loaded comments from .comments.json, count: %d", len(comments_data))
                         if isinstance(comments_data, list) and len(comments_data) > 0:
-                            print(f"[DEBUG] First comment from .comments.json: {comments_data[0]}")
+                            comments_log.debug("First comment from .comments.json: %s", comments_data[0])
                     except Exception as e:
-                        print(f"[ERROR] Failed to load .comments.json: {e}")
+                        comments_log.error("Failed to load .comments.json: %s", e)
                         comments_data = []
         if not comments_data:
-            print(f"[ERROR] No comments found in .info.json or .comments.json for video_id={video_id}")
+            comments_log.error("No comments found in .info.json or .comments.json for video_id=%s", video_id)
             return []
         # แปลงโครงสร้างให้เหมือน YouTube API (commentThreads)
         # yt-dlp: list of dicts, each has 'id', 'text', 'author', 'parent', 'timestamp', ...
@@ -896,7 +774,7 @@ def flatten_comments(comments, video_id, parent_id=None, privacy_mode='none', se
     Supports both top-level and reply comments from YouTube API.
     Returns only text, sentiment, confidence, sentiment_score fields per requirements.
     """
-    print(f"[DEBUG] flatten_comments: {len(comments)} comments received for video_id={video_id}")
+    comments_log.debug("flatten_comments: %d comments received for video_id=%s", len(comments), video_id)
     rows = []
     for c in comments:
         # YouTube API: top-level thread (has 'snippet' and 'topLevelComment')
@@ -1025,33 +903,18 @@ def flatten_comments_no_sentiment(comments, video_id, parent_id=None, privacy_mo
             rows.extend(flatten_comments_no_sentiment(replies, video_id, parent_id=c.get('id'), privacy_mode=privacy_mode))
     return rows
 
-CONTEXT_PATTERNS = {
-    'question': {
-        'patterns': [r'\?', r'มั้ย', r'ไหม', r'ทำไม', r'ทำไม', r'อย่างไร', r'ยังไง', r'ที่ไหน', r'เมื่อไหร่', r'ใคร', r'อะไร', r'หรือไม่', r'หรือเปล่า', r'หรือยัง', r'ใช่ไหม', r'ใช่ป่าว', r'จริงดิ', r'จริงป่ะ'],
-        'score': 0.5
-    },
-    'request': {
-        'patterns': [r'ขอ', r'อยากได้', r'ต้องการ', r'กรุณา', r'โปรด', r'รบกวน'], # เอา 'ช่วย' ออก
-        'score': 0.6
-    },
-    'suggestion': {
-        'patterns': [r'น่าจะ', r'ควรจะ', r'ลอง', r'แนะนำ', r'เสนอ'],
-        'score': 0.7
-    },
-    'emergency': {
-        'patterns': [r'ด่วนที่สุด', r'ฉุกเฉิน', r'อันตราย', r'ต้องรีบ', r'ช่วยด้วย', r'ไฟไหม้', r'อุบัติเหตุ', r'เร่งด่วน', r'ต้องการความช่วยเหลือด่วน'], # ทำให้เฉพาะเจาะจงมากขึ้น
-        'score': 1.5
-    },
-    'gratitude': {
-        'patterns': [r'ขอบคุณ', r'ขอบใจ', r'ซึ้งใจ'],
-        'score': 0.8
-    }
-}
+CONTEXT_PATTERNS = APP_LEXICON["context_patterns"]
+
+# คอมไพล์ CONTEXT_PATTERNS ครั้งเดียวตอนโหลดโมดูล (pattern ที่ผิดจะถูกรายงานที่นี่ครั้งเดียว)
+CONTEXT_PATTERN_BANK = RegexBank(
+    {context: cfg.get('patterns', []) for context, cfg in CONTEXT_PATTERNS.items()},
+    name="CONTEXT_PATTERNS"
+)
 
 def enhanced_analyze_sentiment(text, mode='single'):
     """Enhanced sentiment analysis with fallback logic. Always returns a dict. Debugs all intermediate results."""
     if not text or not text.strip():
-        print('[DEBUG] Input is empty or blank')
+        scoring_log.debug('Input is empty or blank')
         return {
             "text": text,
             "sentiment": "neutral",
@@ -1059,41 +922,53 @@ def enhanced_analyze_sentiment(text, mode='single'):
             "sentiment_score": 0.0,
             "detailed_sentiment": "เฉย ๆ (Neutral)"
         }
+    cache = get_result_cache()
+    cache_key = cache.make_key(
+        "app.enhanced_analyze_sentiment", text, mode=mode,
+        extra=DETAILED_SENTIMENT_AVAILABLE, version=get_app_rule_set().version
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
     try:
         # Try to use the enhanced sentiment integration first
         if DETAILED_SENTIMENT_AVAILABLE:
             try:
                 result = analyze_detailed_sentiment(text, mode=mode)
-                print(f"[DEBUG] analyze_detailed_sentiment returned {type(result)}: {result}")
+                scoring_log.debug("analyze_detailed_sentiment returned %s: %s", type(result), result)
                 if isinstance(result, dict):
-                    return {
+                    enhanced_result = {
                         "text": text,
                         "sentiment": result.get("sentiment", "neutral"),
                         "confidence": result.get("confidence", 0.0),
                         "sentiment_score": result.get("sentiment_score", 0.0),
                         "detailed_sentiment": f"{result.get('detailed_emotion', 'เฉย ๆ')} ({result.get('emotion_group', 'Neutral')})"
                     }
+                    cache.put(cache_key, enhanced_result)
+                    return enhanced_result
                 else:
-                    print(f"[WARN] analyze_detailed_sentiment returned {type(result)}: {result}")
+                    scoring_log.warning("analyze_detailed_sentiment returned %s: %s", type(result), result)
             except Exception as e:
-                print(f"[EXCEPTION] analyze_detailed_sentiment: {e}")
+                scoring_log.error("analyze_detailed_sentiment: %s", e)
         # Fallback to built-in analysis
         builtin_result = analyze_sentiment_builtin(text, mode)
-        print(f"[DEBUG] analyze_sentiment_builtin returned {type(builtin_result)}: {builtin_result}")
+        scoring_log.debug("analyze_sentiment_builtin returned %s: %s", type(builtin_result), builtin_result)
         if isinstance(builtin_result, dict):
-            return {
+            enhanced_result = {
                 "text": text,
                 "sentiment": builtin_result.get("sentiment", "neutral"),
                 "confidence": builtin_result.get("confidence", 0.0),
                 "sentiment_score": builtin_result.get("sentiment_score", 0.0),
                 "detailed_sentiment": f"{builtin_result.get('detailed_emotion', 'เฉย ๆ')} ({builtin_result.get('emotion_group', 'Neutral')})"
             }
+            cache.put(cache_key, enhanced_result)
+            return enhanced_result
         else:
-            print(f"[WARN] analyze_sentiment_builtin returned {type(builtin_result)}: {builtin_result}")
+            scoring_log.warning("analyze_sentiment_builtin returned %s: %s", type(builtin_result), builtin_result)
     except Exception as e:
-        print(f"[EXCEPTION] All sentiment analysis failed: {e}")
+        scoring_log.error("All sentiment analysis failed: %s", e)
     # Always return a dict fallback
-    print('[DEBUG] Returning fallback neutral dict')
+    scoring_log.debug('Returning fallback neutral dict')
     return {
         "text": text,
         "sentiment": "neutral",
@@ -1106,17 +981,8 @@ def enhanced_analyze_sentiment(text, mode='single'):
 
 def analyze_context_patterns(text):
     """Stub: analyze context patterns based on CONTEXT_PATTERNS"""
-    matches = {}
     text_lower = text.lower() if isinstance(text, str) else ''
-    for context, cfg in CONTEXT_PATTERNS.items():
-        patterns = cfg.get('patterns', [])
-        for pattern in patterns:
-            try:
-                if re.search(pattern, text_lower):
-                    matches.setdefault(context, []).append(pattern)
-            except re.error:
-                continue
-    return matches
+    return CONTEXT_PATTERN_BANK.matching_patterns(text_lower)
 
 
 def get_context_insights(context_data):
@@ -1143,7 +1009,10 @@ if __name__ == "__main__":
     parser.add_argument("--sentiment-mode", choices=["builtin", "enhanced"], default="builtin", help="Sentiment analysis mode")
     parser.add_argument("--detailed-mode", choices=["single", "multi"], default="single", help="Detailed sentiment mode (single/multi)")
     parser.add_argument("--limit", type=int, default=20, help="Limit for YouTube comments per video (default: 20)")
+    parser.add_argument("--log", type=str, help="Log levels, e.g. DEBUG or scoring=DEBUG,comments=WARNING")
     args = parser.parse_args()
+    if args.log:
+        configure_logging(args.log)
 
     # Helper: process a single text
     def process_text(text):
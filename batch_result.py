@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar batch results with vectorized statistics
+เก็บผลวิเคราะห์ของทั้ง batch เป็นคอลัมน์ numpy (รหัส label, matrix คะแนน, รหัสบริบท)
+แล้วคำนวณการกระจาย co-occurrence และความสัมพันธ์บริบท-อารมณ์ด้วย bincount
+
+ค่าแต่ละคอลัมน์ที่เป็นหมวดหมู่ (label, กลุ่ม, บริบท) เก็บเป็นรหัส int ที่ชี้ไปยัง vocabulary
+ของ batch เมื่อสร้างจาก list ของ dict รหัสถูกกำหนดตามลำดับที่พบครั้งแรก ผลนับที่ได้จึง
+เรียง key เหมือนฟังก์ชันสถิติเดิมที่วนนับด้วย dict
+"""
+
+import json
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from detailed_thai_sentiment import context_key, generate_context_insights
+
+CONTEXT_FIELDS = ("primary_context", "formality_level", "social_setting", "emotional_tone")
+SENTIMENTS = ("positive", "negative", "neutral")
+
+# คอลัมน์บริบทที่ใช้ใน analyze_context_emotion_correlation และ prefix ของ key ในผลลัพธ์
+_CORRELATION_FIELDS = (("primary_context", ""), ("formality_level", "formality_"), ("social_setting", "social_"))
+
+
+class _Vocab:
+    """แปลงค่าเป็นรหัส int ตามลำดับที่พบครั้งแรก"""
+
+    def __init__(self, values: Iterable[Any] = ()):
+        self.values: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value: Any) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def _counts_to_dict(values: Sequence[Any], counts) -> Dict[Any, int]:
+    """ผลนับตามรหัส -> dict (เฉพาะค่าที่นับได้มากกว่า 0 เรียงตามรหัส)"""
+    return {values[code]: count for code, count in enumerate(counts.tolist()) if count}
+
+
+class _Builder:
+    """สะสมค่าของแต่ละแถวเป็น list แล้วแปลงเป็น array ครั้งเดียวใน ``build``"""
+
+    def __init__(self, track_contexts: bool = True):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for BatchResult")
+        self.track_contexts = track_contexts
+        self.labels = _Vocab()
+        self.groups = _Vocab()
+        self.context_vocabs = {field: _Vocab() for field in CONTEXT_FIELDS}
+        self.context_codes = {field: [] for field in CONTEXT_FIELDS}
+        self.label_cells: Tuple[List[int], List[int]] = ([], [])
+        self.group_cells: Tuple[List[int], List[int]] = ([], [])
+        self.primary: List[int] = []
+        self.confidence: List[float] = []
+        self.sentiments: List[int] = []
+        self.context_detailed: List[bool] = []
+        self.context_ids: List[int] = []
+        self.contexts: List[Any] = []
+        self._context_keys: Dict[Any, int] = {}
+        self.rows = 0
+
+    def add_row(
+        self,
+        labels: Sequence[str],
+        groups: Sequence[str],
+        confidence: float,
+        context: Any,
+        sentiment: Optional[str] = None
+    ):
+        row = self.rows
+        self.rows += 1
+
+        label_rows, label_cols = self.label_cells
+        for label in labels:
+            label_rows.append(row)
+            label_cols.append(self.labels.code(label))
+        self.primary.append(self.labels.code(labels[0]) if labels else -1)
+
+        group_rows, group_cols = self.group_cells
+        for group in groups:
+            group_rows.append(row)
+            group_cols.append(self.groups.code(group))
+
+        self.confidence.append(confidence)
+        self.sentiments.append(SENTIMENTS.index(sentiment) if sentiment in SENTIMENTS else -1)
+
+        # บริบทแบบละเอียด (dict) นับทุกคอลัมน์ แบบเก่า (str) มีเฉพาะ primary_context
+        self.context_detailed.append(isinstance(context, dict))
+        if isinstance(context, dict):
+            for field in CONTEXT_FIELDS:
+                self.context_codes[field].append(self.context_vocabs[field].code(context.get(field, "unknown")))
+        else:
+            primary = self.context_vocabs["primary_context"].code(context) if isinstance(context, str) else -1
+            self.context_codes["primary_context"].append(primary)
+            for field in CONTEXT_FIELDS[1:]:
+                self.context_codes[field].append(-1)
+
+        # id ของบริบททั้ง dict (บริบทที่เหมือนกันเก็บครั้งเดียว)
+        if context and self.track_contexts:
+            key = context_key(context)
+            context_id = self._context_keys.get(key)
+            if context_id is None:
+                context_id = self._context_keys[key] = len(self.contexts)
+                self.contexts.append(context)
+            self.context_ids.append(context_id)
+        else:
+            self.context_ids.append(-1)
+
+    def build(self, **fields) -> "BatchResult":
+        n = self.rows
+        label_mask = np.zeros((n, len(self.labels.values)), dtype=bool)
+        label_mask[self.label_cells[0], self.label_cells[1]] = True
+        group_mask = np.zeros((n, len(self.groups.values)), dtype=bool)
+        group_mask[self.group_cells[0], self.group_cells[1]] = True
+
+        return BatchResult(
+            labels=self.labels.values,
+            label_codes=np.array(self.primary, dtype=np.int32),
+            label_mask=label_mask,
+            groups=self.groups.values,
+            group_mask=group_mask,
+            confidence=np.array(self.confidence, dtype=np.float64),
+            context_vocabs={field: vocab.values for field, vocab in self.context_vocabs.items()},
+            context_codes={field: np.array(codes, dtype=np.int32) for field, codes in self.context_codes.items()},
+            context_detailed=np.array(self.context_detailed, dtype=bool),
+            contexts=self.contexts,
+            context_ids=np.array(self.context_ids, dtype=np.int32),
+            sentiment_codes=np.array(self.sentiments, dtype=np.int8),
+            **fields
+        )
+
+
+class BatchResult:
+    """ผลวิเคราะห์ของทั้ง batch แบบคอลัมน์
+
+    - ``label_codes`` (n,) รหัส label หลักของแต่ละแถว (-1 = ไม่มี) ``label_mask`` (n, L)
+      บอกทุก label ของแถว (single label มี True ตัวเดียว)
+    - ``group_mask`` (n, G) กลุ่มอารมณ์ของแต่ละแถว
+    - ``confidence`` (n,) confidence (multi label ใช้คะแนนสูงสุด) ``scores`` (n, E) float32
+      เรียงคอลัมน์ตาม ``score_labels`` (None ถ้าไม่ได้เก็บ)
+    - ``context_codes[field]`` (n,) รหัสบริบทแต่ละด้านใน ``context_vocabs[field]`` (-1 = ไม่มี)
+      ``context_detailed`` (n,) True ถ้าบริบทเป็น dict แบบละเอียด (ไม่ใช่ string แบบเก่า)
+    - ``context_ids`` (n,) รหัสของบริบททั้ง dict ใน ``contexts``
+    """
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        label_codes,
+        label_mask,
+        groups: Sequence[str],
+        group_mask,
+        confidence,
+        context_vocabs: Dict[str, Sequence[Any]],
+        context_codes: Dict[str, Any],
+        context_detailed,
+        contexts: Sequence[Any],
+        context_ids,
+        sentiment_codes,
+        scores=None,
+        score_labels: Sequence[str] = (),
+        analysis_type: str = "unknown",
+        analysis_mode: str = "unknown",
+        detailed_mask=None
+    ):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for BatchResult")
+        self.labels = list(labels)
+        self.label_codes = label_codes
+        self.label_mask = label_mask
+        self.groups = list(groups)
+        self.group_mask = group_mask
+        self.confidence = confidence
+        self.context_vocabs = {field: list(values) for field, values in context_vocabs.items()}
+        self.context_codes = context_codes
+        self.context_detailed = context_detailed
+        self.contexts = list(contexts)
+        self.context_ids = context_ids
+        self.sentiment_codes = sentiment_codes
+        self.scores = scores
+        self.score_labels = list(score_labels)
+        self.analysis_type = analysis_type
+        self.analysis_mode = analysis_mode
+        # แถวที่นับ label/กลุ่มในสถิติ sentiment (ผลจาก analysis_mode แบบ single_label/multi_label)
+        self.detailed_mask = detailed_mask
+
+    def __len__(self) -> int:
+        return len(self.label_codes)
+
+    # === CONSTRUCTORS ===
+
+    @classmethod
+    def from_results(cls, results: Sequence[Dict[str, Any]], include_scores: bool = False) -> "BatchResult":
+        """สร้างจากผลของ ``analyze_single_label``/``analyze_multi_label``/``analyze_batch``
+
+        ไม่เก็บตารางบริบททั้ง dict (``contexts``/``context_ids``) ซึ่งใช้เฉพาะ ``sentiment_statistics``
+        """
+        builder = _Builder(track_contexts=False)
+        score_rows = []
+
+        for result in results:
+            if "label" in result:
+                labels, groups = [result["label"]], [result["group"]]
+                confidence = result.get("confidence", 0.0)
+            elif "labels" in result:
+                labels, groups = result["labels"], result["groups"]
+                # สำหรับ multi-label ใช้คะแนนสูงสุดเป็น confidence
+                confidence = max(result["scores"].values()) if result["scores"] else 0.0
+            else:
+                labels, groups, confidence = [], [], 0.0
+            builder.add_row(labels, groups, confidence, result.get("context", {}))
+            if include_scores:
+                score_rows.append(result.get("scores") or {})
+
+        fields = {"analysis_type": results[0].get("analysis_type", "unknown") if results else "unknown"}
+        if include_scores:
+            score_labels = _Vocab(label for scores in score_rows for label in scores).values
+            scores = np.full((len(score_rows), len(score_labels)), np.nan, dtype=np.float32)
+            column = {label: i for i, label in enumerate(score_labels)}
+            for row, row_scores in enumerate(score_rows):
+                for label, score in row_scores.items():
+                    scores[row, column[label]] = score
+            fields.update(scores=scores, score_labels=score_labels)
+        return builder.build(**fields)
+
+    @classmethod
+    def from_comments(cls, comments: Sequence[Dict[str, Any]]) -> "BatchResult":
+        """สร้างจาก comment ที่มี ``sentiment_analysis`` (ผลของ ``analyze_social_media_batch``)
+
+        comment ที่ไม่มีผลวิเคราะห์ยังนับเป็นแถว แต่ไม่มี label บริบท หรือ sentiment
+        """
+        builder = _Builder()
+        detailed = []
+        analysis_mode = "unknown"
+
+        for comment in comments:
+            data = comment.get("sentiment_analysis", {})
+            if not data:
+                builder.add_row([], [], 0.0, None)
+                detailed.append(False)
+                continue
+
+            if "analysis_mode" in data:
+                analysis_mode = data["analysis_mode"]
+
+            mode = data.get("analysis_mode")
+            if mode == "single_label":
+                emotion, group = data.get("detailed_emotion"), data.get("emotion_group")
+                labels, groups = ([emotion] if emotion else []), ([group] if group else [])
+            elif mode == "multi_label":
+                labels, groups = data.get("detailed_emotions", []), data.get("emotion_groups", [])
+            else:
+                labels, groups = [], []
+            detailed.append(mode in ("single_label", "multi_label"))
+
+            builder.add_row(labels, groups, data.get("confidence", 0.0), data.get("context"), data.get("sentiment", "neutral"))
+
+        return builder.build(analysis_mode=analysis_mode, detailed_mask=np.array(detailed, dtype=bool))
+
+    @classmethod
+    def from_compact(cls, batch) -> "BatchResult":
+        """สร้างจาก ``CompactResultBatch`` โดยใช้ matrix คะแนนและตารางบริบทของ batch ร่วมกัน"""
+        emotions = list(batch.emotions)
+        n = len(batch.records)
+        rows = np.fromiter((record.row for record in batch.records), dtype=np.int64, count=n)
+        scored = rows >= 0
+
+        label_mask = np.zeros((n, len(emotions)), dtype=bool)
+        label_rows = [i for i, record in enumerate(batch.records) for _ in record.label_ids]
+        label_cols = [label_id for record in batch.records for label_id in record.label_ids]
+        label_mask[label_rows, label_cols] = True
+        label_codes = np.fromiter((record.label_ids[0] for record in batch.records), dtype=np.int32, count=n)
+
+        # กลุ่มของแต่ละแถว = OR ของกลุ่มของทุก label ในแถว
+        groups = _Vocab(batch.label_to_group.get(label, "Unknown") for label in emotions)
+        label_group = np.zeros((len(emotions), len(groups.values)), dtype=bool)
+        for i, label in enumerate(emotions):
+            label_group[i, groups.code(batch.label_to_group.get(label, "Unknown"))] = True
+        group_mask = (label_mask.astype(np.int32) @ label_group.astype(np.int32)) > 0
+
+        scores = np.full((n, len(emotions)), np.nan, dtype=np.float32)
+        scores[scored] = batch.scores[rows[scored]]
+        if batch.multi_label:
+            confidence = np.where(scored, np.nan_to_num(scores, nan=0.0).max(axis=1, initial=0.0), 0.0)
+        else:
+            confidence = np.where(scored, scores[np.arange(n), label_codes], 0.0)
+        confidence = np.round(confidence.astype(np.float64), 3)
+
+        # บริบท: แปลงตารางของ batch ครั้งเดียว แล้ว map ด้วย context_id
+        context_ids = np.fromiter((record.context_id for record in batch.records), dtype=np.int32, count=n)
+        context_vocabs, context_codes = {}, {}
+        for field in CONTEXT_FIELDS:
+            vocab = _Vocab()
+            table = np.array([vocab.code(context.get(field, "unknown")) for context in batch.contexts], dtype=np.int32)
+            context_vocabs[field] = vocab.values
+            context_codes[field] = table[context_ids]
+
+        return cls(
+            labels=emotions,
+            label_codes=label_codes,
+            label_mask=label_mask,
+            groups=groups.values,
+            group_mask=group_mask,
+            confidence=confidence,
+            context_vocabs=context_vocabs,
+            context_codes=context_codes,
+            context_detailed=np.ones(n, dtype=bool),
+            contexts=batch.contexts,
+            context_ids=context_ids,
+            sentiment_codes=np.full(n, -1, dtype=np.int8),
+            scores=scores,
+            score_labels=emotions,
+            analysis_type="multi_label" if batch.multi_label else "single_label"
+        )
+
+    # === DISTRIBUTIONS ===
+
+    def label_counts(self) -> Dict[str, int]:
+        """จำนวนแถวที่มีแต่ละ label"""
+        return _counts_to_dict(self.labels, self.label_mask.sum(axis=0))
+
+    def group_counts(self) -> Dict[str, int]:
+        """จำนวนแถวที่มีแต่ละกลุ่มอารมณ์"""
+        return _counts_to_dict(self.groups, self.group_mask.sum(axis=0))
+
+    def context_counts(self, field: str) -> Dict[Any, int]:
+        """จำนวนแถวต่อค่าของบริบทด้าน ``field`` (เช่น ``formality_level``)"""
+        codes = self.context_codes[field]
+        values = self.context_vocabs[field]
+        return _counts_to_dict(values, np.bincount(codes[codes >= 0], minlength=len(values)))
+
+    def sentiment_counts(self) -> Dict[str, int]:
+        """จำนวน positive/negative/neutral (ครบทุก key)"""
+        codes = self.sentiment_codes
+        counts = np.bincount(codes[codes >= 0], minlength=len(SENTIMENTS))
+        return dict(zip(SENTIMENTS, counts.tolist()))
+
+    def label_cooccurrence(self):
+        """matrix (L, L) จำนวนแถวที่มี label i และ j พร้อมกัน (แนวทแยง = จำนวนของ label นั้น)"""
+        mask = self.label_mask.astype(np.int64)
+        return mask.T @ mask
+
+    def context_emotion_table(self, field: str, row_mask=None):
+        """ตารางไขว้ (ค่าบริบทของ ``field`` x label) นับด้วย bincount ครั้งเดียว (เฉพาะแถวใน ``row_mask`` ถ้าระบุ)"""
+        codes = self.context_codes[field]
+        rows, cols = np.nonzero(self.label_mask)
+        row_codes = codes[rows]
+        valid = row_codes >= 0
+        if row_mask is not None:
+            valid &= row_mask[rows]
+        size = len(self.context_vocabs[field]) * len(self.labels)
+        flat = np.bincount(row_codes[valid] * len(self.labels) + cols[valid], minlength=size)
+        return flat.reshape(len(self.context_vocabs[field]), len(self.labels))
+
+    # === LEGACY STATISTICS ===
+
+    def emotion_statistics(self) -> Dict[str, Any]:
+        """สถิติรูปแบบเดียวกับ ``DetailedThaiSentimentAnalyzer.get_emotion_statistics``"""
+        if not len(self):
+            return {}
+
+        context_stats = {f"{field}_counts": self.context_counts(field) for field in CONTEXT_FIELDS}
+        return {
+            "total_texts": len(self),
+            "analysis_type": self.analysis_type,
+            "emotion_counts": self.label_counts(),
+            "group_counts": self.group_counts(),
+            "context_stats": context_stats,
+            "avg_confidence": round(float(self.confidence.sum()) / len(self), 3),
+            "context_insights": generate_context_insights(context_stats)
+        }
+
+    def context_emotion_correlation(self) -> Dict[str, Dict[str, float]]:
+        """ผลรูปแบบเดียวกับ ``analyze_context_emotion_correlation`` (ร้อยละของแต่ละอารมณ์ต่อบริบท)"""
+        # นับเฉพาะแถวที่มี label และบริบทแบบละเอียด
+        rows = self.label_mask.any(axis=1) & self.context_detailed
+        labelled = np.flatnonzero(rows)
+        entries = []
+        for order, (field, prefix) in enumerate(_CORRELATION_FIELDS):
+            codes = self.context_codes[field]
+            table = self.context_emotion_table(field, rows)
+            # ลำดับของ key ตามแถวแรกที่พบ (เหมือนการวนนับแบบเดิม)
+            values, first = np.unique(codes[labelled], return_index=True)
+            for code, first_row in zip(values.tolist(), labelled[first].tolist()):
+                entries.append((first_row, order, f"{prefix}{self.context_vocabs[field][code]}", table[code]))
+
+        merged: Dict[str, Any] = {}
+        for _, _, key, counts in sorted(entries, key=lambda entry: entry[:2]):
+            merged[key] = merged[key] + counts if key in merged else counts
+
+        correlation_stats = {}
+        for key, counts in merged.items():
+            total = int(counts.sum())
+            if total > 0:
+                correlation_stats[key] = {
+                    self.labels[code]: round((count / total) * 100, 2)
+                    for code, count in enumerate(counts.tolist()) if count
+                }
+        return correlation_stats
+
+    def sentiment_statistics(self, detailed: bool = True) -> Dict[str, Any]:
+        """สถิติรูปแบบเดียวกับ ``sentiment_integration.get_sentiment_statistics``"""
+        if not len(self):
+            return {}
+
+        stats = {
+            "total_comments": len(self),
+            "sentiment_counts": self.sentiment_counts(),
+            "analysis_mode": self.analysis_mode
+        }
+        if detailed:
+            mask = self.detailed_mask if self.detailed_mask is not None else np.ones(len(self), dtype=bool)
+            stats["detailed_emotion_counts"] = _counts_to_dict(self.labels, self.label_mask[mask].sum(axis=0))
+            stats["emotion_group_counts"] = _counts_to_dict(self.groups, self.group_mask[mask].sum(axis=0))
+
+            # serialize บริบทเป็น key ครั้งเดียวต่อบริบทที่ไม่ซ้ำ (ไม่ใช่ทุก comment)
+            ids = self.context_ids
+            counts = np.bincount(ids[ids >= 0], minlength=len(self.contexts))
+            context_counts: Dict[str, int] = defaultdict(int)
+            for context, count in zip(self.contexts, counts.tolist()):
+                if count:
+                    key = json.dumps(context, ensure_ascii=False, sort_keys=True) if isinstance(context, dict) else str(context)
+                    context_counts[key] += count
+            stats["context_counts"] = dict(context_counts)
+        return stats
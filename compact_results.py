@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact result records for DetailedThaiSentimentAnalyzer
+เก็บผลวิเคราะห์จำนวนมากแบบประหยัดหน่วยความจำ แล้วแปลงเป็น dict รูปแบบเดิมเฉพาะตอนส่งออก
+
+ผลแต่ละข้อความเป็น ``CompactResult`` (``__slots__``) ที่เก็บเพียงข้อความ, id ของ label
+(index ของคอลัมน์อารมณ์), แถวใน matrix คะแนน float32 ที่ใช้ร่วมกันทั้ง batch และ id ของ
+บริบทในตารางบริบทของ batch timestamp เก็บเป็นตัวเลขครั้งเดียวต่อ batch และสร้างเป็น
+ISO string เมื่อเรียก ``to_dict`` เท่านั้น ข้อความที่ซ้ำกันใน batch ใช้แถวคะแนนร่วมกัน
+"""
+
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DEFAULT_LABEL = "เฉย ๆ"
+
+# บริบทของข้อความว่าง (เหมือนผลลัพธ์ default ของ analyze_single_label/analyze_multi_label)
+EMPTY_CONTEXT = {
+    "primary_context": "neutral",
+    "formality_level": "neutral",
+    "social_setting": "general",
+    "emotional_tone": "neutral"
+}
+
+
+def _context_key(context: Dict[str, Any]) -> Tuple:
+    """key ที่ hash ได้ของผลบริบท (คงลำดับ key เพื่อให้ dict ที่สร้างกลับมาเหมือนเดิม)"""
+    return tuple(
+        (key, tuple(value.items()) if isinstance(value, dict) else value)
+        for key, value in context.items()
+    )
+
+
+class CompactResult:
+    """ผลวิเคราะห์ของข้อความเดียวแบบกะทัดรัด (อ่านค่าจาก ``CompactResultBatch`` ที่เป็นเจ้าของ)"""
+
+    __slots__ = ("batch", "row", "text", "label_ids", "context_id")
+
+    def __init__(self, batch: "CompactResultBatch", row: int, text: str, label_ids: Tuple[int, ...], context_id: int):
+        self.batch = batch
+        self.row = row  # -1 = ข้อความว่าง (ไม่มีคะแนน)
+        self.text = text
+        self.label_ids = label_ids
+        self.context_id = context_id
+
+    @property
+    def label(self) -> str:
+        return self.batch.emotions[self.label_ids[0]]
+
+    @property
+    def labels(self) -> List[str]:
+        emotions = self.batch.emotions
+        return [emotions[label_id] for label_id in self.label_ids]
+
+    @property
+    def confidence(self) -> float:
+        if self.row < 0:
+            return 0.0
+        return round(float(self.batch.scores[self.row, self.label_ids[0]]), 3)
+
+    @property
+    def scores(self) -> Dict[str, float]:
+        if self.row < 0:
+            return {}
+        return dict(zip(self.batch.emotions, (round(value, 3) for value in self.batch.scores[self.row].tolist())))
+
+    @property
+    def context(self) -> Dict[str, Any]:
+        context = dict(self.batch.contexts[self.context_id])
+        if "all_contexts" in context:
+            context["all_contexts"] = dict(context["all_contexts"])
+        return context
+
+    @property
+    def timestamp(self) -> Optional[str]:
+        if self.row < 0:
+            return None
+        return self.batch.timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        """แปลงเป็น dict รูปแบบเดียวกับ ``analyze_single_label``/``analyze_multi_label``"""
+        batch = self.batch
+        result: Dict[str, Any] = {"text": self.text}
+
+        if batch.multi_label:
+            labels = self.labels
+            result["labels"] = labels
+            result["groups"] = list(set(batch.label_to_group.get(label, "Unknown") for label in labels))
+        else:
+            label = self.label
+            result["label"] = label
+            result["group"] = batch.label_to_group.get(label, "Unknown")
+            result["confidence"] = self.confidence
+
+        result["scores"] = self.scores
+        result["context"] = self.context
+        result["analysis_type"] = "multi_label" if batch.multi_label else "single_label"
+        if batch.multi_label:
+            result["threshold"] = batch.threshold
+        if self.row >= 0:
+            result["timestamp"] = batch.timestamp
+        return result
+
+    def __repr__(self) -> str:
+        return f"CompactResult({self.text[:30]!r}, labels={self.labels})"
+
+
+class CompactResultBatch:
+    """ผลวิเคราะห์ของหลายข้อความ: records + matrix คะแนน float32 + ตารางบริบทที่ใช้ร่วมกัน"""
+
+    def __init__(
+        self,
+        emotions: Sequence[str],
+        label_to_group: Dict[str, str],
+        multi_label: bool,
+        threshold: float,
+        scores,
+        created: Optional[float] = None
+    ):
+        self.emotions = tuple(emotions)
+        self.label_to_group = label_to_group
+        self.multi_label = multi_label
+        self.threshold = threshold
+        self.scores = scores
+        self.created = time.time() if created is None else created
+        self.contexts: List[Dict[str, Any]] = []
+        self.records: List[CompactResult] = []
+        self._context_ids: Dict[Tuple, int] = {}
+        self._label_ids: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+        self._timestamp: Optional[str] = None
+
+    @property
+    def timestamp(self) -> str:
+        """ISO timestamp ของ batch (สร้างครั้งแรกที่ถูกเรียก)"""
+        if self._timestamp is None:
+            self._timestamp = datetime.fromtimestamp(self.created).isoformat()
+        return self._timestamp
+
+    def intern_context(self, context: Dict[str, Any]) -> int:
+        """id ของผลบริบทในตารางของ batch (บริบทที่เหมือนกันเก็บครั้งเดียว)"""
+        key = _context_key(context)
+        context_id = self._context_ids.get(key)
+        if context_id is None:
+            context_id = self._context_ids[key] = len(self.contexts)
+            self.contexts.append(context)
+        return context_id
+
+    def intern_labels(self, label_ids: Tuple[int, ...]) -> Tuple[int, ...]:
+        """ใช้ tuple ของ label id ตัวเดียวกันสำหรับชุด label ที่เหมือนกัน"""
+        return self._label_ids.setdefault(label_ids, label_ids)
+
+    def add(self, text: str, row: int, label_ids: Tuple[int, ...], context: Dict[str, Any]) -> CompactResult:
+        record = CompactResult(self, row, text, self.intern_labels(label_ids), self.intern_context(context))
+        self.records.append(record)
+        return record
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[CompactResult]:
+        return iter(self.records)
+
+    def __getitem__(self, index: int) -> CompactResult:
+        return self.records[index]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """แปลงทุก record เป็น dict รูปแบบเดิม"""
+        return [record.to_dict() for record in self.records]
+
+
+def build_compact_batch(
+    scorer,
+    texts: Sequence[str],
+    multi_label: bool = False,
+    threshold: Optional[float] = None
+) -> CompactResultBatch:
+    """วิเคราะห์ ``texts`` ด้วย ``BatchEmotionScorer`` และเก็บผลแบบ ``CompactResultBatch``
+
+    label ถูกเลือกจากคะแนน float64 ก่อนปัดเศษด้วยกฎเดียวกับ ``_build_single_result`` /
+    ``_build_multi_result`` (ค่าสูงสุดตัวแรก / ทุกอารมณ์ที่ถึง threshold ตามลำดับคอลัมน์)
+    คะแนนที่เก็บใน float32 ถูกปัดเป็น 3 ตำแหน่งก่อน ``to_dict`` จึงให้ค่าเดียวกับ dict เดิมทุกตัว
+    """
+    from detailed_thai_sentiment import LABEL_TO_GROUP
+
+    analyzer = scorer.analyzer
+    if threshold is None:
+        threshold = analyzer.multi_label_threshold
+
+    positions: Dict[str, int] = {}
+    unique_texts: List[str] = []
+    for text in texts:
+        if text and text.strip() and text not in positions:
+            positions[text] = len(unique_texts)
+            unique_texts.append(text)
+
+    prepared_texts = [analyzer.prepare_text(text) for text in unique_texts]
+    raw = scorer.score_matrix(prepared_texts)
+    rounded = np.array([[round(value, 3) for value in row] for row in raw.tolist()], dtype=np.float32)
+    rounded = rounded.reshape(len(unique_texts), len(scorer.emotions))
+
+    batch = CompactResultBatch(scorer.emotions, LABEL_TO_GROUP, multi_label, threshold, rounded)
+    default_label = (batch.emotions.index(DEFAULT_LABEL),)
+
+    # label ของแต่ละแถว (คำนวณครั้งเดียวต่อข้อความที่ไม่ซ้ำ)
+    best = raw.argmax(axis=1).tolist() if len(unique_texts) else []
+    if multi_label:
+        over = raw >= threshold
+        row_labels = [
+            tuple(np.flatnonzero(over[row]).tolist()) or (best[row],)
+            for row in range(len(unique_texts))
+        ]
+    else:
+        row_labels = [(label_id,) for label_id in best]
+
+    for text in texts:
+        row = positions.get(text)
+        if row is None:
+            batch.add(text, -1, default_label, EMPTY_CONTEXT)
+        else:
+            batch.add(text, row, row_labels[row], prepared_texts[row]["context"])
+
+    return batch
@@ -15,9 +15,10 @@ from bs4 import BeautifulSoup
 from collections import Counter
 from typing import List, Dict, Any, Union, Optional
 from pythainlp.util import normalize as th_normalize
-from pythainlp.tokenize import word_tokenize
 from pythainlp.corpus import thai_stopwords
 
+from token_cache import tokenize_many
+
 # ----------------- Data Cleaning Functions -----------------
 
 def clean_text(text: str, options: Dict = None) -> str:
@@ -420,10 +421,10 @@ def analyze_dataset(data_entries: List[Dict], field_path: str = "content.text")
             texts.append(text)
             length = len(text)
             lengths.append(length)
-            
-            # วิเคราะห์คำ
-            words = word_tokenize(text, engine="newmm")
-            all_words.extend(words)
+    
+    # วิเคราะห์คำ (ตัดคำทั้งชุดผ่าน token cache และหลาย process ถ้าข้อมูลมาก)
+    for words in tokenize_many(texts, engine="newmm"):
+        all_words.extend(words)
     
     # คำนวณสถิติความยาว
     if lengths:
@@ -9,10 +9,14 @@ Detailed Thai Sentiment Analysis System
 import json
 import re
 import random
-from typing import List, Dict, Any, Optional, Union, Tuple
+import time
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union, Tuple
 from datetime import datetime
 from collections import defaultdict
 import warnings
+
+from parallel_batch import DEFAULT_CHUNK_SIZE, iter_chunks
+from rule_engine import RuleSet, compute_intensity_bonus, get_rule_set, load_lexicon
 warnings.filterwarnings('ignore')
 
 # === EMOTION LABEL SCHEMA ===
@@ -44,228 +48,113 @@ for group, labels in EMOTION_GROUPS.items():
     for label in labels:
         LABEL_TO_GROUP[label] = group
 
+# Regex ที่ใช้ทำความสะอาดข้อความ (compile ครั้งเดียวตอนโหลดโมดูล)
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+MENTION_PATTERN = re.compile(r'[@#]\w+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+EMOJI_PATTERN = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map
+    "\U0001F1E0-\U0001F1FF"  # flags
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "]+", flags=re.UNICODE
+)
+
+def _copy_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """คัดลอกผลบริบทเพื่อไม่ให้ผลลัพธ์ที่ใช้ prepared ร่วมกันแชร์ dict เดียวกัน"""
+    copied = dict(context)
+    if "all_contexts" in copied:
+        copied["all_contexts"] = dict(copied["all_contexts"])
+    return copied
+
+def context_key(value: Any) -> Any:
+    """key ที่ hash ได้ของผลบริบท ค่าเท่ากันเมื่อ ``json.dumps(value, sort_keys=True)`` เท่ากัน
+    
+    ใช้นับบริบทที่ไม่ซ้ำโดย serialize เป็น JSON ครั้งเดียวต่อบริบท แทนทุกครั้งที่พบ
+    """
+    if isinstance(value, dict):
+        items = []
+        for key, item in value.items():
+            items.append((key, context_key(item) if isinstance(item, (dict, list, tuple)) else (item.__class__, item)))
+        items.sort()
+        return (dict, tuple(items))
+    if isinstance(value, (list, tuple)):
+        return (list, tuple(context_key(item) for item in value))
+    return (value.__class__, value)
+
 class ThaiEmotionPatterns:
-    """คลาส pattern matching สำหรับการวิเคราะห์อารมณ์ภาษาไทย"""
+    """คลาส pattern matching สำหรับการวิเคราะห์อารมณ์ภาษาไทย
+    
+    ข้อมูลโหลดจาก lexicons/detailed_emotions.json (แก้ไขคำสำคัญได้ที่ไฟล์นั้น)
+    """
+    
+    LEXICON_NAME = "detailed_emotions"
     
     def __init__(self):
-        self.emotion_patterns = self._build_emotion_patterns()
-        self.intensity_patterns = self._build_intensity_patterns()
-        self.context_patterns = self._build_context_patterns()
+        lexicon = load_lexicon(self.LEXICON_NAME)
+        self.emotion_patterns = self._build_emotion_patterns(lexicon)
+        self.intensity_patterns = lexicon["intensity_patterns"]
+        self.context_patterns = lexicon["context_patterns"]
     
-    def _build_emotion_patterns(self) -> Dict[str, Dict[str, Any]]:
+    def _build_emotion_patterns(self, lexicon: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
         """สร้าง patterns สำหรับแต่ละอารมณ์"""
-        return {
-            # === POSITIVE EMOTIONS ===
-            "ดีใจ": {
-                "keywords": ["ดีใจ", "มีความสุข", "แฮปปี้", "ปลื้ม", "ยินดี", "เฮง", "เย้", "โย่", "เจ๋ง", "ดี่ใจ"],
-                "patterns": [r"ดี\s*ใจ", r"ปลื้ม", r"เฮง\s*ซะ", r"แฮปปี้", r"เย้.*", r"โย่.*"],
-                "emojis": ["😊", "😄", "🤗", "😍", "🥰", "😘", "😆", "🤩"],
-                "score_range": (0.6, 1.0)
-            },
-            
-            "ชอบ": {
-                "keywords": ["ชอบ", "รัก", "ถูกใจ", "โปรด", "ปลื้ม", "สนใจ", "อิน", "เคลิ้ม"],
-                "patterns": [r"ชอบ.*มาก", r"รัก.*เลย", r"ถูกใจ", r"โปรด.*", r"สนใจ.*มาก"],
-                "emojis": ["❤️", "💕", "😍", "🥰", "😘", "💖", "💝"],
-                "score_range": (0.5, 0.9)
-            },
-            
-            "ซึ้งใจ": {
-                "keywords": ["ซึ้ง", "ซึ้งใจ", "น้ำตาซึม", "ประทับใจ", "ซาบซึ้ง", "ตื้นตัน", "ซื่นใส"],
-                "patterns": [r"ซึ้ง.*ใจ", r"ประทับใจ", r"น้ำตา.*ซึม", r"ซาบซึ้ง"],
-                "emojis": ["😭", "🥺", "😢", "🤧", "💞"],
-                "score_range": (0.4, 0.8)
-            },
-            
-            "พอใจ": {
-                "keywords": ["พอใจ", "โอเค", "ใช้ได้", "ปกติดี", "ไม่เป็นไร", "งาม", "เรียบร้อย"],
-                "patterns": [r"พอใจ", r"โอเค.*", r"ใช้ได้", r"ปกติดี", r"เรียบร้อย"],
-                "emojis": ["👍", "👌", "😌", "🙂"],
-                "score_range": (0.2, 0.6)
-            },
-            
-            "รัก": {
-                "keywords": ["รัก", "หลงรัก", "แพง", "เลิฟ", "love", "ฮักๆ", "ฮัก", "รักมาก"],
-                "patterns": [r"รัก.*มาก", r"หลงรัก", r"เลิฟ.*", r"love.*", r"ฮัก.*"],
-                "emojis": ["❤️", "💕", "💖", "💝", "😍", "🥰", "😘"],
-                "score_range": (0.7, 1.0)
-            },
-            
-            # === NEGATIVE EMOTIONS ===
-            "โกรธ": {
-                "keywords": ["โกรธ", "ฉุน", "โมโห", "แค้น", "ขุ่นข้อง", "เดือด", "บ้า", "ห่วยแตก", "แย่", "งี่เง่า"],
-                "patterns": [r"โกรธ.*มาก", r"ฉุน.*ขาด", r"โมโห", r"แค้น.*", r"ห่วย.*แตก", r"บ้า.*", r"แย่.*มาก"],
-                "emojis": ["😠", "😡", "🤬", "👿", "💢", "😤"],
-                "score_range": (-1.0, -0.6)
-            },
-            
-            "เสียใจ": {
-                "keywords": ["เสียใจ", "เศร้า", "ใจหาย", "ปวดใจ", "เศร้าโศก", "โศกเศร้า", "เสียดาย", "น่าเสียใจ"],
-                "patterns": [r"เสียใจ", r"เศร้า.*มาก", r"ใจหาย", r"ปวดใจ", r"เศร้าโศก"],
-                "emojis": ["😢", "😭", "😞", "☹️", "😔", "💔"],
-                "score_range": (-0.8, -0.4)
-            },
-            
-            "ผิดหวัง": {
-                "keywords": ["ผิดหวัง", "หวังเกิน", "คาดหวัง", "ท้อ", "หมดหวัง", "ไม่ได้ดังใจ"],
-                "patterns": [r"ผิดหวัง", r"หวัง.*เกิน", r"คาดหวัง.*มาก", r"ท้อ.*", r"หมดหวัง"],
-                "emojis": ["😞", "😔", "😓", "😩", "😤"],
-                "score_range": (-0.7, -0.3)
-            },
-            
-            "รำคาญ": {
-                "keywords": ["รำคาญ", "น่ารำคาญ", "เบื่อ", "หน่าย", "เซ็ง", "ง่วง", "เครียด", "เหนื่อย"],
-                "patterns": [r"รำคาญ", r"เบื่อ.*มาก", r"หน่าย.*", r"เซ็ง.*", r"เครียด.*"],
-                "emojis": ["😒", "🙄", "😤", "😑", "😫", "😩"],
-                "score_range": (-0.6, -0.2)
-            },
-            
-            "เกลียด": {
-                "keywords": ["เกลียด", "ขยะแขยง", "แค้น", "แกล้ง", "ไม่ชอบ", "ต่อต้าน"],
-                "patterns": [r"เกลียด.*มาก", r"ขยะแขยง", r"แค้น.*", r"ไม่ชอบ.*เลย"],
-                "emojis": ["😡", "🤬", "👿", "😠", "💢"],
-                "score_range": (-1.0, -0.7)
-            },
-            
-            "กลัว": {
-                "keywords": ["กลัว", "หวาดกลัว", "ตกใจ", "วิตก", "กังวล", "เครียด", "หวั่น", "ตื่นกลัว"],
-                "patterns": [r"กลัว.*มาก", r"หวาดกลัว", r"ตกใจ.*", r"วิตก.*", r"กังวล.*"],
-                "emojis": ["😨", "😰", "😱", "😧", "🫣", "😳"],
-                "score_range": (-0.8, -0.3)
-            },
-            
-            "อึดอัด": {
-                "keywords": ["อึดอัด", "อับอาย", "เก้อ", "ไม่สบายใจ", "กดดัน", "ขัดใจ"],
-                "patterns": [r"อึดอัด", r"อับอาย", r"ไม่สบายใจ", r"กดดัน", r"ขัดใจ"],
-                "emojis": ["😣", "😖", "😫", "😤", "😰"],
-                "score_range": (-0.6, -0.2)
-            },
-            
-            "ตกใจ": {
-                "keywords": ["ตกใจ", "สะดุ้ง", "โหยง", "ตกตะลึง", "ตะลึง", "หวาดเสียว"],
-                "patterns": [r"ตกใจ.*มาก", r"สะดุ้ง", r"โหยง", r"ตกตะลึง", r"ตะลึง"],
-                "emojis": ["😱", "😨", "😳", "🫨", "😧"],
-                "score_range": (-0.5, 0.0)
-            },
-            
-            # === NEUTRAL EMOTIONS ===
-            "เฉย ๆ": {
-                "keywords": ["เฉย", "ธรรมดา", "ปกติ", "โอเค", "ใช้ได้", "พอใช้", "ไม่เป็นไร"],
-                "patterns": [r"เฉย.*ๆ", r"ธรรมดา", r"ปกติ.*", r"โอเค", r"ไม่เป็นไร"],
-                "emojis": ["😐", "🙂", "😶", "😑"],
-                "score_range": (-0.1, 0.1)
-            },
-            
-            "ไม่รู้สึกอะไร": {
-                "keywords": ["ไม่รู้สึก", "ชา", "เฉย", "ไม่สน", "ไม่แคร์", "ไม่เข้าใจ"],
-                "patterns": [r"ไม่รู้สึก.*อะไร", r"ชา.*", r"ไม่สน.*", r"ไม่แคร์"],
-                "emojis": ["😶", "😐", "🤷‍♀️", "🤷‍♂️"],
-                "score_range": (-0.05, 0.05)
-            },
-            
-            "ข้อมูลข่าวสาร": {
-                "keywords": ["ข้อมูล", "ข่าว", "รายงาน", "แจ้ง", "บอก", "อัปเดต", "สำคัญ"],
-                "patterns": [r"ข้อมูล.*", r"ข่าว.*", r"รายงาน.*", r"แจ้ง.*", r"อัปเดต.*"],
-                "emojis": ["📰", "📊", "📈", "📢", "ℹ️"],
-                "score_range": (0.0, 0.0)
-            },
-            
-            # === OTHERS (COMPLEX EMOTIONS) ===
-            "ประชด": {
-                "keywords": ["ประชด", "เหน็บแนม", "เสียดสี", "แดกดัน", "จิกกัด", "อีดอก"],
-                "patterns": [r"ประชด.*", r"เหน็บแนม", r"เสียดสี.*", r"แดกดัน", r"จิกกัด"],
-                "emojis": ["😏", "🙄", "😒", "😤"],
-                "score_range": (-0.4, -0.1)
-            },
-            
-            "ขำขัน": {
-                "keywords": ["ขำ", "ตลก", "555", "ฮา", "เฮฮา", "สนุก", "โลกแตก", "ครื่นเครง"],
-                "patterns": [r"ขำ.*", r"ตลก.*", r"555+", r"ฮา+", r"เฮฮา", r"สนุก.*"],
-                "emojis": ["😂", "🤣", "😆", "😄", "😁", "🤪", "😜"],
-                "score_range": (0.3, 0.8)
-            },
-            
-            "เสียดสี": {
-                "keywords": ["เสียดสี", "ประชด", "เหน็บ", "แนม", "จิกกัด", "แกล้ง"],
-                "patterns": [r"เสียดสี.*", r"ประชด.*", r"เหน็บ.*แนม", r"จิกกัด.*"],
-                "emojis": ["😏", "🙄", "😒"],
-                "score_range": (-0.5, -0.2)
+        emotion_patterns = lexicon["emotion_patterns"]
+        for config in emotion_patterns.values():
+            if "score_range" in config:
+                config["score_range"] = tuple(config["score_range"])
+        return emotion_patterns
+    
+    def build_rule_set(self) -> RuleSet:
+        """คอมไพล์ keywords ของ emotion/intensity/context และ regex ของ emotion"""
+        return RuleSet(
+            self.LEXICON_NAME,
+            keyword_families={
+                "emotion": {emotion: config["keywords"] for emotion, config in self.emotion_patterns.items()},
+                "intensity": self.intensity_patterns,
+                "context": self.context_patterns
             },
-            
-            "สับสน": {
-                "keywords": ["สับสน", "งง", "เข้าใจไม่ได้", "แปลก", "ฉงน", "ฉงนสนเท่ห์"],
-                "patterns": [r"สับสน", r"งง.*", r"เข้าใจไม่ได้", r"แปลก.*", r"ฉงน.*"],
-                "emojis": ["😕", "🤔", "😵‍💫", "🫤", "😵"],
-                "score_range": (-0.2, 0.2)
+            regex_families={
+                "emotion": {emotion: config.get("patterns", []) for emotion, config in self.emotion_patterns.items()}
             }
-        }
-    
-    def _build_intensity_patterns(self) -> Dict[str, List[str]]:
-        """สร้าง patterns สำหรับความเข้มข้นของอารมณ์"""
-        return {
-            "high": ["มาก", "เลย", "สุด", "แรง", "หนัก", "โคตร", "แสน", "สาหัส", "เป็นบ้า", "จริงๆ"],
-            "medium": ["พอ", "ค่อนข้าง", "ปานกลาง", "ใช้ได้", "โอเค"],
-            "low": ["เล็กน้อย", "นิดหน่อย", "เบาๆ", "นิดเดียว", "ไม่มาก"]
-        }
-    
-    def _build_context_patterns(self) -> Dict[str, List[str]]:
-        """สร้าง patterns สำหรับบริบทการใช้ภาษา"""
-        return {
-            # === ระดับความเป็นทางการ ===
-            "formal": ["ครับ", "ค่ะ", "คะ", "ขอ", "กรุณา", "สวัสดี", "ขอบคุณ", "ท่าน", "คุณ", "พี่", "น้อง", "เรียน", "ด้วยความเคารพ"],
-            "informal": ["นะ", "เนอะ", "อะ", "เอ้ย", "เออ", "ของ", "555", "ฮา", "จ้ะ", "จ๋า", "ว่ะ", "วะ", "เฮ้ย"],
-            "slang": ["โคตร", "เฟี้ยว", "เทพ", "แม่ง", "ควย", "บิน", "เฟี้ยม", "ชิบ", "เด็ด", "ปัง", "ห่วย", "ซวย"],
-            
-            # === ความสัมพันธ์ส่วนตัว ===
-            "personal": ["กู", "มึง", "เรา", "ฉัน", "คิด", "รู้สึก", "ใจ", "หัวใจ", "ตัวเอง", "ส่วนตัว"],
-            "intimate": ["ที่รัก", "หวานใจ", "ดาร์ลิ่ง", "ฮันนี่", "เบบี้", "คนดี", "เสือ", "หนูเอง"],
-            "friendly": ["เพื่อน", "เฟร้น", "พวกเรา", "แก๊ง", "กลุ่ม", "คนเก่า", "พี่น้อง"],
-            
-            # === บริบทสื่อสังคม ===
-            "social_media": ["แชร์", "ไลค์", "คอมเมนต์", "โพสต์", "แท็ก", "เฟสบุ๊ค", "ไอจี", "ทวิตเตอร์", "ติ๊กต๊อก", "ยูทูป"],
-            "news_media": ["ข่าว", "รายงาน", "แจ้งข่าว", "ข้อมูล", "อัปเดต", "ประกาศ", "แถลงการณ์", "สำคัญ", "ด่วน"],
-            "review": ["รีวิว", "ทดลอง", "ใช้ดู", "ลอง", "ประสบการณ์", "คุณภาพ", "บริการ", "สินค้า", "ร้าน"],
-            
-            # === บริบทอารมณ์ ===
-            "complaint": ["บ่น", "ร้องเรียน", "แจ้งปัญหา", "ไม่ได้", "เสีย", "ห่วย", "แย่", "ผิดพลาด", "ช้า"],
-            "praise": ["ชม", "ยกย่อง", "ดี", "เยี่ยม", "ประทับใจ", "ชอบ", "รัก", "สุดยอด", "เจ๋ง", "เทพ"],
-            "question": ["ครับ", "คะ", "มั้ย", "หรือ", "ไหม", "อะไร", "ทำไม", "ยังไง", "เมื่อไหร่", "ที่ไหน"],
-            
-            # === บริบทสถานการณ์ ===
-            "emergency": ["ด่วน", "เร่งด่วน", "ฉุกเฉิน", "ช่วย", "ปัญหา", "เสีย", "พัง", "อันตราย", "วิกฤต"],
-            "celebration": ["ยินดี", "แสดงความยินดี", "ขอแสดงความยินดี", "ดีใจ", "ปลื้มปีติ", "เฮง", "โชคดี"],
-            "condolence": ["เสียใจ", "แสดงความเสียใจ", "ขอแสดงความเสียใจ", "เศร้า", "อาลัย", "คิดถึง"],
-            
-            # === บริบทวัฒนธรรม ===
-            "religious": ["บุญ", "กรรม", "ธรรม", "พระ", "วัด", "นมัสการ", "ไหว้", "ศาสนา", "บาป", "กุศล"],
-            "traditional": ["ประเพณี", "วัฒนธรรม", "ไทย", "โบราณ", "ดั้งเดิม", "ภูมิปัญญา", "ชาวบ้าน"],
-            "modern": ["ทันสมัย", "โมเดิร์น", "ไฮเทค", "ดิจิทัล", "ออนไลน์", "แอป", "ไอที", "เทคโนโลยี"],
-            
-            # === บริบทภูมิศาสตร์ ===
-            "central": ["กรุงเทพ", "กทม", "เมืองหลวง", "ภาคกลาง", "จังหวัดใกล้เคียง"],
-            "northern": ["เชียงใหม่", "ภาคเหนือ", "ล้านนา", "คำเมือง", "นา", "ป่า"],
-            "southern": ["ใต้", "ภาคใต้", "ทะเล", "ปลา", "ยางพารา", "ปาล์ม"],
-            "northeastern": ["อีสาน", "ภาคอีสาน", "ส้มตำ", "ลาว", "ข้าวเหนียว", "แจ่ว"],
-            
-            # === บริบทอายุ/รุ่น ===
-            "gen_z": ["ปัง", "เด็ด", "ฟิน", "ชิล", "เฟล็กซ์", "โบ", "ลิต", "ไวบ์", "คอนเทนต์"],
-            "millennial": ["โอเค", "เฟส", "ไลน์", "อินสตา", "ซีรี่ย์", "ยูทูป", "กูเกิล"],
-            "gen_x": ["จริงหรือเปล่า", "ไม่เชื่อ", "สมัยก่อน", "ตอนหนุ่ม", "ปัจจุบัน"],
-            
-            # === บริบทวิชาชีพ ===
-            "business": ["ธุรกิจ", "การตลาด", "ขาย", "ลูกค้า", "กำไร", "ขาดทุน", "ลงทุน"],
-            "education": ["เรียน", "สอน", "ครู", "นักเรียน", "นักศึกษา", "การศึกษา", "วิชา"],
-            "healthcare": ["หมอ", "คลินิก", "โรงพยาบาล", "ยา", "รักษา", "สุขภาพ", "ป่วย"],
-            "government": ["ราชการ", "รัฐบาล", "นโยบาย", "กฎหมาย", "ระเบียบ", "ข้าราชการ"]
-        }
+        )
 
 class DetailedThaiSentimentAnalyzer:
     """ระบบวิเคราะห์ sentiment ภาษาไทยแบบละเอียด"""
     
-    def __init__(self):
+    # จำนวนครั้งที่ pipeline เดิมคำนวณแต่ละขั้นตอนต่อการวิเคราะห์หนึ่งครั้ง
+    # (clean ซ้ำใน emotion scores และ context, intensity ซ้ำทุกอารมณ์)
+    LEGACY_STAGE_REPEATS = {
+        "clean": 2,
+        "emojis": 1,
+        "keyword_scan": 2,
+        "regex_scan": 1,
+        "intensity": None,  # = จำนวนอารมณ์
+        "context": 1
+    }
+    
+    def __init__(self, profile: bool = False):
         self.patterns = ThaiEmotionPatterns()
         self.multi_label_threshold = 0.3  # threshold สำหรับการตัดสิน multi-label
+        self.rules = get_rule_set(ThaiEmotionPatterns.LEXICON_NAME, self.patterns.build_rule_set)
+        self.keyword_automaton = self.rules.automaton
+        self.regex_bank = self.rules.regex["emotion"]
+        self._batch_scorer = None  # สร้างเมื่อเรียก analyze_batch แบบ vectorized ครั้งแรก
         
+        # profiling mode: เก็บเวลาของแต่ละขั้นตอนใน prepare_text
+        self.profile = profile
+        self.reset_profile()
+    
+    def _scan_keywords(self, clean_text: str) -> Dict[str, Dict[str, int]]:
+        """สแกนข้อความครั้งเดียวและนับคำสำคัญที่พบแยกตาม emotion/intensity/context"""
+        return self._hits_from_keyword_ids(self.keyword_automaton.find_keyword_ids(clean_text))
+    
+    def _hits_from_keyword_ids(self, keyword_ids: List[int]) -> Dict[str, Dict[str, int]]:
+        """แปลง keyword id ที่สแกนพบเป็นจำนวนคำแยกตาม emotion/intensity/context"""
+        return self.rules.hits_from_ids(keyword_ids)
+
     def _clean_text(self, text: str) -> str:
         """ทำความสะอาดข้อความ"""
         if not text:
@@ -275,48 +164,132 @@ class DetailedThaiSentimentAnalyzer:
         text = text.lower()
         
         # ลบ URL
-        text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+        text = URL_PATTERN.sub('', text)
         
         # ลบ mentions และ hashtags ใน social media
-        text = re.sub(r'[@#]\w+', '', text)
+        text = MENTION_PATTERN.sub('', text)
         
         # ทำความสะอาดช่องว่างเกิน
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = WHITESPACE_PATTERN.sub(' ', text).strip()
         
         return text
     
     def _extract_emojis(self, text: str) -> List[str]:
         """ดึง emojis จากข้อความ"""
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map
-            "\U0001F1E0-\U0001F1FF"  # flags
-            "\U00002702-\U000027B0"
-            "\U000024C2-\U0001F251"
-            "]+", flags=re.UNICODE
-        )
-        return emoji_pattern.findall(text)
+        return EMOJI_PATTERN.findall(text)
+    
+    # === PER-TEXT ANALYSIS CONTEXT ===
+    
+    def prepare_text(self, text: str) -> Dict[str, Any]:
+        """เตรียมข้อมูลของข้อความครั้งเดียว (clean, emojis, keyword scan, intensity, context)
+        
+        ผลลัพธ์ส่งต่อให้ analyze_single_label, analyze_multi_label และ
+        get_context_recommendations ผ่านพารามิเตอร์ ``prepared`` ได้โดยไม่ต้องคำนวณซ้ำ
+        """
+        clean_text = self._run_stage("clean", self._clean_text, text)
+        emojis = self._run_stage("emojis", self._extract_emojis, text)
+        keyword_ids = self._run_stage("keyword_scan", self.keyword_automaton.find_keyword_ids, clean_text)
+        keyword_hits = self._hits_from_keyword_ids(keyword_ids)
+        pattern_counts = self._run_stage("regex_scan", self.regex_bank.pattern_counts, clean_text)
+        intensity_bonus = self._run_stage("intensity", self._intensity_bonus_from_hits, keyword_hits["intensity"])
+        context = self._run_stage("context", self._context_from_hits, clean_text, keyword_hits["context"])
+        
+        return {
+            "text": text,
+            "clean_text": clean_text,
+            "emojis": emojis,
+            "keyword_ids": keyword_ids,
+            "keyword_hits": keyword_hits,
+            "pattern_counts": pattern_counts,
+            "intensity_bonus": intensity_bonus,
+            "context": context
+        }
+    
+    def _get_prepared(self, text: str, prepared: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """ใช้ prepared ที่ส่งมา หรือเตรียมใหม่ถ้ายังไม่มี (และบันทึกงานที่ประหยัดได้)"""
+        reused = prepared is not None
+        if not reused:
+            prepared = self.prepare_text(text)
+        
+        if self.profile:
+            for stage, repeats in self.LEGACY_STAGE_REPEATS.items():
+                if repeats is None:
+                    repeats = len(self.patterns.emotion_patterns)
+                self.stage_reuses[stage] += repeats if reused else repeats - 1
+        
+        return prepared
+    
+    # === PROFILING ===
+    
+    def _run_stage(self, stage: str, func, *args):
+        """เรียกขั้นตอนหนึ่งของ pipeline และจับเวลาถ้าเปิด profiling mode"""
+        if not self.profile:
+            return func(*args)
+        
+        start = time.perf_counter()
+        result = func(*args)
+        self.stage_timings[stage] += time.perf_counter() - start
+        self.stage_calls[stage] += 1
+        return result
+    
+    def reset_profile(self):
+        """ล้างสถิติ profiling"""
+        self.stage_timings = defaultdict(float)
+        self.stage_calls = defaultdict(int)
+        self.stage_reuses = defaultdict(int)
+    
+    def get_profile_report(self) -> Dict[str, Any]:
+        """รายงานเวลาแต่ละขั้นตอนและเวลาที่ประหยัดได้เทียบกับ pipeline เดิม"""
+        stages = {}
+        total_seconds = 0.0
+        total_saved = 0.0
+        
+        for stage in self.LEGACY_STAGE_REPEATS:
+            calls = self.stage_calls.get(stage, 0)
+            elapsed = self.stage_timings.get(stage, 0.0)
+            avg_seconds = elapsed / calls if calls else 0.0
+            saved = avg_seconds * self.stage_reuses.get(stage, 0)
+            
+            stages[stage] = {
+                "calls": calls,
+                "total_seconds": round(elapsed, 6),
+                "avg_ms": round(avg_seconds * 1000, 4),
+                "reuses": self.stage_reuses.get(stage, 0),
+                "estimated_saved_seconds": round(saved, 6)
+            }
+            total_seconds += elapsed
+            total_saved += saved
+        
+        return {
+            "profile_enabled": self.profile,
+            "stages": stages,
+            "total_seconds": round(total_seconds, 6),
+            "estimated_saved_seconds": round(total_saved, 6)
+        }
+    
+    def get_pattern_validation_report(self) -> Dict[str, Any]:
+        """รายงาน regex ของ emotion patterns ที่คอมไพล์ไม่ได้ (ตรวจครั้งเดียวตอนสร้าง analyzer)"""
+        return self.regex_bank.validation_report()
     
-    def _calculate_emotion_scores(self, text: str) -> Dict[str, float]:
+    def _calculate_emotion_scores(self, text: str, prepared: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
         """คำนวณคะแนนสำหรับแต่ละอารมณ์"""
-        clean_text = self._clean_text(text)
-        emojis = self._extract_emojis(text)
+        if prepared is None:
+            prepared = self.prepare_text(text)
+        emojis = prepared["emojis"]
+        keyword_hits = prepared["keyword_hits"]
+        intensity_bonus = prepared["intensity_bonus"]
         emotion_scores = defaultdict(float)
         
+        regex_hits = defaultdict(int)
+        for index, matches in prepared["pattern_counts"]:
+            regex_hits[self.regex_bank.patterns[index][0]] += matches
+        
         for emotion, config in self.patterns.emotion_patterns.items():
-            score = 0.0
-            
-            # คะแนนจากคำสำคัญ
-            for keyword in config["keywords"]:
-                if keyword in clean_text:
-                    score += 1.0
+            # คะแนนจากคำสำคัญ (นับจากผลสแกนของ automaton)
+            score = float(keyword_hits["emotion"].get(emotion, 0))
             
-            # คะแนนจาก patterns (regex)
-            for pattern in config.get("patterns", []):
-                matches = re.findall(pattern, clean_text)
-                score += len(matches) * 1.5
+            # คะแนนจาก patterns (regex ที่คอมไพล์ไว้ใน regex_bank)
+            score += regex_hits.get(emotion, 0) * 1.5
             
             # คะแนนจาก emojis
             for emoji in emojis:
@@ -324,7 +297,6 @@ class DetailedThaiSentimentAnalyzer:
                     score += 2.0
             
             # ปรับคะแนนตามความเข้มข้น
-            intensity_bonus = self._calculate_intensity_bonus(clean_text)
             score *= (1 + intensity_bonus)
             
             emotion_scores[emotion] = min(score, 5.0)  # จำกัดคะแนนสูงสุด
@@ -333,30 +305,26 @@ class DetailedThaiSentimentAnalyzer:
     
     def _calculate_intensity_bonus(self, text: str) -> float:
         """คำนวณ bonus จากความเข้มข้นของการแสดงออก"""
-        bonus = 0.0
-        
-        for intensity, words in self.patterns.intensity_patterns.items():
-            for word in words:
-                if word in text:
-                    if intensity == "high":
-                        bonus += 0.5
-                    elif intensity == "medium":
-                        bonus += 0.2
-                    elif intensity == "low":
-                        bonus += 0.1
-        
-        return min(bonus, 1.0)  # จำกัด bonus สูงสุด
+        return self._intensity_bonus_from_hits(self._scan_keywords(text)["intensity"])
     
-    def _determine_context(self, text: str) -> Dict[str, Any]:
+    def _intensity_bonus_from_hits(self, intensity_hits: Dict[str, int]) -> float:
+        """คำนวณ bonus จากจำนวนคำบอกความเข้มข้นที่สแกนพบ"""
+        return compute_intensity_bonus(intensity_hits, self.patterns.intensity_patterns)
+    
+    def _determine_context(self, text: str, prepared: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """กำหนดบริบทการใช้ภาษาแบบละเอียด"""
-        clean_text = self._clean_text(text)
+        if prepared is None:
+            prepared = self.prepare_text(text)
+        return _copy_context(prepared["context"])
+    
+    def _context_from_hits(self, clean_text: str, context_hits: Dict[str, int]) -> Dict[str, Any]:
+        """สร้างผลบริบทจากจำนวนคำบริบทที่สแกนพบ"""
         context_scores = defaultdict(int)
         
-        # คำนวณคะแนนสำหรับแต่ละบริบท
-        for context, words in self.patterns.context_patterns.items():
-            for word in words:
-                if word in clean_text:
-                    context_scores[context] += 1
+        # คำนวณคะแนนสำหรับแต่ละบริบท (คงลำดับตาม context_patterns)
+        for context in self.patterns.context_patterns:
+            if context_hits.get(context):
+                context_scores[context] = context_hits[context]
         
         if not context_scores:
             return {
@@ -408,7 +376,7 @@ class DetailedThaiSentimentAnalyzer:
         
         return {emotion: score / max_score for emotion, score in scores.items()}
     
-    def analyze_single_label(self, text: str) -> Dict[str, Any]:
+    def analyze_single_label(self, text: str, prepared: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """วิเคราะห์ sentiment แบบ single label (multi-class classification)"""
         if not text or not text.strip():
             return {
@@ -426,10 +394,25 @@ class DetailedThaiSentimentAnalyzer:
                 "analysis_type": "single_label"
             }
         
+        # เตรียมข้อมูลของข้อความครั้งเดียวแล้วใช้ร่วมกันทุกขั้นตอน
+        prepared = self._get_prepared(text, prepared)
+        
         # คำนวณคะแนนสำหรับแต่ละอารมณ์
-        raw_scores = self._calculate_emotion_scores(text)
+        raw_scores = self._calculate_emotion_scores(text, prepared)
         normalized_scores = self._normalize_scores(raw_scores)
         
+        # กำหนดบริบทแบบละเอียด
+        context = self._determine_context(text, prepared)
+        
+        return self._build_single_result(text, normalized_scores, context)
+    
+    def _build_single_result(
+        self,
+        text: str,
+        normalized_scores: Dict[str, float],
+        context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """สร้างผลลัพธ์ single label จากคะแนนที่ normalize แล้ว"""
         # เลือกอารมณ์ที่มีคะแนนสูงสุด
         if not normalized_scores:
             predicted_label = "เฉย ๆ"
@@ -441,9 +424,6 @@ class DetailedThaiSentimentAnalyzer:
         # กำหนดกลุ่มอารมณ์
         group = LABEL_TO_GROUP.get(predicted_label, "Unknown")
         
-        # กำหนดบริบทแบบละเอียด
-        context = self._determine_context(text)
-        
         return {
             "text": text,
             "label": predicted_label,
@@ -455,7 +435,12 @@ class DetailedThaiSentimentAnalyzer:
             "timestamp": datetime.now().isoformat()
         }
     
-    def analyze_multi_label(self, text: str, threshold: float = None) -> Dict[str, Any]:
+    def analyze_multi_label(
+        self,
+        text: str,
+        threshold: float = None,
+        prepared: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """วิเคราะห์ sentiment แบบ multi-label classification"""
         if threshold is None:
             threshold = self.multi_label_threshold
@@ -476,10 +461,26 @@ class DetailedThaiSentimentAnalyzer:
                 "threshold": threshold
             }
         
+        # เตรียมข้อมูลของข้อความครั้งเดียวแล้วใช้ร่วมกันทุกขั้นตอน
+        prepared = self._get_prepared(text, prepared)
+        
         # คำนวณคะแนนสำหรับแต่ละอารมณ์
-        raw_scores = self._calculate_emotion_scores(text)
+        raw_scores = self._calculate_emotion_scores(text, prepared)
         normalized_scores = self._normalize_scores(raw_scores)
         
+        # กำหนดบริบทแบบละเอียด
+        context = self._determine_context(text, prepared)
+        
+        return self._build_multi_result(text, normalized_scores, context, threshold)
+    
+    def _build_multi_result(
+        self,
+        text: str,
+        normalized_scores: Dict[str, float],
+        context: Dict[str, Any],
+        threshold: float
+    ) -> Dict[str, Any]:
+        """สร้างผลลัพธ์ multi-label จากคะแนนที่ normalize แล้ว"""
         # เลือกอารมณ์ที่มีคะแนนเกิน threshold
         predicted_labels = []
         for emotion, score in normalized_scores.items():
@@ -495,9 +496,6 @@ class DetailedThaiSentimentAnalyzer:
         # กำหนดกลุ่มอารมณ์
         groups = list(set(LABEL_TO_GROUP.get(label, "Unknown") for label in predicted_labels))
         
-        # กำหนดบริบทแบบละเอียด
-        context = self._determine_context(text)
-        
         return {
             "text": text,
             "labels": predicted_labels,
@@ -509,8 +507,29 @@ class DetailedThaiSentimentAnalyzer:
             "timestamp": datetime.now().isoformat()
         }
     
-    def analyze_batch(self, texts: List[str], multi_label: bool = False, threshold: float = None) -> List[Dict[str, Any]]:
-        """วิเคราะห์ sentiment แบบ batch"""
+    def analyze_batch(
+        self,
+        texts: List[str],
+        multi_label: bool = False,
+        threshold: float = None,
+        vectorized: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """วิเคราะห์ sentiment แบบ batch
+        
+        ถ้ามี numpy จะคำนวณคะแนนของทั้ง batch ด้วย sparse keyword-incidence matrix
+        (ผลลัพธ์เท่ากับการวิเคราะห์ทีละข้อความ) ตั้ง ``vectorized=False`` เพื่อใช้ลูปเดิม
+        """
+        if vectorized is None or vectorized:
+            # import numpy/scipy เมื่อใช้ครั้งแรก process ที่วิเคราะห์ทีละข้อความจึงเริ่มได้เร็ว
+            from batch_scoring import BatchEmotionScorer, NUMPY_AVAILABLE
+            if vectorized is None:
+                vectorized = NUMPY_AVAILABLE
+        
+        if vectorized:
+            if self._batch_scorer is None:
+                self._batch_scorer = BatchEmotionScorer(self)
+            return self._batch_scorer.analyze(texts, multi_label=multi_label, threshold=threshold)
+        
         results = []
         
         for text in texts:
@@ -523,8 +542,53 @@ class DetailedThaiSentimentAnalyzer:
         
         return results
     
+    def analyze_batch_compact(
+        self,
+        texts: List[str],
+        multi_label: bool = False,
+        threshold: float = None
+    ):
+        """วิเคราะห์แบบ batch และคืน ``CompactResultBatch`` แทน list ของ dict (ต้องมี numpy)
+        
+        เหมาะกับผลจำนวนมาก: record ละไม่กี่ field, คะแนนอยู่ใน float32 matrix ที่ใช้ร่วมกัน
+        เรียก ``to_dict()``/``to_dicts()`` เมื่อต้องการ dict รูปแบบเดิม
+        """
+        from batch_scoring import BatchEmotionScorer
+        from compact_results import build_compact_batch
+        
+        if self._batch_scorer is None:
+            self._batch_scorer = BatchEmotionScorer(self)
+        return build_compact_batch(self._batch_scorer, texts, multi_label=multi_label, threshold=threshold)
+    
+    def analyze_stream(
+        self,
+        texts: Iterable[str],
+        multi_label: bool = False,
+        threshold: float = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        vectorized: Optional[bool] = None,
+        compact: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """วิเคราะห์ข้อความจาก iterable ใดๆ (เช่นไฟล์ที่อ่านทีละบรรทัด) และ yield ผลทีละรายการ
+        
+        อ่าน input ทีละ ``chunk_size`` ข้อความแล้วส่งเข้า ``analyze_batch`` จึงถืออยู่ในหน่วยความจำ
+        ไม่เกินหนึ่ง chunk และอ่าน chunk ถัดไปเมื่อผู้เรียกดึงผลของ chunk ก่อนหน้าครบแล้วเท่านั้น
+        ``compact=True`` จะ yield ``CompactResult`` (จาก ``analyze_batch_compact``) แทน dict
+        """
+        for chunk in iter_chunks(texts, chunk_size):
+            if compact:
+                yield from self.analyze_batch_compact(chunk, multi_label=multi_label, threshold=threshold)
+            else:
+                yield from self.analyze_batch(chunk, multi_label=multi_label, threshold=threshold, vectorized=vectorized)
+    
     def get_emotion_statistics(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """คำนวณสถิติของอารมณ์จากผลการวิเคราะห์"""
+        """คำนวณสถิติของอารมณ์จากผลการวิเคราะห์
+        
+        รับ ``BatchResult`` ได้โดยตรง (คำนวณด้วย numpy แทนการวนทีละ dict)
+        """
+        if hasattr(results, "emotion_statistics"):
+            return results.emotion_statistics()
+        
         if not results:
             return {}
         
@@ -590,32 +654,39 @@ class DetailedThaiSentimentAnalyzer:
     
     def _generate_context_insights(self, context_stats: Dict[str, Dict[str, int]]) -> Dict[str, str]:
         """สร้าง insights จากสถิติบริบท"""
-        insights = {}
-        
-        # วิเคราะห์ระดับความเป็นทางการ
-        formality = context_stats.get("formality_level_counts", {})
-        if formality:
-            most_formal = max(formality, key=formality.get)
-            insights["formality"] = f"ส่วนใหญ่ใช้ภาษาแบบ {most_formal} ({formality[most_formal]} ครั้ง)"
-        
-        # วิเคราะห์การตั้งค่าทางสังคม
-        social = context_stats.get("social_setting_counts", {})
-        if social:
-            most_social = max(social, key=social.get)
-            insights["social_setting"] = f"บริบทที่พบมากที่สุด: {most_social} ({social[most_social]} ครั้ง)"
-        
-        # วิเคราะห์โทนอารมณ์
-        emotional = context_stats.get("emotional_tone_counts", {})
-        if emotional:
-            most_emotional = max(emotional, key=emotional.get)
-            insights["emotional_tone"] = f"โทนอารมณ์หลัก: {most_emotional} ({emotional[most_emotional]} ครั้ง)"
-        
-        return insights
+        return generate_context_insights(context_stats)
 
 # === ADVANCED CONTEXT ANALYSIS FUNCTIONS ===
 
+def generate_context_insights(context_stats: Dict[str, Dict[str, int]]) -> Dict[str, str]:
+    """สร้าง insights จากสถิติบริบท (ผลนับ formality/social setting/emotional tone)"""
+    insights = {}
+    
+    # วิเคราะห์ระดับความเป็นทางการ
+    formality = context_stats.get("formality_level_counts", {})
+    if formality:
+        most_formal = max(formality, key=formality.get)
+        insights["formality"] = f"ส่วนใหญ่ใช้ภาษาแบบ {most_formal} ({formality[most_formal]} ครั้ง)"
+    
+    # วิเคราะห์การตั้งค่าทางสังคม
+    social = context_stats.get("social_setting_counts", {})
+    if social:
+        most_social = max(social, key=social.get)
+        insights["social_setting"] = f"บริบทที่พบมากที่สุด: {most_social} ({social[most_social]} ครั้ง)"
+    
+    # วิเคราะห์โทนอารมณ์
+    emotional = context_stats.get("emotional_tone_counts", {})
+    if emotional:
+        most_emotional = max(emotional, key=emotional.get)
+        insights["emotional_tone"] = f"โทนอารมณ์หลัก: {most_emotional} ({emotional[most_emotional]} ครั้ง)"
+    
+    return insights
+
 def analyze_context_emotion_correlation(results: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """วิเคราะห์ความสัมพันธ์ระหว่างบริบทและอารมณ์"""
+    """วิเคราะห์ความสัมพันธ์ระหว่างบริบทและอารมณ์ (รับ ``BatchResult`` ได้โดยตรง)"""
+    if hasattr(results, "context_emotion_correlation"):
+        return results.context_emotion_correlation()
+    
     context_emotion_map = defaultdict(lambda: defaultdict(int))
     
     for result in results:
@@ -649,9 +720,13 @@ def analyze_context_emotion_correlation(results: List[Dict[str, Any]]) -> Dict[s
     
     return correlation_stats
 
-def get_context_recommendations(text: str, analyzer: DetailedThaiSentimentAnalyzer) -> Dict[str, Any]:
+def get_context_recommendations(
+    text: str,
+    analyzer: DetailedThaiSentimentAnalyzer,
+    prepared: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     """ให้คำแนะนำการปรับปรุงการสื่อสารตามบริบท"""
-    result = analyzer.analyze_single_label(text)
+    result = analyzer.analyze_single_label(text, prepared=prepared)
     context = result.get("context", {})
     
     recommendations = {
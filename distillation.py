@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ensemble-to-student distillation
+กลั่น ensemble ของโมเดล HF (teacher) เป็น student ขนาดเล็ก (TF-IDF + logistic ของ ThaiSentimentMLModel)
+
+``label_corpus`` ให้ teacher ทำนายคลังคอมเมนต์ที่ไม่มี label ทีละ batch และเขียน soft label
+(probability ของทุก label) ต่อท้ายไฟล์ JSONL ข้อความที่มีในไฟล์แล้วไม่ถูกทำนายซ้ำ จึงรันต่อจากที่ค้างได้
+(ส่ง PredictionStore ให้ teacher เพื่อใช้ผลที่เคยทำนายไว้ด้วย)
+``distill_student`` ฝึก student จาก soft label และรายงานความตรงกับ teacher บนชุด held-out
+``save_student``/``load_student``/``create_student_ensemble`` เก็บ student พร้อมรายงาน และโหลดเป็น
+member ของ EnsembleSentimentModel สำหรับงาน bulk (ใช้ ensemble เต็มสำหรับตรวจสอบ)
+
+    python distillation.py label --corpus data/comments.jsonl --output data/soft_labels.jsonl
+    python distillation.py train --labels data/soft_labels.jsonl --output models/student
+    python distillation.py compare --student models/student --held-out data/held_out.jsonl \\
+        --report reports/student.json
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from result_cache import get_result_cache, text_hash
+from sentiment_stats import write_json_atomic
+
+DEFAULT_STUDENT_DIR = os.path.join("models", "student")
+DEFAULT_BATCH_SIZE = 256
+STUDENT_FILENAME = "student.pkl"
+METADATA_FILENAME = "student.json"
+LABELS = ("positive", "neutral", "negative")
+
+
+def load_soft_labels(path: str) -> List[Dict[str, Any]]:
+    """อ่านไฟล์ soft label (ข้ามบรรทัดที่เสียจากการหยุดกลางคัน)"""
+    rows = []
+    if not os.path.exists(path):
+        return rows
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if row.get("text") and row.get("probabilities"):
+                rows.append(row)
+    return rows
+
+
+def label_corpus(
+    teacher,
+    items: List[Dict[str, Any]],
+    output_path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """ให้ ``teacher`` ทำนาย ``items`` (``{"text", "label"}`` จาก ``load_held_out_texts``) ทีละ batch
+    และเขียน soft label ต่อท้าย ``output_path`` (ข้ามข้อความซ้ำและข้อความที่มีในไฟล์แล้ว)"""
+    labeled = {text_hash(row["text"]) for row in load_soft_labels(output_path)}
+    pending: List[Dict[str, Any]] = []
+    for item in items:
+        key = text_hash(item["text"])
+        if key not in labeled:
+            labeled.add(key)
+            pending.append(item)
+
+    version_getter = getattr(teacher, "model_version", None)
+    teacher_version = version_getter() if version_getter is not None else None
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+
+    # บรรทัดสุดท้ายที่เขียนไม่ครบ (หยุดกลางคัน) ต้องไม่ต่อกับแถวใหม่
+    partial_line = False
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            partial_line = f.read(1) != b"\n"
+
+    started = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as f:
+        if partial_line:
+            f.write("\n")
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            predictions = teacher.predict_batch([item["text"] for item in batch])
+            for item, prediction in zip(batch, predictions):
+                row = {
+                    "text": item["text"],
+                    "probabilities": {label: float(prediction["probabilities"].get(label, 0.0)) for label in LABELS},
+                    "sentiment": prediction["sentiment"],
+                    "teacher": teacher_version
+                }
+                if item.get("label") in LABELS:
+                    row["label"] = item["label"]
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            f.flush()
+            print(f"[INFO] soft label: {min(start + batch_size, len(pending))}/{len(pending)}")
+    seconds = time.perf_counter() - started
+
+    return {
+        "labeled": len(pending),
+        "skipped": len(items) - len(pending),
+        "seconds": round(seconds, 3),
+        "texts_per_second": round(len(pending) / seconds, 2) if seconds > 0 else None,
+        "teacher": teacher_version
+    }
+
+
+def agreement_report(
+    teacher_predictions: List[Dict[str, Any]],
+    student_predictions: List[Dict[str, Any]],
+    gold_labels: Optional[List[Optional[str]]] = None
+) -> Dict[str, Any]:
+    """ความตรงกันของ label และความต่างของ probability ระหว่าง teacher กับ student (และ accuracy ถ้ามี label จริง)"""
+    count = len(teacher_predictions)
+    agreement = sum(
+        teacher["sentiment"] == student["sentiment"] for teacher, student in zip(teacher_predictions, student_predictions)
+    )
+    deltas = [
+        abs(teacher["probabilities"].get(label, 0.0) - student["probabilities"].get(label, 0.0))
+        for teacher, student in zip(teacher_predictions, student_predictions)
+        for label in LABELS
+    ]
+    report: Dict[str, Any] = {
+        "samples": count,
+        "agreement_with_teacher": round(agreement / count, 4) if count else 0.0,
+        "mean_abs_prob_delta": round(sum(deltas) / len(deltas), 5) if deltas else 0.0
+    }
+
+    gold = [(index, label) for index, label in enumerate(gold_labels or []) if label in LABELS]
+    if gold:
+        teacher_accuracy = sum(teacher_predictions[index]["sentiment"] == label for index, label in gold) / len(gold)
+        student_accuracy = sum(student_predictions[index]["sentiment"] == label for index, label in gold) / len(gold)
+        report["accuracy"] = {"teacher": round(teacher_accuracy, 4), "student": round(student_accuracy, 4)}
+        report["accuracy_delta"] = round(student_accuracy - teacher_accuracy, 4)
+    return report
+
+
+def _timed_predictions(model, texts: List[str]) -> Tuple[List[Dict[str, Any]], float]:
+    get_result_cache().clear()
+    started = time.perf_counter()
+    predictions = model.predict_batch(texts)
+    return predictions, time.perf_counter() - started
+
+
+def distill_student(
+    rows: List[Dict[str, Any]],
+    model_type: str = "logistic",
+    held_out: float = 0.1,
+    seed: int = 42,
+    student=None
+) -> Tuple[Any, Dict[str, Any]]:
+    """ฝึก student (``ThaiSentimentMLModel``) จาก soft label แล้วประเมินกับ teacher บนส่วน held-out
+
+    คืน (student, รายงาน) โดย teacher บน held-out คือ soft label ในไฟล์ จึงไม่ต้องรัน ensemble ซ้ำ
+    """
+    if student is None:
+        from ml_sentiment_analysis import ThaiSentimentMLModel
+        student = ThaiSentimentMLModel(model_type=model_type)
+
+    indices = list(range(len(rows)))
+    random.Random(seed).shuffle(indices)
+    held_out_count = int(len(rows) * held_out)
+    test_rows = [rows[index] for index in indices[:held_out_count]]
+    train_rows = [rows[index] for index in indices[held_out_count:]]
+
+    started = time.perf_counter()
+    training = student.train_soft([row["text"] for row in train_rows], [row["probabilities"] for row in train_rows])
+    train_seconds = time.perf_counter() - started
+
+    report: Dict[str, Any] = {
+        "teacher": next((row.get("teacher") for row in rows if row.get("teacher")), None),
+        "student": f"ml_{student.model_type}",
+        "train_samples": training["samples"],
+        "train_seconds": round(train_seconds, 3),
+        "created_at": datetime.now().isoformat()
+    }
+    if test_rows:
+        texts = [row["text"] for row in test_rows]
+        predictions, seconds = _timed_predictions(student, texts)
+        report["held_out"] = agreement_report(test_rows, predictions, [row.get("label") for row in test_rows])
+        report["held_out"]["student_latency_ms_per_text"] = round(seconds * 1000 / len(texts), 3)
+    return student, report
+
+
+def compare_student(student, teacher, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """รายงานความเร็วและความแม่นยำของ student เทียบ teacher (รันทั้งคู่ ไม่ผ่าน result cache)"""
+    texts = [item["text"] for item in items]
+    teacher_predictions, teacher_seconds = _timed_predictions(teacher, texts)
+    student_predictions, student_seconds = _timed_predictions(student, texts)
+
+    report = agreement_report(teacher_predictions, student_predictions, [item.get("label") for item in items])
+    count = len(texts)
+    report["latency_ms_per_text"] = {
+        "teacher": round(teacher_seconds * 1000 / count, 3) if count else 0.0,
+        "student": round(student_seconds * 1000 / count, 3) if count else 0.0
+    }
+    report["speedup"] = round(teacher_seconds / student_seconds, 2) if student_seconds > 0 else None
+    return report
+
+
+def save_student(student, directory: str = DEFAULT_STUDENT_DIR, report: Optional[Dict[str, Any]] = None) -> str:
+    """บันทึก student (pickle ของ ThaiSentimentMLModel) และรายงานไว้ใน ``directory``"""
+    os.makedirs(directory, exist_ok=True)
+    student.save_model(os.path.join(directory, STUDENT_FILENAME))
+    write_json_atomic(os.path.join(directory, METADATA_FILENAME), report or {})
+    return directory
+
+
+def load_student(directory: str = DEFAULT_STUDENT_DIR):
+    """โหลด student ที่บันทึกด้วย ``save_student``"""
+    from ml_sentiment_analysis import ThaiSentimentMLModel
+
+    path = os.path.join(directory, STUDENT_FILENAME)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"ไม่พบ student model: {path}")
+    student = ThaiSentimentMLModel()
+    student.load_model(path)
+    if student.pipeline is None:
+        raise ValueError(f"โหลด student model ไม่สำเร็จ: {path}")
+    return student
+
+
+def load_student_report(directory: str = DEFAULT_STUDENT_DIR) -> Optional[Dict[str, Any]]:
+    """รายงานที่บันทึกไว้กับ student (None ถ้าไม่มี)"""
+    path = os.path.join(directory, METADATA_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def create_student_ensemble(directory: str = DEFAULT_STUDENT_DIR):
+    """EnsembleSentimentModel ที่มี student เป็น member เดียว (ใช้แทน ``create_multi_model_ensemble`` ในงาน bulk)"""
+    from ml_sentiment_analysis import EnsembleSentimentModel
+
+    ensemble = EnsembleSentimentModel()
+    ensemble.add_model("student", load_student(directory), weight=1.0)
+    return ensemble
+
+
+def _teacher(store_path: Optional[str], parallel: bool):
+    from ml_sentiment_analysis import create_multi_model_ensemble
+    from prediction_store import PredictionStore
+
+    store = PredictionStore(store_path) if store_path else None
+    return create_multi_model_ensemble(prediction_store=store, parallel=parallel)
+
+
+def main():
+    from onnx_backend import load_held_out_texts
+
+    parser = argparse.ArgumentParser(description="Distill the sentiment ensemble into a fast student model")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    label_parser = subparsers.add_parser("label", help="soft-label a comment corpus with the ensemble")
+    label_parser.add_argument("--corpus", required=True, help="JSONL (text + optional label) or text file")
+    label_parser.add_argument("--output", required=True, help="soft label JSONL (appended, resumable)")
+    label_parser.add_argument("--text-field", default="text")
+    label_parser.add_argument("--limit", type=int)
+    label_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    label_parser.add_argument("--store", help="PredictionStore path for the teacher's predictions")
+    label_parser.add_argument("--parallel", action="store_true", help="run ensemble members concurrently")
+
+    train_parser = subparsers.add_parser("train", help="train the student from soft labels")
+    train_parser.add_argument("--labels", required=True)
+    train_parser.add_argument("--output", default=DEFAULT_STUDENT_DIR)
+    train_parser.add_argument("--model-type", default="logistic", choices=["logistic", "random_forest", "svm"])
+    train_parser.add_argument("--held-out", type=float, default=0.1, help="fraction kept for the report")
+
+    compare_parser = subparsers.add_parser("compare", help="speed/accuracy report: ensemble vs student")
+    compare_parser.add_argument("--student", default=DEFAULT_STUDENT_DIR)
+    compare_parser.add_argument("--held-out", required=True)
+    compare_parser.add_argument("--text-field", default="text")
+    compare_parser.add_argument("--limit", type=int)
+    compare_parser.add_argument("--parallel", action="store_true")
+    compare_parser.add_argument("--report", help="write the report as JSON")
+    args = parser.parse_args()
+
+    if args.command == "label":
+        items = load_held_out_texts(args.corpus, args.text_field, args.limit)
+        result = label_corpus(_teacher(args.store, args.parallel), items, args.output, args.batch_size)
+    elif args.command == "train":
+        student, result = distill_student(load_soft_labels(args.labels), args.model_type, args.held_out)
+        save_student(student, args.output, result)
+    else:
+        items = load_held_out_texts(args.held_out, args.text_field, args.limit)
+        result = compare_student(load_student(args.student), _teacher(None, args.parallel), items)
+        if args.report:
+            write_json_atomic(args.report, result)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
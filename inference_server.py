@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-batching inference server for the ML sentiment ensemble
+บริการ inference ในเครื่อง (HTTP) ที่โหลด ensemble ไว้ชุดเดียวให้ scraper หลาย process ใช้ร่วมกัน
+
+คำขอที่เข้ามาพร้อมกันถูกรวมเป็น micro-batch (ไม่เกิน ``max_batch_size`` ข้อความ หรือรอไม่เกิน
+``max_wait`` วินาทีนับจากคำขอแรก) แล้วทำนายด้วย ``EnsembleSentimentModel.predict_batch`` ครั้งเดียว
+ก่อนแยกผลกลับไปยังผู้ขอแต่ละราย
+
+Endpoints:
+    POST /predict  {"texts": [...]} หรือ {"text": "..."}  ผลของ ensemble
+    POST /analyze  เหมือน /predict แต่ผ่าน auto review (เหมือน ``analyze_with_review``)
+    GET  /health   สถานะ (loading/ok) และเวอร์ชันโมเดล
+    GET  /metrics  ความยาวคิว, จำนวน batch, ขนาด batch เฉลี่ย, latency
+
+รันด้วย ``python inference_server.py --port 8765`` แล้วตั้ง ``THAI_SENTIMENT_SERVER=http://127.0.0.1:8765``
+ให้ process อื่น (``ml_sentiment_analysis.analyze_sentiment``, ML path ของ social_media_utils) ใช้ server แทน
+การโหลดโมเดลเอง
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib import error as urllib_error
+from urllib import request as urllib_request
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT = 0.01  # วินาที
+DEFAULT_TIMEOUT = 120.0
+SERVER_ENV_VAR = "THAI_SENTIMENT_SERVER"
+
+
+def _json_default(value: Any) -> Any:
+    """แปลงค่าที่ json แปลงเองไม่ได้ (เช่น numpy scalar จาก sklearn) เป็นชนิดพื้นฐาน"""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class _Request:
+    """คำขอหนึ่งรายการที่รอในคิวของ ``MicroBatcher``"""
+
+    __slots__ = ("texts", "results", "error", "done", "submitted")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.results: Optional[List[Any]] = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+        self.submitted = time.monotonic()
+
+
+class MicroBatcher:
+    """รวมคำขอจากหลาย thread เป็น batch แล้วเรียก ``predict_batch`` ใน worker thread เดียว"""
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[str]], List[Any]],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: "deque[_Request]" = deque()
+        self._pending_texts = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        # metrics
+        self.in_flight = 0
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.errors = 0
+        self.max_observed_batch = 0
+        self.predict_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def start(self) -> "MicroBatcher":
+        with self._condition:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="sentiment-micro-batcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """หยุด worker (คำขอที่ค้างอยู่ในคิวจะถูกทำนายให้เสร็จก่อน)"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, texts: List[str], timeout: Optional[float] = None) -> List[Any]:
+        """ส่งข้อความเข้าคิวและรอผล (เรียงตามลำดับ ``texts``)"""
+        if not texts:
+            return []
+        request = _Request(list(texts))
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("micro-batcher is not running")
+            self._pending.append(request)
+            self._pending_texts += len(request.texts)
+            self._condition.notify_all()
+        if not request.done.wait(timeout):
+            raise TimeoutError("prediction timed out")
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def _next_batch(self) -> Optional[List[_Request]]:
+        """รอจนได้ batch (ครบ ``max_batch_size`` ข้อความหรือถึงกำหนดของคำขอแรก) None = หยุดทำงาน"""
+        with self._condition:
+            while self._running and not self._pending:
+                self._condition.wait()
+            if not self._pending:
+                return None
+
+            deadline = self._pending[0].submitted + self.max_wait
+            while self._running and self._pending_texts < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch: List[_Request] = []
+            count = 0
+            while self._pending and (not batch or count + len(self._pending[0].texts) <= self.max_batch_size):
+                request = self._pending.popleft()
+                batch.append(request)
+                count += len(request.texts)
+            self._pending_texts -= count
+            self.in_flight = count
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._process(batch)
+
+    def _process(self, batch: List[_Request]):
+        texts = [text for request in batch for text in request.texts]
+        started = time.monotonic()
+        try:
+            results = self._predict(texts)
+            offset = 0
+            for request in batch:
+                request.results = results[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+        except Exception as e:
+            # ทำนายทีละคำขอ เพื่อไม่ให้ข้อความที่มีปัญหาทำให้คำขออื่นใน batch ล้มเหลวไปด้วย
+            for request in batch:
+                try:
+                    request.results = self._predict(request.texts) if len(batch) > 1 else None
+                except Exception as request_error:
+                    request.error = request_error
+                if request.results is None and request.error is None:
+                    request.error = e
+        finished = time.monotonic()
+        for request in batch:
+            request.done.set()
+
+        with self._condition:
+            self.in_flight = 0
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += len(texts)
+            self.errors += sum(request.error is not None for request in batch)
+            self.max_observed_batch = max(self.max_observed_batch, len(texts))
+            self.predict_seconds += finished - started
+            self.wait_seconds += sum(started - request.submitted for request in batch)
+
+    def _predict(self, texts: List[str]) -> List[Any]:
+        results = self.predict_batch(texts)
+        if len(results) != len(texts):
+            raise ValueError(f"predict_batch returned {len(results)} results for {len(texts)} texts")
+        return results
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "queue_depth": self._pending_texts,
+                "queued_requests": len(self._pending),
+                "in_flight": self.in_flight,
+                "batches": self.batches,
+                "requests": self.requests,
+                "texts": self.texts,
+                "errors": self.errors,
+                "avg_batch_size": round(self.texts / self.batches, 3) if self.batches else 0.0,
+                "max_observed_batch": self.max_observed_batch,
+                "avg_predict_ms": round(self.predict_seconds * 1000 / self.batches, 3) if self.batches else 0.0,
+                "avg_queue_wait_ms": round(self.wait_seconds * 1000 / self.requests, 3) if self.requests else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000
+            }
+
+
+class SentimentInferenceServer:
+    """HTTP server ที่เป็นเจ้าของ ``AdvancedThaiSentimentAnalyzer`` หนึ่งชุดและ ``MicroBatcher`` ของมัน
+
+    ``analyzer`` ที่ยังไม่ได้ initialize จะถูกโหลดใน ``start`` (ระหว่างนั้น /health ตอบ ``loading``)
+    """
+
+    def __init__(
+        self,
+        analyzer=None,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        request_timeout: float = DEFAULT_TIMEOUT
+    ):
+        self.analyzer = analyzer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.request_timeout = request_timeout
+        self.batcher: Optional[MicroBatcher] = None
+        self.status = "loading"
+        self.started = time.time()
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+        self._serve_thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def load(self):
+        """โหลด analyzer (ถ้ายังไม่ได้โหลด) และเริ่ม micro-batcher"""
+        try:
+            if self.analyzer is None:
+                from ml_sentiment_analysis import AdvancedThaiSentimentAnalyzer
+                self.analyzer = AdvancedThaiSentimentAnalyzer()
+            if self.analyzer.ensemble_model is None:
+                self.analyzer.initialize()
+            self.batcher = MicroBatcher(
+                self.analyzer.ensemble_model.predict_batch, self.max_batch_size, self.max_wait
+            ).start()
+            self.status = "ok"
+        except Exception:
+            self.status = "error"
+            raise
+
+    def start(self) -> "SentimentInferenceServer":
+        """เริ่มรับคำขอใน thread เบื้องหลัง แล้วโหลดโมเดล (คืนเมื่อพร้อมใช้งาน)"""
+        self._serve_thread = threading.Thread(target=self.httpd.serve_forever, name="sentiment-inference-http", daemon=True)
+        self._serve_thread.start()
+        self.load()
+        return self
+
+    def serve_forever(self):
+        """เริ่ม server และทำงานจนกว่าจะถูกหยุด (Ctrl+C)"""
+        self.start()
+        print(f"[INFO] Sentiment inference server ready at {self.url}")
+        try:
+            while self._serve_thread.is_alive():
+                self._serve_thread.join(1.0)
+        except KeyboardInterrupt:
+            print("[INFO] Shutting down inference server...")
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.batcher is not None:
+            self.batcher.stop()
+        self.status = "stopped"
+
+    def __enter__(self) -> "SentimentInferenceServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    # === REQUEST HANDLERS ===
+
+    def health(self) -> Dict[str, Any]:
+        model_version = None
+        ensemble = getattr(self.analyzer, "ensemble_model", None)
+        if self.status == "ok" and hasattr(ensemble, "model_version"):
+            try:
+                model_version = ensemble.model_version()
+            except Exception:
+                model_version = None
+        return {
+            "status": self.status,
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "models": list(getattr(ensemble, "models", {}) or {}),
+            "model_version": model_version
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        metrics = self.batcher.metrics() if self.batcher is not None else {}
+        metrics["status"] = self.status
+        return metrics
+
+    def predict(self, texts: List[str]) -> List[Dict[str, Any]]:
+        return self.batcher.submit(texts, self.request_timeout)
+
+    def analyze(self, texts: List[str]) -> List[Dict[str, Any]]:
+        predictions = self.predict(texts)
+        return [self.analyzer.review(text, prediction) for text, prediction in zip(texts, predictions)]
+
+
+def _make_handler(server: SentimentInferenceServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, server.health())
+            elif self.path == "/metrics":
+                self._send(200, server.metrics())
+            else:
+                self._send(404, {"error": f"unknown endpoint {self.path}"})
+
+        def do_POST(self):
+            handlers = {"/predict": server.predict, "/analyze": server.analyze}
+            handler = handlers.get(self.path)
+            if handler is None:
+                self._send(404, {"error": f"unknown endpoint {self.path}"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                single = "text" in payload
+                texts = [payload["text"]] if single else payload["texts"]
+                if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                    raise ValueError("texts must be a list of strings")
+            except (ValueError, KeyError, TypeError) as e:
+                self._send(400, {"error": f"invalid request: {e}"})
+                return
+
+            if server.status != "ok":
+                self._send(503, {"error": f"server is {server.status}"})
+                return
+            try:
+                results = handler(texts)
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+                return
+            self._send(200, {"result": results[0]} if single else {"results": results})
+
+        def log_message(self, format, *args):
+            pass  # ไม่พิมพ์ access log ทุกคำขอ
+
+    return Handler
+
+
+class InferenceClient:
+    """client ของ ``SentimentInferenceServer`` ที่มี interface เดียวกับ model ใน ml_sentiment_analysis"""
+
+    def __init__(self, url: str, timeout: float = DEFAULT_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        data = None if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        request = urllib_request.Request(
+            self.url + path, data=data, headers={"Content-Type": "application/json; charset=utf-8"}
+        )
+        try:
+            with urllib_request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except urllib_error.HTTPError as e:
+            detail = e.read().decode("utf-8", errors="replace")
+            raise RuntimeError(f"inference server error {e.code}: {detail}") from e
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        if not texts:
+            return []
+        return self._request("/predict", {"texts": list(texts)})["results"]
+
+    def predict_sentiment(self, text: str) -> Dict[str, Any]:
+        return self._request("/predict", {"text": text})["result"]
+
+    def batch_analyze_with_review(self, texts: List[str]) -> List[Dict[str, Any]]:
+        if not texts:
+            return []
+        return self._request("/analyze", {"texts": list(texts)})["results"]
+
+    def analyze_with_review(self, text: str) -> Dict[str, Any]:
+        return self._request("/analyze", {"text": text})["result"]
+
+    def health(self) -> Dict[str, Any]:
+        try:
+            return self._request("/health")
+        except (RuntimeError, OSError) as e:
+            return {"status": "unavailable", "error": str(e)}
+
+    def metrics(self) -> Dict[str, Any]:
+        return self._request("/metrics")
+
+
+def get_inference_client() -> Optional[InferenceClient]:
+    """client ของ server ที่กำหนดใน ``THAI_SENTIMENT_SERVER`` (None ถ้าไม่ได้ตั้งค่า)"""
+    url = os.environ.get(SERVER_ENV_VAR)
+    return InferenceClient(url) if url else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching Thai sentiment inference server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT * 1000)
+    args = parser.parse_args()
+
+    SentimentInferenceServer(
+        host=args.host, port=args.port, max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000
+    ).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-pattern keyword automaton (Aho-Corasick)
+ตัวค้นหาคำสำคัญหลายคำพร้อมกันในการสแกนข้อความรอบเดียว
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton สำหรับค้นหาคำสำคัญทั้งหมดในการสแกนครั้งเดียว
+
+    แต่ละคำสำคัญผูกกับ tag ได้หลายตัว (เช่น ("emotion", "ดีใจ")) และคำเดียวกัน
+    ที่ถูกเพิ่มซ้ำจะคืน tag ซ้ำตามจำนวนครั้งที่เพิ่ม เพื่อให้นับคะแนนได้เท่ากับ
+    การวน ``keyword in text`` ทีละคำแบบเดิม
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._terminal: List[int] = [-1]  # keyword id ที่จบที่ state นี้
+        self._outputs: List[Tuple[int, ...]] = [()]
+        self.keywords: List[str] = []
+        self.tags: List[List[Any]] = []
+        self._keyword_ids: Dict[str, int] = {}
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def add(self, keyword: str, tag: Any) -> int:
+        """เพิ่มคำสำคัญพร้อม tag และคืน keyword id"""
+        if not keyword:
+            raise ValueError("keyword must be a non-empty string")
+
+        keyword_id = self._keyword_ids.get(keyword)
+        if keyword_id is None:
+            keyword_id = len(self.keywords)
+            self._keyword_ids[keyword] = keyword_id
+            self.keywords.append(keyword)
+            self.tags.append([])
+
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._terminal.append(-1)
+                    self._outputs.append(())
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._terminal[state] = keyword_id
+            self._built = False
+
+        self.tags[keyword_id].append(tag)
+        return keyword_id
+
+    def build(self) -> "KeywordAutomaton":
+        """คำนวณ failure links และ output ของแต่ละ state (BFS)"""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            own = (self._terminal[state],) if self._terminal[state] >= 0 else ()
+            self._outputs[state] = own + self._outputs[self._fail[state]]
+
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                queue.append(next_state)
+
+        self._built = True
+        return self
+
+    def to_tables(self) -> Dict[str, List[int]]:
+        """แปลง automaton เป็นตารางจำนวนเต็มแบบแบน สำหรับเขียนลงไฟล์
+
+        ``edge_start[s]:edge_start[s + 1]`` คือช่วงของ transition ของ state ``s``
+        ใน ``edge_char`` (code point) และ ``edge_next`` ส่วน ``output_start``
+        ชี้ช่วงของ keyword id ใน ``output_ids`` ในแบบเดียวกัน
+        """
+        if not self._built:
+            self.build()
+
+        tables: Dict[str, List[int]] = {
+            "fail": list(self._fail),
+            "edge_start": [0],
+            "edge_char": [],
+            "edge_next": [],
+            "output_start": [0],
+            "output_ids": []
+        }
+        for state, edges in enumerate(self._goto):
+            for char in sorted(edges):
+                tables["edge_char"].append(ord(char))
+                tables["edge_next"].append(edges[char])
+            tables["edge_start"].append(len(tables["edge_char"]))
+            tables["output_ids"].extend(self._outputs[state])
+            tables["output_start"].append(len(tables["output_ids"]))
+        return tables
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """คืน (ตำแหน่งสิ้นสุด, keyword id) ของทุก occurrence ในข้อความ"""
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in outputs[state]:
+                yield position, keyword_id
+
+    def find_keyword_ids(self, text: str) -> List[int]:
+        """คืน keyword id ที่พบในข้อความ (ไม่ซ้ำ เรียงตามตำแหน่งที่พบครั้งแรก)"""
+        found = {}
+        for _, keyword_id in self.iter_matches(text):
+            found[keyword_id] = None
+        return list(found)
+
+    def find_tags(self, text: str) -> List[Any]:
+        """คืน tag ของทุกคำสำคัญที่พบ (คำละครั้ง ตามแบบ ``keyword in text``)"""
+        tags = self.tags
+        return [tag for keyword_id in self.find_keyword_ids(text) for tag in tags[keyword_id]]
+
+    def count_tags(self, text: str) -> Dict[Any, int]:
+        """นับจำนวนคำสำคัญที่พบแยกตาม tag"""
+        counts: Dict[Any, int] = {}
+        for tag in self.find_tags(text):
+            counts[tag] = counts.get(tag, 0) + 1
+        return counts
+
+
+class TableKeywordAutomaton(KeywordAutomaton):
+    """automaton ที่อ่านจากตารางของ ``KeywordAutomaton.to_tables`` (เช่น memoryview ของไฟล์ที่ mmap)
+
+    ตารางไม่ถูกคัดลอกตอนสร้าง transition ของแต่ละ state จะถูกแปลงเป็น dict
+    เมื่อการสแกนเดินผ่าน state นั้นครั้งแรก process ที่โหลดไฟล์เดียวกันจึงใช้
+    หน้าหน่วยความจำร่วมกัน และเริ่มสแกนได้ทันทีโดยไม่ต้องสร้าง trie ใหม่
+    """
+
+    def __init__(self, tables: Dict[str, Sequence[int]], keywords: List[str], tags: List[List[Any]]):
+        self.keywords = keywords
+        self.tags = tags
+        self._keyword_ids: Dict[str, int] = {}  # ใช้เฉพาะตอน add ซึ่งตารางอ่านอย่างเดียว
+        self._tables = tables
+        self._fail = tables["fail"]
+        num_states = len(self._fail)
+        self._goto: List[Optional[Dict[str, int]]] = [None] * num_states
+        self._outputs: List[Optional[Tuple[int, ...]]] = [None] * num_states
+        self._built = True
+
+    def add(self, keyword: str, tag: Any) -> int:
+        raise TypeError("TableKeywordAutomaton is read-only; rebuild it from a KeywordAutomaton")
+
+    def build(self) -> "TableKeywordAutomaton":
+        return self
+
+    def _load_state(self, state: int) -> Dict[str, int]:
+        """แปลง transition และ output ของ state จากตารางเป็น dict/tuple"""
+        tables = self._tables
+        start, end = tables["edge_start"][state], tables["edge_start"][state + 1]
+        edges = dict(zip(map(chr, tables["edge_char"][start:end]), tables["edge_next"][start:end]))
+        start, end = tables["output_start"][state], tables["output_start"][state + 1]
+        self._outputs[state] = tuple(tables["output_ids"][start:end])
+        self._goto[state] = edges
+        return edges
+
+    def to_tables(self) -> Dict[str, List[int]]:
+        return {key: list(values) for key, values in self._tables.items()}
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        load_state = self._load_state
+        state = 0
+        edges = goto[0]
+        if edges is None:
+            edges = load_state(0)
+        for position, char in enumerate(text):
+            while state and char not in edges:
+                state = fail[state]
+                edges = goto[state]
+                if edges is None:
+                    edges = load_state(state)
+            state = edges.get(char, 0)
+            edges = goto[state]
+            if edges is None:
+                edges = load_state(state)
+            for keyword_id in outputs[state]:
+                yield position, keyword_id
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Time-windowed live sentiment aggregation
+สรุป sentiment แบบเลื่อนหน้าต่างเวลา (เช่น 1 นาทีล่าสุด / 1 ชั่วโมงล่าสุด) ระหว่างที่ crawler ยังทำงานอยู่
+
+แต่ละหน้าต่างเป็น ring buffer ขนาดคงที่ ``buckets`` ช่อง แต่ละช่องเก็บตัวนับของช่วงเวลา
+``seconds / buckets`` วินาที (จำนวน, sentiment, อารมณ์, ผลรวม confidence, sarcasm) ช่องที่เก่ากว่า
+หน้าต่างถูกล้างเมื่อถูกใช้ซ้ำ หน่วยความจำจึงขึ้นกับจำนวนช่องและจำนวน source ไม่ใช่จำนวน comment
+สถิติแยกตาม source (เช่น ``source_query``) จำกัดไว้ที่ ``max_sources`` source ที่ใช้ล่าสุด
+
+อ่านผลได้ทาง ``snapshot()`` หรือให้ thread เบื้องหลังเขียน snapshot ลงไฟล์ JSON ทุก ``interval`` วินาที
+(``start_snapshot_writer``) เพื่อให้ dashboard หรือสคริปต์อื่นอ่านได้ระหว่างการดึงข้อมูล
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from log_utils import get_logger
+from sentiment_stats import result_fields, write_json_atomic
+
+logger = get_logger("live_stats")
+
+DEFAULT_WINDOWS = {"1m": 60, "1h": 3600}
+DEFAULT_BUCKETS = 60
+DEFAULT_MAX_SOURCES = 1000
+DEFAULT_TOP_EMOTIONS = 10
+SNAPSHOT_INTERVAL = 5.0
+
+
+class _Bucket:
+    """ตัวนับของหนึ่งช่องเวลาใน ring buffer"""
+
+    __slots__ = ("epoch", "total", "sentiments", "emotions", "confidence_sum", "confidence_count", "sarcastic")
+
+    def __init__(self, epoch: int):
+        self.reset(epoch)
+
+    def reset(self, epoch: int):
+        self.epoch = epoch
+        self.total = 0
+        self.sentiments: Dict[str, int] = {}
+        self.emotions: Dict[str, int] = {}
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
+        self.sarcastic = 0
+
+
+class _Ring:
+    """ring buffer ของหนึ่งหน้าต่างเวลา (ช่องถูกสร้างเมื่อใช้ครั้งแรก)"""
+
+    __slots__ = ("width", "slots")
+
+    def __init__(self, seconds: float, buckets: int):
+        self.width = seconds / buckets
+        self.slots: List[Optional[_Bucket]] = [None] * buckets
+
+    def bucket(self, timestamp: float) -> Optional[_Bucket]:
+        """ช่องของเวลา ``timestamp`` (None ถ้าช่องนั้นถูกใช้โดยช่วงเวลาที่ใหม่กว่าแล้ว)"""
+        epoch = int(timestamp // self.width)
+        index = epoch % len(self.slots)
+        slot = self.slots[index]
+        if slot is None:
+            slot = self.slots[index] = _Bucket(epoch)
+        elif slot.epoch < epoch:
+            slot.reset(epoch)
+        elif slot.epoch > epoch:
+            return None
+        return slot
+
+    def live(self, now: float) -> Iterable[_Bucket]:
+        """ช่องที่อยู่ในหน้าต่างที่สิ้นสุด ณ ``now``"""
+        newest = int(now // self.width)
+        oldest = newest - len(self.slots)
+        return [slot for slot in self.slots if slot is not None and oldest < slot.epoch <= newest]
+
+
+def _summarize(buckets: Iterable[_Bucket], seconds: float, top_emotions: int) -> Dict[str, Any]:
+    """รวมตัวนับของช่องในหน้าต่างเป็นสรุปหนึ่งชุด"""
+    total = 0
+    sentiments: Dict[str, int] = {}
+    emotions: Dict[str, int] = {}
+    confidence_sum = 0.0
+    confidence_count = 0
+    sarcastic = 0
+    for bucket in buckets:
+        total += bucket.total
+        for key, count in bucket.sentiments.items():
+            sentiments[key] = sentiments.get(key, 0) + count
+        for key, count in bucket.emotions.items():
+            emotions[key] = emotions.get(key, 0) + count
+        confidence_sum += bucket.confidence_sum
+        confidence_count += bucket.confidence_count
+        sarcastic += bucket.sarcastic
+
+    positive = sentiments.get("positive", 0)
+    negative = sentiments.get("negative", 0)
+    return {
+        "total": total,
+        "per_minute": round(total * 60.0 / seconds, 3),
+        "sentiment_counts": sentiments,
+        "sentiment_distribution": {key: round(count / total, 3) for key, count in sentiments.items()} if total else {},
+        "net_sentiment": round((positive - negative) / total, 3) if total else 0.0,
+        "top_emotions": dict(sorted(emotions.items(), key=lambda item: item[1], reverse=True)[:top_emotions]),
+        "avg_confidence": round(confidence_sum / confidence_count, 3) if confidence_count else 0.0,
+        "sarcasm_rate": round(sarcastic / total, 3) if total else 0.0
+    }
+
+
+class WindowedSentimentAggregator:
+    """สถิติ sentiment แบบหน้าต่างเวลาเลื่อน รวมทั้งหมดและแยกตาม source (thread-safe)
+
+    ``update`` รับผลได้ทุกรูปแบบที่ ``sentiment_stats.result_fields`` รองรับ
+    (comment ที่มี ``sentiment_analysis``, ผลของ ``batch_advanced_sentiment_analysis`` ฯลฯ)
+    """
+
+    def __init__(
+        self,
+        windows: Optional[Dict[str, float]] = None,
+        buckets: int = DEFAULT_BUCKETS,
+        max_sources: int = DEFAULT_MAX_SOURCES,
+        source_field: str = "source_query",
+        top_emotions: int = DEFAULT_TOP_EMOTIONS
+    ):
+        if buckets < 1:
+            raise ValueError("buckets must be at least 1")
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        self.buckets = buckets
+        self.max_sources = max_sources
+        self.source_field = source_field
+        self.top_emotions = top_emotions
+        self.started = time.time()
+        self.total = 0
+        self._overall = self._new_rings()
+        self._sources: "OrderedDict[str, Dict[str, _Ring]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._stop_writer = threading.Event()
+
+    def _new_rings(self) -> Dict[str, _Ring]:
+        return {name: _Ring(seconds, self.buckets) for name, seconds in self.windows.items()}
+
+    def _source_rings(self, source: str) -> Dict[str, _Ring]:
+        rings = self._sources.get(source)
+        if rings is None:
+            rings = self._sources[source] = self._new_rings()
+            if len(self._sources) > self.max_sources:
+                self._sources.popitem(last=False)  # ทิ้ง source ที่ไม่ได้อัปเดตนานที่สุด
+        else:
+            self._sources.move_to_end(source)
+        return rings
+
+    def update(self, result: Dict[str, Any], source: Optional[str] = None, timestamp: Optional[float] = None):
+        """เพิ่มผลหนึ่งรายการ ณ เวลา ``timestamp`` (ค่าเริ่มต้นคือเวลาปัจจุบัน)
+
+        ``source`` ค่าเริ่มต้นอ่านจาก ``result[source_field]`` ผลที่เก่ากว่าหน้าต่างจะไม่ถูกนับในหน้าต่างนั้น
+        """
+        fields = result_fields(result)
+        if fields is None:
+            return
+        if timestamp is None:
+            timestamp = time.time()
+        if source is None:
+            source = result.get(self.source_field)
+
+        sentiment = fields["sentiment"] if isinstance(fields["sentiment"], str) else None
+        labels = [label for label in fields["labels"] if isinstance(label, str)]
+        confidence = fields["confidence"]
+        sarcastic = bool(fields["sarcastic"])
+
+        with self._lock:
+            self.total += 1
+            ring_sets = [self._overall]
+            if source is not None:
+                ring_sets.append(self._source_rings(str(source)))
+            for rings in ring_sets:
+                for ring in rings.values():
+                    bucket = ring.bucket(timestamp)
+                    if bucket is None:
+                        continue
+                    bucket.total += 1
+                    if sentiment:
+                        bucket.sentiments[sentiment] = bucket.sentiments.get(sentiment, 0) + 1
+                    for label in labels:
+                        bucket.emotions[label] = bucket.emotions.get(label, 0) + 1
+                    if confidence is not None:
+                        bucket.confidence_sum += confidence
+                        bucket.confidence_count += 1
+                    if sarcastic:
+                        bucket.sarcastic += 1
+
+    def update_many(self, results: Iterable[Dict[str, Any]], source: Optional[str] = None) -> "WindowedSentimentAggregator":
+        for result in results:
+            self.update(result, source)
+        return self
+
+    def observe(self, results: Iterable[Dict[str, Any]], source: Optional[str] = None) -> Iterable[Dict[str, Any]]:
+        """ส่งผลต่อทีละรายการพร้อมนับสถิติ (ใช้ครอบ stream เช่น ``analyze_social_media_stream``)"""
+        for result in results:
+            self.update(result, source)
+            yield result
+
+    @property
+    def sources(self) -> List[str]:
+        with self._lock:
+            return list(self._sources)
+
+    def snapshot(self, now: Optional[float] = None, include_sources: bool = True) -> Dict[str, Any]:
+        """สรุปของทุกหน้าต่าง ณ เวลา ``now`` ทั้งภาพรวม (``overall``) และแยกตาม source (``sources``)"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            snapshot: Dict[str, Any] = {
+                "generated_at": datetime.fromtimestamp(now).isoformat(),
+                "uptime_seconds": round(now - self.started, 3),
+                "total_seen": self.total,
+                "windows": dict(self.windows),
+                "overall": {
+                    name: _summarize(ring.live(now), self.windows[name], self.top_emotions)
+                    for name, ring in self._overall.items()
+                }
+            }
+            if include_sources:
+                snapshot["sources"] = {
+                    source: {
+                        name: _summarize(ring.live(now), self.windows[name], self.top_emotions)
+                        for name, ring in rings.items()
+                    }
+                    for source, rings in self._sources.items()
+                }
+        return snapshot
+
+    def write_snapshot(self, path: str, now: Optional[float] = None) -> str:
+        """เขียน snapshot ลงไฟล์ JSON แบบ atomic"""
+        return write_json_atomic(path, self.snapshot(now))
+
+    # === BACKGROUND WRITER ===
+
+    def start_snapshot_writer(self, path: str, interval: float = SNAPSHOT_INTERVAL) -> threading.Thread:
+        """เริ่ม thread เบื้องหลังที่เขียน snapshot ลง ``path`` ทุก ``interval`` วินาที"""
+        if self._writer is not None and self._writer.is_alive():
+            raise RuntimeError("snapshot writer is already running")
+
+        def write():
+            # ข้อผิดพลาดใดๆ ต้องไม่ทำให้ thread หยุด (ไฟล์จะหยุดอัปเดตโดยไม่มีใครรู้)
+            try:
+                self.write_snapshot(path)
+            except Exception as e:
+                logger.warning("Failed to write live sentiment snapshot to %s: %s", path, e)
+
+        def run():
+            while not self._stop_writer.wait(interval):
+                write()
+            write()  # snapshot สุดท้ายเมื่อหยุด
+
+        self._stop_writer.clear()
+        self._writer = threading.Thread(target=run, name="live-sentiment-snapshot", daemon=True)
+        self._writer.start()
+        return self._writer
+
+    def stop_snapshot_writer(self, timeout: Optional[float] = None):
+        """หยุด thread เขียน snapshot (เขียน snapshot สุดท้ายก่อนหยุด)"""
+        if self._writer is None:
+            return
+        self._stop_writer.set()
+        self._writer.join(timeout)
+        self._writer = None
+
+    def __enter__(self) -> "WindowedSentimentAggregator":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop_snapshot_writer()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leveled logging for the sentiment pipeline
+logger แยกตาม subsystem (เช่น scoring, comments) ที่ปิด DEBUG ไว้โดยค่าเริ่มต้น
+
+ทุกข้อความส่ง argument แยก (``logger.debug("... %s", value)``) เพื่อให้การจัดรูปแบบ
+เกิดขึ้นเฉพาะเมื่อระดับนั้นเปิดอยู่ เปิดระดับแต่ละ subsystem ได้ด้วย
+``configure_logging("scoring=DEBUG")`` หรือ environment variable ``THAI_SENTIMENT_LOG``
+เช่น ``THAI_SENTIMENT_LOG=DEBUG`` หรือ ``THAI_SENTIMENT_LOG=scoring=DEBUG,comments=WARNING``
+"""
+
+import logging
+import os
+import sys
+from typing import Dict, Optional, Set
+
+LOGGER_NAME = "thai_sentiment"
+ENV_VAR = "THAI_SENTIMENT_LOG"
+
+# ระดับเริ่มต้น: แสดงเฉพาะคำเตือน/ข้อผิดพลาด ยกเว้นความคืบหน้าของการดึงคอมเมนต์
+DEFAULT_LEVELS: Dict[str, str] = {"": "WARNING", "comments": "INFO"}
+
+_handler: Optional[logging.Handler] = None
+_configured: Set[str] = set()  # subsystem ที่เคยตั้งระดับไว้ (ต้องรีเซ็ตเมื่อตั้งค่าใหม่)
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """logger ของ subsystem (``thai_sentiment.<subsystem>``)"""
+    _ensure_handler()
+    return logging.getLogger(f"{LOGGER_NAME}.{subsystem}")
+
+
+def _ensure_handler():
+    """ติดตั้ง handler ที่เขียนลง stdout ในรูปแบบ ``[LEVEL] message`` แบบเดิม (ครั้งเดียว)"""
+    global _handler
+    if _handler is not None:
+        return
+
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+    root = logging.getLogger(LOGGER_NAME)
+    root.addHandler(_handler)
+    root.propagate = False
+    try:
+        configure_logging(os.environ.get(ENV_VAR))
+    except ValueError as e:
+        configure_logging()
+        root.warning("ignoring %s: %s", ENV_VAR, e)
+
+
+def parse_levels(spec: Optional[str]) -> Dict[str, str]:
+    """แปลง ``"DEBUG"`` หรือ ``"scoring=DEBUG,comments=WARNING"`` เป็น {subsystem: level}"""
+    levels: Dict[str, str] = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        subsystem, _, level = part.rpartition("=")
+        level = level.strip().upper()
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Unknown log level: {level}")
+        levels[subsystem.strip()] = level
+    return levels
+
+
+def configure_logging(spec: Optional[str] = None, **levels: str):
+    """ตั้งระดับ log ต่อ subsystem (``""`` คือทุก subsystem) ทับค่าเริ่มต้น
+
+    ตัวอย่าง: ``configure_logging("DEBUG")``, ``configure_logging(scoring="DEBUG")``
+    """
+    _ensure_handler()
+    merged = dict(DEFAULT_LEVELS)
+    parsed = parse_levels(spec)
+    parsed.update({subsystem: level.upper() for subsystem, level in levels.items()})
+    if "" in parsed:
+        # ระดับรวมที่ระบุเองใช้กับทุก subsystem ที่ไม่ได้ระบุแยก
+        merged = {"": parsed[""]}
+    merged.update(parsed)
+
+    for subsystem in _configured | set(DEFAULT_LEVELS) | set(merged):
+        name = f"{LOGGER_NAME}.{subsystem}" if subsystem else LOGGER_NAME
+        logging.getLogger(name).setLevel(merged.get(subsystem, logging.NOTSET))
+    _configured.update(merged)
@@ -7,15 +7,32 @@ Advanced Thai Sentiment Analysis with Machine Learning Models
 
 import os
 import re
+import copy
 import json
 import pickle
+import random
+import time
+import uuid
 import numpy as np
 import warnings
 import sys
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
+from length_batching import DEFAULT_MAX_BATCH_SIZE, DEFAULT_TOKEN_BUDGET, run_length_buckets
+from log_utils import get_logger
+from parallel_batch import DEFAULT_CHUNK_SIZE
+from result_cache import copy_result, get_result_cache
+from sentiment_cascade import (DEFAULT_ML_MARGIN, DEFAULT_RULE_MARGIN, CascadeSentimentModel, RuleBasedSentimentModel,
+                               build_default_cascade)
+from token_cache import TokenCache, get_token_cache, tokenize_many
+
+logger = get_logger("inference")
+
 # Fix encoding issues on Windows
 if sys.platform.startswith('win'):
     import locale
@@ -46,8 +63,8 @@ warnings.filterwarnings('ignore')
 
 # --- ML Libraries ---
 try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.linear_model import LogisticRegression
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
     from sklearn.ensemble import RandomForestClassifier
     from sklearn.svm import SVC
     from sklearn.model_selection import train_test_split, cross_val_score
@@ -116,9 +133,15 @@ def clean_unicode_text(text: str) -> str:
         return re.sub(r'[^\x00-\x7F]+', ' ', text).strip()
 
 class ThaiTextPreprocessor:
-    """ตัวประมวลผลข้อความภาษาไทยล่วงหน้า"""
+    """ตัวประมวลผลข้อความภาษาไทยล่วงหน้า
+
+    ผลตัดคำผ่าน token cache ที่ใช้ร่วมกัน (token_cache.py) ``workers`` คือจำนวน process ของ
+    ``tokenize_many``/``preprocess_many`` เมื่อไม่ระบุ (1 = ตัดคำใน process เดียว, 0 = จำนวน CPU)
+    """
     
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = 1, token_cache: Optional[TokenCache] = None):
+        self.workers = workers
+        self.token_cache = token_cache if token_cache is not None else get_token_cache()
         self.stop_words = set()
         if PYTHAINLP_AVAILABLE:
             # Convert frozenset to set to allow updates
@@ -163,15 +186,22 @@ class ThaiTextPreprocessor:
     
     def tokenize(self, text: str) -> List[str]:
         """แยกคำภาษาไทย"""
-        text = self.clean_text(text)
-        
-        if PYTHAINLP_AVAILABLE:
-            tokens = word_tokenize(text, engine='newmm')
-        else:
-            # Fallback: split by spaces
-            tokens = text.split()
-        
-        # กรองคำที่ไม่ต้องการ
+        # ตัดคำด้วย newmm (ไม่มี pythainlp: แยกด้วยช่องว่าง) ผ่าน cache
+        return self._filter_tokens(self.token_cache.segment(self.clean_text(text), 'newmm'))
+    
+    def tokenize_many(self, texts: List[str], workers: Optional[int] = None) -> List[List[str]]:
+        """แยกคำหลายข้อความ: ค้น cache ทั้ง batch แล้วตัดเฉพาะข้อความที่ยังไม่มี
+
+        ``workers``: None = ``self.workers``, 0 = จำนวน CPU, มากกว่า 1 = จำนวน process
+        """
+        segmented = tokenize_many(
+            [self.clean_text(text) for text in texts], 'newmm',
+            workers=self.workers if workers is None else workers, cache=self.token_cache
+        )
+        return [self._filter_tokens(tokens) for tokens in segmented]
+    
+    def _filter_tokens(self, tokens: List[str]) -> List[str]:
+        """กรองคำที่ไม่ต้องการ"""
         filtered_tokens = []
         for token in tokens:
             token = token.strip()
@@ -187,6 +217,10 @@ class ThaiTextPreprocessor:
         """ประมวลผลข้อความให้พร้อมสำหรับ ML"""
         tokens = self.tokenize(text)
         return ' '.join(tokens)
+    
+    def preprocess_many(self, texts: List[str], workers: Optional[int] = None) -> List[str]:
+        """``preprocess`` หลายข้อความผ่าน ``tokenize_many``"""
+        return [' '.join(tokens) for tokens in self.tokenize_many(texts, workers)]
 
 class ThaiSentimentMLModel:
     """Thai Sentiment Analysis ML Model"""
@@ -248,8 +282,7 @@ class ThaiSentimentMLModel:
     
     def prepare_training_data(self, comments: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
         """เตรียมข้อมูลสำหรับฝึกสอน"""
-        texts = []
-        labels = []
+        candidates = []
         
         for comment in comments:
             text = comment.get('text', '')
@@ -280,7 +313,13 @@ class ThaiSentimentMLModel:
             if any(indicator in text_lower for indicator in complaint_indicators):
                 label = 'negative'
             
-            processed_text = self.preprocessor.preprocess(text)
+            candidates.append((text, label))
+        
+        # ตัดคำทั้งชุดครั้งเดียว (ผ่าน token cache และหลาย process ถ้าข้อมูลมาก)
+        texts = []
+        labels = []
+        processed_texts = self.preprocessor.preprocess_many([text for text, _ in candidates], workers=0)
+        for processed_text, (_, label) in zip(processed_texts, candidates):
             if len(processed_text.strip()) > 5:  # มีความยาวพอสมควร
                 texts.append(processed_text)
                 labels.append(label)
@@ -327,39 +366,81 @@ class ThaiSentimentMLModel:
             'test_accuracy': test_score,
             'model_type': self.model_type
         }
-    
+
+    def train_soft(
+        self,
+        texts: List[str],
+        probabilities: List[Dict[str, float]],
+        min_weight: float = 1e-3
+    ) -> Dict[str, Any]:
+        """ฝึกสอนจาก soft label (probability ของ teacher เช่น ensemble) แทน label เดียว
+
+        แต่ละข้อความถูกใช้หนึ่งแถวต่อ label โดยมี probability เป็น sample weight (เทียบเท่า cross-entropy
+        กับ soft target) vectorizer ถูก fit กับข้อความแต่ละข้อความครั้งเดียว และไม่ใช้ class_weight='balanced'
+        เพื่อให้ calibration ตาม teacher
+        """
+        if self.pipeline is None:
+            self.create_model()
+        if len(texts) != len(probabilities):
+            raise ValueError("จำนวนข้อความและ soft label ไม่เท่ากัน")
+
+        processed_texts = self.preprocessor.preprocess_many(texts, workers=0)
+        features = self.vectorizer.fit_transform(processed_texts)
+
+        rows, labels, weights = [], [], []
+        for index, distribution in enumerate(probabilities):
+            for label in self.label_mapping:
+                weight = float(distribution.get(label, 0.0))
+                if weight >= min_weight:
+                    rows.append(index)
+                    labels.append(label)
+                    weights.append(weight)
+        if len(set(labels)) < 2:
+            raise ValueError("soft label ต้องมีอย่างน้อย 2 label")
+
+        safe_print(f"[INFO] ฝึกสอน {self.model_type} จาก soft label: {len(texts)} ข้อความ, {len(rows)} แถว")
+        self.model.set_params(class_weight=None)
+        self.model.fit(features[rows], labels, sample_weight=weights)
+
+        return {
+            'samples': len(texts),
+            'weighted_rows': len(rows),
+            'model_type': self.model_type
+        }
+
     def predict_sentiment(self, text: str) -> Dict[str, Any]:
         """ทำนาย sentiment"""
+        return self.predict_batch([text])[0]
+    
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """ทำนายหลายข้อความ: vectorize และเรียก ``predict_proba`` ครั้งเดียวทั้ง batch
+        แล้วเลือก label จาก probability สูงสุด (ผลแต่ละรายการรูปแบบเดียวกับ ``predict_sentiment``)"""
         if self.pipeline is None:
             raise ValueError("Model ยังไม่ได้ฝึกสอน")
-        
-        processed_text = self.preprocessor.preprocess(text)
-        
-        # ทำนาย
-        prediction = self.pipeline.predict([processed_text])[0]
-        probabilities = self.pipeline.predict_proba([processed_text])[0]
-        
-        # แปลงผลลัพธ์
-        sentiment = prediction
-        confidence = max(probabilities)
-        
-        # สร้าง score
-        prob_dict = dict(zip(self.pipeline.classes_, probabilities))
-        sentiment_score = (
-            prob_dict.get('positive', 0) - prob_dict.get('negative', 0)
-        )
-        
-        return {
-            'sentiment': sentiment,
-            'confidence': confidence,
-            'sentiment_score': sentiment_score,
-            'probabilities': {
-                'positive': prob_dict.get('positive', 0),
-                'neutral': prob_dict.get('neutral', 0), 
-                'negative': prob_dict.get('negative', 0)
-            },
-            'model_type': 'ml_' + self.model_type
-        }
+        if not texts:
+            return []
+        
+        processed_texts = self.preprocessor.preprocess_many(texts)
+        probabilities = self.pipeline.predict_proba(processed_texts)
+        classes = self.pipeline.classes_
+        best = probabilities.argmax(axis=1)
+        
+        results = []
+        for row, label_index in zip(probabilities, best):
+            prob_dict = dict(zip(classes, row))
+            results.append({
+                'sentiment': classes[label_index],
+                'confidence': row[label_index],
+                'sentiment_score': prob_dict.get('positive', 0) - prob_dict.get('negative', 0),
+                'probabilities': {
+                    'positive': prob_dict.get('positive', 0),
+                    'neutral': prob_dict.get('neutral', 0), 
+                    'negative': prob_dict.get('negative', 0)
+                },
+                'model_type': 'ml_' + self.model_type
+            })
+        return results
+
     def save_model(self, filepath: str):
         """บันทึก model"""
         model_data = {
@@ -389,10 +470,186 @@ class ThaiSentimentMLModel:
         except Exception as e:
             safe_print(f"[ERROR] ไม่สามารถโหลด model: {e}")
 
+class _OnlinePipeline:
+    """vectorizer (ไม่มี state) + classifier ที่ fit แล้ว ใช้แทน sklearn Pipeline ใน predict_batch"""
+
+    def __init__(self, vectorizer, classifier):
+        self.vectorizer = vectorizer
+        self.classifier = classifier
+
+    @property
+    def classes_(self):
+        return self.classifier.classes_
+
+    def predict_proba(self, texts: List[str]):
+        return self.classifier.predict_proba(self.vectorizer.transform(texts))
+
+class OnlineThaiSentimentModel(ThaiSentimentMLModel):
+    """ThaiSentimentMLModel ที่เรียนรู้เพิ่มทีละ batch (HashingVectorizer + SGDClassifier.partial_fit)
+
+    vectorizer ไม่มี state จึงรับคำใหม่ได้โดยไม่ต้อง fit ใหม่ แต่ละ update ผสมตัวอย่างเก่าจาก replay buffer
+    (ขนาดจำกัด) เพื่อลดการลืม และเก็บ snapshot ของ ``max_snapshots`` เวอร์ชันล่าสุดไว้ย้อนกลับได้
+    (``snapshot_dir`` เก็บลงดิสก์ด้วย) classifier ถูก fit บนสำเนาแล้วสลับเข้าทีเดียว
+    ผู้ที่ทำนายอยู่ระหว่าง update จึงไม่เห็นโมเดลที่ fit ไม่ครบ
+    """
+
+    def __init__(
+        self,
+        replay_size: int = 2000,
+        replay_ratio: float = 1.0,
+        max_snapshots: int = 5,
+        snapshot_dir: Optional[str] = None,
+        n_features: int = 2 ** 18,
+        seed: int = 42
+    ):
+        super().__init__(model_type="sgd")
+        self.replay_ratio = replay_ratio
+        self.snapshot_dir = snapshot_dir
+        self.n_features = n_features
+        self.replay = deque(maxlen=replay_size)  # (ข้อความที่ preprocess แล้ว, label)
+        self.snapshots = deque(maxlen=max_snapshots)
+        self.version = 0
+        self.samples_seen = 0
+        self.model_id = uuid.uuid4().hex[:8]  # แยกเวอร์ชันของแต่ละ process ใน prediction store
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def create_model(self):
+        """สร้าง HashingVectorizer + SGDClassifier (pipeline ถูกตั้งหลัง update แรก)"""
+        if not SKLEARN_AVAILABLE:
+            raise ImportError("sklearn is required for ML models")
+        self.vectorizer = HashingVectorizer(
+            n_features=self.n_features,
+            ngram_range=(1, 2),
+            alternate_sign=False
+        )
+        self.model = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42)
+
+    def model_version(self) -> str:
+        return f"online-{self.model_type}:{self.model_id}:v{self.version}"
+
+    def prepare_training_data(self, comments: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+        """ใช้ ``label`` ที่ระบุมา (เช่นจาก feedback) ถ้ามี ไม่เช่นนั้นใช้กฎเดียวกับ ThaiSentimentMLModel"""
+        texts = []
+        labels = []
+        for comment in comments:
+            label = comment.get('label')
+            if label in self.label_mapping and comment.get('text'):
+                processed_text = self.preprocessor.preprocess(comment['text'])
+                if processed_text.strip():
+                    texts.append(processed_text)
+                    labels.append(label)
+            else:
+                comment_texts, comment_labels = super().prepare_training_data([comment])
+                texts.extend(comment_texts)
+                labels.extend(comment_labels)
+        return texts, labels
+
+    def train(self, comments: List[Dict[str, Any]], test_size: float = 0.2):
+        """เท่ากับ ``update`` (โมเดลนี้เรียนรู้ทีละ batch)"""
+        return self.update(comments)
+
+    def update(self, comments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """partial_fit กับข้อมูลใหม่รวมกับตัวอย่างสุ่มจาก replay buffer แล้วสร้างเวอร์ชันใหม่"""
+        with self._lock:
+            if self.model is None:
+                self.create_model()
+            texts, labels = self.prepare_training_data(comments)
+            if not texts:
+                return {'version': self.version, 'samples': 0, 'replayed': 0, 'seconds': 0.0}
+
+            replayed = self._random.sample(list(self.replay), min(len(self.replay), int(len(texts) * self.replay_ratio)))
+            batch_texts = texts + [text for text, _ in replayed]
+            batch_labels = labels + [label for _, label in replayed]
+
+            started = time.perf_counter()
+            classifier = copy.deepcopy(self.model)
+            classifier.partial_fit(self.vectorizer.transform(batch_texts), batch_labels, classes=list(self.label_mapping))
+            self._activate(classifier, self.version + 1)
+            self.replay.extend(zip(texts, labels))
+            self.samples_seen += len(texts)
+            self._snapshot()
+
+            return {
+                'version': self.version,
+                'samples': len(texts),
+                'replayed': len(replayed),
+                'seconds': round(time.perf_counter() - started, 4)
+            }
+
+    def _activate(self, classifier, version: int):
+        self.model = classifier
+        self.pipeline = _OnlinePipeline(self.vectorizer, classifier)
+        self.version = version
+
+    def _snapshot_path(self, version: int) -> str:
+        return os.path.join(self.snapshot_dir, f"online_{self.model_id}_v{version}.pkl")
+
+    def _snapshot(self):
+        # classifier ไม่ถูกแก้หลังสลับเข้า (update ใหม่ fit บนสำเนา) จึงเก็บ reference ได้โดยตรง
+        if len(self.snapshots) == self.snapshots.maxlen and self.snapshot_dir:
+            evicted = self._snapshot_path(self.snapshots[0]['version'])
+            if os.path.exists(evicted):
+                os.remove(evicted)
+        snapshot = {
+            'version': self.version,
+            'classifier': self.model,
+            'samples_seen': self.samples_seen,
+            'created_at': datetime.now().isoformat()
+        }
+        self.snapshots.append(snapshot)
+
+        if self.snapshot_dir:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            with open(self._snapshot_path(self.version), 'wb') as f:
+                pickle.dump(dict(snapshot, model_id=self.model_id, n_features=self.n_features), f)
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        """snapshot ที่เก็บไว้ (ไม่รวม classifier)"""
+        return [{key: value for key, value in snapshot.items() if key != 'classifier'} for snapshot in self.snapshots]
+
+    def rollback(self, version: Optional[int] = None) -> int:
+        """ใช้ classifier ของ snapshot ``version`` (ค่าเริ่มต้น: เวอร์ชันก่อนหน้า) เป็นเวอร์ชันใหม่
+
+        เลขเวอร์ชันเพิ่มขึ้นเสมอ ผลที่เก็บใน prediction store ของเวอร์ชันเดิมจึงไม่ถูกใช้ผิด
+        """
+        with self._lock:
+            candidates = [snapshot for snapshot in self.snapshots if snapshot['version'] != self.version]
+            if version is not None:
+                candidates = [snapshot for snapshot in candidates if snapshot['version'] == version]
+            if not candidates:
+                raise ValueError(f"ไม่พบ snapshot ที่จะย้อนกลับ: {version}")
+            restored = candidates[-1]
+            self._activate(restored['classifier'], self.version + 1)
+            self._snapshot()
+            safe_print(f"[INFO] ย้อน online model เป็น v{restored['version']} (เวอร์ชันใหม่ v{self.version})")
+            return self.version
+
+    def load_snapshot(self, path: str):
+        """โหลด snapshot ที่บันทึกใน ``snapshot_dir``"""
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+        with self._lock:
+            self.n_features = snapshot['n_features']
+            self.create_model()
+            self.model_id = snapshot['model_id']
+            self.samples_seen = snapshot['samples_seen']
+            self._activate(snapshot['classifier'], snapshot['version'])
+
 class ThaiTransformerModel:
     """Thai Sentiment Analysis with Transformer Models from Hugging Face"""
     MAX_LEN = 512  # ป้องกันข้อความยาวเกิน
-    def __init__(self, model_name: str = "twitter-roberta"):        # รายการโมเดลที่เป็น public และไม่ต้องการ authentication
+    def __init__(
+        self,
+        model_name: str = "twitter-roberta",
+        prediction_store=None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        backend: str = "pytorch",
+        onnx_dir: Optional[str] = None,
+        quantize: bool = True
+    ):
+        # รายการโมเดลที่เป็น public และไม่ต้องการ authentication
         self.available_models = {
             # Multilingual sentiment models (public)
             "twitter-roberta": "cardiffnlp/twitter-roberta-base-sentiment-latest",
@@ -415,6 +672,16 @@ class ThaiTransformerModel:
         self.tokenizer = None
         self.model = None
         self.pipeline = None
+        self.cache_version = None  # เวอร์ชันโมเดลใน key ของ result cache (ตั้งตอน initialize)
+        self.prediction_store = prediction_store  # PredictionStore (optional) เก็บผลทำนายลงดิสก์
+        self.token_budget = token_budget  # token หลัง padding สูงสุดต่อ bucket ของ predict_batch
+        self.max_batch_size = max_batch_size
+        self.last_batch_stats: List[Dict[str, Any]] = []  # throughput ของแต่ละ bucket ใน predict_batch ล่าสุด
+        if backend not in ("pytorch", "onnx"):
+            raise ValueError(f"Unsupported backend: {backend}")
+        self.backend = backend  # "onnx" = onnxruntime + int8 (ดู onnx_backend.py)
+        self.onnx_dir = onnx_dir
+        self.quantize = quantize
         self.preprocessor = ThaiTextPreprocessor()        
         self.fallback_models = [
             "cardiffnlp/twitter-roberta-base-sentiment-latest",  # Public Twitter sentiment model
@@ -426,8 +693,16 @@ class ThaiTransformerModel:
         # ตัดข้อความที่ยาวเกิน max_len ตัวอักษร (หรือจะใช้ tokenizer ตัดก็ได้)
         return text[:max_len]
 
+    def model_version(self) -> str:
+        """ชื่อโมเดลที่โหลดจริงพร้อม revision (commit hash ของ HF ถ้ามี) ใช้เป็น key ของ cache"""
+        version = self.cache_version or self.model_name
+        revision = getattr(getattr(self.model, 'config', None), '_commit_hash', None)
+        return f"{version}@{revision}" if revision else version
+
     def initialize(self):
         """เริ่มต้น transformer model พร้อม fallback"""
+        if self.backend == "onnx" and self._initialize_onnx():
+            return
         if not TRANSFORMERS_AVAILABLE:
             raise ImportError("transformers library is required")
         
@@ -472,6 +747,8 @@ class ThaiTransformerModel:
                     
                     # สร้าง custom pipeline
                     self.pipeline = self._create_custom_pipeline()
+                    # classifier head สุ่มใหม่ทุก instance ผลจึงใช้ร่วมกับ instance อื่นไม่ได้
+                    self.cache_version = f"{model_path}#custom-{id(self.pipeline)}"
                 
                 print(f"[INFO] โหลด {model_path} สำเร็จ")
                 self.model_name = model_path
@@ -487,11 +764,30 @@ class ThaiTransformerModel:
             # ใช้ basic sentiment pipeline แทน
             try:
                 self.pipeline = pipeline("sentiment-analysis", return_all_scores=True)
+                self.cache_version = "default-sentiment-pipeline"
                 print("[INFO] ใช้ basic sentiment pipeline")
                 success = True
             except Exception as e:
                 raise Exception(f"ไม่สามารถเริ่มต้น transformer model ได้: {e}")
     
+    def _initialize_onnx(self) -> bool:
+        """โหลดโมเดล ONNX (แปลงและ quantize ครั้งแรกถ้ายังไม่มี) คืน False ถ้าใช้ไม่ได้ (จะใช้ PyTorch แทน)"""
+        from onnx_backend import OnnxSentimentPipeline, default_onnx_dir, export_onnx_model, load_export_metadata
+        
+        onnx_dir = self.onnx_dir or default_onnx_dir(self.model_key)
+        try:
+            if load_export_metadata(onnx_dir) is None:
+                print(f"[INFO] กำลังแปลง {self.model_name} เป็น ONNX{' int8' if self.quantize else ''} ที่ {onnx_dir}...")
+                export_onnx_model(self.model_name, onnx_dir, quantize=self.quantize)
+            self.pipeline = OnnxSentimentPipeline.from_directory(onnx_dir, quantized=self.quantize)
+        except Exception as e:
+            print(f"[WARNING] ไม่สามารถใช้ ONNX backend ({e}) ใช้ PyTorch แทน")
+            return False
+        
+        self.cache_version = self.pipeline.version
+        print(f"[INFO] โหลด ONNX model จาก {onnx_dir} สำเร็จ")
+        return True
+    
     def _create_custom_pipeline(self):
         """สร้าง custom pipeline สำหรับโมเดลที่ไม่มี classification head"""
         import torch
@@ -511,7 +807,8 @@ class ThaiTransformerModel:
                 # Initialize weights
                 torch.nn.init.xavier_uniform_(self.classifier.weight)
             
-            def __call__(self, text):
+            def __call__(self, text, **kwargs):
+                # รับข้อความเดียวหรือ list (batch) ตัวเลือกแบบ HF pipeline ใน kwargs ไม่ถูกใช้
                 inputs = self.tokenizer(
                     text, 
                     return_tensors="pt", 
@@ -534,23 +831,103 @@ class ThaiTransformerModel:
                     
                     # แปลงเป็น format ที่ต้องการ
                     labels = ['NEGATIVE', 'NEUTRAL', 'POSITIVE']
-                    results = []
-                    for i, (label, prob) in enumerate(zip(labels, probs[0])):
-                        results.append({
-                            'label': label,
-                            'score': float(prob)
-                        })
+                    results = [
+                        [{'label': label, 'score': float(prob)} for label, prob in zip(labels, row)]
+                        for row in probs
+                    ]
                     
-                    return results
+                    return results if isinstance(text, list) else results[0]
         
         return CustomSentimentPipeline(self.model, self.tokenizer)
     
     def predict_sentiment(self, text: str) -> Dict[str, Any]:
         """ทำนาย sentiment ด้วย transformer"""
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """ทำนายหลายข้อความ: ค้น result cache ก่อน แล้วค้น prediction store ทีละ batch
+        และ inference เฉพาะข้อความ (หลัง preprocess) ที่ยังไม่เคยทำนาย"""
         if self.pipeline is None:
             self.initialize()
-        # ประมวลผลข้อความ
-        processed_text = self.preprocessor.clean_text(text)
+        # key ใช้ข้อความหลัง preprocess (สิ่งที่โมเดลเห็นจริง) และชื่อโมเดลที่โหลดสำเร็จ
+        processed_texts = [self.preprocessor.clean_text(text) for text in texts]
+        version = self.model_version()
+        cache = get_result_cache()
+        cache_keys = [cache.make_key("transformer.predict_sentiment", processed, version=version)
+                      for processed in processed_texts]
+        predictions = [cache.get(key) for key in cache_keys]
+
+        missing = [i for i, prediction in enumerate(predictions) if prediction is None]
+        if missing and self.prediction_store is not None:
+            stored = self.prediction_store.get_many(version, [processed_texts[i] for i in missing])
+            for i, prediction in zip(missing, stored):
+                if prediction is not None:
+                    predictions[i] = prediction
+                    cache.put(cache_keys[i], prediction)
+            missing = [i for i in missing if predictions[i] is None]
+
+        unique_missing = list(dict.fromkeys(processed_texts[i] for i in missing))
+        computed: Dict[str, Dict[str, Any]] = dict(zip(unique_missing, self._predict_many(unique_missing)))
+        cached = set()
+        for i in missing:
+            processed_text = processed_texts[i]
+            if processed_text not in cached:
+                cached.add(processed_text)
+                if computed[processed_text]['model_type'] == 'transformer':
+                    cache.put(cache_keys[i], computed[processed_text])
+            predictions[i] = copy_result(computed[processed_text])
+
+        if self.prediction_store is not None:
+            self.prediction_store.put_many(version, [
+                (processed_text, prediction) for processed_text, prediction in computed.items()
+                if prediction['model_type'] == 'transformer'
+            ])
+        return predictions
+
+    def _predict_many(self, processed_texts: List[str]) -> List[Dict[str, Any]]:
+        """inference หลายข้อความเป็น bucket ตามความยาว token (pad เฉพาะภายใน bucket)
+        และเก็บ throughput ของแต่ละ bucket ไว้ที่ ``last_batch_stats``"""
+        self.last_batch_stats = []
+        if not processed_texts:
+            return []
+        if not (hasattr(self.pipeline, 'tokenizer') and hasattr(self.pipeline, 'model')):
+            return [self._predict_processed(processed_text) for processed_text in processed_texts]
+        
+        results, self.last_batch_stats = run_length_buckets(
+            processed_texts, self._token_lengths(processed_texts), self._predict_bucket,
+            token_budget=self.token_budget, max_batch_size=self.max_batch_size
+        )
+        for stats in self.last_batch_stats:
+            logger.debug("bucket size=%d max_tokens=%d padding=%.1f%% %.1f texts/s",
+                         stats['size'], stats['max_tokens'], stats['padding_ratio'] * 100,
+                         stats['texts_per_second'] or 0.0)
+        return results
+
+    def _token_lengths(self, processed_texts: List[str]) -> List[int]:
+        """จำนวน token (หลัง truncation) ของแต่ละข้อความ ถ้า tokenize ไม่ได้ใช้จำนวนตัวอักษรแทน"""
+        try:
+            encoded = self.pipeline.tokenizer(processed_texts, truncation=True, max_length=self.MAX_LEN)
+            return [len(input_ids) for input_ids in encoded['input_ids']]
+        except Exception:
+            return [min(len(processed_text), self.MAX_LEN) for processed_text in processed_texts]
+
+    def _predict_bucket(self, processed_texts: List[str]) -> List[Dict[str, Any]]:
+        """inference หนึ่ง bucket ด้วยการเรียก pipeline ครั้งเดียว (ถ้าล้มเหลวทำนายทีละข้อความ)"""
+        try:
+            outputs = self.pipeline(
+                processed_texts,
+                truncation=True,
+                max_length=512,
+                padding=True,
+                batch_size=len(processed_texts)
+            )
+            return [self._convert_results(results) for results in outputs]
+        except Exception as e:
+            print(f"[WARNING] Batched transformer prediction failed, predicting one by one: {e}")
+            return [self._predict_processed(processed_text) for processed_text in processed_texts]
+
+    def _predict_processed(self, processed_text: str) -> Dict[str, Any]:
+        """inference ข้อความที่ preprocess แล้วหนึ่งข้อความ"""
         try:
             # ทำนาย (force truncation at tokenizer level)
             if hasattr(self.pipeline, 'tokenizer') and hasattr(self.pipeline, 'model'):
@@ -564,36 +941,7 @@ class ThaiTransformerModel:
             else:
                 # fallback: just call pipeline
                 results = self.pipeline(processed_text)
-            # แปลงผลลัพธ์
-            if isinstance(results[0], list):
-                results = results[0]  # unwrap if nested
-            best_result = max(results, key=lambda x: x['score'])
-            sentiment = best_result['label'].lower()
-            confidence = best_result['score']
-            label_mapping = {
-                'negative': 'negative', 'neg': 'negative', 'label_0': 'negative',
-                'neutral': 'neutral', 'neu': 'neutral', 'label_1': 'neutral', 
-                'positive': 'positive', 'pos': 'positive', 'label_2': 'positive'
-            }
-            sentiment = label_mapping.get(sentiment, 'neutral')
-            sentiment_score = 0.0
-            for result in results:
-                label = label_mapping.get(result['label'].lower(), 'neutral')
-                if label == 'positive':
-                    sentiment_score += result['score']
-                elif label == 'negative':
-                    sentiment_score -= result['score']
-            probabilities = {'positive': 0.0, 'neutral': 0.0, 'negative': 0.0}
-            for result in results:
-                label = label_mapping.get(result['label'].lower(), 'neutral')
-                probabilities[label] = result['score']
-            return {
-                'sentiment': sentiment,
-                'confidence': confidence,
-                'sentiment_score': sentiment_score,
-                'probabilities': probabilities,
-                'model_type': 'transformer'
-            }
+            return self._convert_results(results)
         except Exception as e:
             print(f"[ERROR] Transformer prediction failed: {e}")
             # Fallback to neutral
@@ -605,47 +953,231 @@ class ThaiTransformerModel:
                 'model_type': 'transformer_fallback'
             }
 
+    def _convert_results(self, results) -> Dict[str, Any]:
+        """แปลงผลของ pipeline (คะแนนทุก label ของหนึ่งข้อความ) เป็นผลรูปแบบของ predict_sentiment"""
+        if isinstance(results[0], list):
+            results = results[0]  # unwrap if nested
+        best_result = max(results, key=lambda x: x['score'])
+        sentiment = best_result['label'].lower()
+        confidence = best_result['score']
+        label_mapping = {
+            'negative': 'negative', 'neg': 'negative', 'label_0': 'negative',
+            'neutral': 'neutral', 'neu': 'neutral', 'label_1': 'neutral', 
+            'positive': 'positive', 'pos': 'positive', 'label_2': 'positive'
+        }
+        sentiment = label_mapping.get(sentiment, 'neutral')
+        sentiment_score = 0.0
+        for result in results:
+            label = label_mapping.get(result['label'].lower(), 'neutral')
+            if label == 'positive':
+                sentiment_score += result['score']
+            elif label == 'negative':
+                sentiment_score -= result['score']
+        probabilities = {'positive': 0.0, 'neutral': 0.0, 'negative': 0.0}
+        for result in results:
+            label = label_mapping.get(result['label'].lower(), 'neutral')
+            probabilities[label] = result['score']
+        return {
+            'sentiment': sentiment,
+            'confidence': confidence,
+            'sentiment_score': sentiment_score,
+            'probabilities': probabilities,
+            'model_type': 'transformer'
+        }
+
 class EnsembleSentimentModel:
-    """รวม multiple models เพื่อความแม่นยำสูงสุด"""
-    def __init__(self):
+    """รวม multiple models เพื่อความแม่นยำสูงสุด
+
+    ``parallel`` รันทุก model พร้อมกันบน thread pool (torch/onnxruntime ปล่อย GIL ระหว่าง inference)
+    ``early_exit`` หยุดรอ model ที่เหลือเมื่อน้ำหนักที่เหลือเปลี่ยน sentiment ที่ชนะไม่ได้แล้ว
+    (แบบ sequential จะรัน model น้ำหนักมากก่อนและส่งต่อเฉพาะข้อความที่ยังตัดสินไม่ได้)
+    ผลที่หยุดก่อนมี probabilities จาก model ที่รันแล้วเท่านั้นและไม่ถูกบันทึกลง prediction store
+    """
+    def __init__(
+        self,
+        prediction_store=None,
+        parallel: bool = False,
+        early_exit: bool = False,
+        max_workers: Optional[int] = None
+    ):
         self.models = {}
         self.weights = {}
-        
+        self.prediction_store = prediction_store  # PredictionStore (optional) เก็บผลทำนายลงดิสก์
+        self.parallel = parallel
+        self.early_exit = early_exit
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._member_locks: Dict[str, threading.Lock] = {}
+        
+    def model_version(self) -> Optional[str]:
+        """เวอร์ชันของ ensemble จากชื่อ น้ำหนัก และเวอร์ชันของทุก model
+        (None ถ้ามี model ที่ไม่มี ``model_version`` ซึ่งผลของ ensemble จะเก็บถาวรไม่ได้)"""
+        parts = []
+        for name, model in self.models.items():
+            member_version = getattr(model, 'model_version', None)
+            if member_version is None:
+                return None
+            parts.append(f"{name}:{self.weights[name]}:{member_version()}")
+        return "ensemble[" + ";".join(parts) + "]"
+    
     def add_model(self, name: str, model, weight: float = 1.0):
         """เพิ่ม model เข้า ensemble"""
         self.models[name] = model
         self.weights[name] = weight
+        self._member_locks[name] = threading.Lock()
         safe_print(f"[INFO] เพิ่ม {name} model เข้า ensemble (weight: {weight})")
     
+    def close(self):
+        """ปิด thread pool ของโหมด parallel (ไม่รอ model ที่ถูกทิ้งจาก early exit)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
     def predict_sentiment(self, text: str) -> Dict[str, Any]:
         """ทำนาย sentiment ด้วย ensemble"""
+        return self.predict_batch([text])[0]
+    
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """ทำนายหลายข้อความ ค้นผลที่เก็บไว้ใน prediction store ทีละ batch ก่อน
+        และบันทึกเฉพาะผลที่ทุก model ทำนายสำเร็จ"""
         if not self.models:
             raise ValueError("ไม่มี model ใน ensemble")
         
-        predictions = {}
-        total_weight = 0
-        weighted_scores = {'positive': 0, 'neutral': 0, 'negative': 0}
-        weighted_sentiment_score = 0
+        version = self.model_version() if self.prediction_store is not None else None
+        if version is None:
+            return self._predict_texts(texts)
         
-        # รวบรวมผลจากทุก model
-        for name, model in self.models.items():
+        predictions = self.prediction_store.get_many(version, texts)
+        missing = list(dict.fromkeys(text for text, prediction in zip(texts, predictions) if prediction is None))
+        computed: Dict[str, Dict[str, Any]] = dict(zip(missing, self._predict_texts(missing)))
+        for i, text in enumerate(texts):
+            if predictions[i] is None:
+                predictions[i] = copy_result(computed[text])
+        
+        self.prediction_store.put_many(version, [
+            (text, prediction) for text, prediction in computed.items()
+            if len(prediction['individual_predictions']) == len(self.models)
+        ])
+        return predictions
+    
+    def _member_predictions(self, name: str, model, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """ผลของ model หนึ่งตัวสำหรับทุกข้อความ (ใช้ ``predict_batch`` ถ้ามี) None = ข้อความที่ทำนายไม่สำเร็จ"""
+        predict_batch = getattr(model, 'predict_batch', None)
+        if predict_batch is not None:
             try:
-                result = model.predict_sentiment(text)
-                predictions[name] = result
-                
-                weight = self.weights[name]
-                total_weight += weight
-                
-                # รวม probabilities แบบถ่วงน้ำหนัก
-                for sentiment, prob in result['probabilities'].items():
-                    weighted_scores[sentiment] += prob * weight
-                
-                # รวม sentiment score
-                weighted_sentiment_score += result['sentiment_score'] * weight
-                
+                return predict_batch(texts)
+            except Exception as e:
+                safe_print(f"[WARNING] {name} batch prediction failed, predicting one by one: {e}")
+        
+        results = []
+        for text in texts:
+            try:
+                results.append(model.predict_sentiment(text))
             except Exception as e:
                 safe_print(f"[WARNING] {name} model failed: {e}")
-                continue
+                results.append(None)
+        return results
+    
+    def _locked_member_predictions(self, name: str, model, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """``_member_predictions`` ที่ไม่ให้ model เดียวกันถูกเรียกซ้อนกัน (งานที่ถูกทิ้งจาก early exit ยังรันอยู่ได้)"""
+        with self._member_locks.setdefault(name, threading.Lock()):
+            return self._member_predictions(name, model, texts)
+    
+    def _predict_texts(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """ทำนายด้วยทุก model (หนึ่ง batch ต่อ model) แล้วรวมผลของแต่ละข้อความ"""
+        if not texts:
+            return []
+        if self.parallel:
+            member_results = self._parallel_member_results(texts)
+        elif self.early_exit:
+            member_results = self._early_exit_member_results(texts)
+        else:
+            member_results = {name: self._member_predictions(name, model, texts) for name, model in self.models.items()}
+        # รวมตามลำดับของ self.models เพื่อให้ผลเหมือนกันทุกโหมดเมื่อทุก model ทำงานครบ
+        member_results = {name: member_results[name] for name in self.models if name in member_results}
+        return [
+            self._combine({name: results[i] for name, results in member_results.items() if results[i] is not None})
+            for i in range(len(texts))
+        ]
+    
+    def _early_exit_member_results(self, texts: List[str]) -> Dict[str, List[Optional[Dict[str, Any]]]]:
+        """รัน model ทีละตัวจากน้ำหนักมากไปน้อย แต่ละตัวรับเฉพาะข้อความที่ยังตัดสินไม่ได้"""
+        member_results: Dict[str, List[Optional[Dict[str, Any]]]] = {}
+        pending = list(range(len(texts)))
+        remaining_weight = sum(self.weights.values())
+        for name, model in sorted(self.models.items(), key=lambda item: -self.weights[item[0]]):
+            if not pending:
+                break
+            results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+            predictions = self._member_predictions(name, model, [texts[i] for i in pending])
+            for i, prediction in zip(pending, predictions):
+                results[i] = prediction
+            member_results[name] = results
+            remaining_weight -= self.weights[name]
+            pending = self._undecided(member_results, pending, remaining_weight)
+        return member_results
+    
+    def _parallel_member_results(self, texts: List[str]) -> Dict[str, List[Optional[Dict[str, Any]]]]:
+        """รันทุก model พร้อมกัน (หนึ่ง batch ต่อ model) กับ early_exit จะคืนผลทันทีที่ทุกข้อความตัดสินได้"""
+        if self._executor is None:
+            workers = self.max_workers or max(len(self.models), 1)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ensemble-member")
+        futures = {
+            self._executor.submit(self._locked_member_predictions, name, model, texts): name
+            for name, model in self.models.items()
+        }
+        member_results: Dict[str, List[Optional[Dict[str, Any]]]] = {}
+        pending = list(range(len(texts)))
+        remaining_weight = sum(self.weights.values())
+        not_done = set(futures)
+        while not_done:
+            done, not_done = wait(not_done, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                member_results[name] = future.result()
+                remaining_weight -= self.weights[name]
+            if self.early_exit:
+                pending = self._undecided(member_results, pending, remaining_weight)
+                if not pending:
+                    break
+        return member_results
+    
+    def _undecided(
+        self,
+        member_results: Dict[str, List[Optional[Dict[str, Any]]]],
+        indices: List[int],
+        remaining_weight: float
+    ) -> List[int]:
+        """ข้อความที่ model ที่เหลือ (น้ำหนักรวม ``remaining_weight``) ยังเปลี่ยน sentiment ที่ชนะได้"""
+        undecided = []
+        for i in indices:
+            scores = {'positive': 0.0, 'neutral': 0.0, 'negative': 0.0}
+            for name, results in member_results.items():
+                if results[i] is not None:
+                    for sentiment, prob in results[i]['probabilities'].items():
+                        scores[sentiment] = scores.get(sentiment, 0.0) + prob * self.weights[name]
+            first, second = sorted(scores.values(), reverse=True)[:2]
+            # probability ไม่เกิน 1 ดังนั้น label อื่นไล่ตามได้ไม่เกิน remaining_weight
+            if first - second <= remaining_weight:
+                undecided.append(i)
+        return undecided
+    
+    def _combine(self, predictions: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """รวมผลของทุก model สำหรับข้อความเดียว"""
+        total_weight = 0
+        weighted_scores = {'positive': 0, 'neutral': 0, 'negative': 0}
+        weighted_sentiment_score = 0
+        
+        for name, result in predictions.items():
+            weight = self.weights[name]
+            total_weight += weight
+            
+            # รวม probabilities แบบถ่วงน้ำหนัก
+            for sentiment, prob in result['probabilities'].items():
+                weighted_scores[sentiment] += prob * weight
+            
+            # รวม sentiment score
+            weighted_sentiment_score += result['sentiment_score'] * weight
         
         if total_weight == 0:
             raise ValueError("ไม่มี model ที่ทำงานได้")
@@ -668,8 +1200,15 @@ class EnsembleSentimentModel:
             'individual_predictions': predictions
         }
 
-def create_ml_enhanced_sentiment_analyzer(training_data: Optional[List[Dict[str, Any]]] = None) -> EnsembleSentimentModel:
-    """สร้าง ML-enhanced sentiment analyzer ด้วยโมเดล HF ที่ดีที่สุด"""
+def create_ml_enhanced_sentiment_analyzer(
+    training_data: Optional[List[Dict[str, Any]]] = None,
+    prediction_store=None,
+    parallel: bool = False,
+    early_exit: bool = False
+) -> EnsembleSentimentModel:
+    """สร้าง ML-enhanced sentiment analyzer ด้วยโมเดล HF ที่ดีที่สุด
+    (ส่ง ``prediction_store`` เพื่อเก็บผลทำนายของ transformer/ensemble ลงดิสก์
+    ``parallel``/``early_exit`` ดู EnsembleSentimentModel)"""
     
     print("🚀 กำลังสร้าง Advanced Thai Sentiment Analyzer...")
     print("📱 รองรับ: Social Media, การเมือง, ความคิดเห็นทั่วไป")
@@ -679,10 +1218,10 @@ def create_ml_enhanced_sentiment_analyzer(training_data: Optional[List[Dict[str,
     
     if use_multi_hf_models:
         print("🤖 ใช้ Multi-Model Hugging Face Ensemble")
-        ensemble = create_multi_model_ensemble()
+        ensemble = create_multi_model_ensemble(prediction_store=prediction_store, parallel=parallel, early_exit=early_exit)
     else:
         print("🔧 ใช้ Traditional + Single HF Model")
-        ensemble = EnsembleSentimentModel()
+        ensemble = EnsembleSentimentModel(prediction_store=prediction_store, parallel=parallel, early_exit=early_exit)
         
         # 1. Traditional ML Model (ถ้ามีข้อมูลฝึกสอน)
         if training_data and len(training_data) >= 20 and SKLEARN_AVAILABLE:
@@ -704,7 +1243,7 @@ def create_ml_enhanced_sentiment_analyzer(training_data: Optional[List[Dict[str,
             print("[INFO] โหลดโมเดลไทยที่ดีที่สุดจาก Hugging Face...")
             try:
                 # ใช้โมเดลที่แนะนำสำหรับ sentiment analysis
-                transformer_model = ThaiTransformerModel("wisesight-sentiment")
+                transformer_model = ThaiTransformerModel("wisesight-sentiment", prediction_store=prediction_store)
                 transformer_model.initialize()
                 ensemble.add_model("hf_thai_sentiment", transformer_model, weight=0.5)
             except Exception as e:
@@ -712,7 +1251,7 @@ def create_ml_enhanced_sentiment_analyzer(training_data: Optional[List[Dict[str,
                 
                 # Fallback ไปโมเดลอื่น
                 try:
-                    transformer_model = ThaiTransformerModel("xlm-roberta-sentiment")
+                    transformer_model = ThaiTransformerModel("xlm-roberta-sentiment", prediction_store=prediction_store)
                     transformer_model.initialize() 
                     ensemble.add_model("hf_multilingual", transformer_model, weight=0.4)
                 except Exception as e2:
@@ -720,36 +1259,7 @@ def create_ml_enhanced_sentiment_analyzer(training_data: Optional[List[Dict[str,
         
         # 3. Enhanced Rule-based (จาก original code)
         print("[INFO] เพิ่ม Enhanced Rule-based model...")
-        class RuleBasedModel:
-            def predict_sentiment(self, text):
-                from social_media_utils import advanced_thai_sentiment_analysis
-                result = advanced_thai_sentiment_analysis(text)
-                
-                emotion_to_sentiment = {
-                    'joy': 'positive', 'excited': 'positive',
-                    'anger': 'negative', 'sadness': 'negative', 'fear': 'negative',
-                    'neutral': 'neutral'
-                }
-                
-                sentiment = emotion_to_sentiment.get(result['emotion'], 'neutral')
-                confidence = 0.7 if result['intensity'] == 'high' else 0.5
-                
-                if sentiment == 'positive':
-                    probs = {'positive': 0.7, 'neutral': 0.2, 'negative': 0.1}
-                elif sentiment == 'negative':
-                    probs = {'positive': 0.1, 'neutral': 0.2, 'negative': 0.7}
-                else:
-                    probs = {'positive': 0.25, 'neutral': 0.5, 'negative': 0.25}
-                
-                return {
-                    'sentiment': sentiment,
-                    'confidence': confidence,
-                    'sentiment_score': result['sentiment_score'],
-                    'probabilities': probs,
-                    'model_type': 'rule_based'
-                }
-        
-        rule_model = RuleBasedModel()
+        rule_model = RuleBasedSentimentModel()
         weight = 0.2 if ensemble.models else 1.0
         ensemble.add_model("rule_based", rule_model, weight=weight)
     
@@ -972,10 +1482,29 @@ class SentimentQualityReviewer:
 class AdvancedThaiSentimentAnalyzer:
     """ระบบ sentiment analysis ขั้นสูงสำหรับภาษาไทยที่มี auto review"""
     
-    def __init__(self, confidence_threshold: float = 0.7):
+    def __init__(
+        self,
+        confidence_threshold: float = 0.7,
+        cascade: bool = False,
+        rule_margin: float = DEFAULT_RULE_MARGIN,
+        ml_margin: float = DEFAULT_ML_MARGIN,
+        incremental: bool = False,
+        online_weight: float = 0.3,
+        replay_size: int = 2000,
+        snapshot_dir: Optional[str] = None
+    ):
         self.ensemble_model = None
         self.reviewer = SentimentQualityReviewer(confidence_threshold=confidence_threshold)
         self.training_data = []
+        # cascade: กฎ -> TF-IDF -> transformer เฉพาะข้อความที่ margin ต่ำกว่าเกณฑ์ (ดู sentiment_cascade.py)
+        self.cascade = cascade
+        self.rule_margin = rule_margin
+        self.ml_margin = ml_margin
+        # incremental: update_training_data เรียนรู้เพิ่มด้วย OnlineThaiSentimentModel แทนการสร้าง ensemble ใหม่
+        self.online_weight = online_weight
+        self.online_model = (
+            OnlineThaiSentimentModel(replay_size=replay_size, snapshot_dir=snapshot_dir) if incremental else None
+        )
         
     def initialize(self, training_data: Optional[List[Dict[str, Any]]] = None):
         """เริ่มต้นระบบ"""
@@ -986,7 +1515,12 @@ class AdvancedThaiSentimentAnalyzer:
             safe_print(f"📚 โหลดข้อมูลฝึกสอน: {len(training_data)} รายการ")
         
         # สร้าง ensemble model
-        self.ensemble_model = create_ml_enhanced_sentiment_analyzer(training_data)
+        if self.cascade:
+            self.ensemble_model = build_default_cascade(training_data, rule_margin=self.rule_margin, ml_margin=self.ml_margin)
+        else:
+            self.ensemble_model = create_ml_enhanced_sentiment_analyzer(training_data)
+        if self.online_model is not None and self.online_model.version:
+            self._attach_online_model()
         safe_print("✅ ระบบพร้อมใช้งาน")
     
     def analyze_with_review(self, text: str) -> Dict[str, Any]:
@@ -996,8 +1530,10 @@ class AdvancedThaiSentimentAnalyzer:
         
         # ทำนาย sentiment
         prediction = self.ensemble_model.predict_sentiment(text)
-        
-        # Auto review
+        return self.review(text, prediction)
+    
+    def review(self, text: str, prediction: Dict[str, Any]) -> Dict[str, Any]:
+        """auto review ผลทำนายของ ensemble (ใช้กับผลที่ทำนายเป็น batch หรือจาก inference server)"""
         reviewed_prediction = self.reviewer.review_prediction(text, prediction)
         
         # เพิ่มข้อมูลเสริม
@@ -1009,26 +1545,48 @@ class AdvancedThaiSentimentAnalyzer:
         
         return reviewed_prediction
     def batch_analyze_with_review(self, texts: List[str]) -> List[Dict[str, Any]]:
-        """วิเคราะห์ batch พร้อม auto review"""
+        """วิเคราะห์ batch พร้อม auto review
+
+        ทำนายทีละ chunk ด้วย ``predict_batch`` ของ ensemble (member แต่ละตัวทำนายทั้ง chunk ครั้งเดียว)
+        ถ้า chunk นั้นล้มเหลวจะวิเคราะห์ทีละข้อความ และข้ามข้อความที่ยังวิเคราะห์ไม่ได้
+        """
+        if not self.ensemble_model:
+            raise ValueError("ระบบยังไม่ได้เริ่มต้น กรุณาเรียก initialize() ก่อน")
         safe_print(f"🔄 กำลังวิเคราะห์ {len(texts)} ข้อความ...")
         
-        # วิเคราะห์แต่ละข้อความ
         predictions = []
-        for i, text in enumerate(texts):
-            if i % 50 == 0 and i > 0:
-                safe_print(f"   ดำเนินการแล้ว: {i}/{len(texts)}")
+        predict_batch = getattr(self.ensemble_model, 'predict_batch', None)
+        for start in range(0, len(texts), DEFAULT_CHUNK_SIZE):
+            if start > 0:
+                safe_print(f"   ดำเนินการแล้ว: {start}/{len(texts)}")
+            chunk = texts[start:start + DEFAULT_CHUNK_SIZE]
+            if predict_batch is not None:
+                try:
+                    reviewed = [self.review(text, prediction) for text, prediction in zip(chunk, predict_batch(chunk))]
+                    predictions.extend(reviewed)
+                    continue
+                except Exception as e:
+                    safe_print(f"[WARNING] batch ที่เริ่มจากข้อความที่ {start+1} ล้มเหลว วิเคราะห์ทีละข้อความแทน: {e}")
             
-            try:
-                result = self.analyze_with_review(text)
-                predictions.append(result)
-            except Exception as e:
-                safe_print(f"[WARNING] ข้อความที่ {i+1} ไม่สามารถวิเคราะห์ได้: {e}")
-                continue
+            for i, text in enumerate(chunk, start):
+                try:
+                    predictions.append(self.analyze_with_review(text))
+                except Exception as e:
+                    safe_print(f"[WARNING] ข้อความที่ {i+1} ไม่สามารถวิเคราะห์ได้: {e}")
+                    continue
         
         safe_print(f"✅ วิเคราะห์เสร็จสิ้น: {len(predictions)} รายการ")
         return predictions
     def update_training_data(self, new_data: List[Dict[str, Any]]):
-        """อัปเดตข้อมูลฝึกสอนและปรับปรุงโมเดล"""
+        """อัปเดตข้อมูลฝึกสอนและปรับปรุงโมเดล
+
+        แบบ incremental ไม่เก็บข้อมูลใหม่ใน ``training_data`` (online model มี replay buffer ที่จำกัดขนาดแล้ว)
+        """
+        if self.online_model is not None:
+            safe_print(f"📈 อัปเดตข้อมูลฝึกสอน: +{len(new_data)} รายการ (incremental)")
+            self._update_online_model(new_data)
+            return
+        
         self.training_data.extend(new_data)
         safe_print(f"📈 อัปเดตข้อมูลฝึกสอน: +{len(new_data)} รายการ (รวม: {len(self.training_data)})")
         
@@ -1037,6 +1595,33 @@ class AdvancedThaiSentimentAnalyzer:
             safe_print("🔄 กำลังฝึกโมเดลใหม่...")
             self.ensemble_model = create_ml_enhanced_sentiment_analyzer(self.training_data)
             safe_print("✅ อัปเดตโมเดลเสร็จสิ้น")
+    
+    def _update_online_model(self, new_data: List[Dict[str, Any]]):
+        """เรียนรู้ข้อมูลใหม่ใน online model โดยไม่โหลด transformer หรือฝึกใหม่ทั้งหมด"""
+        try:
+            result = self.online_model.update(new_data)
+        except Exception as e:
+            safe_print(f"[WARNING] incremental update failed: {e}")
+            return
+        if result['samples']:
+            self._attach_online_model()
+            safe_print(f"✅ อัปเดต online model v{result['version']}: +{result['samples']} ตัวอย่าง "
+                       f"(replay {result['replayed']}, {result['seconds']}s)")
+    
+    def _attach_online_model(self):
+        """เพิ่ม online model เป็น member ของ ensemble (ครั้งเดียว)
+
+        ถ้าเป็น cascade จะเพิ่มเป็นขั้นก่อนขั้นสุดท้าย โดยใช้เกณฑ์ ``ml_margin``
+        """
+        if self.ensemble_model is None or 'online' in getattr(self.ensemble_model, 'models', {}):
+            return
+        if isinstance(self.ensemble_model, CascadeSentimentModel):
+            self.ensemble_model.add_stage('online', self.online_model, self.ml_margin,
+                                          position=len(self.ensemble_model.stages) - 1)
+            return
+        add_model = getattr(self.ensemble_model, 'add_model', None)
+        if add_model is not None:
+            add_model('online', self.online_model, weight=self.online_weight)
 
 # Example usage and testing
 def test_ml_sentiment_analysis():
@@ -1115,9 +1700,9 @@ def get_best_thai_sentiment_model():
     
     return recommended_models
 
-def create_multi_model_ensemble():
+def create_multi_model_ensemble(prediction_store=None, parallel: bool = False, early_exit: bool = False):
     """สร้าง ensemble จากหลายโมเดล HF ที่ดี"""
-    ensemble = EnsembleSentimentModel()
+    ensemble = EnsembleSentimentModel(prediction_store=prediction_store, parallel=parallel, early_exit=early_exit)
     
     # รายการโมเดลที่จะรวมใน ensemble
     models_to_try = [
@@ -1133,7 +1718,7 @@ def create_multi_model_ensemble():
     for model_name, model_key, weight in models_to_try:
         try:
             print(f"[INFO] กำลังโหลด {model_name}...")
-            transformer_model = ThaiTransformerModel(model_key)
+            transformer_model = ThaiTransformerModel(model_key, prediction_store=prediction_store)
             transformer_model.initialize()
             ensemble.add_model(model_name, transformer_model, weight=weight)
             successful_models += 1
@@ -1145,36 +1730,7 @@ def create_multi_model_ensemble():
     if successful_models == 0:
         print("⚠️ ไม่สามารถโหลดโมเดล HF ได้ จะใช้ rule-based แทน")
         # Fallback to rule-based
-        class RuleBasedModel:
-            def predict_sentiment(self, text):
-                from social_media_utils import advanced_thai_sentiment_analysis
-                result = advanced_thai_sentiment_analysis(text)
-                
-                emotion_to_sentiment = {
-                    'joy': 'positive', 'excited': 'positive',
-                    'anger': 'negative', 'sadness': 'negative', 'fear': 'negative',
-                    'neutral': 'neutral'
-                }
-                
-                sentiment = emotion_to_sentiment.get(result['emotion'], 'neutral')
-                confidence = 0.7 if result['intensity'] == 'high' else 0.5
-                
-                if sentiment == 'positive':
-                    probs = {'positive': 0.7, 'neutral': 0.2, 'negative': 0.1}
-                elif sentiment == 'negative':
-                    probs = {'positive': 0.1, 'neutral': 0.2, 'negative': 0.7}
-                else:
-                    probs = {'positive': 0.25, 'neutral': 0.5, 'negative': 0.25}
-                
-                return {
-                    'sentiment': sentiment,
-                    'confidence': confidence,
-                    'sentiment_score': result['sentiment_score'],
-                    'probabilities': probs,
-                    'model_type': 'rule_based_fallback'
-                }
-        
-        ensemble.add_model("rule_based_fallback", RuleBasedModel(), weight=1.0)
+        ensemble.add_model("rule_based_fallback", RuleBasedSentimentModel('rule_based_fallback'), weight=1.0)
     
     print(f"🎯 Ensemble พร้อมใช้งาน: {len(ensemble.models)} models")
     return ensemble
@@ -1329,8 +1885,17 @@ def benchmark_sentiment_models():
 # --- EXPORT: analyze_sentiment ---
 _advanced_analyzer = None
 def analyze_sentiment(text: str):
+    """วิเคราะห์พร้อม auto review ผ่าน inference server ถ้าตั้ง ``THAI_SENTIMENT_SERVER``
+    (ใช้โมเดลชุดเดียวร่วมกันทุก process) ไม่เช่นนั้นโหลด analyzer ใน process นี้"""
     global _advanced_analyzer
     if _advanced_analyzer is None:
-        _advanced_analyzer = AdvancedThaiSentimentAnalyzer()
-        _advanced_analyzer.initialize()
+        from inference_server import get_inference_client
+        client = get_inference_client()
+        if client is not None and client.health().get("status") == "ok":
+            _advanced_analyzer = client
+        else:
+            if client is not None:
+                safe_print(f"[WARNING] Inference server {client.url} is not available, loading models locally")
+            _advanced_analyzer = AdvancedThaiSentimentAnalyzer()
+            _advanced_analyzer.initialize()
     return _advanced_analyzer.analyze_with_review(text)
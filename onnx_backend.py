@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ONNX Runtime int8 backend for ThaiTransformerModel
+แปลงโมเดล HF เป็น ONNX แบบ dynamic int8 quantization ครั้งเดียว แล้ว inference ด้วย onnxruntime บน CPU
+
+``export_onnx_model`` โหลดโมเดล PyTorch (fp32) ส่งออกเป็น ``model.onnx`` (batch/ความยาวเป็นแบบ dynamic)
+แล้ว quantize weight เป็น int8 ได้ ``model.int8.onnx`` พร้อม tokenizer และ ``onnx_export.json``
+(ชื่อโมเดลต้นทางและ label ของแต่ละ output) ในโฟลเดอร์เดียวกัน
+
+``OnnxSentimentPipeline`` เรียกได้แบบเดียวกับ HF pipeline (``return_all_scores=True``) จึงใช้กับ
+``ThaiTransformerModel(backend="onnx")`` และ batch path ตามความยาว token ได้โดยผลมีรูปแบบเดิม
+``compare_backends`` สร้างรายงานความต่างของผล (accuracy delta) และ latency เทียบกับ PyTorch บนไฟล์ held-out
+
+    python onnx_backend.py export --model twitter-roberta --output models/onnx/twitter-roberta
+    python onnx_backend.py compare --model twitter-roberta --onnx-dir models/onnx/twitter-roberta \\
+        --held-out data/held_out.jsonl --report reports/onnx_delta.json
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+try:
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    TRANSFORMERS_AVAILABLE = False
+
+DEFAULT_ONNX_ROOT = os.path.join("models", "onnx")
+FP32_FILENAME = "model.onnx"
+INT8_FILENAME = "model.int8.onnx"
+METADATA_FILENAME = "onnx_export.json"
+DEFAULT_OPSET = 14
+MAX_LENGTH = 512
+
+
+def default_onnx_dir(model_key: str) -> str:
+    """โฟลเดอร์เริ่มต้นของโมเดลที่แปลงแล้ว (``models/onnx/<model_key>``)"""
+    return os.path.join(DEFAULT_ONNX_ROOT, model_key.replace("/", "__"))
+
+
+def export_onnx_model(model_path: str, output_dir: str, quantize: bool = True, opset: int = DEFAULT_OPSET) -> Dict[str, Any]:
+    """แปลงโมเดล HF (ชื่อบน hub หรือ path) เป็น ONNX และ int8 (ทำครั้งเดียว) คืน metadata ของการแปลง"""
+    if not TRANSFORMERS_AVAILABLE:
+        raise ImportError("transformers and torch are required to export ONNX models")
+    if quantize and not ONNXRUNTIME_AVAILABLE:
+        raise ImportError("onnxruntime is required for int8 quantization")
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True, use_fast=False)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path, num_labels=3, trust_remote_code=True)
+    model.eval()
+
+    sample = tokenizer(["ตัวอย่าง", "ตัวอย่างข้อความที่ยาวกว่า"], return_tensors="pt", padding=True)
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    fp32_path = os.path.join(output_dir, FP32_FILENAME)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(output_dir, INT8_FILENAME), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(output_dir)
+    id2label = model.config.id2label
+    metadata = {
+        "source_model": model_path,
+        "revision": getattr(model.config, "_commit_hash", None),
+        "labels": [id2label[index] for index in range(len(id2label))],
+        "input_names": input_names,
+        "opset": opset,
+        "quantized": quantize,
+        "exported_at": datetime.now().isoformat(),
+        "sizes_mb": {
+            filename: round(os.path.getsize(os.path.join(output_dir, filename)) / 1e6, 1)
+            for filename in (FP32_FILENAME, INT8_FILENAME) if os.path.exists(os.path.join(output_dir, filename))
+        }
+    }
+    with open(os.path.join(output_dir, METADATA_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    return metadata
+
+
+def load_export_metadata(model_dir: str) -> Optional[Dict[str, Any]]:
+    """metadata ของโมเดลที่แปลงแล้ว (None ถ้ายังไม่เคยแปลง)"""
+    path = os.path.join(model_dir, METADATA_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class OnnxSentimentPipeline:
+    """pipeline สำหรับโมเดล ONNX ที่เรียกได้เหมือน HF text-classification pipeline (คะแนนทุก label)"""
+
+    def __init__(self, session, tokenizer, labels: List[str], version: str = "onnx"):
+        self.session = session
+        self.model = session  # ให้ ThaiTransformerModel ใช้ batch path แบบเดียวกับ HF pipeline
+        self.tokenizer = tokenizer
+        self.labels = list(labels)
+        self.version = version
+        self.input_names = {node.name for node in session.get_inputs()}
+
+    @classmethod
+    def from_directory(cls, model_dir: str, quantized: bool = True, threads: Optional[int] = None) -> "OnnxSentimentPipeline":
+        """โหลดโมเดลที่แปลงด้วย ``export_onnx_model``"""
+        if not (ONNXRUNTIME_AVAILABLE and TRANSFORMERS_AVAILABLE):
+            raise ImportError("onnxruntime and transformers are required for the ONNX backend")
+        metadata = load_export_metadata(model_dir)
+        if metadata is None:
+            raise FileNotFoundError(f"no exported ONNX model in {model_dir}")
+
+        filename = INT8_FILENAME if quantized and metadata.get("quantized") else FP32_FILENAME
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        session = ort.InferenceSession(os.path.join(model_dir, filename), options, providers=["CPUExecutionProvider"])
+        tokenizer = AutoTokenizer.from_pretrained(model_dir, trust_remote_code=True, use_fast=False)
+        version = f"{metadata['source_model']}@{metadata.get('revision') or 'local'}#onnx-{'int8' if filename == INT8_FILENAME else 'fp32'}"
+        return cls(session, tokenizer, metadata["labels"], version)
+
+    def __call__(self, inputs, truncation: bool = True, max_length: int = MAX_LENGTH, padding: bool = True, **kwargs):
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        encoded = self.tokenizer(texts, return_tensors="np", truncation=truncation, max_length=max_length, padding=padding)
+        feeds = {name: np.asarray(value, dtype=np.int64) for name, value in encoded.items() if name in self.input_names}
+        logits = self.session.run(None, feeds)[0]
+        probabilities = _softmax(np.asarray(logits, dtype=np.float64))
+        outputs = [
+            [{"label": label, "score": float(score)} for label, score in zip(self.labels, row)]
+            for row in probabilities.tolist()
+        ]
+        return outputs if isinstance(inputs, list) else [outputs[0]]
+
+
+def load_held_out_texts(path: str, text_field: str = "text", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """อ่านไฟล์ held-out (JSONL ที่มี ``text_field`` และอาจมี ``label``/``sentiment`` หรือข้อความบรรทัดละหนึ่ง)"""
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not record.get(text_field):
+                    continue
+                items.append({"text": record[text_field], "label": record.get("label", record.get("sentiment"))})
+            else:
+                items.append({"text": line, "label": None})
+            if limit is not None and len(items) >= limit:
+                break
+    return items
+
+
+def compare_backends(reference, candidate, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """รายงานความต่างระหว่าง ``ThaiTransformerModel`` สองตัว (เช่น PyTorch กับ ONNX int8) บนชุดเดียวกัน
+
+    วัดความตรงกันของ label, ความต่างของ probability, accuracy เทียบ label จริง (ถ้ามี) และ latency
+    ของ inference (ไม่ผ่าน result cache) model ที่ตั้ง ``backend="onnx"`` แต่ export/โหลด ONNX ไม่ได้
+    (initialize ถอยไปใช้ PyTorch) จะทำให้เกิด RuntimeError แทนรายงานที่เทียบ PyTorch กับตัวเอง
+    """
+    processed = [reference.preprocessor.clean_text(item["text"]) for item in items]
+    runs = {}
+    for name, model in (("reference", reference), ("candidate", candidate)):
+        if model.pipeline is None:
+            model.initialize()
+        if getattr(model, "backend", None) == "onnx" and not isinstance(model.pipeline, OnnxSentimentPipeline):
+            raise RuntimeError(
+                f"{name} model was requested with the ONNX backend but fell back to PyTorch "
+                f"(ONNX export or loading failed); refusing to compare"
+            )
+        started = time.perf_counter()
+        predictions = model._predict_many(processed)
+        runs[name] = {"predictions": predictions, "seconds": time.perf_counter() - started}
+
+    reference_predictions = runs["reference"]["predictions"]
+    candidate_predictions = runs["candidate"]["predictions"]
+    labels = ("positive", "neutral", "negative")
+    deltas = np.array([
+        [abs(ref["probabilities"][label] - cand["probabilities"][label]) for label in labels]
+        for ref, cand in zip(reference_predictions, candidate_predictions)
+    ]).reshape(-1, len(labels))
+    agreement = [ref["sentiment"] == cand["sentiment"] for ref, cand in zip(reference_predictions, candidate_predictions)]
+
+    confusion: Dict[str, Dict[str, int]] = {label: {other: 0 for other in labels} for label in labels}
+    for ref, cand in zip(reference_predictions, candidate_predictions):
+        confusion[ref["sentiment"]][cand["sentiment"]] += 1
+
+    count = len(items)
+    report: Dict[str, Any] = {
+        "reference": reference.model_version(),
+        "candidate": candidate.model_version(),
+        "samples": count,
+        "label_agreement": round(sum(agreement) / count, 4) if count else 0.0,
+        "mean_abs_prob_delta": round(float(deltas.mean()), 5) if count else 0.0,
+        "max_abs_prob_delta": round(float(deltas.max()), 5) if count else 0.0,
+        "confusion": confusion,
+        "latency_ms_per_text": {
+            name: round(run["seconds"] * 1000 / count, 3) if count else 0.0 for name, run in runs.items()
+        },
+        "speedup": round(runs["reference"]["seconds"] / runs["candidate"]["seconds"], 2) if runs["candidate"]["seconds"] > 0 else None,
+        "disagreements": [
+            {"text": item["text"], "reference": ref["sentiment"], "candidate": cand["sentiment"]}
+            for item, ref, cand, same in zip(items, reference_predictions, candidate_predictions, agreement) if not same
+        ][:50]
+    }
+
+    gold = [(item["label"], index) for index, item in enumerate(items) if item.get("label") in labels]
+    if gold:
+        report["accuracy"] = {
+            name: round(sum(run["predictions"][index]["sentiment"] == label for label, index in gold) / len(gold), 4)
+            for name, run in runs.items()
+        }
+        report["accuracy_delta"] = round(report["accuracy"]["candidate"] - report["accuracy"]["reference"], 4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export ThaiTransformerModel to ONNX int8 and compare backends")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="convert a model to ONNX (+ int8)")
+    export_parser.add_argument("--model", required=True, help="available_models key or HF model name")
+    export_parser.add_argument("--output", help="output directory (default: models/onnx/<model>)")
+    export_parser.add_argument("--no-quantize", action="store_true")
+
+    compare_parser = subparsers.add_parser("compare", help="accuracy/latency report: PyTorch vs ONNX")
+    compare_parser.add_argument("--model", required=True)
+    compare_parser.add_argument("--onnx-dir", help="exported model directory (default: models/onnx/<model>)")
+    compare_parser.add_argument("--held-out", required=True, help="JSONL (text + optional label) or text file")
+    compare_parser.add_argument("--text-field", default="text")
+    compare_parser.add_argument("--limit", type=int)
+    compare_parser.add_argument("--report", help="write the report as JSON")
+    args = parser.parse_args()
+
+    from ml_sentiment_analysis import ThaiTransformerModel
+
+    if args.command == "export":
+        model_path = ThaiTransformerModel(args.model).model_name
+        metadata = export_onnx_model(model_path, args.output or default_onnx_dir(args.model), quantize=not args.no_quantize)
+        print(json.dumps(metadata, ensure_ascii=False, indent=2))
+        return
+
+    items = load_held_out_texts(args.held_out, args.text_field, args.limit)
+    reference = ThaiTransformerModel(args.model)
+    candidate = ThaiTransformerModel(args.model, backend="onnx", onnx_dir=args.onnx_dir)
+    report = compare_backends(reference, candidate, items)
+    print(json.dumps({key: value for key, value in report.items() if key != "disagreements"}, ensure_ascii=False, indent=2))
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
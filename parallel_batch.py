@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Process-pool helpers for batch sentiment analysis
+แบ่งงานเป็น chunk ส่งให้ process pool และคืนผลตามลำดับเดิมทันทีที่แต่ละ chunk เสร็จ
+"""
+
+import os
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+DEFAULT_CHUNK_SIZE = 256
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """จำนวน worker ที่จะใช้ (None หรือ 0 = จำนวน CPU)"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """แบ่ง iterable เป็น list ละไม่เกิน ``chunk_size`` รายการ (อ่านทีละ chunk)"""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_parallel_chunks(
+    func: Callable[[List[Any]], Sequence[Any]],
+    items: Iterable[Any],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: tuple = (),
+    max_pending: Optional[int] = None
+) -> Iterator[Sequence[Any]]:
+    """เรียก ``func(chunk)`` ใน process pool และ yield ผลของแต่ละ chunk ตามลำดับของ ``items``
+
+    ``func`` และ ``initializer`` ต้องเป็นฟังก์ชันระดับโมดูล (pickle ได้) ``initializer``
+    ถูกเรียกครั้งเดียวต่อ worker ส่วนจำนวน chunk ที่ส่งเข้า pool แล้วแต่ยังไม่ได้ yield
+    ถูกจำกัดที่ ``max_pending`` (ค่าเริ่มต้น 2 เท่าของจำนวน worker) ``items`` ที่เป็น
+    generator จึงถูกอ่านล่วงหน้าเพียงไม่กี่ chunk
+    """
+    # import เมื่อใช้จริง (multiprocessing ใช้เวลา import ราว 40ms)
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = resolve_workers(workers)
+    max_pending = max_pending or workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        for chunk in iter_chunks(items, chunk_size):
+            pending.append(executor.submit(func, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent prediction cache backed by SQLite
+เก็บผลทำนายของโมเดล (transformer/ensemble) ลงดิสก์ เพื่อให้รันคลังข้อความเดิมซ้ำได้โดยไม่ต้อง inference ใหม่
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from result_cache import text_hash
+
+SCHEMA_VERSION = 1
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "predictions.sqlite3")
+
+# SQLite จำกัดจำนวน parameter ต่อคำสั่ง (ค่าเริ่มต้นเก่าคือ 999)
+_LOOKUP_CHUNK = 500
+
+
+def _json_default(value: Any) -> Any:
+    """แปลง numpy scalar/array เป็นชนิดพื้นฐานของ JSON"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class PredictionStore:
+    """cache ผลทำนายถาวร key คือ (model version, hash ของข้อความที่โมเดลเห็น)
+
+    ใช้ WAL เพื่อให้หลาย process อ่านพร้อมกันได้ระหว่างมีการเขียน ค้นหาและบันทึก
+    ทีละ batch ในคำสั่งเดียว/transaction เดียว และจำกัดขนาดด้วย ``max_rows`` /
+    ``max_bytes`` โดยลบรายการที่ไม่ได้ใช้นานที่สุดออกก่อน
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_STORE_PATH,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        prune_interval: int = 1000,
+        timeout: float = 30.0
+    ):
+        self.path = path
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.prune_interval = prune_interval
+        self.hits = 0
+        self.misses = 0
+        self._writes_since_prune = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")  # มีผลเฉพาะตอนสร้างไฟล์ใหม่
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS predictions (
+                model TEXT NOT NULL,
+                text_hash BLOB NOT NULL,
+                result TEXT NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS predictions_last_used ON predictions (last_used);
+            CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """
+        )
+        row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'schema_version'").fetchone()
+        if row is None:
+            self._conn.execute("INSERT INTO store_meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+        elif int(row[0]) != SCHEMA_VERSION:
+            # schema เปลี่ยน: ผลเก่าอ่านไม่ได้แล้ว ล้างทิ้งแทนการ migrate
+            self._conn.execute("DELETE FROM predictions")
+            self._conn.execute("UPDATE store_meta SET value = ? WHERE key = 'schema_version'", (str(SCHEMA_VERSION),))
+
+    def get(self, model: str, text: str) -> Optional[Dict[str, Any]]:
+        """คืนผลทำนายที่เก็บไว้ของข้อความเดียว หรือ None"""
+        return self.get_many(model, [text])[0]
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        """ค้นผลทำนายของหลายข้อความ (query ละไม่เกิน 500 hash) คืนตามลำดับของ ``texts``"""
+        hashes = [text_hash(text) for text in texts]
+        found: Dict[bytes, str] = {}
+        unique = list(dict.fromkeys(hashes))
+
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self._conn.execute(
+                    f"SELECT text_hash, result FROM predictions WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *chunk]
+                ).fetchall())
+
+            if found:
+                now = int(time.time())
+                self._write_many(
+                    "UPDATE predictions SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, digest) for digest in found]
+                )
+
+            results = [json.loads(found[digest]) if digest in found else None for digest in hashes]
+            hits = sum(result is not None for result in results)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put(self, model: str, text: str, result: Dict[str, Any]):
+        """บันทึกผลทำนายของข้อความเดียว"""
+        self.put_many(model, [(text, result)])
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        """บันทึกผลทำนายหลายรายการใน transaction เดียว"""
+        now = int(time.time())
+        rows = [
+            (model, text_hash(text), json.dumps(result, ensure_ascii=False, default=_json_default), now)
+            for text, result in items
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            self._write_many("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)", rows)
+            self._writes_since_prune += len(rows)
+            due = self._writes_since_prune >= self.prune_interval
+
+        if due and (self.max_rows is not None or self.max_bytes is not None):
+            self.prune()
+
+    def _write_many(self, sql: str, rows: List[Tuple]):
+        """รันคำสั่งเขียนทุกแถวใน transaction เดียว (ต้องถือ ``_lock`` อยู่)"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(sql, rows)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def size_bytes(self) -> int:
+        """ขนาดข้อมูลในไฟล์ (ไม่นับหน้าว่าง)"""
+        with self._lock:
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def prune(self) -> int:
+        """ลบรายการที่ไม่ได้ใช้นานที่สุดจนอยู่ในขอบเขต ``max_rows``/``max_bytes`` คืนจำนวนที่ลบ"""
+        deleted = 0
+        rows = len(self)
+
+        if self.max_rows is not None and rows > self.max_rows:
+            deleted += self._delete_oldest(rows - self.max_rows)
+            rows -= deleted
+
+        if self.max_bytes is not None and rows:
+            size = self.size_bytes()
+            if size > self.max_bytes:
+                # ลบตามสัดส่วนที่เกิน (เผื่อ 10%) แทนการวัดขนาดซ้ำทีละแถว
+                excess = int(rows * (1 - self.max_bytes / size * 0.9)) + 1
+                deleted += self._delete_oldest(min(excess, rows))
+
+        with self._lock:
+            self._writes_since_prune = 0
+            if deleted:
+                self._conn.execute("PRAGMA incremental_vacuum")
+        return deleted
+
+    def _delete_oldest(self, count: int) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM predictions WHERE (model, text_hash) IN "
+                "(SELECT model, text_hash FROM predictions ORDER BY last_used LIMIT ?)",
+                (count,)
+            )
+            return cursor.rowcount
+
+    def vacuum(self):
+        """ตัดรายการเกินขอบเขตแล้วเขียนไฟล์ใหม่ให้เล็กที่สุด"""
+        if self.max_rows is not None or self.max_bytes is not None:
+            self.prune()
+        with self._lock:
+            self._conn.execute("VACUUM")
+
+    def clear(self, model: Optional[str] = None):
+        """ลบผลทำนายทั้งหมด หรือเฉพาะของ ``model``"""
+        with self._lock:
+            if model is None:
+                self._conn.execute("DELETE FROM predictions")
+            else:
+                self._conn.execute("DELETE FROM predictions WHERE model = ?", (model,))
+
+    def stats(self) -> Dict[str, Any]:
+        """จำนวนแถว ขนาด และ hit/miss ของ process นี้"""
+        with self._lock:
+            models = dict(self._conn.execute("SELECT model, COUNT(*) FROM predictions GROUP BY model").fetchall())
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "rows": sum(models.values()),
+            "rows_per_model": models,
+            "bytes": self.size_bytes(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "max_rows": self.max_rows,
+            "max_bytes": self.max_bytes
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "PredictionStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
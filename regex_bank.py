@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precompiled regex bank for labelled pattern families
+คลัง regex ที่คอมไพล์ไว้ตั้งแต่โหลดโมดูล พร้อมรายงาน pattern ที่ไม่ถูกต้อง
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class RegexBank:
+    """คอมไพล์ pattern ของทุก label ครั้งเดียว และสแกนข้อความโดยอ้างกลับไปยัง label
+
+    ``combined`` คือ alternation ของทุก pattern แบบ non-capturing ใช้เป็นด่านแรกว่ามี pattern ใดตรงหรือไม่
+    (ไม่ใช้ named group ระบุ label: sre ปิดการ optimize prefix ของ alternation เมื่อมี capturing group
+    จึงช้ากว่ากันหลายสิบเท่า)
+
+    การนับยังใช้ regex ของแต่ละ pattern แยกกัน เพื่อให้จำนวน match เท่ากับ
+    ``re.findall`` ทีละ pattern (alternation เดียวจะกลืน match ที่ซ้อนกัน
+    เช่น ``เย้.*`` ทับ pattern อื่นที่อยู่ท้ายข้อความ)
+
+    pattern ที่คอมไพล์ไม่ได้จะถูกข้ามและบันทึกไว้ใน ``invalid`` ตั้งแต่ตอนสร้าง
+    แทนที่จะเจอ ``re.error`` ซ้ำทุกข้อความ
+    """
+
+    def __init__(self, families: Dict[Any, Iterable[str]], name: str = "patterns", flags: int = 0, verbose: bool = True):
+        self.name = name
+        self.labels: List[Any] = list(families)
+        self.patterns: List[Tuple[Any, str, "re.Pattern"]] = []
+        self.invalid: List[Dict[str, Any]] = []
+
+        for label, patterns in families.items():
+            for pattern in patterns:
+                try:
+                    compiled = re.compile(pattern, flags)
+                except re.error as e:
+                    self.invalid.append({"label": label, "pattern": pattern, "error": str(e)})
+                    continue
+                self.patterns.append((label, pattern, compiled))
+
+        self.combined = self._compile_alternation(flags)
+
+        if verbose and self.invalid:
+            print(f"⚠️ {self.name}: ข้าม regex ที่ไม่ถูกต้อง {len(self.invalid)} รายการ")
+            for entry in self.invalid:
+                print(f"   - [{entry['label']}] {entry['pattern']!r}: {entry['error']}")
+
+    def _compile_alternation(self, flags: int) -> Optional["re.Pattern"]:
+        """รวมทุก pattern เป็น alternation แบบ non-capturing เดียว"""
+        if not self.patterns:
+            return None
+
+        alternation = "|".join(f"(?:{pattern})" for _, pattern, _ in self.patterns)
+        try:
+            return re.compile(alternation, flags)
+        except re.error:
+            # เช่น pattern ที่อ้าง backreference แบบตัวเลข ซึ่งเลขกลุ่มเลื่อนเมื่อรวมกัน
+            return None
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def any_match(self, text: str) -> bool:
+        """ตรวจรอบเดียวว่ามี pattern ใดตรงกับข้อความหรือไม่"""
+        if self.combined is None:
+            return any(compiled.search(text) for _, _, compiled in self.patterns)
+        return self.combined.search(text) is not None
+
+    def pattern_counts(self, text: str) -> List[Tuple[int, int]]:
+        """คืน (index ของ pattern, จำนวน match แบบ findall) เฉพาะ pattern ที่พบ"""
+        if not self.any_match(text):
+            return []
+
+        counts = []
+        for index, (_, _, compiled) in enumerate(self.patterns):
+            matches = len(compiled.findall(text))
+            if matches:
+                counts.append((index, matches))
+        return counts
+
+    def count(self, text: str) -> Dict[Any, int]:
+        """นับจำนวน match รวมแยกตาม label"""
+        counts: Dict[Any, int] = {}
+        for index, matches in self.pattern_counts(text):
+            label = self.patterns[index][0]
+            counts[label] = counts.get(label, 0) + matches
+        return counts
+
+    def matching_patterns(self, text: str) -> Dict[Any, List[str]]:
+        """คืน pattern ที่ ``search`` พบแยกตาม label (ตามลำดับที่ประกาศไว้)"""
+        if not self.any_match(text):
+            return {}
+
+        matches: Dict[Any, List[str]] = {}
+        for label, pattern, compiled in self.patterns:
+            if compiled.search(text):
+                matches.setdefault(label, []).append(pattern)
+        return matches
+
+    def validation_report(self) -> Dict[str, Any]:
+        """รายงานผลการคอมไพล์ pattern ตอนโหลด"""
+        return {
+            "name": self.name,
+            "total_patterns": len(self.patterns) + len(self.invalid),
+            "valid_patterns": len(self.patterns),
+            "invalid_patterns": list(self.invalid),
+            "combined_alternation": self.combined is not None
+        }
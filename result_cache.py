@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared LRU result cache for sentiment entry points
+cache ผลวิเคราะห์ที่ใช้ร่วมกันทุกฟังก์ชัน จำกัดจำนวนรายการ/หน่วยความจำ และไล่รายการเก่าแบบ LRU
+"""
+
+import copy
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def text_hash(text: str) -> bytes:
+    """hash ขนาด 16 ไบต์ของข้อความ (ใช้เป็นส่วนหนึ่งของ key แทนการเก็บข้อความเต็ม)"""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _estimate_size(obj: Any) -> int:
+    """ประมาณขนาดหน่วยความจำของผลลัพธ์ (dict/list/str ซ้อนกัน)"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _estimate_size(key) + _estimate_size(value)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _estimate_size(item)
+    return size
+
+
+def copy_result(obj: Any) -> Any:
+    """คัดลอกผลลัพธ์ให้ผู้เรียกแก้ไขได้โดยไม่กระทบค่าใน cache (เร็วกว่า deepcopy สำหรับ dict/list)"""
+    if isinstance(obj, dict):
+        return {key: copy_result(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [copy_result(item) for item in obj]
+    if obj is None or isinstance(obj, (str, int, float, bool, bytes, tuple, frozenset)):
+        return obj
+    return copy.deepcopy(obj)
+
+
+class ResultCache:
+    """LRU cache ของผลวิเคราะห์ key คือ (namespace, mode, threshold, model version, hash ของข้อความ)
+
+    ``text`` ที่ส่งเข้า ``make_key`` คือข้อความหลัง normalize ของแต่ละ entry point
+    (เช่นผลของ preprocessor ที่ transformer เห็นจริง) ผลลัพธ์ถูกคัดลอกทั้งตอนเก็บ
+    และตอนคืน จึงแก้ไข dict ที่ได้ได้อย่างปลอดภัย
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        namespace: str,
+        text: str,
+        mode: Optional[str] = None,
+        threshold: Optional[float] = None,
+        version: str = "",
+        extra: Hashable = None
+    ) -> Tuple:
+        """สร้าง key ของ cache จากโหมด threshold เวอร์ชันโมเดล และ hash ของข้อความ"""
+        return (namespace, mode, threshold, version, extra, text_hash(text))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """คืนสำเนาผลลัพธ์ที่เก็บไว้ หรือ None ถ้าไม่มี (นับ hit/miss)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy_result(entry[0])
+
+    def put(self, key: Tuple, value: Any):
+        """เก็บสำเนาผลลัพธ์ และไล่รายการที่ใช้ล่าสุดนานที่สุดออกจนอยู่ในขอบเขต"""
+        if not self.enabled or self.max_entries <= 0:
+            return
+        value = copy_result(value)
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            self._evict()
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        """คืนผลจาก cache หรือเรียก ``compute`` แล้วเก็บผลไว้"""
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+
+    def configure(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None, enabled: Optional[bool] = None):
+        """ปรับขอบเขตของ cache (ไล่รายการออกทันทีถ้าเกิน)"""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if enabled is not None:
+                self.enabled = enabled
+            self._evict()
+
+    def clear(self, reset_stats: bool = False):
+        """ล้างรายการทั้งหมด (และตัวนับถ้า ``reset_stats``)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            if reset_stats:
+                self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """ตัวนับ hit/miss/eviction และขนาดปัจจุบัน"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "enabled": self.enabled
+            }
+
+
+# cache เดียวที่ทุก entry point ใช้ร่วมกัน
+_result_cache = ResultCache()
+
+
+def get_result_cache() -> ResultCache:
+    """คืน cache ที่ใช้ร่วมกันทั้ง process"""
+    return _result_cache
+
+
+def configure_result_cache(max_entries: Optional[int] = None, max_bytes: Optional[int] = None, enabled: Optional[bool] = None) -> ResultCache:
+    """ตั้งค่าขอบเขตของ cache ที่ใช้ร่วมกัน"""
+    _result_cache.configure(max_entries=max_entries, max_bytes=max_bytes, enabled=enabled)
+    return _result_cache
+
+
+def get_result_cache_stats() -> Dict[str, Any]:
+    """ตัวนับของ cache ที่ใช้ร่วมกัน"""
+    return _result_cache.stats()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compiled rule-set artifacts
+เขียน automaton ของ RuleSet ที่คอมไพล์แล้วลงไฟล์ไบนารี และโหลดกลับด้วย mmap
+
+รูปแบบไฟล์ (little-endian)::
+
+    magic (8) | format version (u32) | metadata length (u32) | source hash (32)
+    | ความยาวตาราง 6 ตัว (u32 x 6) | metadata JSON (pad ถึง 4 ไบต์) | ตาราง int32 x 6
+
+metadata เก็บชื่อ rule set, keywords และ tags ส่วนตารางคือผลของ
+``KeywordAutomaton.to_tables`` ซึ่งถูกอ่านตรงจากหน้าหน่วยความจำที่ mmap ไว้
+โดยไม่คัดลอก worker ทุกตัวที่โหลดไฟล์เดียวกันจึงใช้หน้าเดียวกัน
+
+source hash คือ SHA-256 ของ keyword/regex families ของ rule set ถ้า lexicon
+เปลี่ยน hash จะไม่ตรงและ ``RuleSet`` จะคอมไพล์ใหม่ในหน่วยความจำ (ไม่เขียนไฟล์)
+ไฟล์ถูกเขียนโดย build step ``python rule_artifact.py [--force]`` เท่านั้น
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Dict, Optional
+
+from keyword_automaton import KeywordAutomaton, TableKeywordAutomaton
+
+MAGIC = b"THRULES\x00"
+FORMAT_VERSION = 1
+TABLE_NAMES = ("fail", "edge_start", "edge_char", "edge_next", "output_start", "output_ids")
+
+_HEADER = struct.Struct("<8sII32s" + "I" * len(TABLE_NAMES))
+_INT_SIZE = 4
+
+
+def _plain_families(families: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, list]]:
+    return {family: {label: list(words) for label, words in labels.items()} for family, labels in families.items()}
+
+
+def source_hash(
+    name: str,
+    keyword_families: Dict[str, Dict[str, Any]],
+    regex_families: Optional[Dict[str, Dict[str, Any]]] = None
+) -> bytes:
+    """SHA-256 ของ keyword/regex families (รวม format version) ใช้ตรวจว่าไฟล์ยังตรงกับ lexicon"""
+    payload = json.dumps(
+        [FORMAT_VERSION, name, _plain_families(keyword_families), _plain_families(regex_families or {})],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).digest()
+
+
+def _int_array(values) -> array:
+    """แปลงเป็น int32 little-endian"""
+    values = array("i", values)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def write_artifact(path: str, name: str, automaton: KeywordAutomaton, digest: bytes) -> bool:
+    """เขียน automaton ลงไฟล์แบบ atomic (เขียนไฟล์ชั่วคราวแล้ว rename) คืน False ถ้าเขียนไม่ได้"""
+    tables = automaton.to_tables()
+    metadata = json.dumps(
+        {"name": name, "keywords": automaton.keywords, "tags": automaton.tags},
+        ensure_ascii=False
+    ).encode("utf-8")
+    metadata += b" " * (-len(metadata) % _INT_SIZE)
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(metadata), digest,
+        *(len(tables[table]) for table in TABLE_NAMES)
+    )
+
+    directory = os.path.dirname(path) or "."
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+        try:
+            # fdopen ก่อนทุกอย่าง เพื่อให้ with ปิด fd เสมอแม้ขั้นถัดไปล้มเหลว
+            with os.fdopen(fd, "wb") as f:
+                os.chmod(temp_path, 0o644)  # worker ของผู้ใช้อื่นต้องอ่านได้ (mkstemp สร้างเป็น 0600)
+                f.write(header)
+                f.write(metadata)
+                for table in TABLE_NAMES:
+                    f.write(_int_array(tables[table]).tobytes())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+    except OSError as e:
+        print(f"⚠️ ไม่สามารถเขียน rule artifact {path}: {e}")
+        return False
+    return True
+
+
+def load_artifact(path: str, digest: bytes) -> Optional[TableKeywordAutomaton]:
+    """mmap ไฟล์และคืน automaton ที่อ่านจากไฟล์ หรือ None ถ้าไม่มีไฟล์/ไฟล์เก่า/ไฟล์เสีย
+
+    fd ถูกปิดทันทีหลัง mmap ส่วน mmap ถูกปิดเมื่ออ่านไม่สำเร็จ ถ้าสำเร็จ mmap
+    จะอยู่ตราบเท่าที่ตารางของ automaton ยังถูกใช้ (memoryview อ้างถึงอยู่)
+    """
+    if sys.byteorder != "little":
+        return None
+
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    automaton = None
+    try:
+        automaton = _read_tables(mapped, digest)
+    finally:
+        if automaton is None:
+            mapped.close()
+    return automaton
+
+
+def _read_tables(mapped: mmap.mmap, digest: bytes) -> Optional[TableKeywordAutomaton]:
+    """ตรวจ header/metadata แล้วสร้าง automaton จาก memoryview ของ ``mapped`` (None ถ้าไฟล์เก่าหรือเสีย)
+
+    memoryview ถูกสร้างหลังตรวจทุกอย่างแล้ว mmap จึงปิดได้เสมอเมื่อคืน None
+    """
+    if len(mapped) < _HEADER.size:
+        return None
+    magic, version, metadata_length, stored_digest, *lengths = _HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC or version != FORMAT_VERSION or stored_digest != digest:
+        return None
+
+    offset = _HEADER.size + metadata_length
+    if offset + sum(lengths) * _INT_SIZE != len(mapped):
+        return None
+
+    try:
+        metadata = json.loads(mapped[_HEADER.size:offset].decode("utf-8"))
+        keywords = metadata["keywords"]
+        tags = [[tuple(tag) for tag in keyword_tags] for keyword_tags in metadata["tags"]]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    view = memoryview(mapped)
+    tables = {}
+    for table, length in zip(TABLE_NAMES, lengths):
+        tables[table] = view[offset:offset + length * _INT_SIZE].cast("i")
+        offset += length * _INT_SIZE
+    view.release()
+
+    return TableKeywordAutomaton(tables, keywords, tags)
+
+
+def build_all(force: bool = False) -> Dict[str, str]:
+    """คอมไพล์และเขียน artifact ของ rule set ทุกตัวที่ import ได้ (ใช้เป็น build step ก่อน deploy)
+
+    เป็นที่เดียวที่เขียนไฟล์ลง ``rule_engine.ARTIFACT_DIR`` (การ import ไม่เขียนไฟล์)
+    """
+    import rule_engine
+
+    if force:
+        rule_engine.clear_rule_sets()
+        for filename in os.listdir(rule_engine.ARTIFACT_DIR) if os.path.isdir(rule_engine.ARTIFACT_DIR) else []:
+            if filename.endswith(rule_engine.ARTIFACT_SUFFIX):
+                os.unlink(os.path.join(rule_engine.ARTIFACT_DIR, filename))
+
+    getters = []
+    from detailed_thai_sentiment import DetailedThaiSentimentAnalyzer
+    getters.append(lambda: DetailedThaiSentimentAnalyzer().rules)
+    try:
+        from app import get_app_rule_set
+        getters.append(get_app_rule_set)
+    except ImportError as e:
+        print(f"⚠️ ข้าม app rule set: {e}")
+    try:
+        from social_media_utils import get_social_rule_set
+        getters.append(get_social_rule_set)
+    except ImportError as e:
+        print(f"⚠️ ข้าม social media rule set: {e}")
+
+    results = {}
+    for getter in getters:
+        rule_set = getter()
+        if rule_set.artifact_status != "loaded":
+            rule_set.save_artifact()
+        results[rule_set.name] = rule_set.artifact_status
+        print(f"✅ {rule_set.name}: {rule_set.artifact_status} ({rule_set.artifact_path})")
+    return results
+
+
+if __name__ == "__main__":
+    build_all(force="--force" in sys.argv[1:])
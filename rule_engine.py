@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared rule engine for the lexicon-based sentiment scorers
+โหลด lexicon จากไฟล์ข้อมูลและคอมไพล์เป็นโครงสร้างค้นหาครั้งเดียวต่อ process
+"""
+
+import copy
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from keyword_automaton import KeywordAutomaton
+from regex_bank import RegexBank
+from rule_artifact import load_artifact, source_hash, write_artifact
+
+LEXICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons")
+# automaton ที่คอมไพล์แล้วของแต่ละ rule set (เขียนด้วย build step ``python rule_artifact.py`` เท่านั้น)
+ARTIFACT_DIR = os.path.join(LEXICON_DIR, "compiled")
+ARTIFACT_SUFFIX = ".rules"
+
+# bonus ต่อคำบอกความเข้มข้นหนึ่งคำ (ใช้ร่วมกันทั้ง app และ detailed analyzer)
+INTENSITY_INCREMENTS = {"high": 0.5, "medium": 0.2, "low": 0.1}
+
+_lexicon_cache: Dict[str, Dict[str, Any]] = {}
+_rule_sets: Dict[str, "RuleSet"] = {}
+_lock = threading.RLock()
+
+
+def lexicon_path(name: str) -> str:
+    """path ของไฟล์ lexicon ``lexicons/<name>.json``"""
+    return os.path.join(LEXICON_DIR, f"{name}.json")
+
+
+def artifact_path(name: str) -> str:
+    """path ของ automaton ที่คอมไพล์แล้ว ``lexicons/compiled/<name>.rules``"""
+    return os.path.join(ARTIFACT_DIR, f"{name}{ARTIFACT_SUFFIX}")
+
+
+def load_lexicon(name: str) -> Dict[str, Any]:
+    """โหลด lexicon จากไฟล์ JSON (อ่านไฟล์ครั้งเดียว คืนสำเนาใหม่ทุกครั้งที่เรียก)"""
+    with _lock:
+        lexicon = _lexicon_cache.get(name)
+        if lexicon is None:
+            with open(lexicon_path(name), "r", encoding="utf-8") as f:
+                lexicon = json.load(f)
+            _lexicon_cache[name] = lexicon
+    return copy.deepcopy(lexicon)
+
+
+class RuleSet:
+    """lexicon ที่คอมไพล์แล้ว: คำสำคัญทุก family อยู่ใน automaton เดียว และ regex แยกตาม family
+
+    คำสำคัญผูกกับ tag ``(family, label)`` การสแกนหนึ่งรอบจึงได้จำนวนคำที่พบ
+    ของทุก family พร้อมกัน (นับคำละครั้งเหมือน ``keyword in text``)
+
+    automaton ถูกโหลดจาก artifact ใน ``ARTIFACT_DIR`` ด้วย mmap ถ้า source hash
+    ตรงกับ keyword families ไม่เช่นนั้นจะคอมไพล์ใหม่ในหน่วยความจำโดยไม่เขียนไฟล์
+    (เขียน artifact ด้วย ``save_artifact`` หรือ build step ``python rule_artifact.py``,
+    ส่ง ``use_artifact=False`` เพื่อไม่อ่าน artifact เลย)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        keyword_families: Dict[str, Dict[str, Iterable[str]]],
+        regex_families: Optional[Dict[str, Dict[str, Iterable[str]]]] = None,
+        use_artifact: bool = True
+    ):
+        self.name = name
+        self.families: List[str] = list(keyword_families)
+        self.artifact_path = artifact_path(name) if use_artifact else None
+        self.artifact_status = "disabled"
+        digest = source_hash(name, keyword_families, regex_families)
+        self._digest = digest
+        # เวอร์ชันของ lexicon ที่คอมไพล์ (ใช้เป็นส่วนหนึ่งของ key ของ result cache)
+        self.version = digest.hex()[:16]
+
+        if use_artifact:
+            self.automaton = load_artifact(self.artifact_path, digest)
+            if self.automaton is not None:
+                self.artifact_status = "loaded"
+            else:
+                self.automaton = self._compile_keywords(keyword_families)
+                self.artifact_status = "compiled"
+        else:
+            self.automaton = self._compile_keywords(keyword_families)
+
+        self.regex: Dict[str, RegexBank] = {
+            family: RegexBank(labels, name=f"{name}.{family}")
+            for family, labels in (regex_families or {}).items()
+        }
+
+    @staticmethod
+    def _compile_keywords(keyword_families: Dict[str, Dict[str, Iterable[str]]]) -> KeywordAutomaton:
+        """สร้าง automaton จากคำสำคัญของทุก family"""
+        automaton = KeywordAutomaton()
+        for family, labels in keyword_families.items():
+            for label, words in labels.items():
+                for word in words:
+                    automaton.add(word, (family, label))
+        return automaton.build()
+
+    def save_artifact(self) -> bool:
+        """เขียน automaton ลง ``artifact_path`` (เรียกจาก build step) คืน False ถ้าเขียนไม่ได้"""
+        if self.artifact_path is None:
+            return False
+        written = write_artifact(self.artifact_path, self.name, self.automaton, self._digest)
+        self.artifact_status = "built" if written else "unwritable"
+        return written
+
+    def scan_ids(self, text: str) -> List[int]:
+        """คืน keyword id ที่พบในข้อความ"""
+        return self.automaton.find_keyword_ids(text)
+
+    def hits_from_ids(self, keyword_ids: Iterable[int]) -> Dict[str, Dict[str, int]]:
+        """แปลง keyword id เป็นจำนวนคำที่พบแยกตาม family และ label"""
+        hits = {family: defaultdict(int) for family in self.families}
+        tags = self.automaton.tags
+        for keyword_id in keyword_ids:
+            for family, label in tags[keyword_id]:
+                hits[family][label] += 1
+        return hits
+
+    def scan(self, text: str) -> Dict[str, Dict[str, int]]:
+        """สแกนข้อความรอบเดียว คืนจำนวนคำที่พบแยกตาม family และ label"""
+        return self.hits_from_ids(self.scan_ids(text))
+
+    def validation_report(self) -> Dict[str, Any]:
+        """รายงานขนาดของ rule set และ regex ที่คอมไพล์ไม่ได้"""
+        return {
+            "name": self.name,
+            "version": self.version,
+            "keywords": len(self.automaton),
+            "artifact": {"path": self.artifact_path, "status": self.artifact_status},
+            "regex": {family: bank.validation_report() for family, bank in self.regex.items()}
+        }
+
+
+def get_rule_set(name: str, builder: Callable[[], RuleSet]) -> RuleSet:
+    """คืน RuleSet ที่คอมไพล์แล้วของ ``name`` (เรียก ``builder`` เฉพาะครั้งแรก)"""
+    rule_set = _rule_sets.get(name)
+    if rule_set is None:
+        with _lock:
+            rule_set = _rule_sets.get(name)
+            if rule_set is None:
+                rule_set = builder()
+                _rule_sets[name] = rule_set
+    return rule_set
+
+
+def clear_rule_sets():
+    """ล้าง lexicon และ RuleSet ที่ cache ไว้ (เช่นหลังแก้ไฟล์ lexicon)"""
+    with _lock:
+        _lexicon_cache.clear()
+        _rule_sets.clear()
+
+
+def compute_intensity_bonus(
+    intensity_hits: Dict[str, int],
+    levels: Iterable[str],
+    increments: Dict[str, float] = INTENSITY_INCREMENTS,
+    cap: float = 1.0
+) -> float:
+    """คำนวณ bonus จากจำนวนคำบอกความเข้มข้นที่พบ
+
+    บวกทีละคำตามลำดับ ``levels`` (เช่น high -> medium -> low) ให้ผลทศนิยม
+    เท่ากับการวน ``for word in words: if word in text`` แบบเดิม
+    """
+    bonus = 0.0
+    for level in levels:
+        for _ in range(intensity_hits.get(level, 0)):
+            bonus += increments.get(level, 0.0)
+    return min(bonus, cap)
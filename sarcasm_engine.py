@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Linear-time sarcasm detection engine
+ตรวจจับการประชด/เสียดสีด้วยการสแกน keyword รอบเดียว แทนการลอง regex ทีละตัว
+"""
+
+import re
+import time
+from bisect import bisect_right
+from itertools import product
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from keyword_automaton import KeywordAutomaton
+
+# Patterns for sarcasm/irony detection (Thai & English)
+SARCASM_PATTERNS = [
+    # Thai Sarcasm
+    r'ดีออก', r'จ้าาา', r'พ่อคุณ', r'แม่คุณ', r'ตัวดีเลย',
+    r'(เยี่ยม|ดี|เลิศ|ประเสริฐ|สุดยอด)จริงๆ(\\s*เนอะ)?',
+    r'(ดี|เก่ง)ตายห่า',
+    r'ภูมิใจในตัว.*จริงๆ',
+    r'ขอบคุณสำหรับความ(พยายาม|หวังดี)',
+    r'(สวย|หล่อ)เลือกได้',
+    r'(ดี|เก่ง)จนไม่รู้จะพูดยังไง',
+    r'.*ซะไม่มี',
+    r'ทำดีแล้วครับ.* สำหรับ',
+    r'บริการระดับห้าดาว.* ในโลกคู่ขนาน',
+    r'อนาคตสดใสแน่นอน.* ถ้า',
+    r'เสียงเพราะมาก.* จนอยากปิดหู',
+    r'เขียนดีนะ.* ถ้าไม่นับว่า',
+    r'ฉลาดเป็นกรด.* แต่',
+
+    # Specific patterns for failing cases
+    r'ขอบคุณ.*ที่.*แย่',  # ขอบคุณนะคะที่ทำให้วันนี้เป็นวันที่แย่ที่สุดในชีวิต
+    r'(งาน|สิ่ง)นี้สุดยอด.*ถ้า.*ล้มเหลว',  # งานนี้สุดยอดครับ... ถ้าชอบความล้มเหลว
+    r'ขอบคุณ.*ที่ทำให้.*แย่',  # Thank you for making it worse
+
+    # Rhetorical Questions (as sarcasm)
+    r'ทำกันได้ลงคอ(เนอะ)?',
+    r'ใครจะไปทน',
+
+    # English Sarcasm
+    r"'(amazing|great|fantastic|wonderful|perfect)'",  # Positive words in quotes
+    r'just what i needed',
+    r'so fun',
+    r'(i love|i enjoy) it when',
+    r'oh, great',
+    r'another meeting',
+    r'(clear|smooth) as mud',
+    r"that's just perfect"
+]
+
+# Check for positive sentiment followed by a negative context (more robust)
+# Structure: [Positive Keywords] ... [Conjunctions/Prepositions] ... [Negative Keywords/Context]
+POSITIVE_NEGATIVE_STRUCTURES = [
+    # Thai Structures
+    r'(ดี|สวย|อร่อย|ชอบ|สุดยอด|เยี่ยม|ดีใจ|เก่ง|พัฒนาการที่ดี|เป็นความคิดที่ดี|ชุดนี้สวย|เสียงเพราะ|เขียนดีนะ|ฉลาดเป็นกรด|ประทับใจ)\s*.*(แต่|ถ้า|สำหรับ|จน|ในความ|ที่เป็นต้นเหตุ|ไม่นับว่า|กว่าจะ|กว่าที่)\s*.*(แย่|ห่วย|ล้มเหลว|ต่ำ|ปัญหา|ไม่พัฒนา|ไม่อยากเจอ|ปิดหู|ไม่รู้เรื่อง|กัดกร่อน|ไร้ความสามารถ)',
+    # More specific patterns for failing cases
+    r'(ขอบคุณ|ขอบใจ).*(ที่|นะ).*(แย่|เลว|ล้มเหลว)',  # Thank you for making it worse
+    r'(สุดยอด|เยี่ยม|ดี).*(ถ้า|สำหรับ).*(ชอบ|คน).*(ล้มเหลว|แย่)',  # Great if you like failure
+    # English Structures
+    r'(amazing|great|fantastic|wonderful|perfect|love|fun|nice)\s*.*(waited|breaks|lost|for no reason|another meeting)'
+]
+
+ELLIPSIS_POSITIVE_WORDS = ['ขอบคุณ', 'สุดยอด', 'เยี่ยม', 'ดี', 'เก่ง', 'สวย', 'เพราะ']
+ELLIPSIS_NEGATIVE_WORDS = ['แย่', 'ล้มเหลว', 'ถ้าชอบ', 'สำหรับคน', 'ที่ไม่', 'ไม่รู้เรื่อง']
+
+# เวลาสูงสุดต่อข้อความ (วินาที) ก่อนหยุดตรวจ rule ที่เหลือ
+DEFAULT_TIME_BUDGET = 0.05
+
+GAP_LINE = "line"        # .*    : อะไรก็ได้ที่ไม่ข้ามบรรทัด
+GAP_WS_LINE = "ws_line"  # \s*.* : ช่องว่าง (รวมขึ้นบรรทัดใหม่) แล้วตามด้วย .*
+
+_REGEX_METACHARS = set(".^$*+?{}[]|()")
+
+
+def _parse_literal(source: str) -> Optional[str]:
+    """แปลง regex ที่เป็นตัวอักษรล้วน (รองรับ escape ของสัญลักษณ์) เป็น string"""
+    chars = []
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char == "\\":
+            if i + 1 >= len(source) or source[i + 1].isalnum():
+                return None
+            chars.append(source[i + 1])
+            i += 2
+            continue
+        if char in _REGEX_METACHARS:
+            return None
+        chars.append(char)
+        i += 1
+    return "".join(chars)
+
+
+def _find_group_end(pattern: str, start: int) -> int:
+    """คืนตำแหน่ง ')' ที่ปิดกลุ่มซึ่งเปิดที่ ``start`` (ไม่รองรับกลุ่มซ้อน)"""
+    i = start + 1
+    while i < len(pattern):
+        if pattern[i] == "\\":
+            i += 2
+            continue
+        if pattern[i] == "(":
+            return -1
+        if pattern[i] == ")":
+            return i
+        i += 1
+    return -1
+
+
+def compile_sequence(pattern: str) -> Optional[Tuple[List[List[str]], List[str]]]:
+    """แปลง regex ชุดย่อยเป็นลำดับกลุ่ม literal ที่คั่นด้วย gap
+
+    รองรับ literal, กลุ่ม ``(a|b|c)`` ที่ไม่ซ้อนกัน, ``.*``, ``\\s*.*`` และกลุ่ม
+    ``(...)?`` ที่อยู่ท้ายสุด (ไม่มีผลต่อการ ``re.search`` ว่าพบหรือไม่)
+    คืน ``(groups, gaps)`` หรือ None ถ้า pattern อยู่นอกชุดที่รองรับ
+    """
+    segments: List[List[List[str]]] = [[]]  # แต่ละ segment คือรายการตัวเลือกที่ต่อกัน
+    gaps: List[str] = []
+    i = 0
+
+    while i < len(pattern):
+        if pattern.startswith(r"\s*.*", i):
+            gaps.append(GAP_WS_LINE)
+            segments.append([])
+            i += 5
+        elif pattern.startswith(".*", i):
+            gaps.append(GAP_LINE)
+            segments.append([])
+            i += 2
+        elif pattern[i] == "(":
+            end = _find_group_end(pattern, i)
+            if end < 0:
+                return None
+            if pattern[end + 1:end + 2] == "?":
+                if end + 2 != len(pattern):
+                    return None
+                break  # กลุ่ม optional ท้าย pattern
+            alternatives = [_parse_literal(alt) for alt in pattern[i + 1:end].split("|")]
+            if any(alt is None or alt == "" for alt in alternatives):
+                return None
+            segments[-1].append(alternatives)
+            i = end + 1
+        elif pattern[i] == "\\":
+            literal = _parse_literal(pattern[i:i + 2])
+            if literal is None:
+                return None
+            segments[-1].append([literal])
+            i += 2
+        elif pattern[i] in _REGEX_METACHARS:
+            return None
+        else:
+            segments[-1].append([pattern[i]])
+            i += 1
+
+    # .* ที่หัวหรือท้าย pattern ไม่มีผลต่อ re.search
+    while segments and not segments[0]:
+        segments.pop(0)
+        if gaps:
+            gaps.pop(0)
+    while segments and not segments[-1]:
+        segments.pop()
+        if gaps:
+            gaps.pop()
+    if not segments or any(not segment for segment in segments):
+        return None
+
+    groups = [["".join(parts) for parts in product(*segment)] for segment in segments]
+    return groups, gaps
+
+
+class SarcasmEngine:
+    """ตรวจ rule ของ sarcasm ทั้งชุดในเวลาเชิงเส้นตามความยาวข้อความ
+
+    rule ที่แปลงเป็นลำดับ literal ได้ จะถูกค้นด้วย KeywordAutomaton รอบเดียว
+    แล้วตรวจลำดับ/ช่องว่างระหว่างกลุ่มจากตำแหน่งที่พบ (ไม่มี backtracking)
+    ผลเท่ากับ ``re.search`` ของ pattern เดิม rule ที่แปลงไม่ได้จะใช้ regex
+    ที่คอมไพล์ไว้แทน และทุก rule อยู่ภายใต้ time budget ต่อข้อความ
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, Any]], time_budget: float = DEFAULT_TIME_BUDGET):
+        self.time_budget = time_budget
+        self.rules: List[Tuple[str, Any]] = list(rules)
+        self.sequences: List[Optional[Tuple[List[List[str]], List[str]]]] = []
+        self.fallback: Dict[int, "re.Pattern"] = {}
+        self.automaton = KeywordAutomaton()
+
+        for rule_index, (pattern, _) in enumerate(self.rules):
+            sequence = compile_sequence(pattern)
+            self.sequences.append(sequence)
+            if sequence is None:
+                self.fallback[rule_index] = re.compile(pattern)
+                continue
+            for group_index, literals in enumerate(sequence[0]):
+                for literal in literals:
+                    self.automaton.add(literal, (rule_index, group_index))
+        self.automaton.build()
+
+    def _scan(self, text: str) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+        """สแกนข้อความรอบเดียว คืนตำแหน่ง (start, end) ของ literal แยกตาม (rule, group)"""
+        occurrences: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        keywords = self.automaton.keywords
+        tags = self.automaton.tags
+        for position, keyword_id in self.automaton.iter_matches(text):
+            end = position + 1
+            span = (end - len(keywords[keyword_id]), end)
+            for tag in tags[keyword_id]:
+                occurrences.setdefault(tag, []).append(span)
+        return occurrences
+
+    @staticmethod
+    def _line_tables(text: str) -> Tuple[List[int], List[int]]:
+        """ตาราง newline ล่าสุดก่อนแต่ละตำแหน่ง และตัวอักษรที่ไม่ใช่ช่องว่างตัวถัดไป"""
+        previous_newline = [-1] * (len(text) + 1)
+        last = -1
+        for index, char in enumerate(text):
+            previous_newline[index] = last
+            if char == "\n":
+                last = index
+        previous_newline[len(text)] = last
+
+        next_non_space = [len(text)] * (len(text) + 1)
+        following = len(text)
+        for index in range(len(text) - 1, -1, -1):
+            if not text[index].isspace():
+                following = index
+            next_non_space[index] = following
+        return previous_newline, next_non_space
+
+    def _sequence_matches(self, rule_index: int, occurrences, text: str, tables) -> bool:
+        """ตรวจว่ามีตำแหน่งของทุกกลุ่มเรียงกันตาม gap หรือไม่ (DP บนตำแหน่งที่พบ)"""
+        groups, gaps = self.sequences[rule_index]
+        ends = sorted(end for _, end in occurrences[(rule_index, 0)])
+
+        for group_index in range(1, len(groups)):
+            gap = gaps[group_index - 1]
+            reachable = []
+            for start, end in sorted(occurrences[(rule_index, group_index)]):
+                # จุดจบของกลุ่มก่อนหน้าที่ใกล้ที่สุด ดีที่สุดเสมอสำหรับทั้งสอง gap
+                found = bisect_right(ends, start)
+                if not found:
+                    continue
+                previous_end = ends[found - 1]
+                if tables is not None:
+                    previous_newline, next_non_space = tables
+                    newline = previous_newline[start]
+                    if newline >= previous_end:
+                        if gap == GAP_LINE or next_non_space[previous_end] <= newline:
+                            continue
+                reachable.append(end)
+            if not reachable:
+                return False
+            ends = sorted(reachable)
+        return True
+
+    def first_match(self, text: str) -> Tuple[Optional[Tuple[str, Any]], bool]:
+        """คืน (rule แรกตามลำดับที่ตรงกับข้อความ, หมดเวลาหรือไม่)"""
+        deadline = time.perf_counter() + self.time_budget
+        occurrences = self._scan(text)
+        tables = self._line_tables(text) if "\n" in text else None
+
+        # prefilter: ตรวจเฉพาะ rule ที่ทุกกลุ่มมี literal อย่างน้อยหนึ่งตัวในข้อความ
+        groups_found: Dict[int, int] = {}
+        for rule_index, _ in occurrences:
+            groups_found[rule_index] = groups_found.get(rule_index, 0) + 1
+        candidates = [
+            rule_index for rule_index, found in groups_found.items()
+            if found == len(self.sequences[rule_index][0])
+        ]
+        candidates.extend(self.fallback)
+
+        for rule_index in sorted(candidates):
+            if time.perf_counter() > deadline:
+                return None, True
+
+            if rule_index in self.fallback:
+                if self.fallback[rule_index].search(text):
+                    return self.rules[rule_index], False
+            elif self._sequence_matches(rule_index, occurrences, text, tables):
+                return self.rules[rule_index], False
+        return None, False
+
+
+SARCASM_ENGINE = SarcasmEngine(
+    [(pattern, "Matched sarcasm pattern") for pattern in SARCASM_PATTERNS]
+    + [(pattern, "Matched positive-negative structure") for pattern in POSITIVE_NEGATIVE_STRUCTURES]
+)
+
+
+def detect_sarcasm(text: str, engine: Optional[SarcasmEngine] = None) -> Dict[str, Any]:
+    """ตรวจจับ sarcasm/irony (ผลเท่ากับ app.analyze_sarcasm แบบเดิม)"""
+    engine = engine or SARCASM_ENGINE
+    text_lower = text.lower()
+
+    is_sarcastic = False
+    reason = ""
+
+    rule, timed_out = engine.first_match(text_lower)
+    if rule is not None:
+        pattern, label = rule
+        return {'is_sarcastic': True, 'reason': f"{label}: '{pattern}'"}
+    if timed_out:
+        return {'is_sarcastic': False, 'reason': "Sarcasm check stopped: time budget exceeded"}
+
+    # Additional check for ellipsis/dots with contrasting sentiment
+    if '...' in text:
+        # Look for positive words before ... and negative words after
+        parts = text.split('...')
+        if len(parts) >= 2:
+            first_part = parts[0].lower()
+            second_part = parts[1].lower()
+
+            has_positive_start = any(word in first_part for word in ELLIPSIS_POSITIVE_WORDS)
+            has_negative_end = any(word in second_part for word in ELLIPSIS_NEGATIVE_WORDS)
+
+            if has_positive_start and has_negative_end:
+                is_sarcastic = True
+                reason = "Positive-negative contrast with ellipsis"
+
+    return {'is_sarcastic': is_sarcastic, 'reason': reason}
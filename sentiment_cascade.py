@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Confidence-gated sentiment cascade
+วิเคราะห์ด้วยขั้นที่ถูกก่อน (กฎ -> TF-IDF) และส่งต่อให้ transformer เฉพาะข้อความที่ยังไม่มั่นใจ
+
+แต่ละขั้นมี ``margin`` (ผลต่างของ probability อันดับ 1 กับอันดับ 2 หรือ ``gate_margin`` ที่ขั้นนั้นให้มา
+เช่นขั้นกฎใช้ ``rule_margin`` จากหลักฐานของกฎ) ขั้นต่ำ ข้อความที่ผลของขั้นนั้น
+มี margin ถึงเกณฑ์จะจบที่ขั้นนั้น ที่เหลือส่งต่อขั้นถัดไปเป็น batch เดียว ขั้นสุดท้ายรับทุกข้อความที่มาถึง
+คอมเมนต์ส่วนใหญ่ชัดเจน ("555", "สุดยอด") จึงไม่ต้องผ่านโมเดลขนาดหลายร้อย MB
+
+``CascadeSentimentModel`` มี interface เดียวกับ model อื่นใน ml_sentiment_analysis (``predict_sentiment`` /
+``predict_batch`` / ``model_version``) จึงใช้แทน ensemble ได้ ``stats()`` รายงานอัตราการส่งต่อของแต่ละขั้น
+และ ``evaluate_cascade`` เทียบผลและเวลากับการรันโมเดลเต็มทุกข้อความ
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_RULE_MARGIN = 0.4
+DEFAULT_ML_MARGIN = 0.3
+
+# อารมณ์จาก advanced_thai_sentiment_analysis -> sentiment
+RULE_EMOTION_SENTIMENT = {
+    'joy': 'positive', 'excited': 'positive',
+    'anger': 'negative', 'sadness': 'negative', 'fear': 'negative',
+    'neutral': 'neutral'
+}
+
+RULE_PROBABILITIES = {
+    'positive': {'positive': 0.7, 'neutral': 0.2, 'negative': 0.1},
+    'negative': {'positive': 0.1, 'neutral': 0.2, 'negative': 0.7},
+    'neutral': {'positive': 0.25, 'neutral': 0.5, 'negative': 0.25}
+}
+
+# margin ของผลที่เป็นกลาง (ไม่พบคำแสดงอารมณ์) ตาม intensity: มีคำเน้นแต่ไม่พบอารมณ์ = น่าจะพลาดคำศัพท์
+RULE_NEUTRAL_MARGIN = {'low': 0.3, 'medium': 0.2, 'high': 0.1}
+
+
+def rule_prediction(rule_result: Dict[str, Any], model_type: str = 'rule_based') -> Dict[str, Any]:
+    """แปลงผลของ ``advanced_thai_sentiment_analysis`` เป็นผลรูปแบบเดียวกับ ML model (probability คงที่ตาม label)"""
+    sentiment = RULE_EMOTION_SENTIMENT.get(rule_result['emotion'], 'neutral')
+    return {
+        'sentiment': sentiment,
+        'confidence': 0.7 if rule_result['intensity'] == 'high' else 0.5,
+        'sentiment_score': rule_result['sentiment_score'],
+        'probabilities': dict(RULE_PROBABILITIES[sentiment]),
+        'model_type': model_type
+    }
+
+
+def rule_margin(rule_result: Dict[str, Any], evidence: Dict[str, int]) -> float:
+    """margin สำหรับ gate ของ cascade จากหลักฐานของกฎ: ขนาดของ sentiment_score และจำนวนคำที่พบ
+
+    ``evidence`` คือจำนวนคำฝั่ง ``positive``/``negative`` ที่พบ (ไม่นับคำเน้นอย่าง "มาก")
+    sarcasm หรือพบคำทั้งบวกและลบ (mixed) ได้ 0 จึงถูกส่งต่อเสมอ
+    """
+    positive = evidence.get('positive', 0)
+    negative = evidence.get('negative', 0)
+    if rule_result.get('intent') == 'sarcasm' or (positive and negative):
+        return 0.0
+    if RULE_EMOTION_SENTIMENT.get(rule_result['emotion'], 'neutral') == 'neutral':
+        return RULE_NEUTRAL_MARGIN.get(rule_result.get('intensity'), 0.2)
+    matched = max(positive + negative, 1)
+    strength = min(abs(float(rule_result.get('sentiment_score', 0.0))), 1.0)
+    return round(strength * matched / (matched + 1), 4)
+
+
+def probability_margin(prediction: Dict[str, Any]) -> float:
+    """ผลต่างของ probability อันดับ 1 กับอันดับ 2 (0 ถ้าไม่มี probabilities)"""
+    probabilities = sorted((float(value) for value in (prediction.get('probabilities') or {}).values()), reverse=True)
+    if not probabilities:
+        return 0.0
+    return probabilities[0] - (probabilities[1] if len(probabilities) > 1 else 0.0)
+
+
+def prediction_margin(prediction: Dict[str, Any]) -> float:
+    """margin ที่ cascade ใช้: ``gate_margin`` ถ้าขั้นนั้นให้มา ไม่เช่นนั้นใช้ ``probability_margin``"""
+    gate_margin = prediction.get('gate_margin')
+    return probability_margin(prediction) if gate_margin is None else float(gate_margin)
+
+
+class RuleBasedSentimentModel:
+    """model แบบกฎ (``advanced_thai_sentiment_analysis``) ในรูปแบบของ ML model
+
+    ``gated=True`` (ขั้นแรกของ cascade) เพิ่ม ``gate_margin`` จาก ``rule_margin`` ในผล
+    ส่วน probabilities ยังเป็นค่าคงที่เดียวกับเมื่อใช้เป็น member ของ ensemble
+    """
+
+    def __init__(self, model_type: str = 'rule_based', gated: bool = False):
+        self.model_type = model_type
+        self.gated = gated
+
+    def predict_sentiment(self, text: str) -> Dict[str, Any]:
+        from social_media_utils import _advanced_sentiment_with_evidence
+        rule_result, evidence = _advanced_sentiment_with_evidence(text)
+        prediction = rule_prediction(rule_result, self.model_type)
+        if self.gated:
+            prediction['gate_margin'] = rule_margin(rule_result, evidence)
+        return prediction
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        return [self.predict_sentiment(text) for text in texts]
+
+
+class CascadeSentimentModel:
+    """ลำดับของ model ที่ส่งต่อเฉพาะข้อความที่ margin ต่ำกว่าเกณฑ์ของขั้นนั้น"""
+
+    def __init__(self):
+        self.stages: List[Dict[str, Any]] = []
+        self.reset_stats()
+
+    @property
+    def models(self) -> Dict[str, Any]:
+        return {stage['name']: stage['model'] for stage in self.stages}
+
+    def add_stage(
+        self, name: str, model, margin: Optional[float] = None, position: Optional[int] = None
+    ) -> "CascadeSentimentModel":
+        """เพิ่มขั้นท้ายสุด หรือก่อนขั้นที่ ``position`` (``margin`` ไม่มีผลกับขั้นสุดท้าย ซึ่งรับทุกข้อความที่มาถึง)"""
+        stage = {'name': name, 'model': model, 'margin': margin}
+        if position is None:
+            self.stages.append(stage)
+        else:
+            self.stages.insert(position, stage)
+        self._stats[name] = self._empty_stats()
+        return self
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {'seen': 0, 'accepted': 0, 'escalated': 0, 'failed': 0, 'seconds': 0.0}
+
+    def reset_stats(self):
+        self.total = 0
+        self._stats: Dict[str, Dict[str, Any]] = {stage['name']: self._empty_stats() for stage in self.stages}
+
+    def model_version(self) -> Optional[str]:
+        """เวอร์ชันจากชื่อ เกณฑ์ และเวอร์ชันของทุกขั้น (None ถ้ามีขั้นที่ไม่มี ``model_version``)"""
+        parts = []
+        for stage in self.stages:
+            member_version = getattr(stage['model'], 'model_version', None)
+            if member_version is None:
+                return None
+            parts.append(f"{stage['name']}:{stage['margin']}:{member_version()}")
+        return "cascade[" + ";".join(parts) + "]"
+
+    def predict_sentiment(self, text: str) -> Dict[str, Any]:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """ทำนายทีละขั้น ข้อความที่ผลยังไม่มั่นใจส่งต่อขั้นถัดไปเป็น batch เดียว
+
+        ผลแต่ละรายการเพิ่ม ``cascade_stage`` (ขั้นที่ให้ผล) และ ``cascade_margin``
+        ถ้าขั้นถัดไปล้มเหลว จะใช้ผลของขั้นก่อนหน้าแทน
+        """
+        if not self.stages:
+            raise ValueError("ไม่มี stage ใน cascade")
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        pending = list(range(len(texts)))
+        self.total += len(texts)
+        last = len(self.stages) - 1
+
+        for position, stage in enumerate(self.stages):
+            if not pending:
+                break
+            stats = self._stats[stage['name']]
+            stats['seen'] += len(pending)
+            started = time.perf_counter()
+            try:
+                predictions = _predict_many(stage['model'], [texts[index] for index in pending])
+            except Exception as e:
+                print(f"[WARNING] cascade stage {stage['name']} failed: {e}")
+                stats['failed'] += len(pending)
+                stats['seconds'] += time.perf_counter() - started
+                continue
+            stats['seconds'] += time.perf_counter() - started
+
+            escalate = []
+            for index, prediction in zip(pending, predictions):
+                margin = prediction_margin(prediction)
+                result = dict(prediction)
+                result.pop('gate_margin', None)
+                result['cascade_stage'] = stage['name']
+                result['cascade_margin'] = round(margin, 4)
+                results[index] = result
+                if position < last and margin < (stage['margin'] or 0.0):
+                    escalate.append(index)
+            stats['accepted'] += len(pending) - len(escalate)
+            stats['escalated'] += len(escalate)
+            pending = escalate
+
+        if any(result is None for result in results):
+            raise ValueError("ไม่มี stage ที่ทำงานได้")
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """อัตราการรับ/ส่งต่อของแต่ละขั้น และสัดส่วนข้อความที่ถึงขั้นสุดท้าย"""
+        stages = {}
+        for stage in self.stages:
+            stats = dict(self._stats[stage['name']])
+            stats['escalation_rate'] = round(stats['escalated'] / stats['seen'], 4) if stats['seen'] else 0.0
+            stats['share_of_total'] = round(stats['seen'] / self.total, 4) if self.total else 0.0
+            stats['seconds'] = round(stats['seconds'], 4)
+            stages[stage['name']] = stats
+        final = self._stats[self.stages[-1]['name']]['seen'] if self.stages else 0
+        return {
+            'total': self.total,
+            'stages': stages,
+            'final_stage_rate': round(final / self.total, 4) if self.total else 0.0
+        }
+
+
+def _predict_many(model, texts: List[str]) -> List[Dict[str, Any]]:
+    predict_batch = getattr(model, 'predict_batch', None)
+    if predict_batch is not None:
+        return predict_batch(texts)
+    return [model.predict_sentiment(text) for text in texts]
+
+
+def evaluate_cascade(
+    cascade: CascadeSentimentModel,
+    texts: List[str],
+    labels: Optional[Sequence[Optional[str]]] = None,
+    reference=None
+) -> Dict[str, Any]:
+    """เทียบ cascade กับการรัน ``reference`` (ค่าเริ่มต้น: ขั้นสุดท้ายของ cascade) กับทุกข้อความ
+
+    รายงานความตรงกันของ label, accuracy เทียบ ``labels`` (ถ้ามี), อัตราการส่งต่อของแต่ละขั้นและเวลา
+    (ล้าง result cache ก่อนแต่ละรอบเพื่อให้เวลาเทียบกันได้)
+    """
+    from result_cache import get_result_cache
+
+    if reference is None:
+        reference = cascade.stages[-1]['model']
+
+    get_result_cache().clear()
+    started = time.perf_counter()
+    reference_predictions = _predict_many(reference, texts)
+    reference_seconds = time.perf_counter() - started
+
+    get_result_cache().clear()
+    cascade.reset_stats()
+    started = time.perf_counter()
+    cascade_predictions = cascade.predict_batch(texts)
+    cascade_seconds = time.perf_counter() - started
+
+    count = len(texts)
+    agreement = sum(
+        cascade_prediction['sentiment'] == reference_prediction['sentiment']
+        for cascade_prediction, reference_prediction in zip(cascade_predictions, reference_predictions)
+    )
+    report: Dict[str, Any] = {
+        'samples': count,
+        'agreement_with_reference': round(agreement / count, 4) if count else 0.0,
+        'cascade': cascade.stats(),
+        'seconds': {'reference': round(reference_seconds, 4), 'cascade': round(cascade_seconds, 4)},
+        'speedup': round(reference_seconds / cascade_seconds, 2) if cascade_seconds > 0 else None
+    }
+
+    if labels is not None:
+        gold = [(index, label) for index, label in enumerate(labels) if label]
+        if gold:
+            reference_accuracy = sum(reference_predictions[index]['sentiment'] == label for index, label in gold) / len(gold)
+            cascade_accuracy = sum(cascade_predictions[index]['sentiment'] == label for index, label in gold) / len(gold)
+            report['accuracy'] = {'reference': round(reference_accuracy, 4), 'cascade': round(cascade_accuracy, 4)}
+            report['accuracy_delta'] = round(cascade_accuracy - reference_accuracy, 4)
+    return report
+
+
+def build_default_cascade(
+    training_data: Optional[List[Dict[str, Any]]] = None,
+    prediction_store=None,
+    rule_margin: float = DEFAULT_RULE_MARGIN,
+    ml_margin: float = DEFAULT_ML_MARGIN,
+    final_model=None
+) -> CascadeSentimentModel:
+    """cascade มาตรฐาน: กฎ -> TF-IDF (ถ้ามีข้อมูลฝึกสอนพอ) -> ensemble ของโมเดล HF
+
+    ``final_model`` ใช้แทน ensemble ที่สร้างด้วย ``create_multi_model_ensemble`` ได้
+    """
+    from ml_sentiment_analysis import SKLEARN_AVAILABLE, ThaiSentimentMLModel, create_multi_model_ensemble
+
+    cascade = CascadeSentimentModel()
+    cascade.add_stage('rules', RuleBasedSentimentModel(gated=True), rule_margin)
+
+    if training_data and len(training_data) >= 20 and SKLEARN_AVAILABLE:
+        try:
+            ml_model = ThaiSentimentMLModel(model_type="logistic")
+            ml_model.train(training_data)
+            cascade.add_stage('tfidf', ml_model, ml_margin)
+        except Exception as e:
+            print(f"[WARNING] TF-IDF cascade stage skipped: {e}")
+
+    if final_model is None:
+        final_model = create_multi_model_ensemble(prediction_store=prediction_store)
+    cascade.add_stage('transformer', final_model)
+    return cascade
@@ -5,9 +5,16 @@ Integration module for Detailed Thai Sentiment Analysis
 โมดูลเชื่อมต่อระบบ sentiment analysis ใหม่กับระบบเดิม
 """
 
-from typing import Dict, List, Any, Optional, Union
-from detailed_thai_sentiment import DetailedThaiSentimentAnalyzer, EMOTION_GROUPS
+from functools import partial
+from itertools import islice
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Union
+from detailed_thai_sentiment import DetailedThaiSentimentAnalyzer, EMOTION_GROUPS, context_key
+from parallel_batch import DEFAULT_CHUNK_SIZE, iter_chunks, iter_parallel_chunks, resolve_workers
+from result_cache import get_result_cache
+from sentiment_stats import SentimentStatsAggregator
+from live_stats import WindowedSentimentAggregator
 import json
+import os
 
 # สร้าง global analyzer instance
 _detailed_analyzer = None
@@ -19,6 +26,14 @@ def get_detailed_analyzer() -> DetailedThaiSentimentAnalyzer:
         _detailed_analyzer = DetailedThaiSentimentAnalyzer()
     return _detailed_analyzer
 
+def _app_rule_version() -> Optional[str]:
+    """เวอร์ชัน lexicon ของ app ที่ทาง sarcasm/builtin ใช้ (None ถ้า import app ไม่ได้)"""
+    try:
+        from app import get_app_rule_set
+    except ImportError:
+        return None
+    return get_app_rule_set().version
+
 def analyze_detailed_sentiment(
     text: str, 
     mode: str = "single",  # "single" หรือ "multi"
@@ -37,6 +52,16 @@ def analyze_detailed_sentiment(
     Returns:
         Dict ที่มีผลการวิเคราะห์
     """
+    cache = get_result_cache()
+    cache_key = cache.make_key(
+        "sentiment_integration.analyze_detailed_sentiment", text, mode=mode,
+        threshold=None if mode == "single" else threshold, extra=(include_scores, _app_rule_version()),
+        version=get_detailed_analyzer().rules.version
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     # Check for sarcasm first using the enhanced detection
     try:
         from app import analyze_sarcasm, analyze_sentiment_builtin
@@ -65,6 +90,7 @@ def analyze_detailed_sentiment(
                 formatted_result["threshold"] = threshold
             if include_scores:
                 formatted_result["all_scores"] = result.get("scores", {})
+            cache.put(cache_key, formatted_result)
             return formatted_result
     except ImportError:
         pass  # Fall back to original detailed analysis
@@ -107,6 +133,7 @@ def analyze_detailed_sentiment(
                 formatted_result["all_scores"] = result.get("scores", {})
         else:
             raise ValueError(f"Invalid mode: {mode}. Use 'single' or 'multi'")
+        cache.put(cache_key, formatted_result)
         return formatted_result
     except Exception as e:
         # กรณีเกิดข้อผิดพลาด ให้คืนค่า default ที่ไม่ทำให้ระบบล่ม
@@ -161,29 +188,70 @@ def _map_emotion_to_sentiment(emotion: str) -> str:
     else:
         return "neutral"
 
+def _init_batch_worker():
+    """initializer ของ worker process: สร้าง analyzer ครั้งเดียวต่อ process"""
+    get_detailed_analyzer()
+
+def _analyze_text_chunk(
+    texts: List[str],
+    mode: str,
+    threshold: float,
+    include_scores: bool
+) -> List[Dict[str, Any]]:
+    """วิเคราะห์ข้อความหนึ่ง chunk (รันใน worker process)"""
+    return [analyze_detailed_sentiment(text, mode, threshold, include_scores) for text in texts]
+
+def _iter_progress(chunks, total: Optional[int], desc: str, show_progress: bool):
+    """yield chunk ต่อไปพร้อมอัปเดต progress bar ตามจำนวนรายการใน chunk"""
+    progress = None
+    if show_progress:
+        try:
+            from tqdm import tqdm
+            progress = tqdm(total=total, desc=desc)
+        except ImportError:
+            pass
+    try:
+        for chunk in chunks:
+            if progress is not None:
+                progress.update(len(chunk))
+            yield chunk
+    finally:
+        if progress is not None:
+            progress.close()
+
 def batch_analyze_detailed_sentiment(
     texts: List[str],
     mode: str = "single",
     threshold: float = 0.3,
     include_scores: bool = False,
-    show_progress: bool = False
+    show_progress: bool = False,
+    workers: Optional[int] = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
 ) -> List[Dict[str, Any]]:
-    """วิเคราะห์ sentiment แบบ batch"""
-    results = []
+    """วิเคราะห์ sentiment แบบ batch
     
-    if show_progress:
-        try:
-            from tqdm import tqdm
-            iterator = tqdm(texts, desc="Analyzing sentiment")
-        except ImportError:
+    ``workers > 1`` (หรือ ``None`` = จำนวน CPU) จะแบ่งข้อความเป็น chunk ละ ``chunk_size``
+    และวิเคราะห์ใน process pool โดยผลลัพธ์ยังเรียงตามลำดับเดิม
+    """
+    if resolve_workers(workers) <= 1:
+        if show_progress:
+            try:
+                from tqdm import tqdm
+                iterator = tqdm(texts, desc="Analyzing sentiment")
+            except ImportError:
+                iterator = texts
+        else:
             iterator = texts
-    else:
-        iterator = texts
-    
-    for text in iterator:
-        result = analyze_detailed_sentiment(text, mode, threshold, include_scores)
-        results.append(result)
+        
+        return [analyze_detailed_sentiment(text, mode, threshold, include_scores) for text in iterator]
     
+    chunks = iter_parallel_chunks(
+        partial(_analyze_text_chunk, mode=mode, threshold=threshold, include_scores=include_scores),
+        texts, workers=workers, chunk_size=chunk_size, initializer=_init_batch_worker
+    )
+    results = []
+    for chunk in _iter_progress(chunks, len(texts), "Analyzing sentiment", show_progress):
+        results.extend(chunk)
     return results
 
 def analyze_comment_sentiment(
@@ -216,36 +284,168 @@ def analyze_comment_sentiment(
     
     return enhanced_comment
 
+def _analyze_comment_chunk(
+    comments: List[Dict[str, Any]],
+    text_field: str,
+    mode: str,
+    threshold: float
+) -> List[Dict[str, Any]]:
+    """วิเคราะห์ comment หนึ่ง chunk (รันใน worker process)"""
+    return [analyze_comment_sentiment(comment, text_field, mode, threshold) for comment in comments]
+
 def analyze_social_media_batch(
     comments: List[Dict[str, Any]],
     text_field: str = "text",
     mode: str = "single",
     threshold: float = 0.3,
-    show_progress: bool = True
+    show_progress: bool = True,
+    workers: Optional[int] = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    live_stats: Optional[WindowedSentimentAggregator] = None
 ) -> List[Dict[str, Any]]:
-    """วิเคราะห์ sentiment สำหรับข้อมูล social media แบบ batch"""
-    results = []
+    """วิเคราะห์ sentiment สำหรับข้อมูล social media แบบ batch
     
-    if show_progress:
-        try:
-            from tqdm import tqdm
-            iterator = tqdm(comments, desc="Analyzing social media sentiment")
-        except ImportError:
+    ``workers > 1`` (หรือ ``None`` = จำนวน CPU) จะวิเคราะห์ใน process pool ทีละ chunk
+    โดยผลลัพธ์ยังเรียงตามลำดับเดิม ``live_stats`` จะถูกอัปเดตทันทีที่แต่ละ comment/chunk วิเคราะห์เสร็จ
+    """
+    if resolve_workers(workers) <= 1:
+        if show_progress:
+            try:
+                from tqdm import tqdm
+                iterator = tqdm(comments, desc="Analyzing social media sentiment")
+            except ImportError:
+                iterator = comments
+        else:
             iterator = comments
+        
+        results = []
+        for comment in iterator:
+            result = analyze_comment_sentiment(comment, text_field, mode, threshold)
+            if live_stats is not None:
+                live_stats.update(result)
+            results.append(result)
+        return results
+    
+    chunks = iter_parallel_chunks(
+        partial(_analyze_comment_chunk, text_field=text_field, mode=mode, threshold=threshold),
+        comments, workers=workers, chunk_size=chunk_size, initializer=_init_batch_worker
+    )
+    results = []
+    for chunk in _iter_progress(chunks, len(comments), "Analyzing social media sentiment", show_progress):
+        if live_stats is not None:
+            live_stats.update_many(chunk)
+        results.extend(chunk)
+    return results
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """อ่านไฟล์ JSONL ทีละบรรทัด (ข้ามบรรทัดว่างและบรรทัดที่ไม่ใช่ JSON ที่ถูกต้อง)"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def analyze_detailed_sentiment_stream(
+    texts: Iterable[str],
+    mode: str = "single",
+    threshold: float = 0.3,
+    include_scores: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1
+) -> Iterator[Dict[str, Any]]:
+    """วิเคราะห์ข้อความจาก iterable ใดๆ และ yield ผล (รูปแบบเดียวกับ ``analyze_detailed_sentiment``) ทีละรายการ
+    
+    input ถูกอ่านทีละ ``chunk_size`` รายการเมื่อผู้เรียกดึงผล หน่วยความจำจึงคงที่ตามขนาด chunk
+    ไม่ใช่ขนาดของคลังข้อความ ``workers > 1`` จะวิเคราะห์ใน process pool โดยอ่านล่วงหน้าไม่กี่ chunk
+    """
+    if resolve_workers(workers) <= 1:
+        for chunk in iter_chunks(texts, chunk_size):
+            yield from _analyze_text_chunk(chunk, mode, threshold, include_scores)
+        return
+    
+    for chunk in iter_parallel_chunks(
+        partial(_analyze_text_chunk, mode=mode, threshold=threshold, include_scores=include_scores),
+        texts, workers=workers, chunk_size=chunk_size, initializer=_init_batch_worker
+    ):
+        yield from chunk
+
+def analyze_social_media_stream(
+    comments: Iterable[Dict[str, Any]],
+    text_field: str = "text",
+    mode: str = "single",
+    threshold: float = 0.3,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+    live_stats: Optional[WindowedSentimentAggregator] = None
+) -> Iterator[Dict[str, Any]]:
+    """เหมือน ``analyze_social_media_batch`` แต่รับ iterable (เช่น ``iter_jsonl(path)``) และ yield ทีละ comment"""
+    if resolve_workers(workers) <= 1:
+        chunks = (_analyze_comment_chunk(chunk, text_field, mode, threshold) for chunk in iter_chunks(comments, chunk_size))
     else:
-        iterator = comments
+        chunks = iter_parallel_chunks(
+            partial(_analyze_comment_chunk, text_field=text_field, mode=mode, threshold=threshold),
+            comments, workers=workers, chunk_size=chunk_size, initializer=_init_batch_worker
+        )
     
-    for comment in iterator:
-        analyzed_comment = analyze_comment_sentiment(comment, text_field, mode, threshold)
-        results.append(analyzed_comment)
+    for chunk in chunks:
+        if live_stats is not None:
+            live_stats.update_many(chunk)
+        yield from chunk
+
+def _aggregate_text_chunk(texts: List[str], mode: str, threshold: float) -> SentimentStatsAggregator:
+    """วิเคราะห์ข้อความหนึ่ง chunk และคืนเฉพาะตัวสะสมสถิติ (รันใน worker process)"""
+    return SentimentStatsAggregator().update_many(
+        analyze_detailed_sentiment(text, mode, threshold) for text in texts
+    )
+
+def aggregate_sentiment_statistics(
+    texts: Iterable[str],
+    mode: str = "single",
+    threshold: float = 0.3,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = 1,
+    checkpoint_path: Optional[str] = None,
+    resume: bool = False
+) -> SentimentStatsAggregator:
+    """วิเคราะห์ข้อความจาก iterable และสะสมเฉพาะสถิติ (ไม่เก็บผลรายข้อความ)
     
-    return results
+    แต่ละ chunk ถูกวิเคราะห์และสะสมใน worker แล้วส่งกลับเฉพาะตัวสะสมมา merge
+    ถ้าระบุ ``checkpoint_path`` จะบันทึกสถานะหลังทุก chunk และ ``resume=True``
+    จะโหลด checkpoint แล้วข้ามข้อความที่นับไปแล้ว (ต้องส่ง input ชุดเดิมในลำดับเดิม)
+    """
+    aggregator = SentimentStatsAggregator()
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        aggregator = SentimentStatsAggregator.load(checkpoint_path)
+        texts = islice(texts, aggregator.total, None)
+    
+    if resolve_workers(workers) <= 1:
+        chunks = (_aggregate_text_chunk(chunk, mode, threshold) for chunk in iter_chunks(texts, chunk_size))
+    else:
+        chunks = iter_parallel_chunks(
+            partial(_aggregate_text_chunk, mode=mode, threshold=threshold),
+            texts, workers=workers, chunk_size=chunk_size, initializer=_init_batch_worker
+        )
+    
+    for chunk_stats in chunks:
+        aggregator.merge(chunk_stats)
+        if checkpoint_path:
+            aggregator.save(checkpoint_path)
+    return aggregator
 
 def get_sentiment_statistics(
     analyzed_comments: List[Dict[str, Any]],
     detailed: bool = True
 ) -> Dict[str, Any]:
-    """คำนวณสถิติของ sentiment จากผลการวิเคราะห์"""
+    """คำนวณสถิติของ sentiment จากผลการวิเคราะห์
+    
+    รับ ``BatchResult`` (จาก ``BatchResult.from_comments``) ได้โดยตรง
+    """
+    if hasattr(analyzed_comments, "sentiment_statistics"):
+        return analyzed_comments.sentiment_statistics(detailed)
+    
     if not analyzed_comments:
         return {}
     
@@ -259,6 +459,7 @@ def get_sentiment_statistics(
         stats["detailed_emotion_counts"] = {}
         stats["emotion_group_counts"] = {}
         stats["context_counts"] = {}
+        unique_contexts = {}  # context_key -> [บริบท, จำนวน]
     
     for comment in analyzed_comments:
         sentiment_data = comment.get("sentiment_analysis", {})
@@ -295,52 +496,59 @@ def get_sentiment_statistics(
                 for group in groups:
                     stats["emotion_group_counts"][group] = stats["emotion_group_counts"].get(group, 0) + 1
             
-            # นับ context (serialize dict เป็น string เพื่อใช้เป็น key)
+            # นับ context ที่ไม่ซ้ำด้วย key ที่ hash ได้ แล้วค่อย serialize ครั้งเดียวต่อบริบท
             context = sentiment_data.get("context")
             if context:
-                if isinstance(context, dict):
-                    context_key = json.dumps(context, ensure_ascii=False, sort_keys=True)
-                else:
-                    context_key = str(context)
-                stats["context_counts"][context_key] = stats["context_counts"].get(context_key, 0) + 1
+                entry = unique_contexts.setdefault(context_key(context), [context, 0])
+                entry[1] += 1
+    
+    if detailed:
+        for context, count in unique_contexts.values():
+            if isinstance(context, dict):
+                key = json.dumps(context, ensure_ascii=False, sort_keys=True)
+            else:
+                key = str(context)
+            stats["context_counts"][key] = stats["context_counts"].get(key, 0) + count
     
     return stats
 
+def _export_item(comment: Dict[str, Any], include_original: bool) -> Dict[str, Any]:
+    """เตรียม comment หนึ่งรายการสำหรับส่งออก"""
+    if include_original:
+        return comment.copy()
+    
+    # ส่งออกเฉพาะข้อมูล sentiment
+    export_item = {
+        "text": comment.get("text", ""),
+        "sentiment_analysis": comment.get("sentiment_analysis", {})
+    }
+    
+    # เพิ่มข้อมูลพื้นฐานถ้ามี
+    for field in ["author", "timestamp", "platform", "comment_id"]:
+        if field in comment:
+            export_item[field] = comment[field]
+    
+    return export_item
+
 def export_detailed_sentiment_results(
-    analyzed_comments: List[Dict[str, Any]],
+    analyzed_comments: Iterable[Dict[str, Any]],
     output_path: str,
     format: str = "jsonl",
     include_original: bool = True
 ) -> str:
-    """ส่งออกผลการวิเคราะห์ sentiment แบบละเอียด"""
-    
-    # เตรียมข้อมูลสำหรับส่งออก
-    export_data = []
-    
-    for comment in analyzed_comments:
-        if include_original:
-            export_item = comment.copy()
-        else:
-            # ส่งออกเฉพาะข้อมูล sentiment
-            export_item = {
-                "text": comment.get("text", ""),
-                "sentiment_analysis": comment.get("sentiment_analysis", {})
-            }
-            
-            # เพิ่มข้อมูลพื้นฐานถ้ามี
-            for field in ["author", "timestamp", "platform", "comment_id"]:
-                if field in comment:
-                    export_item[field] = comment[field]
-        
-        export_data.append(export_item)
+    """ส่งออกผลการวิเคราะห์ sentiment แบบละเอียด
     
+    รูปแบบ ``jsonl`` เขียนทีละรายการ จึงรับ generator (เช่นผลของ ``analyze_social_media_stream``)
+    ได้โดยไม่ต้องเก็บผลทั้งหมดไว้ในหน่วยความจำ
+    """
     # บันทึกไฟล์
     if format.lower() == "jsonl":
         with open(output_path, 'w', encoding='utf-8') as f:
-            for item in export_data:
-                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+            for comment in analyzed_comments:
+                f.write(json.dumps(_export_item(comment, include_original), ensure_ascii=False) + '\n')
     
     elif format.lower() == "json":
+        export_data = [_export_item(comment, include_original) for comment in analyzed_comments]
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(export_data, f, ensure_ascii=False, indent=2)
     
@@ -357,6 +565,15 @@ def enhanced_analyze_sentiment(text: str) -> Dict[str, Any]:
     เปลี่ยนเป็นใช้ AI Model จริง (detailed sentiment analyzer) เท่านั้น
     แต่เพิ่ม fallback ไปยัง builtin analysis ที่มี sarcasm detection
     """
+    cache = get_result_cache()
+    cache_key = cache.make_key(
+        "sentiment_integration.enhanced_analyze_sentiment", text, mode="single",
+        extra=_app_rule_version(), version=get_detailed_analyzer().rules.version
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
         # Try detailed analysis first
         result = analyze_detailed_sentiment(
@@ -365,7 +582,7 @@ def enhanced_analyze_sentiment(text: str) -> Dict[str, Any]:
             threshold=0.3,
             include_scores=False
         )
-        return {
+        enhanced_result = {
             "text": text,
             "sentiment": result["sentiment"],
             "confidence": result["confidence"],
@@ -374,6 +591,9 @@ def enhanced_analyze_sentiment(text: str) -> Dict[str, Any]:
             "emotion_group": result.get("emotion_group", result.get("group", "")),
             "context": result.get("context", {})
         }
+        if "error" not in result:
+            cache.put(cache_key, enhanced_result)
+        return enhanced_result
     except Exception as e:
         # Fallback to builtin analysis with enhanced sarcasm detection
         try:
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mergeable streaming statistics for sentiment results
+สะสมสถิติ sentiment ทีละผลลัพธ์ รวมข้าม process/shard ได้ และบันทึก checkpoint ลงดิสก์ได้
+
+ตัวสะสมเก็บเฉพาะตัวนับ (dict ของจำนวน, histogram ของ confidence, ตารางบริบท x อารมณ์,
+จำนวน sarcasm) ขนาดจึงขึ้นกับจำนวน label/บริบทที่พบ ไม่ใช่จำนวนผลลัพธ์ รับผลได้ทุกรูปแบบ
+ของระบบ: ผลของ DetailedThaiSentimentAnalyzer, ``analyze_detailed_sentiment``,
+comment ที่มี ``sentiment_analysis`` และผลของ ``app.analyze_sentiment_builtin``
+"""
+
+import json
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional
+
+from detailed_thai_sentiment import LABEL_TO_GROUP, generate_context_insights
+
+CHECKPOINT_FORMAT = "sentiment-stats"
+CHECKPOINT_VERSION = 1
+DEFAULT_CONFIDENCE_BINS = 10
+
+CONTEXT_FIELDS = ("primary_context", "formality_level", "social_setting", "emotional_tone")
+# คอลัมน์บริบทในตาราง context x emotion และ prefix ของ key แบบ analyze_context_emotion_correlation
+CORRELATION_FIELDS = (("primary_context", ""), ("formality_level", "formality_"), ("social_setting", "social_"))
+
+# ฟิลด์ที่ merge ด้วยการบวก (ตัวเลข / dict ของตัวนับ)
+_SCALAR_FIELDS = ("total", "unanalyzed", "confidence_sum", "confidence_count", "sarcasm_checked", "sarcastic")
+_COUNT_FIELDS = ("sentiment_counts", "emotion_counts", "group_counts", "context_counts", "context_emotion", "analysis_types")
+
+
+def _add(counts: Dict[Any, int], key: Any, amount: int = 1):
+    counts[key] = counts.get(key, 0) + amount
+
+
+def _merge_counts(target: Dict[Any, Any], source: Dict[Any, Any]):
+    """บวกตัวนับ (dict ซ้อนกันได้) จาก ``source`` เข้า ``target``"""
+    for key, value in source.items():
+        if isinstance(value, dict):
+            _merge_counts(target.setdefault(key, {}), value)
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+def _copy_counts(counts: Dict[Any, Any]) -> Dict[Any, Any]:
+    copied: Dict[Any, Any] = {}
+    _merge_counts(copied, counts)
+    return copied
+
+
+def _first(data: Dict[str, Any], *keys: str) -> Any:
+    for key in keys:
+        if key in data:
+            return data[key]
+    return None
+
+
+def write_json_atomic(path: str, data: Any) -> str:
+    """เขียน JSON แบบ atomic (เขียนไฟล์ชั่วคราวในโฟลเดอร์เดียวกันแล้ว rename ทับ) ผู้อ่านจึงไม่เห็นไฟล์ที่เขียนไม่ครบ"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".stats-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return path
+
+
+def result_fields(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """ดึงฟิลด์ที่ใช้ทำสถิติจากผลวิเคราะห์ทุกรูปแบบ (None ถ้า comment ยังไม่ถูกวิเคราะห์)
+
+    คืน dict ที่มี ``analysis_type``, ``sentiment``, ``labels``, ``groups``, ``confidence``
+    (ค่าที่ให้มา หรือคะแนนสูงสุดสำหรับ multi-label เหมือน get_emotion_statistics),
+    ``context`` และ ``sarcastic`` (None ถ้าไม่ได้ตรวจ sarcasm)
+    """
+    data = result["sentiment_analysis"] if "sentiment_analysis" in result else result
+    if not data:
+        return None
+
+    labels = _first(data, "labels", "detailed_emotions")
+    if labels is None:
+        label = _first(data, "label", "detailed_emotion", "emotion")
+        labels = [label] if label else []
+    groups = _first(data, "groups", "emotion_groups")
+    if groups is None:
+        group = _first(data, "group", "emotion_group")
+        groups = [group] if group else list(dict.fromkeys(LABEL_TO_GROUP.get(label, "Unknown") for label in labels))
+
+    confidence = _first(data, "confidence", "ml_confidence")
+    if confidence is None and data.get("scores"):
+        confidence = max(data["scores"].values())
+
+    sarcastic = _first(data, "is_sarcastic", "sarcasm_detected")
+    if sarcastic is None and "intent" in data:
+        sarcastic = data["intent"] == "sarcasm"  # ผลของ advanced_thai_sentiment_analysis
+
+    return {
+        "analysis_type": _first(data, "analysis_type", "analysis_mode"),
+        "sentiment": data.get("sentiment"),
+        "labels": labels,
+        "groups": groups,
+        "confidence": float(confidence) if confidence is not None else None,
+        "context": data.get("context"),
+        "sarcastic": sarcastic
+    }
+
+
+class SentimentStatsAggregator:
+    """ตัวสะสมสถิติที่อัปเดตทีละผล (``update``) รวมกันได้ (``merge``) และบันทึก/โหลดได้ (``save``/``load``)
+
+    ตัวสะสมของแต่ละ worker/shard สร้างแยกกันแล้ว ``merge`` เข้าด้วยกันได้ผลเท่ากับ
+    การสะสมทุกผลใน process เดียว (ยกเว้นลำดับ key ที่ตามลำดับการ merge)
+    """
+
+    def __init__(self, confidence_bins: int = DEFAULT_CONFIDENCE_BINS):
+        if confidence_bins < 1:
+            raise ValueError("confidence_bins must be at least 1")
+        self.confidence_bins = confidence_bins
+        self.total = 0
+        self.unanalyzed = 0
+        self.sentiment_counts: Dict[str, int] = {}
+        self.emotion_counts: Dict[str, int] = {}
+        self.group_counts: Dict[str, int] = {}
+        self.context_counts: Dict[str, Dict[str, int]] = {field: {} for field in CONTEXT_FIELDS}
+        # {field: {ค่าบริบท: {อารมณ์: จำนวน}}}
+        self.context_emotion: Dict[str, Dict[str, Dict[str, int]]] = {field: {} for field, _ in CORRELATION_FIELDS}
+        self.confidence_histogram: List[int] = [0] * confidence_bins
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
+        self.sarcasm_checked = 0
+        self.sarcastic = 0
+        self.analysis_types: Dict[str, int] = {}
+
+    # === UPDATE ===
+
+    def update(self, result: Dict[str, Any]):
+        """เพิ่มผลวิเคราะห์หนึ่งรายการ"""
+        self.total += 1
+
+        fields = result_fields(result)
+        if fields is None:
+            self.unanalyzed += 1
+            return
+
+        if fields["analysis_type"]:
+            _add(self.analysis_types, fields["analysis_type"])
+        if fields["sentiment"]:
+            _add(self.sentiment_counts, fields["sentiment"])
+
+        labels = fields["labels"]
+        for label in labels:
+            _add(self.emotion_counts, label)
+        for group in fields["groups"]:
+            _add(self.group_counts, group)
+
+        if fields["confidence"] is not None:
+            self._add_confidence(fields["confidence"])
+
+        context = fields["context"]
+        if isinstance(context, dict):
+            values = {field: context.get(field, "unknown") for field in CONTEXT_FIELDS}
+            for field in CONTEXT_FIELDS:
+                _add(self.context_counts[field], values[field])
+            for field, _ in CORRELATION_FIELDS:
+                table = self.context_emotion[field].setdefault(values[field], {})
+                for label in labels:
+                    _add(table, label)
+        elif isinstance(context, str):
+            _add(self.context_counts["primary_context"], context)
+
+        if fields["sarcastic"] is not None:
+            self.sarcasm_checked += 1
+            if fields["sarcastic"]:
+                self.sarcastic += 1
+
+    def update_many(self, results: Iterable[Dict[str, Any]]) -> "SentimentStatsAggregator":
+        """เพิ่มผลทุกรายการจาก iterable (อ่านทีละรายการ ไม่เก็บผลไว้)"""
+        for result in results:
+            self.update(result)
+        return self
+
+    def _add_confidence(self, confidence: float):
+        self.confidence_sum += confidence
+        self.confidence_count += 1
+        clipped = min(max(confidence, 0.0), 1.0)
+        self.confidence_histogram[min(int(clipped * self.confidence_bins), self.confidence_bins - 1)] += 1
+
+    # === MERGE ===
+
+    def merge(self, other: "SentimentStatsAggregator") -> "SentimentStatsAggregator":
+        """รวมตัวนับของ ``other`` เข้าตัวนี้ (histogram ต้องมีจำนวน bin เท่ากัน)"""
+        if other.confidence_bins != self.confidence_bins:
+            raise ValueError(
+                f"Cannot merge aggregators with {other.confidence_bins} and {self.confidence_bins} confidence bins"
+            )
+        for name in _SCALAR_FIELDS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in _COUNT_FIELDS:
+            _merge_counts(getattr(self, name), getattr(other, name))
+        self.confidence_histogram = [a + b for a, b in zip(self.confidence_histogram, other.confidence_histogram)]
+        return self
+
+    __iadd__ = merge
+
+    @classmethod
+    def merged(cls, aggregators: Iterable["SentimentStatsAggregator"], confidence_bins: int = DEFAULT_CONFIDENCE_BINS) -> "SentimentStatsAggregator":
+        """ตัวสะสมใหม่ที่รวมทุกตัวใน ``aggregators``"""
+        result = cls(confidence_bins)
+        for aggregator in aggregators:
+            result.merge(aggregator)
+        return result
+
+    # === CHECKPOINT ===
+
+    def to_dict(self) -> Dict[str, Any]:
+        """สำเนาสถานะทั้งหมดเป็น dict ที่ serialize เป็น JSON ได้"""
+        state: Dict[str, Any] = {
+            "format": CHECKPOINT_FORMAT,
+            "version": CHECKPOINT_VERSION,
+            "confidence_bins": self.confidence_bins,
+            "confidence_histogram": list(self.confidence_histogram)
+        }
+        for name in _SCALAR_FIELDS:
+            state[name] = getattr(self, name)
+        for name in _COUNT_FIELDS:
+            state[name] = _copy_counts(getattr(self, name))
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "SentimentStatsAggregator":
+        """สร้างตัวสะสมจากผลของ ``to_dict``"""
+        if state.get("format") != CHECKPOINT_FORMAT or state.get("version") != CHECKPOINT_VERSION:
+            raise ValueError("Not a sentiment stats checkpoint (or unsupported version)")
+        aggregator = cls(state["confidence_bins"])
+        if len(state["confidence_histogram"]) != aggregator.confidence_bins:
+            raise ValueError("Checkpoint histogram does not match confidence_bins")
+        aggregator.confidence_histogram = list(state["confidence_histogram"])
+        for name in _SCALAR_FIELDS:
+            setattr(aggregator, name, state[name])
+        for name in _COUNT_FIELDS:
+            _merge_counts(getattr(aggregator, name), state[name])  # สำเนา ไม่แชร์ dict กับ state
+        return aggregator
+
+    def save(self, path: str) -> str:
+        """บันทึก checkpoint แบบ atomic (เขียนไฟล์ชั่วคราวแล้ว rename ทับ)"""
+        return write_json_atomic(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path: str) -> "SentimentStatsAggregator":
+        """โหลด checkpoint ที่บันทึกด้วย ``save``"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    # === REPORTS ===
+
+    @property
+    def avg_confidence(self) -> float:
+        return self.confidence_sum / self.confidence_count if self.confidence_count else 0.0
+
+    @property
+    def sarcasm_rate(self) -> float:
+        """สัดส่วนผลที่ถูกระบุว่าเป็น sarcasm ในผลที่ตรวจ sarcasm"""
+        return self.sarcastic / self.sarcasm_checked if self.sarcasm_checked else 0.0
+
+    def confidence_distribution(self) -> Dict[str, int]:
+        """histogram ของ confidence โดย key เป็นช่วง เช่น ``"0.0-0.1"``"""
+        width = 1.0 / self.confidence_bins
+        return {
+            f"{round(i * width, 4)}-{round((i + 1) * width, 4)}": count
+            for i, count in enumerate(self.confidence_histogram)
+        }
+
+    def context_emotion_correlation(self) -> Dict[str, Dict[str, float]]:
+        """ร้อยละของแต่ละอารมณ์ต่อบริบท (รูปแบบเดียวกับ ``analyze_context_emotion_correlation``)"""
+        correlation: Dict[str, Dict[str, int]] = {}
+        for field, prefix in CORRELATION_FIELDS:
+            for value, emotions in self.context_emotion[field].items():
+                _merge_counts(correlation.setdefault(f"{prefix}{value}", {}), emotions)
+
+        stats = {}
+        for key, emotions in correlation.items():
+            total = sum(emotions.values())
+            if total > 0:
+                stats[key] = {emotion: round((count / total) * 100, 2) for emotion, count in emotions.items()}
+        return stats
+
+    def emotion_statistics(self) -> Dict[str, Any]:
+        """สถิติรูปแบบเดียวกับ ``DetailedThaiSentimentAnalyzer.get_emotion_statistics``"""
+        if not self.total:
+            return {}
+        context_stats = {f"{field}_counts": dict(self.context_counts[field]) for field in CONTEXT_FIELDS}
+        analysis_type = max(self.analysis_types, key=self.analysis_types.get) if self.analysis_types else "unknown"
+        return {
+            "total_texts": self.total,
+            "analysis_type": analysis_type,
+            "emotion_counts": dict(self.emotion_counts),
+            "group_counts": dict(self.group_counts),
+            "context_stats": context_stats,
+            "avg_confidence": round(self.confidence_sum / self.total, 3),
+            "context_insights": generate_context_insights(context_stats)
+        }
+
+    def app_statistics(self) -> Dict[str, int]:
+        """สถิติรูปแบบเดียวกับ ``app.get_sentiment_statistics``"""
+        return {
+            "total_comments": self.total,
+            "positive_comments": self.group_counts.get("Positive", 0),
+            "negative_comments": self.group_counts.get("Negative", 0),
+            "neutral_comments": self.group_counts.get("Neutral", 0),
+            "sarcastic_comments": self.sarcastic,
+            "non_sarcastic_comments": self.total - self.sarcastic
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """สรุปสถิติทั้งหมดสำหรับ dashboard/รายงาน"""
+        return {
+            "total": self.total,
+            "unanalyzed": self.unanalyzed,
+            "sentiment_counts": dict(self.sentiment_counts),
+            "emotion_counts": dict(self.emotion_counts),
+            "group_counts": dict(self.group_counts),
+            "context_stats": {f"{field}_counts": dict(self.context_counts[field]) for field in CONTEXT_FIELDS},
+            "avg_confidence": round(self.avg_confidence, 3),
+            "confidence_histogram": self.confidence_distribution(),
+            "context_emotion_correlation": self.context_emotion_correlation(),
+            "sarcasm": {
+                "checked": self.sarcasm_checked,
+                "sarcastic": self.sarcastic,
+                "rate": round(self.sarcasm_rate, 4)
+            }
+        }
+
+    def __repr__(self) -> str:
+        return f"SentimentStatsAggregator(total={self.total}, emotions={len(self.emotion_counts)})"
@@ -5,11 +5,12 @@ import re
 import random
 import requests
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Union # Added Union back for completeness
+from typing import List, Dict, Any, Optional, Tuple, Union # Added Union back for completeness
 from bs4 import BeautifulSoup
 import asyncio
 
 from dotenv import load_dotenv # Moved to top
+from rule_engine import RuleSet, get_rule_set, load_lexicon
 
 # --- Playwright for complex JS websites ---
 try:
@@ -1028,6 +1029,48 @@ def analyze_sentiment(text: str, lang: str = "th") -> str:
     else:
         return "neutral"
 
+# คำศัพท์ของ advanced_thai_sentiment_analysis อยู่ใน lexicons/social_media.json
+SOCIAL_LEXICON = load_lexicon("social_media")
+
+
+def _build_social_rule_set() -> RuleSet:
+    """คอมไพล์ lexicon ของ advanced_thai_sentiment_analysis เป็น RuleSet
+
+    emojis และเครื่องหมายวรรคตอนไม่มีตัวพิมพ์เล็ก/ใหญ่ จึงสแกนรวมกับคำสำคัญ
+    บน ``text.lower()`` ได้ในรอบเดียว
+    """
+    emotion_patterns = SOCIAL_LEXICON["emotion_patterns"]
+    intent_patterns = SOCIAL_LEXICON["intent_patterns"]
+    return RuleSet(
+        "social_media",
+        keyword_families={
+            "emotion": {
+                emotion: patterns["keywords"] + patterns.get("emojis", [])
+                for emotion, patterns in emotion_patterns.items()
+            },
+            "intent": {
+                intent: patterns.get("keywords", []) + patterns.get("punctuation", [])
+                for intent, patterns in intent_patterns.items()
+            },
+            "context": SOCIAL_LEXICON["context_patterns"],
+            "intensity": SOCIAL_LEXICON["intensity_patterns"],
+            "sarcasm": {
+                "indicator": SOCIAL_LEXICON["sarcasm_indicators"],
+                "positive": SOCIAL_LEXICON["sarcasm_positive_words"]
+            }
+        },
+        regex_families={
+            "intent": {intent: patterns.get("patterns", []) for intent, patterns in intent_patterns.items()},
+            "target": {"target": SOCIAL_LEXICON["target_patterns"]}
+        }
+    )
+
+
+def get_social_rule_set() -> RuleSet:
+    """RuleSet ของ advanced_thai_sentiment_analysis (คอมไพล์ครั้งเดียวต่อ process)"""
+    return get_rule_set("social_media", _build_social_rule_set)
+
+
 def advanced_thai_sentiment_analysis(text: str) -> Dict[str, Any]:
     """
     Advanced Thai sentiment analysis with comprehensive schema
@@ -1038,76 +1081,37 @@ def advanced_thai_sentiment_analysis(text: str) -> Dict[str, Any]:
     Returns:
         Dictionary with detailed sentiment analysis including emotion, intent, intensity, context
     """
+    return _advanced_sentiment_with_evidence(text)[0]
+
+
+def _polarity_evidence(rules: RuleSet, keyword_ids: List[int]) -> Dict[str, int]:
+    """จำนวนคำแสดงอารมณ์ฝั่งบวก/ลบที่พบ (ใช้เป็นหลักฐานของ cascade)
+
+    ไม่นับคำที่เป็นทั้งคำอารมณ์และคำเน้น (เช่น "มาก" ที่อยู่ใน excited) เพราะใช้ขยายได้ทั้งสองฝั่ง
+    """
+    evidence = {"positive": 0, "negative": 0}
+    tags = rules.automaton.tags
+    for keyword_id in keyword_ids:
+        keyword_tags = tags[keyword_id]
+        if any(family == "intensity" for family, _ in keyword_tags):
+            continue
+        for family, label in keyword_tags:
+            if family != "emotion":
+                continue
+            score = SOCIAL_LEXICON["sentiment_mapping"].get(label, 0.0)
+            if score > 0:
+                evidence["positive"] += 1
+            elif score < 0:
+                evidence["negative"] += 1
+    return evidence
+
+
+def _advanced_sentiment_with_evidence(text: str) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """``advanced_thai_sentiment_analysis`` พร้อมจำนวนคำฝั่งบวก/ลบที่พบ (สำหรับ margin ของ cascade)"""
     text_lower = text.lower()
-    
-    # Emotion mapping patterns
-    emotion_patterns = {
-        "joy": {
-            "keywords": ["ดีใจ", "สุข", "ปลื้ม", "ยินดี", "เฮง", "555", "ฮ่าๆ", "เจ๋ง", "สุดยอด", "เยี่ยม"],
-            "emojis": ["😊", "😁", "😂", "🤣", "😆", "🥳", "❤️", "👍"]
-        },
-        "sadness": {
-            "keywords": ["เศร้า", "เสียใจ", "น่าเศร้า", "ใจเสีย", "ท้อ", "หดหู่", "ผิดหวัง"],
-            "emojis": ["😢", "😭", "😔", "💔", "😞"]
-        },
-        "anger": {
-            "keywords": ["โกรธ", "เกลียด", "ห่วยแตก", "แย่", "น่ารำคาญ", "เลว", "บ้า", "ฟาด"],
-            "emojis": ["😡", "🤬", "😠", "👎"]
-        },
-        "fear": {
-            "keywords": ["กลัว", "เครียด", "วิตก", "กังวล", "ตื่น", "หวาดเสีย", "ตกใจ"],
-            "emojis": ["😰", "😨", "😱", "😟"]
-        },
-        "excited": {
-            "keywords": ["ตื่นเต้น", "ว้าว", "มาก", "สุดๆ", "โคตร", "วิ้ง", "อีหยัง"],
-            "emojis": ["🤩", "😍", "🔥", "⚡"]
-        },
-        "neutral": {
-            "keywords": ["ปกติ", "ธรรมดา", "โอเค", "พอ", "ใช้ได้"],
-            "emojis": ["😐", "😶"]
-        }
-    }
-    
-    # Intent mapping patterns
-    intent_patterns = {
-        "question": {
-            "keywords": ["ไหม", "หรือ", "เหรอ", "ไง", "อะไร", "ทำไม", "อย่างไร", "เมื่อไหร่", "ที่ไหน", "ใคร"],
-            "punctuation": ["?", "？"]
-        },
-        "request": {
-            "keywords": ["ช่วย", "กรุณา", "โปรด", "ขอ", "ได้ไหม", "หน่อย", "ดัง", "นะ"],
-            "context": ["ได้ไหม", "หน่อยนะ", "กรุณา"]
-        },
-        "complain": {
-            "keywords": ["แย่", "ห่วย", "เลว", "ไม่ดี", "น่ารำคาญ", "ผิดหวัง", "เกลียด"],
-            "context": ["ไม่ควร", "ไม่น่า", "แย่มาก"]
-        },
-        "praise": {
-            "keywords": ["ดี", "เยี่ยม", "สุดยอด", "เก่ง", "น่ารัก", "ประทับใจ", "ชอบ"],
-            "context": ["ดีจัง", "เยี่ยมมาก", "สุดยอดเลย"]
-        },
-        "sarcasm": {
-            "keywords": ["อ่อ", "เหรอ", "จริงๆ", "555", "ล้อเล่น"],
-            "patterns": ["อ่อ.*ดี", "จริงๆ.*เนอะ", "ใช่.*มั้ง", "แน่นอน.*จัง"]
-        },
-        "inform": {
-            "keywords": ["คือ", "เป็น", "มี", "ได้", "จะ", "แล้ว", "กำลัง"],
-            "default": True  # Default intent if no others match
-        }
-    }
-    
-    # Context patterns
-    context_patterns = {
-        "formal": ["ครับ", "ค่ะ", "คะ", "ขอแสดงความนับถือ", "ด้วยความเคารพ", "กรุณา"],
-        "informal": ["555", "ฮ่า", "อ่ะ", "นะ", "วะ", "เฮ้ย", "ไอ้", "โว้ย"],
-        "slang": ["โคตร", "ปัง", "ชิล", "เฟล", "เบร็ค", "แจ่ม", "เจ๋ง"],
-        "personal": ["ฉัน", "กู", "มึง", "เรา", "กัน", "ตัว"]
-    }
-    
-    # Intensity indicators
-    intensity_high = ["มาก", "โคตร", "สุด", "ปัง", "แรง", "เลว", "ห่วย", "แจ่ม"]
-    intensity_medium = ["ค่อนข้าง", "พอสมควร", "ปานกลาง", "นิดหน่อย"]
-    intensity_low = ["เล็กน้อย", "นิดเดียว", "หน่อย", "เบาๆ"]
+    rules = get_social_rule_set()
+    keyword_ids = rules.scan_ids(text_lower)
+    hits = rules.hits_from_ids(keyword_ids)
     
     # Analysis
     result = {
@@ -1121,19 +1125,11 @@ def advanced_thai_sentiment_analysis(text: str) -> Dict[str, Any]:
         "notes": ""
     }
     
-    # Detect emotion
-    emotion_scores = {}
-    for emotion, patterns in emotion_patterns.items():
-        score = 0
-        # Check keywords
-        for keyword in patterns["keywords"]:
-            if keyword in text_lower:
-                score += 1
-        # Check emojis
-        for emoji in patterns.get("emojis", []):
-            if emoji in text:
-                score += 1
-        emotion_scores[emotion] = score
+    # Detect emotion (keywords + emojis)
+    emotion_scores = {
+        emotion: hits["emotion"].get(emotion, 0)
+        for emotion in SOCIAL_LEXICON["emotion_patterns"]
+    }
     
     # Select highest scoring emotion
     if emotion_scores:
@@ -1141,76 +1137,48 @@ def advanced_thai_sentiment_analysis(text: str) -> Dict[str, Any]:
         if emotion_scores[result["emotion"]] == 0:
             result["emotion"] = "neutral"
     
-    # Detect intent
-    intent_scores = {}
-    for intent, patterns in intent_patterns.items():
-        score = 0
-        # Check keywords
-        for keyword in patterns.get("keywords", []):
-            if keyword in text_lower:
-                score += 1
-        # Check patterns (regex-like)
-        for pattern in patterns.get("patterns", []):
-            if re.search(pattern, text_lower):
-                score += 2
-        # Check punctuation
-        for punct in patterns.get("punctuation", []):
-            if punct in text:
-                score += 1
-        intent_scores[intent] = score
+    # Detect intent (keywords + punctuation, regex patterns count double)
+    pattern_matches = rules.regex["intent"].matching_patterns(text_lower)
+    intent_scores = {
+        intent: hits["intent"].get(intent, 0) + 2 * len(pattern_matches.get(intent, []))
+        for intent in SOCIAL_LEXICON["intent_patterns"]
+    }
     
     # Select highest scoring intent
     if intent_scores and max(intent_scores.values()) > 0:
         result["intent"] = max(intent_scores, key=intent_scores.get)
     
     # Detect sarcasm (special case)
-    sarcasm_indicators = ["อ่อ", "เหรอ", "จริงๆ เนอะ", "ใช่ๆ", "แน่นอน"]
-    if any(indicator in text_lower for indicator in sarcasm_indicators):
-        positive_words = ["ดี", "เยี่ยม", "สุดยอด"]
-        if any(word in text_lower for word in positive_words):
-            result["intent"] = "sarcasm"
-            result["emotion"] = "complex"
+    if hits["sarcasm"].get("indicator") and hits["sarcasm"].get("positive"):
+        result["intent"] = "sarcasm"
+        result["emotion"] = "complex"
     
     # Detect intensity
-    if any(word in text_lower for word in intensity_high):
+    intensity_hits = hits["intensity"]
+    if intensity_hits.get("high"):
         result["intensity"] = "high"
-    elif any(word in text_lower for word in intensity_medium):
+    elif intensity_hits.get("medium"):
         result["intensity"] = "medium"
-    elif any(word in text_lower for word in intensity_low):
+    elif intensity_hits.get("low"):
         result["intensity"] = "low"
     
     # Detect context
-    if any(word in text_lower for word in context_patterns["formal"]):
+    context_hits = hits["context"]
+    if context_hits.get("formal"):
         result["context"] = "formal"
-    elif any(word in text_lower for word in context_patterns["slang"]):
+    elif context_hits.get("slang"):
         result["context"] = "slang"
-    elif any(word in text_lower for word in context_patterns["personal"]):
+    elif context_hits.get("personal"):
         result["context"] = "personal"
     else:
         result["context"] = "informal"
     
     # Calculate sentiment score
-    sentiment_mapping = {
-        "joy": 0.8,
-        "excited": 0.9,
-        "sadness": -0.6,
-        "anger": -0.8,
-        "fear": -0.4,
-        "neutral": 0.0,
-        "complex": -0.2  # Slightly negative for sarcasm/complex emotions
-    }
-    
-    base_score = sentiment_mapping.get(result["emotion"], 0.0)
+    base_score = SOCIAL_LEXICON["sentiment_mapping"].get(result["emotion"], 0.0)
     
     # Adjust by intensity
-    intensity_multiplier = {
-        "low": 0.5,
-        "medium": 1.0,
-        "high": 1.5
-    }
-    
     result["sentiment_score"] = round(
-        base_score * intensity_multiplier.get(result["intensity"], 1.0), 2
+        base_score * SOCIAL_LEXICON["intensity_multiplier"].get(result["intensity"], 1.0), 2
     )
     
     # Ensure score is within bounds
@@ -1218,13 +1186,8 @@ def advanced_thai_sentiment_analysis(text: str) -> Dict[str, Any]:
     
     # Extract target (simple noun extraction)
     # This is a basic implementation - could be enhanced with NLP libraries
-    target_patterns = [
-        r'ร้าน\w*', r'อาหาร\w*', r'บริการ\w*', r'สินค้า\w*',
-        r'ภาพยนตร์\w*', r'หนัง\w*', r'เพลง\w*', r'คน\w*'
-    ]
-    
-    for pattern in target_patterns:
-        match = re.search(pattern, text)
+    for _, _, target_pattern in rules.regex["target"].patterns:
+        match = target_pattern.search(text)
         if match:
             result["target"] = match.group()
             break
@@ -1240,12 +1203,14 @@ def advanced_thai_sentiment_analysis(text: str) -> Dict[str, Any]:
     
     result["notes"] = ", ".join(notes) if notes else ""
     
-    return result
+    return result, _polarity_evidence(rules, keyword_ids)
 
 def batch_advanced_sentiment_analysis(
     comments: List[Dict[str, Any]], 
     text_field: str = "text",
-    use_ml: bool = False
+    use_ml: bool = False,
+    live_stats=None,
+    cascade_margin: Optional[float] = None
 ) -> List[Dict[str, Any]]:
     """
     Apply advanced sentiment analysis to a batch of comments
@@ -1254,19 +1219,25 @@ def batch_advanced_sentiment_analysis(
         comments: List of comment dictionaries
         text_field: Field name containing the text to analyze
         use_ml: Whether to use ML-enhanced sentiment analysis
+        live_stats: Optional live_stats.WindowedSentimentAggregator updated as each comment is analyzed
+        cascade_margin: With use_ml, comments whose rule-based margin reaches it skip the ML model
         
     Returns:
         List of comments with added sentiment analysis fields
     """
     enriched_comments = []
+    comments_to_analyze = [comment for comment in comments if text_field in comment and comment[text_field]]
     
-    for comment in comments:
-        if text_field not in comment or not comment[text_field]:
-            continue
-            
+    # ML: ทำนายทั้งชุดด้วย predict_batch ครั้งเดียว
+    if use_ml:
+        ml_results = batch_ml_enhanced_sentiment_analysis(
+            [comment[text_field] for comment in comments_to_analyze], comments, cascade_margin
+        )
+    
+    for index, comment in enumerate(comments_to_analyze):
         # Apply appropriate sentiment analysis
         if use_ml:
-            sentiment_data = ml_enhanced_sentiment_analysis(comment[text_field], comments)
+            sentiment_data = ml_results[index]
         else:
             sentiment_data = advanced_thai_sentiment_analysis(comment[text_field])
           # Merge with original comment data
@@ -1293,6 +1264,8 @@ def batch_advanced_sentiment_analysis(
         else:
             enriched_comment["ml_enhanced"] = False
         
+        if live_stats is not None:
+            live_stats.update(enriched_comment)
         enriched_comments.append(enriched_comment)
     
     return enriched_comments
@@ -1443,6 +1416,7 @@ def extract_social_media_comments(
     silent: bool = True,
     include_advanced_sentiment: bool = False,
     use_ml_sentiment: bool = False,
+    live_stats=None,
     **kwargs
 ) -> List[Dict[str, Any]]:
     """
@@ -1456,6 +1430,11 @@ def extract_social_media_comments(
         silent: Whether to suppress log messages
         include_advanced_sentiment: Whether to perform advanced Thai sentiment analysis
         use_ml_sentiment: Whether to use ML-enhanced sentiment analysis (requires include_advanced_sentiment)
+        live_stats: Optional live_stats.WindowedSentimentAggregator for monitoring the crawl while it runs.
+            Fed after each query with that query's comments once they are deduplicated against earlier
+            queries, analyzed (include_advanced_sentiment) and spam-filtered, i.e. the same comments the
+            final result contains (before the max_results cut). Without include_sentiment or
+            include_advanced_sentiment the comments carry no label, so only volume is counted
         **kwargs: Additional platform-specific parameters
         
     Returns:
@@ -1484,6 +1463,14 @@ def extract_social_media_comments(
         # Calculate max results per query for multiple queries
         max_per_query = initial_fetch if len(queries) == 1 else max(1, initial_fetch // len(queries))
     
+    if not silent and include_advanced_sentiment:
+        if use_ml_sentiment:
+            print(f"[INFO] Applying ML-Enhanced Thai Sentiment Analysis...")
+        else:
+            print(f"[INFO] Applying Advanced Thai Sentiment Analysis...")
+    
+    unique_comments = []
+    duplicate_count = 0
     try:
         for i, single_query in enumerate(queries):
             if not silent and len(queries) > 1:
@@ -1573,34 +1560,37 @@ def extract_social_media_comments(
                 if "query_index" not in comment:
                     comment["query_index"] = i
             
+            extracted_count = len(comments)
+            
+            # Deduplicate comments based on text similarity (against earlier queries too)
+            if len(queries) > 1 and comments:
+                comments = deduplicate_comments(comments, existing=unique_comments)
+                unique_comments.extend(comments)  # ก่อนกรองสแปม เหมือนการตัดซ้ำทั้งชุด
+                duplicate_count += extracted_count - len(comments)
+            
+            # Advanced Thai Sentiment Analysis (ถ้าเปิดใช้งาน) ทีละ query เพื่อให้ live_stats เห็นผลระหว่างดึงข้อมูล
+            if include_advanced_sentiment and comments:
+                comments = batch_advanced_sentiment_analysis(comments, use_ml=use_ml_sentiment)
+            
+            # Spam Filtering
+            if filter_spam and comments:
+                comments = spam_filter(comments)
+            
+            # Live monitoring: นับเฉพาะคอมเมนต์ที่จะอยู่ในผลลัพธ์ (ไม่ซ้ำ ไม่ใช่สแปม)
+            if live_stats is not None:
+                live_stats.update_many(comments)
+            
             # Aggregate results
             all_comments.extend(comments)
             
             if not silent and len(queries) > 1:
-                print(f"[INFO] Extracted {len(comments)} comments from query {i+1}")
-        
-        # Deduplicate comments based on text similarity
-        if len(queries) > 1 and all_comments:
-            original_count = len(all_comments)
-            all_comments = deduplicate_comments(all_comments)
-            if not silent:
-                print(f"[INFO] Removed {original_count - len(all_comments)} duplicate comments")
-          # Advanced Thai Sentiment Analysis (ถ้าเปิดใช้งาน)
-        if include_advanced_sentiment and all_comments:
-            if not silent:
-                if use_ml_sentiment:
-                    print(f"[INFO] Applying ML-Enhanced Thai Sentiment Analysis...")
-                else:
-                    print(f"[INFO] Applying Advanced Thai Sentiment Analysis...")
-            all_comments = batch_advanced_sentiment_analysis(all_comments, use_ml=use_ml_sentiment)
-            if not silent:
-                print(f"[INFO] Advanced sentiment analysis completed!")
+                print(f"[INFO] Extracted {extracted_count} comments from query {i+1}")
         
-        # Spam Filtering
-        if filter_spam and all_comments:
-            if not silent:
-                print(f"[INFO] Filtering out spam comments...")
-            all_comments = spam_filter(all_comments)
+        if not silent:
+            if len(queries) > 1:
+                print(f"[INFO] Removed {duplicate_count} duplicate comments")
+            if include_advanced_sentiment:
+                print(f"[INFO] Advanced sentiment analysis completed!")
           # Limit results to max_results (only if max_results is specified)
         if max_results is not None and max_results > 0 and len(all_comments) > max_results:
             all_comments = all_comments[:max_results]
@@ -2267,22 +2257,28 @@ def extract_youtube_comments(
         print(f"[ERROR] YouTube extraction failed: {e}")
         return []
 
-def deduplicate_comments(comments: List[Dict[str, Any]], similarity_threshold: float = 0.85) -> List[Dict[str, Any]]:
+def deduplicate_comments(
+    comments: List[Dict[str, Any]],
+    similarity_threshold: float = 0.85,
+    existing: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
     """
     Remove duplicate comments based on text similarity
     
     Args:
         comments: List of comment dictionaries
         similarity_threshold: Similarity threshold for considering comments as duplicates (0.0 to 1.0)
+        existing: Already-deduplicated comments; new comments that duplicate them are dropped too
         
     Returns:
-        List of unique comments
+        List of unique comments (excluding ``existing``)
     """
     if not comments:
         return comments
     
-    unique_comments = []
-    seen_texts = set()
+    existing = existing or []
+    unique_comments = list(existing)
+    seen_texts = {comment.get("text", "").strip().lower() for comment in existing}
     
     for comment in comments:
         text = comment.get("text", "").strip().lower()
@@ -2319,7 +2315,7 @@ def deduplicate_comments(comments: List[Dict[str, Any]], similarity_threshold: f
             seen_texts.add(text)
             unique_comments.append(comment)
     
-    return unique_comments
+    return unique_comments[len(existing):]
 
 # --- ML-Enhanced Sentiment Analysis ---
 try:
@@ -2335,6 +2331,14 @@ def get_ml_sentiment_model(training_data: Optional[List[Dict[str, Any]]] = None)
     """Get or create ML sentiment model"""
     global _ml_sentiment_model
     
+    if _ml_sentiment_model is None and ML_SENTIMENT_AVAILABLE:
+        # ใช้ ensemble ที่โหลดไว้ใน inference server (THAI_SENTIMENT_SERVER) แทนการโหลดในทุก process
+        from inference_server import get_inference_client
+        client = get_inference_client()
+        if client is not None and client.health().get("status") == "ok":
+            print(f"[INFO] Using sentiment inference server at {client.url}")
+            _ml_sentiment_model = client
+    
     if _ml_sentiment_model is None and ML_SENTIMENT_AVAILABLE:
         try:
             print("[INFO] Initializing ML-enhanced sentiment analyzer...")
@@ -2346,63 +2350,143 @@ def get_ml_sentiment_model(training_data: Optional[List[Dict[str, Any]]] = None)
     
     return _ml_sentiment_model
 
-def ml_enhanced_sentiment_analysis(text: str, training_data: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+def ml_enhanced_sentiment_analysis(
+    text: str,
+    training_data: Optional[List[Dict[str, Any]]] = None,
+    cascade_margin: Optional[float] = None
+) -> Dict[str, Any]:
     """
     ML-enhanced Thai sentiment analysis
     
     Args:
         text: Thai text to analyze
         training_data: Optional training data for model improvement
+        cascade_margin: If set, skip the ML model when the rule-based evidence margin reaches it
         
     Returns:
         Dictionary with enhanced sentiment analysis
     """
-    # Get ML model
-    ml_model = get_ml_sentiment_model(training_data)
+    rule_result, accepted = _cascade_rule_result(text, cascade_margin)
+    if accepted is not None:
+        return accepted
+    return _ml_enhance_one(text, rule_result, get_ml_sentiment_model(training_data))
+
+def batch_ml_enhanced_sentiment_analysis(
+    texts: List[str],
+    training_data: Optional[List[Dict[str, Any]]] = None,
+    cascade_margin: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    ML-enhanced Thai sentiment analysis for many texts
+    
+    Same results as ml_enhanced_sentiment_analysis per text, but the ML model predicts all texts
+    that reach it in one predict_batch call (per-text fallback if the batch fails)
     
-    if ml_model is not None:
+    Args:
+        texts: Thai texts to analyze
+        training_data: Optional training data for model improvement
+        cascade_margin: If set, skip the ML model when the rule-based evidence margin reaches it
+        
+    Returns:
+        List of enhanced sentiment analysis dictionaries (same order as texts)
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+    rule_results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+    pending = []
+    for index, text in enumerate(texts):
+        rule_results[index], results[index] = _cascade_rule_result(text, cascade_margin)
+        if results[index] is None:
+            pending.append(index)
+    if not pending:
+        return results
+    
+    ml_model = get_ml_sentiment_model(training_data)
+    ml_results = None
+    predict_batch = getattr(ml_model, 'predict_batch', None)
+    if predict_batch is not None:
         try:
-            # Use ML model
-            ml_result = ml_model.predict_sentiment(text)
-            
-            # Combine with rule-based analysis for complete schema
-            rule_result = advanced_thai_sentiment_analysis(text)
-            
-            # Merge results (ML takes precedence for sentiment/score)
-            enhanced_result = rule_result.copy()
-            enhanced_result.update({
-                'sentiment': ml_result['sentiment'],
-                'sentiment_score': ml_result['sentiment_score'],
-                'confidence': ml_result['confidence'],
-                'ml_probabilities': ml_result['probabilities'],
-                'model_type': ml_result['model_type'],
-                'ml_enhanced': True
-            })
-            
-            # Adjust emotion based on ML sentiment
-            if ml_result['sentiment'] == 'positive' and rule_result['emotion'] in ['anger', 'sadness']:
-                enhanced_result['emotion'] = 'joy'
-            elif ml_result['sentiment'] == 'negative' and rule_result['emotion'] in ['joy', 'excited']:
-                enhanced_result['emotion'] = 'anger'
-            
-            # Add confidence-based notes
-            if ml_result['confidence'] > 0.8:
-                enhanced_result['notes'] = f"ความเชื่อมั่นสูง, {enhanced_result['notes']}"
-            elif ml_result['confidence'] < 0.6:
-                enhanced_result['notes'] = f"ความเชื่อมั่นต่ำ, {enhanced_result['notes']}"
-            
-            return enhanced_result
-            
+            ml_results = predict_batch([texts[index] for index in pending])
         except Exception as e:
-            print(f"[WARNING] ML sentiment analysis failed: {e}")
-            # Fallback to rule-based
-            result = advanced_thai_sentiment_analysis(text)
-            result['ml_enhanced'] = False
-            result['fallback_reason'] = str(e)
-            return result
-    else:
+            print(f"[WARNING] ML batch sentiment analysis failed, analyzing one by one: {e}")
+    
+    for position, index in enumerate(pending):
+        ml_result = ml_results[position] if ml_results is not None else None
+        results[index] = _ml_enhance_one(texts[index], rule_results[index], ml_model, ml_result)
+    return results
+
+def _cascade_rule_result(
+    text: str, cascade_margin: Optional[float]
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """(ผลของกฎ, ผลสุดท้ายถ้ากฎมั่นใจพอจนไม่ต้องผ่าน ML model) ไม่มี cascade_margin คืน (None, None)"""
+    if cascade_margin is None:
+        return None, None
+    # cascade: ผลจากกฎที่มั่นใจพอไม่ต้องผ่าน ML model
+    from sentiment_cascade import rule_margin, rule_prediction
+    rule_result, evidence = _advanced_sentiment_with_evidence(text)
+    margin = rule_margin(rule_result, evidence)
+    if margin < cascade_margin:
+        return rule_result, None
+    result = rule_result.copy()
+    result.setdefault('sentiment', rule_prediction(rule_result)['sentiment'])
+    result.update({
+        'ml_enhanced': False,
+        'cascade_stage': 'rules',
+        'cascade_margin': round(margin, 4)
+    })
+    return rule_result, result
+
+def _ml_enhance_one(
+    text: str,
+    rule_result: Optional[Dict[str, Any]],
+    ml_model,
+    ml_result: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """รวมผล ML (ทำนายเองถ้าไม่ได้ส่ง ``ml_result`` มา) กับผลของกฎ หรือถอยไปใช้กฎถ้า ML ใช้ไม่ได้"""
+    if ml_model is None:
         # No ML model available, use rule-based
-        result = advanced_thai_sentiment_analysis(text)
+        result = (rule_result or advanced_thai_sentiment_analysis(text)).copy()
         result['ml_enhanced'] = False
         result['fallback_reason'] = "ML model not available"
+        return result
+    
+    try:
+        # Use ML model
+        if ml_result is None:
+            ml_result = ml_model.predict_sentiment(text)
+        
+        # Combine with rule-based analysis for complete schema (reuse the cascade's result)
+        if rule_result is None:
+            rule_result = advanced_thai_sentiment_analysis(text)
+        
+        # Merge results (ML takes precedence for sentiment/score)
+        enhanced_result = rule_result.copy()
+        enhanced_result.update({
+            'sentiment': ml_result['sentiment'],
+            'sentiment_score': ml_result['sentiment_score'],
+            'confidence': ml_result['confidence'],
+            'ml_probabilities': ml_result['probabilities'],
+            'model_type': ml_result['model_type'],
+            'ml_enhanced': True
+        })
+        
+        # Adjust emotion based on ML sentiment
+        if ml_result['sentiment'] == 'positive' and rule_result['emotion'] in ['anger', 'sadness']:
+            enhanced_result['emotion'] = 'joy'
+        elif ml_result['sentiment'] == 'negative' and rule_result['emotion'] in ['joy', 'excited']:
+            enhanced_result['emotion'] = 'anger'
+        
+        # Add confidence-based notes
+        if ml_result['confidence'] > 0.8:
+            enhanced_result['notes'] = f"ความเชื่อมั่นสูง, {enhanced_result['notes']}"
+        elif ml_result['confidence'] < 0.6:
+            enhanced_result['notes'] = f"ความเชื่อมั่นต่ำ, {enhanced_result['notes']}"
+        
+        return enhanced_result
+        
+    except Exception as e:
+        print(f"[WARNING] ML sentiment analysis failed: {e}")
+        # Fallback to rule-based
+        result = (rule_result or advanced_thai_sentiment_analysis(text)).copy()
+        result['ml_enhanced'] = False
+        result['fallback_reason'] = str(e)
         return result
\ No newline at end of file
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the columnar BatchResult container
+ทดสอบว่าสถิติที่คำนวณจาก BatchResult ตรงกับฟังก์ชันสถิติเดิมที่วนนับ list ของ dict
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from batch_result import BatchResult
+from detailed_thai_sentiment import DetailedThaiSentimentAnalyzer, analyze_context_emotion_correlation
+from sentiment_integration import analyze_social_media_batch, get_sentiment_statistics
+
+TEXTS = [
+    "วันนี้มีความสุขมาก ดีใจสุดๆ 😊",
+    "โกรธมาก ไม่พอใจเลย",
+    "",
+    "เศร้าจัง เสียใจ ขอแสดงความเสียใจด้วยครับ",
+    "เยี่ยมมาก! ได้ถูกหวยแล้ว 5555",
+    "วันนี้มีความสุขมาก ดีใจสุดๆ 😊",
+    "ข่าวด่วน รัฐบาลประกาศมาตรการใหม่",
+    "ขอบคุณมากครับ บริการดีมาก ประทับใจ",
+]
+
+
+def test_emotion_statistics_match_legacy():
+    """สถิติอารมณ์และ correlation ต้องเท่ากับผลของฟังก์ชันเดิม (รวมลำดับ key)"""
+    analyzer = DetailedThaiSentimentAnalyzer()
+    for multi_label in (False, True):
+        results = analyzer.analyze_batch(TEXTS * 4, multi_label=multi_label, threshold=0.25)
+        expected_stats = analyzer.get_emotion_statistics(results)
+        expected_correlation = analyze_context_emotion_correlation(results)
+
+        for batch in (BatchResult.from_results(results),
+                      BatchResult.from_compact(analyzer.analyze_batch_compact(TEXTS * 4, multi_label=multi_label, threshold=0.25))):
+            assert analyzer.get_emotion_statistics(batch) == expected_stats
+            assert analyze_context_emotion_correlation(batch) == expected_correlation
+
+        columnar = analyzer.get_emotion_statistics(BatchResult.from_results(results))
+        assert list(columnar["emotion_counts"]) == list(expected_stats["emotion_counts"])
+
+
+def test_sentiment_statistics_match_legacy():
+    """สถิติของ comment ต้องเท่ากัน รวมถึง comment ที่ไม่มีผลวิเคราะห์และบริบทแบบเก่า"""
+    comments = analyze_social_media_batch([{"text": text} for text in TEXTS], mode="multi", show_progress=False)
+    comments += analyze_social_media_batch([{"text": text} for text in TEXTS], show_progress=False)
+    comments += [
+        {"text": "ไม่มีผล"},
+        {"text": "บริบทแบบเก่า", "sentiment_analysis": {"sentiment": "positive", "context": "review",
+                                                     "analysis_mode": "single_label", "detailed_emotion": "ชอบ"}},
+        {"text": "int", "sentiment_analysis": {"context": {"b": {"x": 1}, "a": 0}}},
+        {"text": "float", "sentiment_analysis": {"context": {"a": 0.0, "b": {"x": 1}}}},
+    ]
+    batch = BatchResult.from_comments(comments)
+    for detailed in (True, False):
+        expected = get_sentiment_statistics(comments, detailed)
+        assert get_sentiment_statistics(batch, detailed) == expected
+    assert len(get_sentiment_statistics(comments)["context_counts"]) == len(batch.contexts)
+
+
+def test_cooccurrence_and_context_table():
+    """co-occurrence และตารางไขว้บริบท-อารมณ์ต้องนับตรงกับการนับทีละแถว"""
+    analyzer = DetailedThaiSentimentAnalyzer()
+    results = analyzer.analyze_batch(TEXTS, multi_label=True, threshold=0.2)
+    batch = BatchResult.from_results(results, include_scores=True)
+
+    cooccurrence = batch.label_cooccurrence()
+    for i, first in enumerate(batch.labels):
+        for j, second in enumerate(batch.labels):
+            expected = sum(first in result["labels"] and second in result["labels"] for result in results)
+            assert cooccurrence[i, j] == expected
+
+    table = batch.context_emotion_table("formality_level")
+    assert table.sum() == sum(len(result["labels"]) for result in results)
+    assert batch.scores.dtype == np.float32 and batch.scores.shape[0] == len(results)
+    assert np.isnan(batch.scores[2]).all()
+
+
+if __name__ == "__main__":
+    test_emotion_statistics_match_legacy()
+    test_sentiment_statistics_match_legacy()
+    test_cooccurrence_and_context_table()
+    print("✅ All batch result tests passed!")
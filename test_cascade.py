@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the confidence-gated sentiment cascade
+ทดสอบการส่งต่อเฉพาะข้อความที่ margin ต่ำ, สถิติของแต่ละขั้น และ evaluate_cascade
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+import pytest
+
+from sentiment_cascade import (CascadeSentimentModel, RuleBasedSentimentModel, evaluate_cascade,
+                               probability_margin, rule_margin, rule_prediction)
+
+
+class FakeModel:
+    """model ปลอมที่ให้ผลตามตาราง {text: (sentiment, margin)} และบันทึกข้อความที่ได้รับ"""
+
+    def __init__(self, table, default=("neutral", 0.9), fail=False):
+        self.table = table
+        self.default = default
+        self.fail = fail
+        self.calls = []
+
+    def predict_batch(self, texts):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return [self._predict(text) for text in texts]
+
+    def _predict(self, text):
+        sentiment, margin = self.table.get(text, self.default)
+        top = (1 + margin) / 2
+        others = [label for label in ("positive", "neutral", "negative") if label != sentiment]
+        probabilities = {sentiment: top, others[0]: 1 - top, others[1]: 0.0}
+        return {"sentiment": sentiment, "confidence": top, "sentiment_score": 0.0,
+                "probabilities": probabilities, "model_type": "fake"}
+
+
+def _cascade(final_fail=False):
+    cheap = FakeModel({"clear": ("positive", 0.8), "vague": ("positive", 0.1), "unsure": ("negative", 0.2)})
+    middle = FakeModel({"vague": ("neutral", 0.5), "unsure": ("negative", 0.05)})
+    final = FakeModel({"unsure": ("positive", 0.6)}, fail=final_fail)
+    cascade = CascadeSentimentModel()
+    cascade.add_stage("cheap", cheap, 0.4).add_stage("middle", middle, 0.3).add_stage("final", final)
+    return cascade, cheap, middle, final
+
+
+def test_escalates_only_below_margin():
+    """เฉพาะข้อความที่ margin ต่ำกว่าเกณฑ์ถูกส่งต่อ และผลระบุขั้นที่ให้ผล"""
+    cascade, cheap, middle, final = _cascade()
+    results = cascade.predict_batch(["clear", "vague", "unsure"])
+
+    assert [result["cascade_stage"] for result in results] == ["cheap", "middle", "final"]
+    assert [result["sentiment"] for result in results] == ["positive", "neutral", "positive"]
+    assert cheap.calls == [["clear", "vague", "unsure"]]
+    assert middle.calls == [["vague", "unsure"]] and final.calls == [["unsure"]]
+    assert abs(results[0]["cascade_margin"] - 0.8) < 1e-9
+    assert abs(probability_margin(results[1]) - 0.5) < 1e-9
+
+
+def test_stats_report_escalation_rates():
+    """stats() ต้องนับ seen/accepted/escalated ของแต่ละขั้นและสัดส่วนที่ถึงขั้นสุดท้าย"""
+    cascade, _, _, _ = _cascade()
+    cascade.predict_batch(["clear", "vague", "unsure", "clear"])
+    stats = cascade.stats()
+
+    assert stats["total"] == 4 and stats["final_stage_rate"] == 0.25
+    cheap = stats["stages"]["cheap"]
+    assert (cheap["seen"], cheap["accepted"], cheap["escalated"]) == (4, 2, 2) and cheap["escalation_rate"] == 0.5
+    assert stats["stages"]["middle"]["share_of_total"] == 0.5
+    assert stats["stages"]["final"]["escalated"] == 0
+
+    cascade.reset_stats()
+    assert cascade.stats()["total"] == 0 and cascade.stats()["stages"]["cheap"]["seen"] == 0
+
+
+def test_failed_stage_keeps_earlier_result():
+    """ถ้าขั้นสุดท้ายล้มเหลว ข้อความที่ถูกส่งต่อต้องใช้ผลของขั้นก่อนหน้า"""
+    cascade, _, _, _ = _cascade(final_fail=True)
+    results = cascade.predict_batch(["clear", "unsure"])
+
+    assert [result["cascade_stage"] for result in results] == ["cheap", "middle"]
+    assert results[1]["sentiment"] == "negative"
+    assert cascade.stats()["stages"]["final"]["failed"] == 1
+    assert cascade.model_version() is None
+
+
+def test_evaluate_cascade_reports_accuracy_delta():
+    """evaluate_cascade ต้องเทียบกับขั้นสุดท้ายที่รันทุกข้อความ และรายงาน accuracy_delta"""
+    cascade, _, _, final = _cascade()
+    texts = ["clear", "vague", "unsure", "other"]
+    report = evaluate_cascade(cascade, texts, labels=["positive", "neutral", "positive", None])
+
+    assert final.calls[0] == texts
+    assert report["samples"] == 4 and report["agreement_with_reference"] == 0.75
+    assert report["accuracy"] == {"reference": round(2 / 3, 4), "cascade": 1.0}
+    assert report["accuracy_delta"] == round(1 - 2 / 3, 4)
+    assert report["cascade"]["total"] == 4 and set(report["seconds"]) == {"reference", "cascade"}
+
+
+def _rule(emotion, intensity, score, intent="inform"):
+    return {"emotion": emotion, "intensity": intensity, "sentiment_score": score, "intent": intent}
+
+
+def test_rule_based_model_schema():
+    """RuleBasedSentimentModel ต้องให้ผลรูปแบบเดียวกับ ML model ด้วย probability คงที่ตาม label"""
+    result = rule_prediction(_rule("joy", "high", 1.0), RuleBasedSentimentModel().model_type)
+    assert set(result) == {"sentiment", "confidence", "sentiment_score", "probabilities", "model_type"}
+    assert result["sentiment"] == "positive" and result["confidence"] == 0.7
+    assert result["model_type"] == "rule_based"
+    assert result["probabilities"] == {"positive": 0.7, "neutral": 0.2, "negative": 0.1}
+
+    negative = rule_prediction(_rule("anger", "medium", -0.8), "fallback")
+    assert negative["sentiment"] == "negative" and negative["confidence"] == 0.5
+    assert negative["model_type"] == "fallback" and negative["probabilities"]["negative"] == 0.7
+    assert probability_margin({"probabilities": {}}) == 0.0
+
+
+def test_rule_margin_follows_evidence():
+    """margin ของ gate ต้องเพิ่มตาม intensity และจำนวนคำที่พบ ส่วน neutral ขึ้นกับ intensity"""
+    margins = [rule_margin(_rule("joy", intensity, score), {"positive": 1})
+               for intensity, score in (("low", 0.4), ("medium", 0.8), ("high", 1.0))]
+    assert margins == sorted(margins) and len(set(margins)) == 3
+    assert rule_margin(_rule("anger", "medium", -0.8), {"negative": 2}) > margins[1]
+    assert rule_margin(_rule("joy", "high", 1.0), {"positive": 3}) == 0.75
+    assert rule_margin(_rule("neutral", "low", 0.0), {}) == 0.3
+
+
+def test_rule_margin_escalates_sarcasm_and_mixed():
+    """sarcasm และข้อความที่พบทั้งคำบวกและลบต้องได้ margin 0 (ส่งต่อเสมอ)"""
+    assert rule_margin(_rule("joy", "high", 1.0), {"positive": 2, "negative": 1}) == 0.0
+    assert rule_margin(_rule("complex", "medium", -0.2, intent="sarcasm"), {"positive": 1}) == 0.0
+
+    mixed = dict(rule_prediction(_rule("joy", "high", 1.0)), gate_margin=0.0)
+    clear = dict(rule_prediction(_rule("joy", "high", 1.0)), gate_margin=0.5)
+    cascade = CascadeSentimentModel()
+    rules = FakeModel({})
+    rules.predict_batch = lambda texts: [mixed, clear]
+    final = FakeModel({})
+    cascade.add_stage("rules", rules, 0.4).add_stage("final", final)
+    results = cascade.predict_batch(["mixed", "clear"])
+    assert [result["cascade_stage"] for result in results] == ["final", "rules"] and final.calls == [["mixed"]]
+    assert results[1]["cascade_margin"] == 0.5 and "gate_margin" not in results[1]
+
+
+def test_fallback_ensemble_keeps_negative_intensified_comments():
+    """ensemble ที่มีแต่กฎ (โหลดโมเดล HF ไม่ได้) ต้องให้ negative กับคำลบที่มีคำเน้น เช่น มาก"""
+    pytest.importorskip("requests")  # social_media_utils ต้องใช้ requests
+    from ml_sentiment_analysis import EnsembleSentimentModel
+    from social_media_utils import _advanced_sentiment_with_evidence
+
+    ensemble = EnsembleSentimentModel()
+    ensemble.add_model("rule_based_fallback", RuleBasedSentimentModel("rule_based_fallback"), weight=1.0)
+    for text in ("แย่มาก โกรธ", "ห่วยแตก เกลียดมาก"):
+        result = ensemble.predict_sentiment(text)
+        assert result["sentiment"] == "negative" and result["confidence"] == 0.7
+        rule_result, evidence = _advanced_sentiment_with_evidence(text)
+        assert evidence["positive"] == 0 and rule_margin(rule_result, evidence) > 0
+
+
+if __name__ == "__main__":
+    test_escalates_only_below_margin()
+    test_stats_report_escalation_rates()
+    test_failed_stage_keeps_earlier_result()
+    test_evaluate_cascade_reports_accuracy_delta()
+    test_rule_based_model_schema()
+    test_rule_margin_follows_evidence()
+    test_rule_margin_escalates_sarcasm_and_mixed()
+    test_fallback_ensemble_keeps_negative_intensified_comments()
+    print("✅ All cascade tests passed!")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for compact result records
+ทดสอบว่า CompactResultBatch แปลงกลับเป็น dict ได้เหมือนผลของ analyze_batch ทุก field
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from compact_results import CompactResult
+from detailed_thai_sentiment import DetailedThaiSentimentAnalyzer
+
+TEXTS = [
+    "วันนี้มีความสุขมาก ดีใจสุดๆ 😊",
+    "โกรธมาก ไม่พอใจเลย",
+    "",
+    "เศร้าจัง เสียใจ ขอแสดงความเสียใจด้วยครับ",
+    "   ",
+    "เยี่ยมมาก! ได้ถูกหวยแล้ว 5555",
+    "วันนี้มีความสุขมาก ดีใจสุดๆ 😊",
+    "ข่าวด่วน รัฐบาลประกาศมาตรการใหม่",
+]
+
+
+def _without_timestamp(result):
+    return {key: value for key, value in result.items() if key != "timestamp"}
+
+
+def test_compact_matches_dict_results():
+    """to_dicts ต้องได้ผลเหมือน analyze_batch (ยกเว้นค่า timestamp) ทั้ง single และ multi label"""
+    analyzer = DetailedThaiSentimentAnalyzer()
+    for multi_label in (False, True):
+        compact = analyzer.analyze_batch_compact(TEXTS, multi_label=multi_label, threshold=0.25).to_dicts()
+        expected = analyzer.analyze_batch(TEXTS, multi_label=multi_label, threshold=0.25)
+        assert [list(result) for result in compact] == [list(result) for result in expected]
+        assert [_without_timestamp(result) for result in compact] == [_without_timestamp(result) for result in expected]
+
+
+def test_records_share_batch_storage():
+    """ข้อความซ้ำใช้แถวคะแนนเดียวกัน คะแนนเก็บเป็น float32 และบริบทที่เหมือนกันเก็บครั้งเดียว"""
+    analyzer = DetailedThaiSentimentAnalyzer()
+    batch = analyzer.analyze_batch_compact(TEXTS)
+
+    assert batch.scores.dtype == np.float32
+    assert batch.scores.shape == (len(set(TEXTS)) - 2, len(batch.emotions))
+    assert batch[0].row == batch[6].row
+    assert batch[2].row == -1 and batch[2].scores == {} and batch[2].timestamp is None
+    assert batch[2].context_id == batch[4].context_id
+    assert not hasattr(batch[0], "__dict__")
+    assert isinstance(batch[0], CompactResult)
+
+    # timestamp สร้างเมื่อถูกเรียกครั้งแรกและใช้ค่าเดียวกันทั้ง batch
+    assert batch._timestamp is None
+    assert batch[0].to_dict()["timestamp"] == batch[1].timestamp
+
+
+def test_stream_compact_records():
+    """analyze_stream(compact=True) ต้อง yield record ที่แปลงเป็น dict เดียวกับแบบ dict"""
+    analyzer = DetailedThaiSentimentAnalyzer()
+    records = list(analyzer.analyze_stream(iter(TEXTS * 3), chunk_size=5, compact=True))
+    expected = list(analyzer.analyze_stream(iter(TEXTS * 3), chunk_size=5))
+    assert [_without_timestamp(record.to_dict()) for record in records] == [_without_timestamp(result) for result in expected]
+    assert records[0].label == expected[0]["label"]
+
+
+if __name__ == "__main__":
+    test_compact_matches_dict_results()
+    test_records_share_batch_storage()
+    test_stream_compact_records()
+    print("✅ All compact result tests passed!")
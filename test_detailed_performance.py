@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the optimized scoring paths of DetailedThaiSentimentAnalyzer
+ทดสอบว่าเส้นทางที่ปรับปรุงความเร็วให้ผลเท่ากับการวิเคราะห์แบบเดิม
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(__file__))
+
+from detailed_thai_sentiment import DetailedThaiSentimentAnalyzer, get_context_recommendations
+
+SAMPLE_TEXTS = [
+    "ดีใจมากเลย! รักมาก ❤️😍",
+    "โกรธจนขำอะ! ทำไมต้องมาแบบนี้ด้วย 555 😡😂",
+    "ข้อมูลข่าวสารประจำวัน สถานการณ์ปกติดี",
+    "อ่อ... ดีจริงๆ เนอะ บริการเยี่ยมมาก 🙄",
+    "ชอบมาก แต่ก็ผิดหวังนิดหน่อย เอาแต่ใจ",
+    "ด่วน! เกิดเหตุไฟไหม้ ขอความช่วยเหลือด้วย @admin #help https://example.com",
+    "",
+    "   ",
+]
+
+
+def _strip_timestamp(result):
+    result = dict(result)
+    result.pop("timestamp", None)
+    return result
+
+
+def test_prepared_text_matches_fresh_analysis():
+    """ผลจาก prepared ที่ใช้ร่วมกันต้องเท่ากับการวิเคราะห์ใหม่ทุกครั้ง"""
+    analyzer = DetailedThaiSentimentAnalyzer()
+    for text in SAMPLE_TEXTS:
+        prepared = analyzer.prepare_text(text)
+
+        single = analyzer.analyze_single_label(text, prepared=prepared)
+        multi = analyzer.analyze_multi_label(text, threshold=0.25, prepared=prepared)
+        assert _strip_timestamp(single) == _strip_timestamp(analyzer.analyze_single_label(text))
+        assert _strip_timestamp(multi) == _strip_timestamp(analyzer.analyze_multi_label(text, threshold=0.25))
+
+        if text.strip():
+            # results that share a prepared context must not share mutable dicts
+            assert single["context"] is not multi["context"]
+            recommendations = get_context_recommendations(text, analyzer, prepared=prepared)
+            assert recommendations["current_analysis"]["label"] == single["label"]
+
+
+def test_profile_report_counts_saved_work():
+    """profiling mode ต้องรายงานเวลาแต่ละขั้นตอนและงานที่ไม่ต้องทำซ้ำ"""
+    analyzer = DetailedThaiSentimentAnalyzer(profile=True)
+    text = SAMPLE_TEXTS[0]
+    prepared = analyzer.prepare_text(text)
+    analyzer.analyze_single_label(text, prepared=prepared)
+    analyzer.analyze_multi_label(text, prepared=prepared)
+
+    report = analyzer.get_profile_report()
+    assert report["profile_enabled"] is True
+    assert report["stages"]["clean"]["calls"] == 1
+    assert report["stages"]["clean"]["reuses"] == 4
+    assert report["stages"]["intensity"]["reuses"] == 2 * len(analyzer.patterns.emotion_patterns)
+
+    analyzer.reset_profile()
+    assert analyzer.get_profile_report()["stages"]["clean"]["calls"] == 0
+
+
+def test_vectorized_batch_matches_per_text_loop():
+    """analyze_batch แบบ vectorized ต้องให้ผลเท่ากับการวนวิเคราะห์ทีละข้อความ"""
+    from batch_scoring import NUMPY_AVAILABLE
+    if not NUMPY_AVAILABLE:
+        pytest.skip("numpy is not installed; vectorized scoring is unavailable")
+
+    analyzer = DetailedThaiSentimentAnalyzer()
+    texts = SAMPLE_TEXTS + SAMPLE_TEXTS[:3]  # include duplicates within the batch
+    for multi_label in (False, True):
+        vectorized = analyzer.analyze_batch(texts, multi_label=multi_label, vectorized=True)
+        loop = analyzer.analyze_batch(texts, multi_label=multi_label, vectorized=False)
+        assert [_strip_timestamp(r) for r in vectorized] == [_strip_timestamp(r) for r in loop]
+        # duplicated texts must still get independent result dicts
+        assert vectorized[0] is not vectorized[len(SAMPLE_TEXTS)]
+        assert vectorized[0]["context"] is not vectorized[len(SAMPLE_TEXTS)]["context"]
+
+
+if __name__ == "__main__":
+    test_prepared_text_matches_fresh_analysis()
+    test_profile_report_counts_saved_work()
+    test_vectorized_batch_matches_per_text_loop()
+    print("✅ All detailed performance tests passed!")
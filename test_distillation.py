@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for ensemble-to-student distillation
+ทดสอบการทำ soft label แบบรันต่อได้, การฝึก student จาก soft label และรายงานเทียบกับ teacher
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+from scipy import sparse
+
+from distillation import (agreement_report, compare_student, create_student_ensemble, distill_student,
+                          label_corpus, load_soft_labels)
+from ml_sentiment_analysis import ThaiSentimentMLModel
+
+
+def _prediction(text):
+    if "ดี" in text:
+        probabilities = {"positive": 0.7, "neutral": 0.2, "negative": 0.1}
+    elif "แย่" in text:
+        probabilities = {"positive": 0.1, "neutral": 0.3, "negative": 0.6}
+    else:
+        probabilities = {"positive": 0.2, "neutral": 0.5, "negative": 0.3}
+    sentiment = max(probabilities, key=probabilities.get)
+    return {"sentiment": sentiment, "confidence": probabilities[sentiment], "sentiment_score": 0.0,
+            "probabilities": probabilities, "model_type": "ensemble"}
+
+
+class FakeTeacher:
+    """ensemble ปลอมที่บันทึกทุก batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    def model_version(self):
+        return "ensemble[fake]"
+
+    def predict_batch(self, texts):
+        self.batches.append(list(texts))
+        return [_prediction(text) for text in texts]
+
+
+class FakeVectorizer:
+    def fit_transform(self, texts):
+        self.fitted = list(texts)
+        return sparse.csr_matrix(np.arange(len(texts), dtype=float).reshape(-1, 1))
+
+
+class FakeClassifier:
+    """classifier ปลอมที่บันทึกข้อมูลที่ใช้ fit"""
+
+    def __init__(self):
+        self.params = {"class_weight": "balanced"}
+
+    def set_params(self, **params):
+        self.params.update(params)
+
+    def fit(self, features, labels, sample_weight=None):
+        self.rows = features.toarray().ravel().astype(int).tolist()
+        self.labels = list(labels)
+        self.weights = list(sample_weight)
+
+
+class FakePipeline:
+    """แทน sklearn Pipeline ที่ fit แล้ว: ทำนายเหมือน teacher แต่ข้อความที่มี "ไม่" เป็น neutral"""
+
+    classes_ = np.array(["negative", "neutral", "positive"])
+
+    def predict_proba(self, texts):
+        rows = []
+        for text in texts:
+            probabilities = _prediction(text)["probabilities"]
+            if "ไม่" in text:
+                probabilities = {"positive": 0.3, "neutral": 0.4, "negative": 0.3}
+            rows.append([probabilities[label] for label in self.classes_])
+        return np.array(rows)
+
+
+def _student():
+    student = ThaiSentimentMLModel()
+    student.pipeline = FakePipeline()
+    student.vectorizer = FakeVectorizer()
+    student.model = FakeClassifier()
+    return student
+
+
+def test_label_corpus_resumes_and_skips_duplicates():
+    """ข้อความที่มีในไฟล์แล้วหรือซ้ำกันต้องไม่ถูกส่งให้ teacher อีก และ label จริงถูกเก็บไว้"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "soft", "labels.jsonl")
+        teacher = FakeTeacher()
+        first = label_corpus(teacher, [{"text": "ดีมาก", "label": "positive"}, {"text": "แย่"}, {"text": "ดีมาก"}],
+                             path, batch_size=1)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"text": "ตัดกลาง')
+        second = label_corpus(teacher, [{"text": "แย่"}, {"text": "เฉยๆ"}, {"text": "ไม่ดี"}], path, batch_size=8)
+        rows = load_soft_labels(path)
+
+    assert (first["labeled"], first["skipped"]) == (2, 1)
+    assert (second["labeled"], second["skipped"]) == (2, 1)
+    assert teacher.batches == [["ดีมาก"], ["แย่"], ["เฉยๆ", "ไม่ดี"]]
+    assert [row["text"] for row in rows] == ["ดีมาก", "แย่", "เฉยๆ", "ไม่ดี"]
+    assert rows[0]["label"] == "positive" and "label" not in rows[1]
+    assert rows[0]["teacher"] == "ensemble[fake]" and abs(sum(rows[0]["probabilities"].values()) - 1) < 1e-9
+
+
+def test_train_soft_uses_probabilities_as_weights():
+    """train_soft ต้อง fit vectorizer ครั้งเดียวต่อข้อความ และใช้ probability เป็น sample weight ของแต่ละ label"""
+    student = _student()
+    result = student.train_soft(["ดีมาก", "แย่"], [{"positive": 0.7, "neutral": 0.3, "negative": 0.0},
+                                                    {"positive": 0.1, "neutral": 0.3, "negative": 0.6}])
+
+    assert len(student.vectorizer.fitted) == 2
+    assert student.model.params["class_weight"] is None
+    assert student.model.rows == [0, 0, 1, 1, 1]
+    assert student.model.labels == ["neutral", "positive", "negative", "neutral", "positive"]
+    assert student.model.weights == [0.3, 0.7, 0.6, 0.3, 0.1]
+    assert result == {"samples": 2, "weighted_rows": 5, "model_type": "logistic"}
+
+
+def test_distill_and_compare_reports():
+    """รายงานต้องเทียบ student กับ soft label ของ teacher บน held-out และเทียบความเร็วกับ teacher"""
+    texts = ["ดีมาก", "แย่มาก", "เฉยๆ", "ไม่ดี", "ดีจัง", "แย่จัง", "ปกติ", "ไม่แย่"]
+    rows = [dict(_prediction(text), text=text, teacher="ensemble[fake]") for text in texts]
+    for row in rows:
+        row["label"] = "negative"
+    student, report = distill_student(rows, held_out=0.5, student=_student())
+
+    assert report["teacher"] == "ensemble[fake]" and report["student"] == "ml_logistic"
+    assert report["train_samples"] == 4 and len(student.vectorizer.fitted) == 4
+    trained = set(student.vectorizer.fitted)
+    held_out_texts = [text for text in texts if student.preprocessor.preprocess(text) not in trained]
+    held_out = report["held_out"]
+    assert held_out["samples"] == len(held_out_texts) == 4
+    expected = sum("ไม่" not in text for text in held_out_texts) / 4
+    assert held_out["agreement_with_teacher"] == expected
+    assert set(held_out["accuracy"]) == {"teacher", "student"}
+
+    items = [{"text": text, "label": "positive" if "ดี" in text and "ไม่" not in text else None} for text in texts]
+    compared = compare_student(student, FakeTeacher(), items)
+    assert compared["agreement_with_teacher"] == 0.75 and compared["accuracy_delta"] == 0.0
+    assert set(compared["latency_ms_per_text"]) == {"teacher", "student"}
+
+    report = agreement_report([_prediction("ดี")], [_prediction("แย่")], ["negative"])
+    assert report["agreement_with_teacher"] == 0.0 and report["accuracy_delta"] == 1.0
+
+
+def test_student_ensemble_requires_saved_model():
+    """create_student_ensemble ต้องแจ้งชัดเจนเมื่อยังไม่มี student ที่บันทึกไว้"""
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            create_student_ensemble(directory)
+        except FileNotFoundError:
+            pass
+        else:
+            raise AssertionError("expected FileNotFoundError for a missing student")
+
+
+if __name__ == "__main__":
+    test_label_corpus_resumes_and_skips_duplicates()
+    test_train_soft_uses_probabilities_as_weights()
+    test_distill_and_compare_reports()
+    test_student_ensemble_requires_saved_model()
+    print("✅ All distillation tests passed!")
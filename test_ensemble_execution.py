@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for parallel and early-exit ensemble execution
+ทดสอบการรัน model ของ EnsembleSentimentModel พร้อมกัน และการหยุดเมื่อผลตัดสินได้แล้ว
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from ml_sentiment_analysis import EnsembleSentimentModel
+
+
+class FakeMember:
+    """model ปลอมที่ predict_batch ใช้เวลา ``delay`` วินาที ให้ probability ตาม ``table`` และบันทึกทุก batch"""
+
+    def __init__(self, table, delay=0.0):
+        self.table = table
+        self.delay = delay
+        self.batches = []
+
+    def predict_batch(self, texts):
+        self.batches.append(list(texts))
+        time.sleep(self.delay)
+        return [self._predict(text) for text in texts]
+
+    def _predict(self, text):
+        positive, negative = self.table.get(text, (0.2, 0.2))
+        probabilities = {"positive": positive, "neutral": 1 - positive - negative, "negative": negative}
+        sentiment = max(probabilities, key=probabilities.get)
+        return {"sentiment": sentiment, "confidence": probabilities[sentiment],
+                "sentiment_score": positive - negative, "probabilities": probabilities, "model_type": "fake"}
+
+
+TEXTS = ["ดีมาก", "แย่มาก", "ก็งั้นๆ", "ดีแต่แพง"]
+
+
+def _members(delay=0.0):
+    return {
+        "heavy": (FakeMember({"ดีมาก": (0.95, 0.0), "แย่มาก": (0.0, 0.9), "ดีแต่แพง": (0.45, 0.4)}, delay), 0.6),
+        "middle": (FakeMember({"ดีมาก": (0.8, 0.1), "แย่มาก": (0.1, 0.8), "ดีแต่แพง": (0.3, 0.5)}, delay), 0.3),
+        "light": (FakeMember({"ดีมาก": (0.5, 0.2), "แย่มาก": (0.3, 0.3), "ดีแต่แพง": (0.1, 0.8)}, delay * 3), 0.1)
+    }
+
+
+def _ensemble(members, **kwargs):
+    ensemble = EnsembleSentimentModel(**kwargs)
+    for name, (model, weight) in members.items():
+        ensemble.add_model(name, model, weight)
+    return ensemble
+
+
+def test_parallel_matches_sequential():
+    """โหมด parallel ต้องให้ผลเหมือน sequential ทุกประการ และใช้เวลาเท่ากับ model ที่ช้าที่สุด"""
+    expected = _ensemble(_members()).predict_batch(TEXTS)
+    members = _members(delay=0.05)
+    ensemble = _ensemble(members, parallel=True)
+    try:
+        started = time.perf_counter()
+        results = ensemble.predict_batch(TEXTS)
+        elapsed = time.perf_counter() - started
+    finally:
+        ensemble.close()
+
+    assert results == expected
+    assert list(results[0]["individual_predictions"]) == ["heavy", "middle", "light"]
+    assert all(model.batches == [TEXTS] for model, _ in members.values())
+    assert elapsed < 0.05 + 0.05 + 0.15
+
+
+def test_sequential_early_exit_skips_decided_texts():
+    """early exit ต้องส่งต่อเฉพาะข้อความที่ยังตัดสินไม่ได้ และ sentiment ต้องตรงกับการรันครบทุก model"""
+    expected = _ensemble(_members()).predict_batch(TEXTS)
+    members = _members()
+    results = _ensemble(members, early_exit=True).predict_batch(TEXTS)
+
+    assert [result["sentiment"] for result in results] == [result["sentiment"] for result in expected]
+    assert members["heavy"][0].batches == [TEXTS]
+    assert members["middle"][0].batches == [["ก็งั้นๆ", "ดีแต่แพง"]]
+    assert members["light"][0].batches == [["ดีแต่แพง"]]
+    assert list(results[0]["individual_predictions"]) == ["heavy"]
+    assert results[3] == expected[3]
+
+
+def test_parallel_early_exit_does_not_wait_for_slow_member():
+    """parallel + early exit ต้องคืนผลโดยไม่รอ model ช้าที่ไม่มีผลต่อ sentiment"""
+    members = _members(delay=0.05)
+    ensemble = _ensemble(members, parallel=True, early_exit=True)
+    try:
+        started = time.perf_counter()
+        results = ensemble.predict_batch(TEXTS[:2])
+        elapsed = time.perf_counter() - started
+    finally:
+        ensemble.close()
+
+    assert [result["sentiment"] for result in results] == ["positive", "negative"]
+    assert "light" not in results[0]["individual_predictions"]
+    assert elapsed < 0.15
+
+
+def test_early_exit_results_are_not_stored():
+    """ผลที่หยุดก่อนครบทุก model ต้องไม่ถูกบันทึกลง prediction store"""
+
+    class MemoryStore:
+        def __init__(self):
+            self.saved = {}
+
+        def get_many(self, version, texts):
+            return [self.saved.get(text) for text in texts]
+
+        def put_many(self, version, items):
+            self.saved.update(items)
+
+    members = _members()
+    for model, _ in members.values():
+        model.model_version = lambda: "fake-v1"
+    ensemble = _ensemble(members, prediction_store=MemoryStore(), early_exit=True)
+    ensemble.predict_batch(TEXTS)
+    assert set(ensemble.prediction_store.saved) == {"ดีแต่แพง"}
+
+
+if __name__ == "__main__":
+    test_parallel_matches_sequential()
+    test_sequential_early_exit_skips_decided_texts()
+    test_parallel_early_exit_does_not_wait_for_slow_member()
+    test_early_exit_results_are_not_stored()
+    print("✅ All ensemble execution tests passed!")
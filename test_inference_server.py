@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the micro-batching inference server
+ทดสอบการรวมคำขอพร้อมกันเป็น batch, endpoint /health /metrics และ client
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from inference_server import InferenceClient, MicroBatcher, SentimentInferenceServer
+from ml_sentiment_analysis import AdvancedThaiSentimentAnalyzer, EnsembleSentimentModel
+
+
+class SlowBatchModel:
+    """model ปลอมที่มี predict_batch ช้า (จำลอง transformer) และบันทึกขนาดของทุก batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_batch(self, texts):
+        self.batches.append(len(texts))
+        time.sleep(0.05)
+        return [self.predict_sentiment(text) for text in texts]
+
+    def predict_sentiment(self, text):
+        positive = 0.8 if "ดี" in text else 0.1
+        return {
+            "sentiment": "positive" if positive > 0.5 else "negative",
+            "confidence": max(positive, 1 - positive),
+            "sentiment_score": positive - (1 - positive),
+            "probabilities": {"positive": positive, "neutral": 0.0, "negative": 1 - positive},
+            "model_type": "fake"
+        }
+
+
+def _analyzer(model):
+    analyzer = AdvancedThaiSentimentAnalyzer()
+    analyzer.ensemble_model = EnsembleSentimentModel()
+    analyzer.ensemble_model.add_model("fake", model)
+    return analyzer
+
+
+def _concurrently(count, func):
+    results = [None] * count
+
+    def run(index):
+        results[index] = func(index)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_batcher_groups_concurrent_requests():
+    """คำขอพร้อมกันต้องถูกรวมเป็น batch ที่ไม่เกิน max_batch_size และผลกลับไปถูกคน"""
+    calls = []
+
+    def predict(texts):
+        calls.append(len(texts))
+        time.sleep(0.02)
+        return [text.upper() for text in texts]
+
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait=0.05).start()
+    try:
+        results = _concurrently(20, lambda index: batcher.submit([f"t{index}", f"u{index}"]))
+    finally:
+        batcher.stop()
+
+    assert results == [[f"T{index}", f"U{index}"] for index in range(20)]
+    assert max(calls) <= 8 and len(calls) < 20
+    metrics = batcher.metrics()
+    assert metrics["texts"] == 40 and metrics["queue_depth"] == 0 and metrics["batches"] == len(calls)
+
+
+def test_failed_request_does_not_fail_batch():
+    """ข้อความที่ทำให้ predict ล้มเหลวต้องกระทบเฉพาะคำขอของมันเอง"""
+    def predict(texts):
+        if "bad" in texts:
+            raise ValueError("bad input")
+        return texts
+
+    batcher = MicroBatcher(predict, max_batch_size=16, max_wait=0.05).start()
+
+    def submit(index):
+        try:
+            return batcher.submit(["bad"] if index == 0 else [str(index)])
+        except ValueError:
+            return "error"
+
+    try:
+        results = _concurrently(6, submit)
+    finally:
+        batcher.stop()
+    assert results == ["error"] + [[str(index)] for index in range(1, 6)]
+    assert batcher.metrics()["errors"] == 1
+
+
+def test_http_server_round_trip():
+    """client หลาย thread ผ่าน HTTP ต้องได้ผลเหมือนเรียก ensemble ตรงๆ และ model ถูกเรียกเป็น batch"""
+    model = SlowBatchModel()
+    with SentimentInferenceServer(_analyzer(model), port=0, max_batch_size=16, max_wait=0.05) as server:
+        client = InferenceClient(server.url)
+        assert client.health()["status"] == "ok"
+        assert client.health()["models"] == ["fake"]
+
+        texts = [f"ข้อความ {index} ดี" if index % 2 else f"ข้อความ {index} แย่" for index in range(24)]
+        results = _concurrently(len(texts), lambda index: client.predict_sentiment(texts[index]))
+        expected = _analyzer(SlowBatchModel()).ensemble_model.predict_batch(texts)
+        assert results == expected
+        assert len(model.batches) < len(texts)
+
+        reviewed = client.batch_analyze_with_review(texts[:3])
+        assert [result["text"] for result in reviewed] == texts[:3]
+        assert "review_applied" in reviewed[0]
+
+        metrics = client.metrics()
+        assert metrics["texts"] == 27 and metrics["queue_depth"] == 0 and metrics["avg_batch_size"] > 1
+
+    assert InferenceClient(server.url, timeout=1).health()["status"] == "unavailable"
+
+
+if __name__ == "__main__":
+    test_batcher_groups_concurrent_requests()
+    test_failed_request_does_not_fail_batch()
+    test_http_server_round_trip()
+    print("✅ All inference server tests passed!")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the keyword automaton used by DetailedThaiSentimentAnalyzer
+ทดสอบ automaton สำหรับค้นหาคำสำคัญ
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+from keyword_automaton import KeywordAutomaton
+from detailed_thai_sentiment import DetailedThaiSentimentAnalyzer
+
+
+def test_overlapping_keywords():
+    """คำที่ซ้อนกันต้องถูกพบครบทุกคำ"""
+    automaton = KeywordAutomaton()
+    for word in ["รัก", "รักมาก", "มาก", "หลงรัก"]:
+        automaton.add(word, word)
+    automaton.build()
+
+    found = set(automaton.find_tags("หลงรักมากๆ"))
+    assert found == {"รัก", "รักมาก", "มาก", "หลงรัก"}
+    assert automaton.find_tags("") == []
+    assert automaton.find_tags("ไม่มีคำใดตรง") == []
+
+
+def test_duplicate_tags_are_counted():
+    """คำเดียวกันใน label เดียวกันสองครั้งต้องนับสองครั้งเหมือนลูปเดิม"""
+    automaton = KeywordAutomaton()
+    automaton.add("โอเค", ("emotion", "พอใจ"))
+    automaton.add("โอเค", ("emotion", "เฉย ๆ"))
+    automaton.add("โอเค", ("emotion", "เฉย ๆ"))
+
+    counts = automaton.count_tags("โอเค โอเค")
+    assert counts == {("emotion", "พอใจ"): 1, ("emotion", "เฉย ๆ"): 2}
+
+
+def test_matches_naive_substring_scan():
+    """ผลของ automaton ต้องเท่ากับการวน ``keyword in text`` แบบเดิม"""
+    analyzer = DetailedThaiSentimentAnalyzer()
+    texts = [
+        "ดีใจมากเลย! รักมาก ❤️😍",
+        "โกรธจนขำอะ! ทำไมต้องมาแบบนี้ด้วย 555 😡😂",
+        "ข้อมูลข่าวสารประจำวัน สถานการณ์ปกติดี",
+        "ขอแสดงความยินดีกับความสำเร็จครับ",
+        "love it เลิฟมากๆ",
+    ]
+    for text in texts:
+        clean_text = analyzer._clean_text(text)
+        hits = analyzer._scan_keywords(clean_text)
+
+        for emotion, config in analyzer.patterns.emotion_patterns.items():
+            expected = sum(1 for keyword in config["keywords"] if keyword in clean_text)
+            assert hits["emotion"].get(emotion, 0) == expected
+
+        for context, words in analyzer.patterns.context_patterns.items():
+            expected = sum(1 for word in words if word in clean_text)
+            assert hits["context"].get(context, 0) == expected
+
+
+if __name__ == "__main__":
+    test_overlapping_keywords()
+    test_duplicate_tags_are_counted()
+    test_matches_naive_substring_scan()
+    print("✅ All keyword automaton tests passed!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for length-bucketed transformer batching
+ทดสอบการแบ่ง bucket ตามความยาว token และ batch path ของ ThaiTransformerModel
+"""
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+from length_batching import plan_length_buckets, run_length_buckets
+from ml_sentiment_analysis import ThaiTransformerModel
+from result_cache import get_result_cache
+
+
+class FakeTokenizer:
+    """tokenizer ปลอม: หนึ่ง token ต่อหนึ่งคำ (+2 สำหรับ token พิเศษ)"""
+
+    def __call__(self, texts, truncation=True, max_length=512):
+        return {"input_ids": [list(range(min(len(text.split()) + 2, max_length))) for text in texts]}
+
+
+class FakeHFPipeline:
+    """pipeline ปลอมรูปแบบเดียวกับ HF text-classification (return_all_scores=True)"""
+
+    def __init__(self):
+        self.tokenizer = FakeTokenizer()
+        self.model = object()
+        self.calls = []
+
+    def __call__(self, inputs, **kwargs):
+        batch = inputs if isinstance(inputs, list) else [inputs]
+        self.calls.append(len(batch))
+        outputs = []
+        for text in batch:
+            positive = 0.9 if "ดี" in text else 0.2
+            outputs.append([{"label": "POSITIVE", "score": positive}, {"label": "NEGATIVE", "score": 1 - positive}])
+        return outputs if isinstance(inputs, list) else [outputs[0]]
+
+
+def test_buckets_respect_budget_and_cover_all():
+    """ทุก index อยู่ใน bucket เดียว ความยาวเรียงจากสั้นไปยาว และ padding ไม่เกิน budget"""
+    rng = random.Random(0)
+    lengths = [rng.choice([3, 5, 8, 40, 200, 512]) for _ in range(300)]
+    buckets = plan_length_buckets(lengths, token_budget=1024, max_batch_size=32)
+
+    assert sorted(index for bucket in buckets for index in bucket) == list(range(len(lengths)))
+    for bucket in buckets:
+        assert len(bucket) <= 32
+        assert len(bucket) * max(lengths[index] for index in bucket) <= 1024
+    flattened = [lengths[index] for bucket in buckets for index in bucket]
+    assert flattened == sorted(flattened)
+    assert plan_length_buckets([4000], token_budget=1024) == [[0]]
+
+
+def test_run_restores_order_and_reports_throughput():
+    """ผลต้องกลับมาเรียงตามลำดับเดิม และมีสถิติ throughput/padding ต่อ bucket"""
+    items = ["c" * 9, "a", "b" * 5, "d" * 2]
+    lengths = [len(item) for item in items]
+    results, stats = run_length_buckets(items, lengths, lambda batch: [item.upper() for item in batch], token_budget=10)
+    assert results == [item.upper() for item in items]
+    assert sum(bucket["size"] for bucket in stats) == len(items)
+    assert all(0 <= bucket["padding_ratio"] < 1 and bucket["padded_tokens"] >= bucket["tokens"] for bucket in stats)
+
+
+def test_transformer_predict_batch_uses_buckets():
+    """predict_batch ต้องเรียก pipeline ทีละ bucket และให้ผลเหมือนการทำนายทีละข้อความ"""
+    get_result_cache().clear()
+    texts = ["อาหาร ดี มาก"] + ["บริการ " * n + "ช้า" for n in range(1, 30)] + ["ดี"]
+    model = ThaiTransformerModel("twitter-roberta", token_budget=64, max_batch_size=8)
+    model.pipeline = FakeHFPipeline()
+    batched = model.predict_batch(texts)
+
+    assert all(size > 1 for size in model.pipeline.calls[:-1])
+    assert len(model.pipeline.calls) == len(model.last_batch_stats) < len(texts)
+    assert sum(bucket["size"] for bucket in model.last_batch_stats) == len(set(texts))
+
+    get_result_cache().clear()
+    single = ThaiTransformerModel("twitter-roberta")
+    single.pipeline = FakeHFPipeline()
+    assert batched == [single._predict_processed(single.preprocessor.clean_text(text)) for text in texts]
+    get_result_cache().clear()
+
+
+if __name__ == "__main__":
+    test_buckets_respect_budget_and_cover_all()
+    test_run_restores_order_and_reports_throughput()
+    test_transformer_predict_batch_uses_buckets()
+    print("✅ All length batching tests passed!")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for time-windowed live sentiment aggregation
+ทดสอบการนับตามหน้าต่างเวลา การล้างช่องเก่าของ ring buffer การแยกตาม source และการเขียน snapshot
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from live_stats import WindowedSentimentAggregator
+from sentiment_integration import analyze_social_media_batch, analyze_social_media_stream
+
+NOW = 1_700_000_000.0
+
+COMMENTS = [
+    {"text": "วันนี้มีความสุขมาก ดีใจสุดๆ 😊", "source_query": "a"},
+    {"text": "โกรธมาก ไม่พอใจเลย", "source_query": "a"},
+    {"text": "ขอบคุณมากครับ บริการดีมาก ประทับใจ", "source_query": "b"},
+    {"text": "", "source_query": "b"},
+]
+
+
+def test_windows_expire_old_events():
+    """ผลที่เก่ากว่าหน้าต่างต้องหายจากหน้าต่างนั้น แต่ยังอยู่ในหน้าต่างที่ยาวกว่า"""
+    live = WindowedSentimentAggregator()
+    live.update({"sentiment": "positive", "emotion": "joy", "ml_confidence": 0.8}, source="q1", timestamp=NOW - 120)
+    live.update({"sentiment": "negative", "emotion": "anger"}, source="q1", timestamp=NOW - 5)
+    live.update({"sentiment": "negative", "intent": "sarcasm"}, source="q2", timestamp=NOW - 1)
+
+    snapshot = live.snapshot(now=NOW)
+    minute, hour = snapshot["overall"]["1m"], snapshot["overall"]["1h"]
+    assert minute["total"] == 2 and hour["total"] == 3
+    assert minute["sentiment_counts"] == {"negative": 2}
+    assert minute["net_sentiment"] == -1.0 and hour["net_sentiment"] == round(-1 / 3, 3)
+    assert hour["top_emotions"] == {"joy": 1, "anger": 1}
+    assert hour["avg_confidence"] == 0.8
+    assert minute["sarcasm_rate"] == 0.5
+    assert snapshot["sources"]["q1"]["1m"]["total"] == 1 and snapshot["sources"]["q1"]["1h"]["total"] == 2
+
+    # หนึ่งชั่วโมงต่อมาทุกหน้าต่างว่าง
+    later = live.snapshot(now=NOW + 3600)
+    assert later["overall"]["1h"]["total"] == 0 and later["total_seen"] == 3
+
+
+def test_ring_reuses_slots():
+    """ช่องที่ถูกใช้ซ้ำต้องถูกล้าง และผลที่มาช้ากว่าช่องที่ใหม่กว่าจะไม่ถูกนับ"""
+    live = WindowedSentimentAggregator(windows={"10s": 10}, buckets=10)
+    for second in range(25):
+        live.update({"sentiment": "neutral"}, timestamp=NOW + second)
+    assert live.snapshot(now=NOW + 24)["overall"]["10s"]["total"] == 10
+
+    live.update({"sentiment": "neutral"}, timestamp=NOW + 14)  # ช่องเดียวกับ NOW + 24
+    assert live.snapshot(now=NOW + 24)["overall"]["10s"]["total"] == 10
+    assert all(len(ring.slots) == 10 for ring in live._overall.values())
+
+
+def test_source_limit_evicts_least_recent():
+    """จำนวน source ถูกจำกัด โดยทิ้ง source ที่ไม่ได้อัปเดตนานที่สุด"""
+    live = WindowedSentimentAggregator(max_sources=2)
+    for source in ("a", "b", "a", "c"):
+        live.update({"sentiment": "positive"}, source=source, timestamp=NOW)
+    assert live.sources == ["a", "c"]
+    assert live.snapshot(now=NOW)["overall"]["1m"]["total"] == 4
+
+
+def test_integration_feeds_live_stats():
+    """batch และ stream ต้องนับทุก comment โดยแยกตาม source_query"""
+    for analyze in (analyze_social_media_batch, analyze_social_media_stream):
+        live = WindowedSentimentAggregator()
+        kwargs = {"show_progress": False} if analyze is analyze_social_media_batch else {"chunk_size": 2}
+        results = list(analyze(COMMENTS, live_stats=live, **kwargs))
+        snapshot = live.snapshot()
+        assert snapshot["overall"]["1m"]["total"] == len(results)
+        expected = {}
+        for result in results[:2]:
+            expected[result["sentiment"]] = expected.get(result["sentiment"], 0) + 1
+        assert snapshot["sources"]["a"]["1m"]["sentiment_counts"] == expected
+        assert snapshot["sources"]["b"]["1m"]["total"] == 2
+        assert sum(snapshot["overall"]["1h"]["top_emotions"].values()) == 3
+
+
+def test_snapshot_writer():
+    """thread เบื้องหลังต้องเขียนไฟล์ JSON ที่อ่านได้ และเขียนครั้งสุดท้ายเมื่อหยุด"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "live.json")
+        with WindowedSentimentAggregator() as live:
+            live.start_snapshot_writer(path, interval=0.05)
+            live.update({"sentiment": "positive"}, source="q")
+            time.sleep(0.2)
+            with open(path, encoding="utf-8") as f:
+                assert json.load(f)["overall"]["1m"]["total"] == 1
+            live.update({"sentiment": "negative"}, source="q")
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f)["sources"]["q"]["1m"]["total"] == 2
+        assert os.listdir(directory) == ["live.json"]
+
+
+def test_snapshot_writer_survives_errors():
+    """ข้อผิดพลาดระหว่างเขียน snapshot ต้องไม่ทำให้ thread หยุด"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "live.json")
+        live = WindowedSentimentAggregator()
+        original = live.snapshot
+        failures = []
+
+        def flaky_snapshot(now=None):
+            if len(failures) < 2:
+                failures.append(now)
+                raise ValueError("not serializable")
+            return original(now)
+
+        live.snapshot = flaky_snapshot
+        writer = live.start_snapshot_writer(path, interval=0.02)
+        time.sleep(0.2)
+        assert writer.is_alive() and len(failures) == 2
+        live.stop_snapshot_writer()
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f)["overall"]["1m"]["total"] == 0
+
+
+def test_extraction_feeds_analyzed_comments_per_query():
+    """ระหว่างดึงหลาย query ต้องส่งผล advanced sentiment ของแต่ละ query (ไม่ซ้ำ ไม่ใช่สแปม) ให้ live_stats ทันที"""
+    import pytest
+    pytest.importorskip("requests")  # social_media_utils ต้องใช้ requests
+    from social_media_utils import extract_social_media_comments
+
+    class RecordingAggregator(WindowedSentimentAggregator):
+        def __init__(self):
+            super().__init__()
+            self.batches = []
+
+        def update_many(self, comments, *args, **kwargs):
+            self.batches.append([comment["text"] for comment in comments])
+            assert all("emotion" in comment for comment in comments)
+            return super().update_many(comments, *args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index, texts in enumerate([["ดีใจมาก ชอบ", "สมัครสมาชิก ฟรี"], ["ดีใจมาก ชอบ", "โกรธมาก ไม่พอใจ"]]):
+            path = os.path.join(directory, f"q{index}.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps({"text": text}, ensure_ascii=False) + "\n" for text in texts)
+            paths.append(path)
+        live = RecordingAggregator()
+        results = extract_social_media_comments("file", paths, include_advanced_sentiment=True, live_stats=live)
+
+    assert live.batches == [["ดีใจมาก ชอบ"], ["โกรธมาก ไม่พอใจ"]]
+    assert [comment["text"] for comment in results] == ["ดีใจมาก ชอบ", "โกรธมาก ไม่พอใจ"]
+    assert live.snapshot()["overall"]["1m"]["total"] == 2
+
+
+if __name__ == "__main__":
+    test_windows_expire_old_events()
+    test_ring_reuses_slots()
+    test_source_limit_evicts_least_recent()
+    test_integration_feeds_live_stats()
+    test_snapshot_writer()
+    test_snapshot_writer_survives_errors()
+    test_extraction_feeds_analyzed_comments_per_query()
+    print("✅ All live stats tests passed!")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for leveled subsystem logging
+ทดสอบระดับ log ต่อ subsystem และการจัดรูปแบบแบบ lazy
+"""
+
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+from log_utils import configure_logging, get_logger, parse_levels
+
+
+class ExplodingRepr:
+    """ถ้าถูกจัดรูปแบบจะ raise (ใช้ตรวจว่า DEBUG ที่ปิดอยู่ไม่จัดรูปแบบ argument)"""
+
+    def __repr__(self):
+        raise AssertionError("formatted while disabled")
+
+    __str__ = __repr__
+
+
+def test_parse_levels():
+    assert parse_levels("DEBUG") == {"": "DEBUG"}
+    assert parse_levels("scoring=debug, comments=WARNING") == {"scoring": "DEBUG", "comments": "WARNING"}
+    assert parse_levels(None) == {}
+    try:
+        parse_levels("scoring=LOUD")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("invalid level accepted")
+
+
+def test_debug_is_off_by_default_and_lazy():
+    """ค่าเริ่มต้นต้องปิด DEBUG ของ scoring และไม่จัดรูปแบบ argument เลย"""
+    configure_logging()
+    scoring = get_logger("scoring")
+    assert not scoring.isEnabledFor(logging.DEBUG)
+    assert get_logger("comments").isEnabledFor(logging.INFO)
+    scoring.debug("scores: %s", ExplodingRepr())
+
+
+def test_levels_per_subsystem():
+    """เปิด DEBUG เฉพาะ subsystem ที่ระบุ และระดับรวมใช้กับทุก subsystem"""
+    try:
+        configure_logging("scoring=DEBUG")
+        assert get_logger("scoring").isEnabledFor(logging.DEBUG)
+        assert not get_logger("comments").isEnabledFor(logging.DEBUG)
+
+        configure_logging("ERROR")
+        assert not get_logger("comments").isEnabledFor(logging.INFO)
+        assert get_logger("scoring").isEnabledFor(logging.ERROR)
+
+        configure_logging(comments="DEBUG")
+        assert get_logger("comments").isEnabledFor(logging.DEBUG)
+        assert not get_logger("scoring").isEnabledFor(logging.INFO)
+    finally:
+        configure_logging()
+
+
+if __name__ == "__main__":
+    test_parse_levels()
+    test_debug_is_off_by_default_and_lazy()
+    test_levels_per_subsystem()
+    print("✅ All logging tests passed!")
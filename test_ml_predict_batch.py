@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for batched prediction in ThaiSentimentMLModel
+ทดสอบว่า predict_batch เรียก predict_proba ครั้งเดียวทั้ง batch และให้ผลรูปแบบเดียวกับ predict_sentiment
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+import pytest
+
+from ml_sentiment_analysis import AdvancedThaiSentimentAnalyzer, ThaiSentimentMLModel
+
+
+class CountingPipeline:
+    """pipeline ปลอม (แทน sklearn Pipeline) ที่นับจำนวนครั้งและขนาด batch ของ predict_proba"""
+
+    classes_ = np.array(["negative", "neutral", "positive"])
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_proba(self, texts):
+        self.batches.append(list(texts))
+        rows = []
+        for text in texts:
+            if "ดี" in text:
+                rows.append([0.1, 0.2, 0.7])
+            elif "แย่" in text:
+                rows.append([0.6, 0.3, 0.1])
+            else:
+                rows.append([0.2, 0.5, 0.3])
+        return np.array(rows)
+
+
+def _model():
+    model = ThaiSentimentMLModel()
+    model.pipeline = CountingPipeline()
+    return model
+
+
+def test_single_predict_proba_call():
+    """ทั้ง batch ต้อง vectorize/ทำนายครั้งเดียว และผลเรียงตามลำดับข้อความ"""
+    model = _model()
+    texts = ["อาหารดีมาก", "บริการแย่มาก", "วันนี้ฝนตก", "อาหารดีมาก"]
+    results = model.predict_batch(texts)
+
+    assert len(model.pipeline.batches) == 1 and len(model.pipeline.batches[0]) == len(texts)
+    assert [result["sentiment"] for result in results] == ["positive", "negative", "neutral", "positive"]
+    assert model.predict_batch([]) == [] and len(model.pipeline.batches) == 1
+
+
+def test_schema_matches_predict_sentiment():
+    """ผลแต่ละรายการต้องมี field และค่าเหมือน predict_sentiment"""
+    model = _model()
+    result = model.predict_batch(["บริการแย่มาก"])[0]
+    assert result == model.predict_sentiment("บริการแย่มาก")
+    assert list(result) == ["sentiment", "confidence", "sentiment_score", "probabilities", "model_type"]
+    assert result["confidence"] == 0.6
+    assert abs(result["sentiment_score"] - (0.1 - 0.6)) < 1e-12
+    assert result["probabilities"] == {"positive": 0.1, "neutral": 0.3, "negative": 0.6}
+    assert result["model_type"] == "ml_logistic"
+
+
+def test_untrained_model_raises():
+    try:
+        ThaiSentimentMLModel().predict_batch(["ข้อความ"])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError for an untrained model")
+
+
+class BatchEnsemble:
+    """ensemble ปลอมที่บันทึกการเรียก predict_batch/predict_sentiment (``fail`` ทำให้ predict_batch ล้มเหลว)"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+        self.singles = []
+
+    def predict_sentiment(self, text):
+        self.singles.append(text)
+        if "พัง" in text:
+            raise RuntimeError("broken text")
+        return {"sentiment": "positive" if "ดี" in text else "negative", "confidence": 0.9,
+                "sentiment_score": 0.8, "probabilities": {}, "model_type": "fake"}
+
+    def predict_batch(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("batch failed")
+        return [self.predict_sentiment(text) for text in texts]
+
+
+def _analyzer(ensemble):
+    analyzer = AdvancedThaiSentimentAnalyzer()
+    analyzer.ensemble_model = ensemble
+    return analyzer
+
+
+def test_batch_analyze_with_review_uses_predict_batch():
+    """batch_analyze_with_review ต้องทำนายทั้ง chunk ด้วย predict_batch แล้ว review ทีละผล"""
+    ensemble = BatchEnsemble()
+    texts = ["อาหารดี", "บริการแย่", "ร้านดี"]
+    results = _analyzer(ensemble).batch_analyze_with_review(texts)
+
+    assert ensemble.batches == [texts]
+    assert [result["text"] for result in results] == texts
+    assert [result["sentiment"] for result in results] == ["positive", "negative", "positive"]
+    assert all(result["analyzer_version"] == "advanced_v2.0" for result in results)
+
+
+def test_batch_analyze_with_review_falls_back_per_text():
+    """ถ้า predict_batch ล้มเหลวต้องวิเคราะห์ทีละข้อความ และข้ามข้อความที่วิเคราะห์ไม่ได้"""
+    ensemble = BatchEnsemble(fail=True)
+    results = _analyzer(ensemble).batch_analyze_with_review(["อาหารดี", "ระบบพัง", "บริการแย่"])
+
+    assert [result["text"] for result in results] == ["อาหารดี", "บริการแย่"]
+    assert ensemble.singles == ["อาหารดี", "ระบบพัง", "บริการแย่"]
+
+
+def test_batch_advanced_sentiment_predicts_once():
+    """batch_advanced_sentiment_analysis (use_ml) ต้องเรียก predict_batch ครั้งเดียวทั้งชุด"""
+    pytest.importorskip("requests")  # social_media_utils ต้องใช้ requests
+    import social_media_utils
+
+    ensemble = BatchEnsemble()
+    comments = [{"text": "อาหารดี"}, {"text": ""}, {"text": "บริการแย่"}]
+    original = social_media_utils._ml_sentiment_model
+    social_media_utils._ml_sentiment_model = ensemble
+    try:
+        results = social_media_utils.batch_advanced_sentiment_analysis(comments, use_ml=True)
+    finally:
+        social_media_utils._ml_sentiment_model = original
+
+    assert ensemble.batches == [["อาหารดี", "บริการแย่"]] and ensemble.singles == ["อาหารดี", "บริการแย่"]
+    assert [result["sentiment"] for result in results] == ["positive", "negative"]
+    assert all(result["ml_enhanced"] for result in results)
+
+    # ผลต้องเหมือนวิเคราะห์ทีละข้อความด้วย ml_enhanced_sentiment_analysis
+    social_media_utils._ml_sentiment_model = ensemble
+    try:
+        single = social_media_utils.ml_enhanced_sentiment_analysis("บริการแย่")
+    finally:
+        social_media_utils._ml_sentiment_model = original
+    assert results[1]["analysis_notes"] == single["notes"] and results[1]["emotion"] == single["emotion"]
+    assert results[1]["sentiment_score"] == single["sentiment_score"]
+
+
+if __name__ == "__main__":
+    test_single_predict_proba_call()
+    test_schema_matches_predict_sentiment()
+    test_untrained_model_raises()
+    test_batch_analyze_with_review_uses_predict_batch()
+    test_batch_analyze_with_review_falls_back_per_text()
+    test_batch_advanced_sentiment_predicts_once()
+    print("✅ All ML predict_batch tests passed!")
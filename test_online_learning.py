@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for incremental learning in AdvancedThaiSentimentAnalyzer
+ทดสอบ OnlineThaiSentimentModel (replay buffer, เวอร์ชัน, snapshot, rollback) และ update_training_data แบบ incremental
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+import ml_sentiment_analysis
+from ml_sentiment_analysis import AdvancedThaiSentimentAnalyzer, EnsembleSentimentModel, OnlineThaiSentimentModel
+from sentiment_cascade import CascadeSentimentModel
+
+
+class FakeHashingVectorizer:
+    """แทน HashingVectorizer: ไม่มี state คืนข้อความเดิม"""
+
+    def transform(self, texts):
+        return list(texts)
+
+
+class FakeSGD:
+    """แทน SGDClassifier: นับ label ที่เคยเห็น และบันทึกทุก batch ที่ partial_fit"""
+
+    def __init__(self):
+        self.counts = {}
+        self.batches = []
+
+    def partial_fit(self, features, labels, classes=None):
+        self.classes_ = np.array(sorted(classes))
+        self.batches.append(list(features))
+        for label in labels:
+            self.counts[label] = self.counts.get(label, 0) + 1
+
+    def predict_proba(self, features):
+        total = sum(self.counts.values())
+        row = [self.counts.get(label, 0) / total for label in self.classes_]
+        return np.array([row for _ in features])
+
+
+def _model(**kwargs):
+    model = OnlineThaiSentimentModel(**kwargs)
+    model.vectorizer = FakeHashingVectorizer()
+    model.model = FakeSGD()
+    return model
+
+
+def _comments(label, count, prefix):
+    return [{"text": f"{prefix} ข้อความที่ {index}", "label": label} for index in range(count)]
+
+
+def test_update_uses_bounded_replay_and_versions():
+    """แต่ละ update ต้องเพิ่มเวอร์ชัน, ผสมตัวอย่างเก่าจาก replay buffer ที่มีขนาดจำกัด และไม่แก้ classifier เดิม"""
+    model = _model(replay_size=5, max_snapshots=2)
+    first = model.update(_comments("positive", 4, "ดี"))
+    classifier_v1 = model.model
+    second = model.update(_comments("negative", 3, "แย่"))
+
+    assert (first["version"], first["samples"], first["replayed"]) == (1, 4, 0)
+    assert (second["version"], second["samples"], second["replayed"]) == (2, 3, 3)
+    assert len(model.model.batches[-1]) == 6 and len(model.replay) == 5
+    assert classifier_v1 is not model.model and len(classifier_v1.batches) == 1
+    assert model.model_version().endswith(":v2")
+
+    result = model.predict_sentiment("อะไรก็ได้")
+    assert result["model_type"] == "ml_sgd" and result["sentiment"] == "positive"
+    assert model.update([{"text": ""}])["samples"] == 0 and model.version == 2
+
+
+def test_snapshots_and_rollback():
+    """snapshot เก็บได้ไม่เกิน max_snapshots (ทั้งในหน่วยความจำและดิสก์) และ rollback สร้างเวอร์ชันใหม่"""
+    with tempfile.TemporaryDirectory() as directory:
+        model = _model(max_snapshots=2, snapshot_dir=directory)
+        model.update(_comments("positive", 2, "ดี"))
+        model.update(_comments("negative", 5, "แย่"))
+        model.update(_comments("negative", 5, "แย่อีก"))
+        assert [snapshot["version"] for snapshot in model.list_snapshots()] == [2, 3]
+        assert sorted(os.listdir(directory)) == [f"online_{model.model_id}_v2.pkl", f"online_{model.model_id}_v3.pkl"]
+
+        classifier_v2 = model.snapshots[0]["classifier"]
+        assert model.rollback() == 4
+        assert model.model is classifier_v2
+        assert [snapshot["version"] for snapshot in model.list_snapshots()] == [3, 4]
+        try:
+            model.rollback(1)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError for an evicted snapshot")
+
+        restored = _model()
+        restored.create_model = lambda: None  # sklearn ไม่จำเป็นสำหรับ vectorizer ปลอม
+        restored.load_snapshot(os.path.join(directory, f"online_{model.model_id}_v4.pkl"))
+        assert restored.version == 4 and restored.model_id == model.model_id
+        assert restored.predict_batch(["x"])[0]["probabilities"] == model.predict_batch(["x"])[0]["probabilities"]
+
+
+def test_analyzer_updates_in_place():
+    """update_training_data แบบ incremental ต้องไม่สร้าง ensemble ใหม่ และเพิ่ม online model เป็น member"""
+    analyzer = AdvancedThaiSentimentAnalyzer(incremental=True, online_weight=0.5)
+    analyzer.online_model.vectorizer = FakeHashingVectorizer()
+    analyzer.online_model.model = FakeSGD()
+    ensemble = EnsembleSentimentModel()
+    ensemble.add_model("rules", ml_sentiment_analysis.RuleBasedSentimentModel())
+    analyzer.ensemble_model = ensemble
+
+    def rebuild(*args, **kwargs):
+        raise AssertionError("ensemble should not be rebuilt")
+
+    original = ml_sentiment_analysis.create_ml_enhanced_sentiment_analyzer
+    ml_sentiment_analysis.create_ml_enhanced_sentiment_analyzer = rebuild
+    try:
+        for batch in range(3):
+            analyzer.update_training_data(_comments("positive", 20, f"รอบ {batch}"))
+    finally:
+        ml_sentiment_analysis.create_ml_enhanced_sentiment_analyzer = original
+
+    assert analyzer.ensemble_model is ensemble and analyzer.training_data == []
+    assert list(ensemble.models) == ["rules", "online"] and ensemble.weights["online"] == 0.5
+    assert analyzer.online_model.version == 3 and analyzer.online_model.samples_seen == 60
+
+
+def test_cascade_gets_online_stage():
+    """แบบ cascade ต้องเพิ่ม online model เป็นขั้นก่อนขั้นสุดท้าย"""
+    analyzer = AdvancedThaiSentimentAnalyzer(cascade=True, incremental=True, ml_margin=0.25)
+    analyzer.online_model.vectorizer = FakeHashingVectorizer()
+    analyzer.online_model.model = FakeSGD()
+    cascade = CascadeSentimentModel()
+    cascade.add_stage("rules", ml_sentiment_analysis.RuleBasedSentimentModel(), 0.4)
+    cascade.add_stage("transformer", ml_sentiment_analysis.RuleBasedSentimentModel())
+    analyzer.ensemble_model = cascade
+
+    analyzer.update_training_data(_comments("positive", 5, "ดี"))
+    analyzer.update_training_data(_comments("negative", 5, "แย่"))
+
+    assert [stage["name"] for stage in cascade.stages] == ["rules", "online", "transformer"]
+    assert cascade.stages[1]["margin"] == 0.25 and cascade.stages[1]["model"] is analyzer.online_model
+
+
+if __name__ == "__main__":
+    test_update_uses_bounded_replay_and_versions()
+    test_snapshots_and_rollback()
+    test_analyzer_updates_in_place()
+    test_cascade_gets_online_stage()
+    print("✅ All online learning tests passed!")
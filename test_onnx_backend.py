@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the ONNX Runtime backend
+ทดสอบรูปแบบผลของ OnnxSentimentPipeline (ด้วย session ปลอม) และรายงานเปรียบเทียบ backend
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from ml_sentiment_analysis import ThaiTransformerModel
+from onnx_backend import OnnxSentimentPipeline, compare_backends, load_held_out_texts
+
+
+class FakeTokenizer:
+    """tokenizer ปลอมที่คืน numpy array แบบ HF (return_tensors="np")"""
+
+    def __call__(self, texts, return_tensors="np", truncation=True, max_length=512, padding=True):
+        lengths = [min(len(text.split()) + 2, max_length) for text in texts]
+        width = max(lengths) if padding else None
+        input_ids = np.array([[1] * length + [0] * (width - length) for length in lengths])
+        return {"input_ids": input_ids, "attention_mask": (input_ids > 0).astype(np.int64),
+                "token_type_ids": np.zeros_like(input_ids)}
+
+
+class _Input:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeSession:
+    """InferenceSession ปลอม: logits ขึ้นกับจำนวน token (ไม่รับ token_type_ids เหมือนโมเดลตระกูล RoBERTa)"""
+
+    def __init__(self, shift=0.0):
+        self.shift = shift
+        self.feeds = []
+
+    def get_inputs(self):
+        return [_Input("input_ids"), _Input("attention_mask")]
+
+    def run(self, output_names, feeds):
+        self.feeds.append(sorted(feeds))
+        tokens = feeds["attention_mask"].sum(axis=1).astype(np.float32)
+        return [np.stack([-tokens / 4 + self.shift, np.zeros_like(tokens), tokens / 4 - 1], axis=1)]
+
+
+def _onnx_model(shift=0.0):
+    model = ThaiTransformerModel("twitter-roberta", backend="onnx")
+    model.pipeline = OnnxSentimentPipeline(FakeSession(shift), FakeTokenizer(), ["negative", "neutral", "positive"],
+                                           version=f"fake#onnx-{shift}")
+    model.cache_version = model.pipeline.version
+    return model
+
+
+def test_pipeline_matches_hf_output_format():
+    """ผลต้องเป็นคะแนนทุก label ที่รวมกันได้ 1 ทั้งแบบข้อความเดียวและ batch และส่งเฉพาะ input ที่โมเดลรับ"""
+    pipeline = OnnxSentimentPipeline(FakeSession(), FakeTokenizer(), ["negative", "neutral", "positive"])
+    single = pipeline("ดี มาก")
+    batch = pipeline(["ดี มาก", "a b c d e f g h"])
+    assert len(single) == 1 and [item["label"] for item in single[0]] == ["negative", "neutral", "positive"]
+    assert single[0] == batch[0]
+    assert all(abs(sum(item["score"] for item in row) - 1) < 1e-9 for row in batch)
+    assert pipeline.session.feeds[-1] == ["attention_mask", "input_ids"]
+
+
+def test_onnx_model_keeps_predict_schema():
+    """ThaiTransformerModel(backend="onnx") ต้องให้ผลรูปแบบเดียวกับ predict_sentiment ของ PyTorch"""
+    model = _onnx_model()
+    result = model.predict_sentiment("สินค้า ดี มาก ครับ ส่ง ไว")
+    assert set(result) == {"sentiment", "confidence", "sentiment_score", "probabilities", "model_type"}
+    assert result["model_type"] == "transformer"
+    assert set(result["probabilities"]) == {"positive", "neutral", "negative"}
+    assert model.model_version() == "fake#onnx-0.0"
+
+    try:
+        ThaiTransformerModel("twitter-roberta", backend="tensorrt")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError for an unknown backend")
+
+
+def test_compare_backends_report():
+    """รายงานต้องมี agreement, ความต่างของ probability, accuracy delta และ latency"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "held_out.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for text, label in [("a", "negative"), ("a b c d e f", "positive"), ("a b c", "neutral"), ("a b c d", None)]:
+                f.write(json.dumps({"text": text, "label": label}) + "\n")
+            f.write("not json\n")
+        items = load_held_out_texts(path)
+
+    assert len(items) == 4
+    same = compare_backends(_onnx_model(), _onnx_model(), items)
+    assert same["label_agreement"] == 1.0 and same["max_abs_prob_delta"] == 0.0 and same["accuracy_delta"] == 0.0
+
+    shifted = compare_backends(_onnx_model(), _onnx_model(shift=3.0), items)
+    assert shifted["label_agreement"] < 1.0 and shifted["mean_abs_prob_delta"] > 0
+    assert shifted["disagreements"] and set(shifted["latency_ms_per_text"]) == {"reference", "candidate"}
+    assert sum(sum(row.values()) for row in shifted["confusion"].values()) == len(items)
+
+
+def test_compare_backends_rejects_pytorch_fallback():
+    """ถ้า model แบบ onnx ถอยไปใช้ PyTorch ต้องไม่ได้รายงานที่เทียบ PyTorch กับตัวเอง"""
+    fallback = _onnx_model()
+    fallback.pipeline = lambda texts, **kwargs: [[{"label": "neutral", "score": 1.0}] for _ in texts]
+    try:
+        compare_backends(_onnx_model(), fallback, [{"text": "a b", "label": None}])
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError for a candidate that fell back to PyTorch")
+
+
+if __name__ == "__main__":
+    test_pipeline_matches_hf_output_format()
+    test_onnx_model_keeps_predict_schema()
+    test_compare_backends_report()
+    test_compare_backends_rejects_pytorch_fallback()
+    print("✅ All ONNX backend tests passed!")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for process-pool batch analysis
+ทดสอบการวิเคราะห์แบบ batch ด้วย process pool ว่าให้ผลและลำดับเหมือนการรันทีละข้อความ
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+from parallel_batch import iter_chunks, iter_parallel_chunks
+from sentiment_integration import analyze_social_media_batch, batch_analyze_detailed_sentiment
+
+TEXTS = [
+    "วันนี้มีความสุขมาก ดีใจสุดๆ",
+    "โกรธมาก ไม่พอใจเลย",
+    "เศร้าจัง เสียใจ",
+    "ขอบคุณมากครับ ประทับใจ",
+    "เยี่ยมมาก! ได้ถูกหวยแล้ว 5555",
+    "ก็โอเคนะ ธรรมดา",
+    "กลัวจัง ไม่กล้า",
+    "",
+]
+
+
+def _square_chunk(chunk):
+    return [value * value for value in chunk]
+
+
+def test_iter_chunks_splits_lazily():
+    """แบ่ง generator เป็น chunk ขนาดเท่ากัน ยกเว้น chunk สุดท้าย"""
+    assert list(iter_chunks((i for i in range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(iter_chunks([], 3)) == []
+
+
+def test_parallel_chunks_preserve_order():
+    """ผลของแต่ละ chunk ต้องออกมาตามลำดับ input แม้ chunk จะเสร็จไม่พร้อมกัน"""
+    chunks = list(iter_parallel_chunks(_square_chunk, range(50), workers=2, chunk_size=4, max_pending=3))
+    assert [len(chunk) for chunk in chunks] == [4] * 12 + [2]
+    assert [value for chunk in chunks for value in chunk] == [i * i for i in range(50)]
+
+
+def test_batch_parallel_matches_sequential():
+    """batch แบบ process pool ต้องให้ผลเหมือนกับการรันใน process เดียว"""
+    texts = TEXTS * 5
+    sequential = batch_analyze_detailed_sentiment(texts, mode="multi", include_scores=True)
+    parallel = batch_analyze_detailed_sentiment(texts, mode="multi", include_scores=True, workers=2, chunk_size=3)
+    assert parallel == sequential
+
+
+def test_social_batch_parallel_matches_sequential():
+    """comment ทุกรายการต้องกลับมาตามลำดับเดิมพร้อมฟิลด์ต้นฉบับ"""
+    comments = [{"id": i, "text": text} for i, text in enumerate(TEXTS * 3)]
+    sequential = analyze_social_media_batch(comments, show_progress=False)
+    parallel = analyze_social_media_batch(comments, show_progress=False, workers=2, chunk_size=5)
+    assert [comment["id"] for comment in parallel] == list(range(len(comments)))
+    assert parallel == sequential
+
+
+if __name__ == "__main__":
+    test_iter_chunks_splits_lazily()
+    test_parallel_chunks_preserve_order()
+    test_batch_parallel_matches_sequential()
+    test_social_batch_parallel_matches_sequential()
+    print("✅ All parallel batch tests passed!")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the persistent SQLite prediction store
+ทดสอบ PredictionStore และการใช้ร่วมกับ ThaiTransformerModel/EnsembleSentimentModel
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(__file__))
+
+from ml_sentiment_analysis import EnsembleSentimentModel, ThaiTransformerModel
+from prediction_store import PredictionStore
+from result_cache import get_result_cache
+
+
+class CountingPipeline:
+    """pipeline ปลอมที่นับจำนวนครั้งที่ถูกเรียก"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        positive = 0.8 if "ดี" in text else 0.2
+        return [[{"label": "POSITIVE", "score": positive}, {"label": "NEGATIVE", "score": 1 - positive}]]
+
+
+def _transformer(store, pipeline):
+    model = ThaiTransformerModel("twitter-roberta", prediction_store=store)
+    model.pipeline = pipeline
+    return model
+
+
+def test_batched_round_trip_and_order():
+    """get_many ต้องคืนผลตามลำดับข้อความ รวมข้อความซ้ำและข้อความที่ไม่มีในคลัง"""
+    with tempfile.TemporaryDirectory() as directory:
+        with PredictionStore(os.path.join(directory, "predictions.sqlite3")) as store:
+            store.put_many("model-a", [("ดีมาก", {"sentiment": "positive", "probabilities": {"positive": 0.9}}),
+                                       ("แย่", {"sentiment": "negative"})])
+            results = store.get_many("model-a", ["แย่", "ไม่มี", "ดีมาก", "แย่"])
+            assert [r and r["sentiment"] for r in results] == ["negative", None, "positive", "negative"]
+            assert results[2]["probabilities"] == {"positive": 0.9}
+            assert store.get("model-b", "ดีมาก") is None
+            assert (store.hits, store.misses) == (3, 2)
+
+
+def test_size_cap_removes_least_recently_used():
+    """เมื่อเกิน max_rows ต้องลบแถวที่ไม่ได้ใช้นานที่สุดก่อน"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = PredictionStore(os.path.join(directory, "predictions.sqlite3"), max_rows=2, prune_interval=1)
+        store.put("m", "a", {"v": 1})
+        store.put("m", "b", {"v": 2})
+        store._conn.execute("UPDATE predictions SET last_used = last_used - 100")
+        store.get("m", "a")  # a ถูกใช้ล่าสุด
+        store.put("m", "c", {"v": 3})
+
+        assert len(store) == 2
+        assert store.get("m", "b") is None
+        assert store.get("m", "a") == {"v": 1}
+        store.vacuum()
+        assert store.stats()["rows"] == 2
+        store.close()
+
+
+def test_transformer_rerun_uses_store_instead_of_inference():
+    """การรันคลังเดิมซ้ำ (process ใหม่ = result cache ว่าง) ต้องไม่เรียก pipeline อีก"""
+    texts = ["ดีมาก 555", "แย่มาก", "ดีมาก 555 😂", "แย่มาก"]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "predictions.sqlite3")
+        get_result_cache().clear()
+
+        first_pipeline = CountingPipeline()
+        with PredictionStore(path) as store:
+            first = _transformer(store, first_pipeline).predict_batch(texts)
+        assert len(first_pipeline.calls) == 2  # ข้อความหลัง preprocess ซ้ำกันทำนายครั้งเดียว
+
+        get_result_cache().clear()
+        second_pipeline = CountingPipeline()
+        with PredictionStore(path) as store:
+            second = _transformer(store, second_pipeline).predict_batch(texts)
+            assert store.hits == len(texts)
+        assert second_pipeline.calls == []
+        assert second == first
+
+
+def test_ensemble_persists_only_complete_predictions():
+    """ensemble เก็บผลเมื่อทุก model มีเวอร์ชันและทำนายสำเร็จ"""
+    with tempfile.TemporaryDirectory() as directory:
+        with PredictionStore(os.path.join(directory, "predictions.sqlite3")) as store:
+            get_result_cache().clear()
+            ensemble = EnsembleSentimentModel(prediction_store=store)
+            ensemble.add_model("hf", _transformer(None, CountingPipeline()), weight=1.0)
+            result = ensemble.predict_sentiment("ดีจัง")
+            assert ensemble.model_version().startswith("ensemble[hf:1.0:")
+            assert store.get(ensemble.model_version(), "ดีจัง") == result
+
+            class Unversioned:
+                def predict_sentiment(self, text):
+                    return {"sentiment_score": 0.0, "probabilities": {"neutral": 1.0}}
+
+            ensemble.add_model("rules", Unversioned(), weight=0.5)
+            assert ensemble.model_version() is None
+            ensemble.predict_sentiment("ดีจัง")
+            assert store.stats()["rows"] == 1
+
+
+if __name__ == "__main__":
+    test_batched_round_trip_and_order()
+    test_size_cap_removes_least_recently_used()
+    test_transformer_rerun_uses_store_instead_of_inference()
+    test_ensemble_persists_only_complete_predictions()
+    print("✅ All prediction store tests passed!")
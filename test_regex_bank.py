@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the precompiled regex bank
+ทดสอบคลัง regex ที่คอมไพล์ไว้ล่วงหน้า
+"""
+
+import os
+import re
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+from regex_bank import RegexBank
+from detailed_thai_sentiment import DetailedThaiSentimentAnalyzer
+
+
+def test_counts_match_findall_per_pattern():
+    """จำนวน match ต้องเท่ากับ re.findall ทีละ pattern แม้ pattern จะซ้อนกัน"""
+    families = {"ดีใจ": [r"เย้.*", r"ดี\s*ใจ"], "ขำขัน": [r"555+", r"ฮา+"]}
+    bank = RegexBank(families, verbose=False)
+    texts = ["เย้ ดีใจจัง 5555 ฮาฮา", "ดี ใจ ดีใจ", "ไม่มีอะไรตรง", ""]
+    for text in texts:
+        expected = {}
+        for label, patterns in families.items():
+            total = sum(len(re.findall(pattern, text)) for pattern in patterns)
+            if total:
+                expected[label] = total
+        assert bank.count(text) == expected
+
+
+def test_invalid_patterns_are_reported_once():
+    """pattern ที่คอมไพล์ไม่ได้ต้องถูกข้ามและอยู่ใน validation report"""
+    bank = RegexBank({"question": [r"\?", r"(ทำไม"], "request": [r"ขอ"]}, name="test", verbose=False)
+    report = bank.validation_report()
+    assert report["valid_patterns"] == 2
+    assert [entry["pattern"] for entry in report["invalid_patterns"]] == [r"(ทำไม"]
+    assert bank.matching_patterns("ขอหน่อยได้ไหม?") == {"question": [r"\?"], "request": ["ขอ"]}
+
+
+def test_analyzer_patterns_are_valid():
+    """emotion patterns ของ analyzer ต้องคอมไพล์ได้ทั้งหมด"""
+    analyzer = DetailedThaiSentimentAnalyzer()
+    report = analyzer.get_pattern_validation_report()
+    assert report["invalid_patterns"] == []
+    assert report["combined_alternation"] is True
+
+
+if __name__ == "__main__":
+    test_counts_match_findall_per_pattern()
+    test_invalid_patterns_are_reported_once()
+    test_analyzer_patterns_are_valid()
+    print("✅ All regex bank tests passed!")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the shared LRU result cache
+ทดสอบ ResultCache และการใช้ cache ใน entry point ของ sentiment_integration
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+import sentiment_integration
+from result_cache import ResultCache, get_result_cache
+from sentiment_integration import analyze_detailed_sentiment, enhanced_analyze_sentiment
+
+
+def test_lru_eviction_and_counters():
+    """ต้องไล่รายการที่ไม่ได้ใช้นานที่สุดออก และนับ hit/miss/eviction ถูกต้อง"""
+    cache = ResultCache(max_entries=2)
+    keys = [cache.make_key("test", text) for text in ("555", "สุดยอด", "😂😂")]
+
+    cache.put(keys[0], {"label": "ขำขัน"})
+    cache.put(keys[1], {"label": "ชื่นชม"})
+    assert cache.get(keys[0]) == {"label": "ขำขัน"}  # keys[1] กลายเป็นรายการเก่าสุด
+    cache.put(keys[2], {"label": "ขำขัน"})
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) == {"label": "ขำขัน"}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (2, 1, 1, 2)
+
+
+def test_memory_bound_and_key_fields():
+    """ขนาดรวมต้องไม่เกิน max_bytes และ key ต้องแยกตาม mode/threshold/version"""
+    cache = ResultCache(max_entries=1000, max_bytes=2000)
+    for i in range(50):
+        cache.put(cache.make_key("test", f"ข้อความ {i}"), {"text": f"ข้อความ {i}", "scores": {"a": 0.5}})
+    assert 0 < cache.stats()["bytes"] <= 2000
+    assert cache.evictions > 0
+
+    base = cache.make_key("test", "555", mode="multi", threshold=0.3, version="v1")
+    assert base == cache.make_key("test", "555", mode="multi", threshold=0.3, version="v1")
+    assert base != cache.make_key("test", "555", mode="multi", threshold=0.4, version="v1")
+    assert base != cache.make_key("test", "555", mode="single", threshold=0.3, version="v1")
+    assert base != cache.make_key("test", "555", mode="multi", threshold=0.3, version="v2")
+
+
+def test_returned_results_are_copies():
+    """การแก้ dict ที่ได้จาก cache ต้องไม่กระทบค่าที่เก็บไว้"""
+    cache = ResultCache()
+    key = cache.make_key("test", "555")
+    value = {"labels": ["ขำขัน"], "context": {"formality": "informal"}}
+    cache.put(key, value)
+    value["labels"].append("รัก")
+
+    first = cache.get(key)
+    first["context"]["formality"] = "formal"
+    assert cache.get(key) == {"labels": ["ขำขัน"], "context": {"formality": "informal"}}
+
+
+def test_entry_points_return_cached_results():
+    """การเรียกซ้ำด้วยข้อความเดิมต้องได้ผลเดิมจาก cache"""
+    cache = get_result_cache()
+    cache.clear(reset_stats=True)
+    text = "สุดยอดไปเลย 555 😂"
+
+    first = analyze_detailed_sentiment(text, mode="multi", threshold=0.3, include_scores=True)
+    again = analyze_detailed_sentiment(text, mode="multi", threshold=0.3, include_scores=True)
+    assert first == again
+    assert cache.hits == 1
+
+    other_threshold = analyze_detailed_sentiment(text, mode="multi", threshold=0.9, include_scores=True)
+    assert other_threshold["threshold"] == 0.9
+    assert cache.hits == 1
+
+    assert enhanced_analyze_sentiment(text) == enhanced_analyze_sentiment(text)
+    assert cache.stats()["entries"] >= 3
+
+
+def test_app_rule_version_is_part_of_key():
+    """เมื่อ lexicon ของ app (ทาง sarcasm/builtin) เปลี่ยน ผลใน cache เดิมต้องไม่ถูกใช้"""
+    cache = get_result_cache()
+    cache.clear(reset_stats=True)
+    text = "ดีจริงๆ เลยนะ"
+    original = sentiment_integration._app_rule_version
+    try:
+        sentiment_integration._app_rule_version = lambda: "v1"
+        analyze_detailed_sentiment(text)
+        enhanced_analyze_sentiment(text)
+        sentiment_integration._app_rule_version = lambda: "v2"
+        misses = cache.misses
+        analyze_detailed_sentiment(text)
+        enhanced_analyze_sentiment(text)
+    finally:
+        sentiment_integration._app_rule_version = original
+    assert cache.misses - misses >= 2
+
+
+if __name__ == "__main__":
+    test_lru_eviction_and_counters()
+    test_memory_bound_and_key_fields()
+    test_returned_results_are_copies()
+    test_entry_points_return_cached_results()
+    test_app_rule_version_is_part_of_key()
+    print("✅ All result cache tests passed!")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the shared lexicon rule engine
+ทดสอบการโหลด lexicon และ RuleSet ที่ใช้ร่วมกัน
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(__file__))
+
+import rule_engine
+from keyword_automaton import TableKeywordAutomaton
+from rule_engine import RuleSet, compute_intensity_bonus, get_rule_set, load_lexicon, lexicon_path
+from detailed_thai_sentiment import DetailedThaiSentimentAnalyzer, ThaiEmotionPatterns
+
+
+def test_lexicon_files_load_as_independent_copies():
+    """lexicon ทุกไฟล์ต้องโหลดได้ และแก้สำเนาที่ได้ต้องไม่กระทบการโหลดครั้งถัดไป"""
+    for name in ("detailed_emotions", "app_emotions", "social_media"):
+        assert os.path.exists(lexicon_path(name))
+        lexicon = load_lexicon(name)
+        assert lexicon["version"] == 1
+        assert lexicon["emotion_patterns"]
+
+    lexicon = load_lexicon("social_media")
+    lexicon["emotion_patterns"].clear()
+    assert load_lexicon("social_media")["emotion_patterns"]
+
+
+def test_rule_set_counts_every_family_in_one_scan():
+    """การสแกนครั้งเดียวต้องนับคำของทุก family และนับคำซ้ำในรายการเดียวกันสองครั้ง"""
+    rules = RuleSet(
+        "test",
+        keyword_families={
+            "emotion": {"joy": ["ดีใจ", "ดี", "ดี"], "anger": ["โกรธ"]},
+            "intensity": {"high": ["มาก"]}
+        },
+        regex_families={"emotion": {"joy": [r"เย้+"]}},
+        use_artifact=False
+    )
+    hits = rules.scan("ดีใจมาก เย้")
+    assert dict(hits["emotion"]) == {"joy": 3}
+    assert dict(hits["intensity"]) == {"high": 1}
+    assert rules.regex["emotion"].count("เย้ เย้") == {"joy": 2}
+    assert rules.scan("")["emotion"] == {}
+
+
+def test_rule_sets_are_compiled_once():
+    """analyzer หลายตัวต้องใช้ RuleSet ที่คอมไพล์แล้วชุดเดียวกัน"""
+    first = DetailedThaiSentimentAnalyzer()
+    second = DetailedThaiSentimentAnalyzer()
+    assert first.rules is second.rules
+    assert get_rule_set(ThaiEmotionPatterns.LEXICON_NAME, lambda: None) is first.rules
+
+
+def test_intensity_bonus_matches_sequential_adds():
+    """bonus ต้องบวกทีละคำตามลำดับระดับเหมือนลูปเดิม และถูกจำกัดที่ 1.0"""
+    expected = 0.0
+    for increment in [0.5] + [0.2] * 2 + [0.1]:
+        expected += increment
+    assert compute_intensity_bonus({"high": 1, "medium": 2, "low": 1}, ["high", "medium", "low"]) == min(expected, 1.0)
+    assert compute_intensity_bonus({"high": 3}, ["high", "medium", "low"]) == 1.0
+    assert compute_intensity_bonus({}, ["high"]) == 0.0
+
+
+def test_artifact_is_reused_and_rebuilt_when_lexicon_changes():
+    """artifact ต้องถูกโหลดซ้ำด้วย mmap ให้ผลเหมือนเดิม และคอมไพล์ใหม่ในหน่วยความจำเมื่อคำสำคัญเปลี่ยนหรือไฟล์เสีย"""
+    families = {"emotion": {"joy": ["ดีใจ", "สุข"], "anger": ["โกรธ"]}, "intensity": {"high": ["มาก"]}}
+    text = "ดีใจมาก แต่โกรธนิดหน่อย"
+    original_dir = rule_engine.ARTIFACT_DIR
+    with tempfile.TemporaryDirectory() as directory:
+        rule_engine.ARTIFACT_DIR = directory
+        try:
+            compiled = RuleSet("artifact_test", families)
+            assert compiled.artifact_status == "compiled"
+            assert os.listdir(directory) == []  # สร้าง RuleSet ต้องไม่เขียนไฟล์
+            assert compiled.save_artifact() and compiled.artifact_status == "built"
+            assert os.path.exists(compiled.artifact_path)
+
+            loaded = RuleSet("artifact_test", families)
+            assert loaded.artifact_status == "loaded"
+            assert isinstance(loaded.automaton, TableKeywordAutomaton)
+            assert loaded.scan(text) == compiled.scan(text)
+            assert loaded.scan_ids(text) == compiled.scan_ids(text)
+
+            families["emotion"]["joy"].append("แฮปปี้")
+            changed = RuleSet("artifact_test", families)
+            assert changed.artifact_status == "compiled"
+            assert changed.scan("แฮปปี้")["emotion"] == {"joy": 1}
+            assert RuleSet("artifact_test", families).artifact_status == "compiled"  # ไฟล์เก่าไม่ถูกเขียนทับ
+
+            # unlink ก่อนเขียนทับ เพื่อไม่ให้กระทบหน้าที่ loaded ยัง mmap อยู่
+            os.unlink(changed.artifact_path)
+            with open(changed.artifact_path, "wb") as f:
+                f.write(b"THRULES\x00" + b"\x00" * 56)
+            assert RuleSet("artifact_test", families).artifact_status == "compiled"
+        finally:
+            rule_engine.ARTIFACT_DIR = original_dir
+
+
+def test_rejected_artifact_is_unmapped():
+    """ไฟล์ที่ hash ไม่ตรงหรือเสียต้องไม่ค้าง mmap ไว้"""
+    import rule_artifact
+
+    families = {"emotion": {"joy": ["ดีใจ"]}}
+    mapped = []
+    original_mmap = rule_artifact.mmap.mmap
+
+    def tracking_mmap(*args, **kwargs):
+        mapped.append(original_mmap(*args, **kwargs))
+        return mapped[-1]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "artifact_test.rules")
+        rule_set = RuleSet("artifact_test", families, use_artifact=False)
+        assert rule_artifact.write_artifact(path, "artifact_test", rule_set.automaton, rule_set._digest)
+        rule_artifact.mmap.mmap = tracking_mmap
+        try:
+            assert rule_artifact.load_artifact(path, b"\x00" * 32) is None
+            assert rule_artifact.load_artifact(path, rule_set._digest) is not None
+        finally:
+            rule_artifact.mmap.mmap = original_mmap
+    assert mapped[0].closed and not mapped[1].closed
+
+
+def test_build_all_writes_artifacts():
+    """build step (rule_artifact.build_all) เป็นที่เดียวที่เขียน artifact"""
+    import rule_artifact
+
+    original_dir = rule_engine.ARTIFACT_DIR
+    with tempfile.TemporaryDirectory() as directory:
+        rule_engine.ARTIFACT_DIR = directory
+        try:
+            rule_engine.clear_rule_sets()
+            DetailedThaiSentimentAnalyzer()
+            assert os.listdir(directory) == []
+
+            results = rule_artifact.build_all(force=True)
+            assert results[ThaiEmotionPatterns.LEXICON_NAME] == "built"
+            assert os.path.exists(rule_engine.artifact_path(ThaiEmotionPatterns.LEXICON_NAME))
+
+            rule_engine.clear_rule_sets()
+            assert DetailedThaiSentimentAnalyzer().rules.artifact_status == "loaded"
+        finally:
+            rule_engine.ARTIFACT_DIR = original_dir
+            rule_engine.clear_rule_sets()
+
+if __name__ == "__main__":
+    test_lexicon_files_load_as_independent_copies()
+    test_rule_set_counts_every_family_in_one_scan()
+    test_rule_sets_are_compiled_once()
+    test_intensity_bonus_matches_sequential_adds()
+    test_artifact_is_reused_and_rebuilt_when_lexicon_changes()
+    test_rejected_artifact_is_unmapped()
+    test_build_all_writes_artifacts()
+    print("✅ All rule engine tests passed!")
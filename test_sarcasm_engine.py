@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the linear-time sarcasm engine
+ทดสอบระบบตรวจจับการประชดแบบสแกนรอบเดียว
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from sarcasm_engine import (
+    SARCASM_ENGINE, SARCASM_PATTERNS, POSITIVE_NEGATIVE_STRUCTURES,
+    SarcasmEngine, compile_sequence, detect_sarcasm
+)
+
+
+def _first_regex_match(text):
+    """ลำดับการตรวจแบบเดิม: re.search ทีละ pattern"""
+    for pattern in SARCASM_PATTERNS + POSITIVE_NEGATIVE_STRUCTURES:
+        if re.search(pattern, text):
+            return pattern
+    return None
+
+
+def test_all_patterns_compile_to_sequences():
+    """pattern ในชุดปัจจุบันต้องแปลงเป็นลำดับ literal ได้ทั้งหมด (ไม่มี regex fallback)"""
+    assert SARCASM_ENGINE.fallback == {}
+    assert compile_sequence(r'.*ซะไม่มี') == ([['ซะไม่มี']], [])
+    assert compile_sequence(r'(งาน|สิ่ง)นี้สุดยอด.*ถ้า') == ([['งานนี้สุดยอด', 'สิ่งนี้สุดยอด'], ['ถ้า']], ['line'])
+    assert compile_sequence(r'ฮา+') is None
+
+
+def test_matches_regex_search_order():
+    """rule แรกที่ตรงต้องเท่ากับการวน re.search แบบเดิม รวมถึงกรณีขึ้นบรรทัดใหม่"""
+    literals = set()
+    for sequence in SARCASM_ENGINE.sequences:
+        for group in sequence[0]:
+            literals.update(group)
+    pieces = sorted(literals) + [' ', '\n', ' \n ', 'x\n', '\t', 'ok']
+
+    rnd = random.Random(5)
+    for _ in range(3000):
+        text = ''.join(rnd.choice(pieces) for _ in range(rnd.randint(0, 8)))
+        rule, timed_out = SARCASM_ENGINE.first_match(text)
+        assert not timed_out
+        assert (rule[0] if rule else None) == _first_regex_match(text)
+
+
+def test_long_text_and_time_budget():
+    """ข้อความยาวต้องไม่เกิด backtracking และเคารพ time budget"""
+    long_text = 'ดี ' * 4000 + 'แต่' + ' x' * 4000
+    start = time.perf_counter()
+    assert detect_sarcasm(long_text)['is_sarcastic'] is False
+    assert time.perf_counter() - start < 1.0
+
+    engine = SarcasmEngine([(r'ฮา+', "fallback")], time_budget=-1.0)
+    rule, timed_out = engine.first_match('ฮาาา')
+    assert rule is None and timed_out
+
+
+def test_detect_sarcasm_reasons():
+    """รูปแบบผลลัพธ์ต้องเหมือน app.analyze_sarcasm เดิม"""
+    assert detect_sarcasm("ขอบคุณนะคะที่ทำให้วันนี้แย่ที่สุด") == {
+        'is_sarcastic': True, 'reason': "Matched sarcasm pattern: 'ขอบคุณ.*ที่.*แย่'"
+    }
+    assert detect_sarcasm("Oh, GREAT") == {'is_sarcastic': True, 'reason': "Matched sarcasm pattern: 'oh, great'"}
+    assert detect_sarcasm("เก่ง... แย่")['reason'] == "Positive-negative contrast with ellipsis"
+    assert detect_sarcasm("วันนี้อากาศดี") == {'is_sarcastic': False, 'reason': ""}
+
+
+if __name__ == "__main__":
+    test_all_patterns_compile_to_sequences()
+    test_matches_regex_search_order()
+    test_long_text_and_time_budget()
+    test_detect_sarcasm_reasons()
+    print("✅ All sarcasm engine tests passed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the mergeable streaming statistics aggregator
+ทดสอบ SentimentStatsAggregator: ผลเท่ากับฟังก์ชันสถิติเดิม, merge ข้าม shard และ checkpoint
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(__file__))
+
+from detailed_thai_sentiment import DetailedThaiSentimentAnalyzer, analyze_context_emotion_correlation
+from sentiment_integration import aggregate_sentiment_statistics, analyze_detailed_sentiment
+from sentiment_stats import SentimentStatsAggregator
+
+TEXTS = [
+    "วันนี้มีความสุขมาก ดีใจสุดๆ 😊",
+    "โกรธมาก ไม่พอใจเลย",
+    "",
+    "เศร้าจัง เสียใจ ขอแสดงความเสียใจด้วยครับ",
+    "เยี่ยมมาก! ได้ถูกหวยแล้ว 5555",
+    "ข่าวด่วน รัฐบาลประกาศมาตรการใหม่",
+    "ขอบคุณมากครับ บริการดีมาก ประทับใจ",
+]
+
+
+def test_matches_legacy_statistics():
+    """ตัวสะสมต้องให้สถิติเดียวกับ get_emotion_statistics และ analyze_context_emotion_correlation"""
+    analyzer = DetailedThaiSentimentAnalyzer()
+    for multi_label in (False, True):
+        results = analyzer.analyze_batch(TEXTS * 3, multi_label=multi_label, threshold=0.25)
+        stats = SentimentStatsAggregator().update_many(results)
+        assert stats.emotion_statistics() == analyzer.get_emotion_statistics(results)
+        assert stats.context_emotion_correlation() == analyze_context_emotion_correlation(results)
+
+
+def test_merge_equals_single_pass():
+    """รวมตัวสะสมของหลาย shard ต้องได้ตัวนับเท่ากับการสะสมใน process เดียว"""
+    results = [analyze_detailed_sentiment(text, mode="multi") for text in TEXTS * 4]
+    results.append({"is_sarcastic": True, "emotion_group": "Negative", "confidence": 0.9})
+    single = SentimentStatsAggregator().update_many(results)
+
+    shards = [SentimentStatsAggregator().update_many(results[i::3]) for i in range(3)]
+    merged = SentimentStatsAggregator.merged(shards)
+    assert merged.total == single.total == len(results)
+    assert merged.emotion_counts == single.emotion_counts
+    assert merged.context_emotion == single.context_emotion
+    assert merged.confidence_histogram == single.confidence_histogram
+    assert merged.report()["sarcasm"] == single.report()["sarcasm"]
+    assert merged.app_statistics()["sarcastic_comments"] == 1
+
+    try:
+        merged.merge(SentimentStatsAggregator(confidence_bins=5))
+        assert False, "merging different histogram bins must fail"
+    except ValueError:
+        pass
+
+
+def test_checkpoint_round_trip_and_resume():
+    """checkpoint ต้องโหลดกลับได้สถานะเดิม และ resume ต้องไม่นับข้อความซ้ำ"""
+    texts = TEXTS * 5
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "stats.json")
+        full = aggregate_sentiment_statistics(texts, chunk_size=4, checkpoint_path=path)
+        assert SentimentStatsAggregator.load(path).to_dict() == full.to_dict()
+
+        # จำลองการหยุดกลางทาง: checkpoint มีเฉพาะ 8 ข้อความแรก
+        aggregate_sentiment_statistics(texts[:8], chunk_size=4, checkpoint_path=path)
+        resumed = aggregate_sentiment_statistics(texts, chunk_size=4, checkpoint_path=path, resume=True)
+        assert resumed.total == len(texts)
+        assert resumed.emotion_counts == full.emotion_counts
+        assert resumed.confidence_histogram == full.confidence_histogram
+
+
+def test_parallel_aggregation_matches_sequential():
+    """สถิติที่สะสมใน process pool ต้องเท่ากับแบบ process เดียว"""
+    sequential = aggregate_sentiment_statistics(TEXTS * 4, mode="multi", chunk_size=5)
+    parallel = aggregate_sentiment_statistics(TEXTS * 4, mode="multi", chunk_size=5, workers=2)
+    assert parallel.to_dict() == sequential.to_dict()
+
+
+if __name__ == "__main__":
+    test_matches_legacy_statistics()
+    test_merge_equals_single_pass()
+    test_checkpoint_round_trip_and_resume()
+    test_parallel_aggregation_matches_sequential()
+    print("✅ All sentiment stats tests passed!")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the streaming (iterator in / iterator out) analysis API
+ทดสอบ analyze_stream และฟังก์ชัน stream ของ sentiment_integration ว่าอ่าน input ทีละ chunk และให้ผลเหมือนแบบ batch
+"""
+
+import json
+import os
+import sys
+import tempfile
+from itertools import islice
+
+sys.path.append(os.path.dirname(__file__))
+
+from detailed_thai_sentiment import DetailedThaiSentimentAnalyzer
+from sentiment_integration import (
+    analyze_detailed_sentiment_stream,
+    analyze_social_media_batch,
+    analyze_social_media_stream,
+    batch_analyze_detailed_sentiment,
+    export_detailed_sentiment_results,
+    iter_jsonl,
+)
+
+TEXTS = [
+    "วันนี้มีความสุขมาก ดีใจสุดๆ",
+    "โกรธมาก ไม่พอใจเลย",
+    "เศร้าจัง เสียใจ",
+    "ขอบคุณมากครับ ประทับใจ",
+    "ก็โอเคนะ ธรรมดา",
+]
+
+
+class CountingIterable:
+    """iterable ไม่มีที่สิ้นสุดที่นับจำนวนข้อความที่ถูกอ่านไป"""
+
+    def __init__(self):
+        self.consumed = 0
+
+    def __iter__(self):
+        while True:
+            yield TEXTS[self.consumed % len(TEXTS)]
+            self.consumed += 1
+
+
+def _strip_timestamps(results):
+    return [{key: value for key, value in result.items() if key != "timestamp"} for result in results]
+
+
+def test_analyze_stream_matches_batch():
+    """analyze_stream ต้องให้ผลเท่ากับ analyze_batch ทั้งแบบ single และ multi label"""
+    analyzer = DetailedThaiSentimentAnalyzer()
+    texts = TEXTS * 7
+    for multi_label in (False, True):
+        streamed = list(analyzer.analyze_stream(iter(texts), multi_label=multi_label, chunk_size=4))
+        batch = analyzer.analyze_batch(texts, multi_label=multi_label)
+        assert _strip_timestamps(streamed) == _strip_timestamps(batch)
+
+
+def test_stream_reads_input_one_chunk_at_a_time():
+    """input ที่ไม่มีที่สิ้นสุดต้องถูกอ่านไม่เกินหนึ่ง chunk ล่วงหน้า"""
+    analyzer = DetailedThaiSentimentAnalyzer()
+    source = CountingIterable()
+    assert len(list(islice(analyzer.analyze_stream(source, chunk_size=8), 10))) == 10
+    assert source.consumed <= 16
+
+    source = CountingIterable()
+    assert len(list(islice(analyze_detailed_sentiment_stream(source, chunk_size=8), 3))) == 3
+    assert source.consumed <= 8
+
+
+def test_integration_stream_matches_batch():
+    """ฟังก์ชัน stream ต้องให้ผลเหมือนฟังก์ชัน batch เดิม"""
+    texts = TEXTS * 3
+    assert list(analyze_detailed_sentiment_stream(texts, mode="multi", chunk_size=4)) == \
+        batch_analyze_detailed_sentiment(texts, mode="multi")
+
+
+def test_jsonl_pipeline_round_trip():
+    """iter_jsonl -> analyze_social_media_stream -> export ต้องทำงานต่อกันได้โดยไม่สร้าง list"""
+    comments = [{"id": i, "text": text} for i, text in enumerate(TEXTS * 2)]
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "comments.jsonl")
+        with open(source, "w", encoding="utf-8") as f:
+            for comment in comments:
+                f.write(json.dumps(comment, ensure_ascii=False) + "\n")
+            f.write("not json\n\n")
+
+        output = os.path.join(directory, "analyzed.jsonl")
+        export_detailed_sentiment_results(analyze_social_media_stream(iter_jsonl(source), chunk_size=3), output)
+
+        exported = list(iter_jsonl(output))
+        assert exported == analyze_social_media_batch(comments, show_progress=False)
+
+
+if __name__ == "__main__":
+    test_analyze_stream_matches_batch()
+    test_stream_reads_input_one_chunk_at_a_time()
+    test_integration_stream_matches_batch()
+    test_jsonl_pipeline_round_trip()
+    print("✅ All streaming tests passed!")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the word segmentation cache
+ทดสอบ TokenCache (LRU + store บนดิสก์), tokenize_many (ตัดเฉพาะข้อความที่ยังไม่มีใน cache, หลาย process)
+และ ThaiTextPreprocessor.tokenize_many
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+import token_cache
+from ml_sentiment_analysis import ThaiSentimentMLModel, ThaiTextPreprocessor
+from prediction_store import PredictionStore
+from token_cache import TokenCache, tokenize_many
+
+
+def _counting_segmenter(calls):
+    original = token_cache.segment_text
+
+    def segment(text, engine="newmm"):
+        calls.append(text)
+        return original(text, engine)
+
+    return original, segment
+
+
+def test_lru_cache_returns_copies_and_evicts():
+    """cache ต้องไล่รายการที่ไม่ได้ใช้นานที่สุด และผลที่คืนแก้ไขได้โดยไม่กระทบ cache"""
+    cache = TokenCache(max_entries=2)
+    cache.put_many([("a b", ["a", "b"]), ("c d", ["c", "d"])])
+    first = cache.get_many(["a b"])[0]
+    first.append("x")
+    cache.put_many([("e f", ["e", "f"])])
+
+    assert cache.get_many(["a b", "c d", "e f"]) == [["a", "b"], None, ["e", "f"]]
+    assert cache.get_many(["a b"], engine="longest") == [None]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 2, 2)
+
+
+def test_tokenize_many_segments_only_missing_texts():
+    """tokenize_many ต้องตัดคำแต่ละข้อความที่ไม่ซ้ำเพียงครั้งเดียว แม้เรียกซ้ำหลายรอบ"""
+    calls = []
+    original, segment = _counting_segmenter(calls)
+    token_cache.segment_text = segment
+    try:
+        cache = TokenCache()
+        first = tokenize_many(["สวัสดี ครับ", "ดี มาก", "สวัสดี ครับ"], cache=cache)
+        second = tokenize_many(["ดี มาก", "ใหม่ ครับ"], cache=cache)
+    finally:
+        token_cache.segment_text = original
+
+    assert first == [original("สวัสดี ครับ"), original("ดี มาก"), original("สวัสดี ครับ")]
+    assert second == [original("ดี มาก"), original("ใหม่ ครับ")]
+    assert calls == ["สวัสดี ครับ", "ดี มาก", "ใหม่ ครับ"]
+
+
+def test_store_persists_between_caches():
+    """ผลตัดคำใน store ต้องใช้ได้กับ cache ใหม่ (เช่นรอบการรันถัดไป)"""
+    store = PredictionStore(":memory:")
+    tokenize_many(["หนึ่ง สอง", "สาม"], cache=TokenCache(store=store))
+
+    calls = []
+    original, segment = _counting_segmenter(calls)
+    token_cache.segment_text = segment
+    try:
+        fresh = TokenCache(store=store)
+        assert tokenize_many(["หนึ่ง สอง", "สาม"], cache=fresh) == [original("หนึ่ง สอง"), original("สาม")]
+    finally:
+        token_cache.segment_text = original
+    assert calls == [] and fresh.stats()["store_hits"] == 2 and len(fresh) == 2
+
+
+def test_parallel_tokenize_matches_serial():
+    """การตัดคำด้วย process pool ต้องให้ผลเหมือนตัดใน process เดียวและตามลำดับเดิม"""
+    texts = [f"ข้อความ ที่ {index} ดี" for index in range(9)]
+    parallel = tokenize_many(texts, workers=2, chunk_size=2, cache=TokenCache())
+    serial = tokenize_many(texts, workers=1, cache=TokenCache())
+    assert parallel == serial == [token_cache.segment_text(text) for text in texts]
+
+
+def test_preprocessor_batch_matches_single():
+    """ThaiTextPreprocessor.tokenize_many/preprocess_many ต้องให้ผลเหมือนเรียกทีละข้อความ"""
+    preprocessor = ThaiTextPreprocessor(token_cache=TokenCache())
+    texts = ["สินค้า ดีมาก ครับ https://example.com", "แย่ 12345678 มาก", ""]
+    assert preprocessor.tokenize_many(texts) == [preprocessor.tokenize(text) for text in texts]
+    assert preprocessor.preprocess_many(texts) == [preprocessor.preprocess(text) for text in texts]
+    assert preprocessor.token_cache.stats()["hits"] >= len(texts)
+
+
+def test_training_path_uses_process_pool():
+    """prepare_training_data ต้องตัดคำด้วย pool ทุก CPU (workers=0) แม้ preprocessor ตั้ง workers=1"""
+    calls = []
+    original_pool, original_resolve = token_cache.iter_parallel_chunks, token_cache.resolve_workers
+
+    def record_pool(func, items, workers=None, chunk_size=token_cache.DEFAULT_CHUNK_SIZE):
+        calls.append(workers)
+        items = list(items)
+        return iter([func(items[start:start + chunk_size]) for start in range(0, len(items), chunk_size)])
+
+    token_cache.iter_parallel_chunks = record_pool
+    token_cache.resolve_workers = lambda workers: 4 if not workers else max(1, workers)  # เครื่องที่มี 4 CPU
+    try:
+        model = ThaiSentimentMLModel()
+        model.preprocessor = ThaiTextPreprocessor(token_cache=TokenCache())
+        comments = [{"text": f"สินค้า ชิ้นที่ {index} ดีมาก", "sentiment_score": 0.8}
+                    for index in range(token_cache.DEFAULT_CHUNK_SIZE * 2)]
+        texts, labels = model.prepare_training_data(comments)
+    finally:
+        token_cache.iter_parallel_chunks, token_cache.resolve_workers = original_pool, original_resolve
+
+    assert calls == [0]
+    assert len(texts) == len(comments) and set(labels) == {"positive"}
+
+
+if __name__ == "__main__":
+    test_lru_cache_returns_copies_and_evicts()
+    test_tokenize_many_segments_only_missing_texts()
+    test_store_persists_between_caches()
+    test_parallel_tokenize_matches_serial()
+    test_preprocessor_batch_matches_single()
+    test_training_path_uses_process_pool()
+    print("✅ All token cache tests passed!")
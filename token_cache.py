@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-addressed cache for Thai word segmentation
+cache ผลตัดคำ (pythainlp ``word_tokenize``) ที่ใช้ร่วมกันทั้ง process และตัดคำจำนวนมากด้วย process pool
+
+key คือ (engine, hash ของข้อความ) เก็บผลตัดคำดิบก่อนกรอง stopword ผู้เรียกแต่ละที่
+(ThaiTextPreprocessor, data_utils) จึงใช้ผลเดียวกันได้ cache ในหน่วยความจำเป็น LRU จำกัดจำนวนรายการ
+และเก็บลงดิสก์ได้ด้วย PredictionStore (``configure_token_cache(store_path=...)``) เพื่อใช้ข้ามรอบการรัน
+``tokenize_many`` ค้น cache ทั้ง batch ก่อน แล้วตัดเฉพาะข้อความที่ยังไม่มี ถ้ามีจำนวนมากจะแบ่ง chunk
+ส่งให้ process pool (newmm เป็น pure Python จึงใช้ thread ไม่ได้ผล)
+"""
+
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from parallel_batch import DEFAULT_CHUNK_SIZE, iter_parallel_chunks, resolve_workers
+from result_cache import text_hash
+
+try:
+    import pythainlp
+    from pythainlp.tokenize import word_tokenize
+    PYTHAINLP_AVAILABLE = True
+    SEGMENTER_VERSION = getattr(pythainlp, "__version__", "unknown")
+except ImportError:
+    PYTHAINLP_AVAILABLE = False
+    SEGMENTER_VERSION = "split"
+
+DEFAULT_ENGINE = "newmm"
+DEFAULT_MAX_ENTRIES = 200000
+
+
+def segment_text(text: str, engine: str = DEFAULT_ENGINE) -> List[str]:
+    """ตัดคำหนึ่งข้อความโดยไม่ผ่าน cache (ไม่มี pythainlp: แยกด้วยช่องว่าง)"""
+    if PYTHAINLP_AVAILABLE:
+        return word_tokenize(text, engine=engine)
+    return text.split()
+
+
+def _segment_chunk(texts: List[str], engine: str = DEFAULT_ENGINE) -> List[List[str]]:
+    return [segment_text(text, engine) for text in texts]
+
+
+class TokenCache:
+    """LRU cache ของผลตัดคำ key คือ (engine, hash ของข้อความ) พร้อม store บนดิสก์ (ถ้ามี)"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, store=None):
+        self.max_entries = max_entries
+        self.store = store  # PredictionStore (optional)
+        self.enabled = True
+        self._entries: "OrderedDict[Tuple[str, bytes], Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _store_model(engine: str) -> str:
+        return f"tokens:{engine}:{SEGMENTER_VERSION}"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, texts: Sequence[str], engine: str = DEFAULT_ENGINE) -> List[Optional[List[str]]]:
+        """ผลตัดคำที่มีใน cache (หน่วยความจำก่อน แล้ว store) คืนตามลำดับของ ``texts`` None = ไม่มี"""
+        results: List[Optional[List[str]]] = [None] * len(texts)
+        if not self.enabled:
+            return results
+        keys = [(engine, text_hash(text)) for text in texts]
+        missing = []
+        with self._lock:
+            for index, key in enumerate(keys):
+                tokens = self._entries.get(key)
+                if tokens is None:
+                    missing.append(index)
+                else:
+                    self._entries.move_to_end(key)
+                    results[index] = list(tokens)
+            self.hits += len(texts) - len(missing)
+
+        if missing and self.store is not None:
+            stored = self.store.get_many(self._store_model(engine), [texts[index] for index in missing])
+            found = [(index, row["tokens"]) for index, row in zip(missing, stored) if row is not None]
+            with self._lock:
+                for index, tokens in found:
+                    results[index] = list(tokens)
+                    self._remember(keys[index], tokens)
+                self.store_hits += len(found)
+            missing = [index for index in missing if results[index] is None]
+
+        with self._lock:
+            self.misses += len(missing)
+        return results
+
+    def put_many(self, items: Sequence[Tuple[str, List[str]]], engine: str = DEFAULT_ENGINE):
+        """เก็บผลตัดคำ (ข้อความ, tokens) ทั้งในหน่วยความจำและ store"""
+        if not self.enabled or not items:
+            return
+        with self._lock:
+            for text, tokens in items:
+                self._remember((engine, text_hash(text)), tokens)
+        if self.store is not None:
+            self.store.put_many(self._store_model(engine), [(text, {"tokens": list(tokens)}) for text, tokens in items])
+
+    def _remember(self, key: Tuple[str, bytes], tokens: Sequence[str]):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = tuple(tokens)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def segment(self, text: str, engine: str = DEFAULT_ENGINE) -> List[str]:
+        """ตัดคำหนึ่งข้อความผ่าน cache"""
+        tokens = self.get_many([text], engine)[0]
+        if tokens is None:
+            tokens = segment_text(text, engine)
+            self.put_many([(text, tokens)], engine)
+        return tokens
+
+    def configure(self, max_entries: Optional[int] = None, enabled: Optional[bool] = None):
+        """ปรับขนาด cache (ไล่รายการออกทันทีถ้าเกิน) หรือเปิด/ปิด cache"""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+                while len(self._entries) > max(max_entries, 0):
+                    self._entries.popitem(last=False)
+            if enabled is not None:
+                self.enabled = enabled
+
+    def clear(self, reset_stats: bool = False):
+        """ล้างรายการในหน่วยความจำ (ไม่ลบ store)"""
+        with self._lock:
+            self._entries.clear()
+            if reset_stats:
+                self.hits = self.store_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """ตัวนับ hit (หน่วยความจำ/store)/miss และจำนวนรายการ"""
+        with self._lock:
+            lookups = self.hits + self.store_hits + self.misses
+            return {
+                "hits": self.hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.store_hits) / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "store": getattr(self.store, "path", None),
+                "enabled": self.enabled
+            }
+
+
+# cache เดียวที่ทุกผู้เรียกใช้ร่วมกัน
+_token_cache = TokenCache()
+
+
+def get_token_cache() -> TokenCache:
+    """คืน cache ผลตัดคำที่ใช้ร่วมกันทั้ง process"""
+    return _token_cache
+
+
+def configure_token_cache(
+    max_entries: Optional[int] = None,
+    store_path: Optional[str] = None,
+    enabled: Optional[bool] = None
+) -> TokenCache:
+    """ตั้งขนาด cache, เปิด store บนดิสก์ที่ ``store_path`` หรือปิด cache"""
+    if store_path is not None:
+        from prediction_store import PredictionStore
+        _token_cache.store = PredictionStore(store_path)
+    _token_cache.configure(max_entries=max_entries, enabled=enabled)
+    return _token_cache
+
+
+def tokenize_many(
+    texts: Sequence[str],
+    engine: str = DEFAULT_ENGINE,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: Optional[TokenCache] = None
+) -> List[List[str]]:
+    """ตัดคำหลายข้อความ: ใช้ผลใน cache แล้วตัดเฉพาะข้อความ (ไม่ซ้ำ) ที่ยังไม่มี
+
+    ถ้าข้อความที่ต้องตัดมีอย่างน้อย 2 chunk และ ``workers`` (None = จำนวน CPU) มากกว่า 1
+    จะแบ่ง chunk ละ ``chunk_size`` ส่งให้ process pool
+    """
+    if cache is None:
+        cache = _token_cache
+    results = cache.get_many(texts, engine)
+    missing = list(dict.fromkeys(text for text, tokens in zip(texts, results) if tokens is None))
+    if not missing:
+        return results
+
+    if resolve_workers(workers) > 1 and len(missing) >= chunk_size * 2:
+        segmented = [
+            tokens
+            for chunk in iter_parallel_chunks(partial(_segment_chunk, engine=engine), missing, workers, chunk_size)
+            for tokens in chunk
+        ]
+    else:
+        segmented = _segment_chunk(missing, engine)
+    cache.put_many(list(zip(missing, segmented)), engine)
+
+    computed = dict(zip(missing, segmented))
+    return [tokens if tokens is not None else list(computed[text]) for text, tokens in zip(texts, results)]